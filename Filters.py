@@ -29,8 +29,6 @@ import config
 import localize
 import user_config
 
-import GUI
-
 
 
 ########################################################################
@@ -50,7 +48,9 @@ def run(interface):
 	# Localize the software.
 	localize.localize()
 	
+	# The GUI, and therefore wx, is only imported when it is used.
 	if interface == "GUI":
+		import GUI
 		app = GUI.Filters_GUI(0)
 		app.MainLoop()
 
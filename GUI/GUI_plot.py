@@ -34,6 +34,17 @@ import sys
 import os.path
 import math
 import array
+import itertools
+import operator
+import collections
+import bisect
+
+# Numpy is not required, but it accelerates the conversion of the
+# curves to device coordinates when it is available.
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 import wx
 from wx.lib.dialogs import ScrolledMessageDialog
@@ -111,12 +122,28 @@ max_marker_size = 100
 maxint = sys.maxint - max_marker_size
 minint = -maxint - 1 + max_marker_size
 
+# The largest float that can be converted to an integer not larger than
+# maxint, used to limit coordinates calculated with numpy.
+if numpy:
+	maxint_float = numpy.nextafter(float(maxint), 0.0)
+
 # Zero and negative value cannot be handled correctly in log scale. The
 # minimal value is the smallest possible positive value. To draw a line
 # falling outside of the figure, the log value is replaced by the log
 # of the smallest representable number.
 log_min_float = math.log10(limits.min)
 
+# Curves with more points than this are decimated before being drawn,
+# keeping the first, last, minimal and maximal points drawn in every
+# pixel column. To find them quickly, the points are grouped in blocks
+# whose size is multiplied by decimation_block_factor from one level of
+# detail to the next. The decimated points are kept for the last
+# nb_kept_decimations scales and axis types.
+decimation_min_nb_points = 2000
+decimation_block_factor = 8
+decimation_min_nb_blocks = 16
+nb_kept_decimations = 8
+
 
 
 ########################################################################
@@ -180,6 +207,242 @@ def limited_log10(x):
 
 
 
+########################################################################
+#                                                                      #
+# to_device_coordinates                                                #
+#                                                                      #
+########################################################################
+def to_device_coordinates(values, shift, scale, axis = LINEAR):
+	"""Convert values to device coordinates
+	
+	This function takes 3 or 4 arguments:
+	  values               a vector of values;
+	  shift                position of the origin on the device context;
+	  scale                scaling factor of the axis;
+	  axis                 (optional) LINEAR (default) or LOG;
+	and returns a list of the device coordinates, as integers, limited
+	like with limited_int and limited_log10. All the values are
+	converted at once with numpy when it is available."""
+	
+	if numpy:
+		values = numpy.asarray(values, dtype = numpy.float64)
+		if axis == LOG:
+			with numpy.errstate(divide = "ignore", invalid = "ignore"):
+				values = numpy.where(values > 0.0, numpy.log10(values), log_min_float)
+		coordinates = numpy.rint(scale*(values-shift))
+		numpy.clip(coordinates, minint, maxint_float, coordinates)
+		return coordinates.astype(numpy.int64).tolist()
+	
+	if axis == LOG:
+		values = map(limited_log10, values)
+	return [limited_int(scale*(value-shift)) for value in values]
+
+
+
+########################################################################
+#                                                                      #
+# draw_markers                                                         #
+#                                                                      #
+########################################################################
+def draw_markers(DC, points, marker, half_size):
+	"""Draw markers
+	
+	This function takes 4 arguments:
+	  DC                   the device context on which to draw the
+	                       markers;
+	  points               a list of points in device coordinates;
+	  marker               the type of marker (as in plot_curve_style);
+	  half_size            half the size of the markers.
+	
+	All the markers are drawn with a single call to the device
+	context."""
+	
+	if not points:
+		return
+	
+	if marker == "+":
+		lines = [(x-half_size, y, x+half_size+1, y) for x, y in points]
+		lines += [(x, y-half_size, x, y+half_size+1) for x, y in points]
+	elif marker == "x":
+		lines = [(x-half_size, y-half_size, x+half_size+1, y+half_size+1) for x, y in points]
+		lines += [(x-half_size, y+half_size, x+half_size+1, y-half_size-1) for x, y in points]
+	elif marker == "^":
+		lines = [(x-half_size, y+half_size, x, y) for x, y in points]
+		lines += [(x, y, x+half_size+1, y+half_size+1) for x, y in points]
+	elif marker == "v":
+		lines = [(x-half_size, y-half_size, x, y) for x, y in points]
+		lines += [(x, y, x+half_size+1, y-half_size-1) for x, y in points]
+	elif marker == "o":
+		DC.DrawEllipseList([(x-half_size, y-half_size, 2*half_size, 2*half_size) for x, y in points])
+		return
+	else:
+		return
+	
+	DC.DrawLineList(lines)
+
+
+
+########################################################################
+#                                                                      #
+# curve_decimator                                                      #
+#                                                                      #
+########################################################################
+class curve_decimator(object):
+	"""A class to reduce the number of points of a curve to those that
+	are visible on the screen"""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, x, y):
+		"""Initialize the decimator
+		
+		This method takes 2 arguments:
+		  x, y               x and y vectors of the same length describing
+		                     the curve, in the order of the points.
+		
+		The decimator must be recreated when the data of the curve
+		changes."""
+		
+		self.x = x
+		self.y = y
+		
+		# When the x values are increasing, only the points on the
+		# screen need to be considered.
+		self.increasing = all(itertools.imap(operator.le, x, itertools.islice(x, 1, None)))
+		
+		# The levels of detail, by axis type.
+		self.levels = {}
+		
+		# The decimated points in device coordinates, by scale and axis
+		# type, the most recently used last.
+		self.decimations = collections.OrderedDict()
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_levels                                                         #
+	#                                                                    #
+	######################################################################
+	def get_levels(self, axis_x, axis_y):
+		"""Get the levels of detail of the curve
+		
+		This method takes 2 arguments:
+		  axis_x, axis_y     the types of the axes (LINEAR or LOG);
+		and returns a list of levels from the finest to the coarsest. Every
+		level is a tuple of the largest width of the blocks, along the x
+		axis, and the x and y vectors of the points that represent the
+		blocks."""
+		
+		if (axis_x, axis_y) in self.levels:
+			return self.levels[(axis_x, axis_y)]
+		
+		if axis_x == LOG:
+			x = array.array("d", map(limited_log10, self.x))
+		else:
+			x = self.x
+		if axis_y == LOG:
+			y = array.array("d", map(limited_log10, self.y))
+		else:
+			y = self.y
+		
+		nb_points = len(x)
+		levels = [(0.0, x, y)]
+		
+		# Every block is represented by its first point, its minimum, its
+		# maximum and its last point, in their original order. The slices
+		# and the min and max functions do most of the work in C.
+		block_size = decimation_block_factor
+		while nb_points >= decimation_min_nb_blocks*block_size:
+			largest_width = 0.0
+			level_x = array.array("d")
+			level_y = array.array("d")
+			for start in range(0, nb_points, block_size):
+				block_x = x[start:start+block_size]
+				block_y = y[start:start+block_size]
+				largest_width = max(largest_width, max(block_x)-min(block_x))
+				last = len(block_y)-1
+				i_min = block_y.index(min(block_y))
+				i_max = block_y.index(max(block_y))
+				for i in sorted(set((0, i_min, i_max, last))):
+					level_x.append(block_x[i])
+					level_y.append(block_y[i])
+			levels.append((largest_width, level_x, level_y))
+			block_size *= decimation_block_factor
+		
+		self.levels[(axis_x, axis_y)] = levels
+		
+		return levels
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_decimated_points                                               #
+	#                                                                    #
+	######################################################################
+	def get_decimated_points(self, width, shift_x, scale_x, shift_y, scale_y, axis_x = LINEAR, axis_y = LINEAR):
+		"""Get the points to draw
+		
+		This method takes 5 to 7 arguments:
+		  width              the width of the device context;
+		  shift_x            position of the x origin on the device
+		                     context;
+		  scale_x            scaling factor of the x axis;
+		  shift_y            position of the y origin on the device
+		                     context;
+		  scale_y            scaling factor of the y axis;
+		  axis_x             (optional) LINEAR (default) or LOG;
+		  axis_y             (optional) LINEAR (default) or LOG;
+		and returns a list of points in device coordinates. In every pixel
+		column, only the first, last, minimal and maximal points are kept,
+		which is sufficient to draw the same lines as with all the points."""
+		
+		key = (width, shift_x, scale_x, shift_y, scale_y, axis_x, axis_y)
+		
+		if key in self.decimations:
+			decimated_points = self.decimations.pop(key)
+			self.decimations[key] = decimated_points
+			return decimated_points
+		
+		# Use the coarsest level whose blocks are at most one pixel wide.
+		levels = self.get_levels(axis_x, axis_y)
+		largest_width, x, y = levels[0]
+		for largest_width, level_x, level_y in levels[1:]:
+			if abs(scale_x)*largest_width > 1.0:
+				break
+			x, y = level_x, level_y
+		
+		# Keep one point on each side of the screen to draw the lines
+		# that cross its edges.
+		first_point = 0
+		last_point = len(x)
+		if self.increasing and scale_x > 0.0:
+			first_point = max(bisect.bisect_left(x, shift_x)-1, 0)
+			last_point = min(bisect.bisect_right(x, shift_x+width/scale_x)+1, len(x))
+		
+		device_points = zip(to_device_coordinates(x[first_point:last_point], shift_x, scale_x), to_device_coordinates(y[first_point:last_point], shift_y, scale_y))
+		
+		decimated_points = []
+		for column, column_points in itertools.groupby(device_points, operator.itemgetter(0)):
+			column_points = list(column_points)
+			if len(column_points) > 4:
+				column_y = [point[1] for point in column_points]
+				i_min = column_y.index(min(column_y))
+				i_max = column_y.index(max(column_y))
+				column_points = [column_points[i] for i in sorted(set((0, i_min, i_max, len(column_points)-1)))]
+			decimated_points += column_points
+		
+		self.decimations[key] = decimated_points
+		if len(self.decimations) > nb_kept_decimations:
+			self.decimations.popitem(last = False)
+		
+		return decimated_points
+
+
+
 ########################################################################
 #                                                                      #
 # set_use_buffered_drawing                                             #
@@ -411,6 +674,10 @@ class plot_curve(object):
 		else:
 			self.style = plot_curve_style()
 		
+		# The decimator used to draw long curves. It is created when
+		# necessary and deleted when the data changes.
+		self.decimator = None
+		
 		# When appending points, so that the graph would become bigger
 		# than size, two policies are possible, APPEND, in which memory
 		# is added to fit the new points, or REPLACE, where old points are
@@ -646,82 +913,54 @@ class plot_curve(object):
 		DC.SetPen(wx.Pen(wx.NamedColour(self.style.colour), self.style.width))
 		DC.SetBrush(wx.Brush(wx.NamedColour(self.style.colour), wx.TRANSPARENT))
 		
-		# Calculate half the marker size.
-		half_size = limited_int(0.5*self.style.marker_size)
+		# Long curves without markers are decimated when they are drawn
+		# entirely.
+		if self.nb_points > decimation_min_nb_points and nb_points == 0 and min_x_value is None and not self.style.marker and self.style.width > 0:
+			if self.decimator is None:
+				self.decimator = curve_decimator(self.get_x(), self.get_y())
+			points = self.decimator.get_decimated_points(DC.GetSize()[0], shift_x, scale_x, shift_y, scale_y, axis_x, axis_y)
+			if len(points) > 1:
+				DC.DrawLines(points)
+			return
+		
+		if self.nb_points == 0:
+			return
 		
 		# Find where to start and where to stop.
-		if self.nb_points > 0:
-			if nb_points == 0:
-				# Select all points that are defined.
-				first_point = self.starting_point
-				last_point = first_point + self.nb_points
-				
-				# If a minimal x value is defined, search for the last point
-				# where x is smaller than or equal to the minimum value. We
-				# might keep one exterior point in order to draw the line from
-				# that point to the interior point.
-				if min_x_value is not None:
-					for first_point in range(first_point, last_point-1):
-						if self.x[(first_point+1) % self.size] > min_x_value:
-							break
-			# If nb_points is non-zero, only the last nb_points should be
-			# drawn.
-			else:
-				first_point = self.starting_point+self.nb_points-nb_points
-				last_point = self.starting_point+self.nb_points
-			
-			# If the first point is not the starting point, the previous
-			# point is considered to do the line. Otherwise, there is no
-			# previous point and the previous point is initialized to the
-			# first point to avoid crashes.
-			if first_point == self.starting_point:
-				x = self.x[first_point % self.size]
-				y = self.y[first_point % self.size]
-				if axis_x == LOG:
-					x = limited_log10(x)
-				if axis_y == LOG:
-					y = limited_log10(y)
-				x_minus_1 = limited_int(scale_x*(x-shift_x))
-				y_minus_1 = limited_int(scale_y*(y-shift_y))
-			else:
-				x = self.x[(first_point-1) % self.size]
-				y = self.y[(first_point-1) % self.size]
-				if axis_x == LOG:
-					x = limited_log10(x)
-				if axis_y == LOG:
-					y = limited_log10(y)
-				x_minus_1 = limited_int(scale_x*(x-shift_x))
-				y_minus_1 = limited_int(scale_y*(y-shift_y))
+		if nb_points == 0:
+			# Select all points that are defined.
+			first_point = self.starting_point
+			last_point = first_point + self.nb_points
 			
-			# The loop is executed from the first point in order to get the
-			# mark for the first point.
-			for i in range(first_point, last_point):
-				x = self.x[i % self.size]
-				y = self.y[i % self.size]
-				if axis_x == LOG:
-					x = limited_log10(x)
-				if axis_y == LOG:
-					y = limited_log10(y)
-				x = limited_int(scale_x*(x-shift_x))
-				y = limited_int(scale_y*(y-shift_y))
-				if self.style.width > 0:
-					DC.DrawLine(x_minus_1, y_minus_1, x, y)
-				if self.style.marker == "+":
-					DC.DrawLine(x-half_size, y,           x+half_size+1, y            )
-					DC.DrawLine(x,           y-half_size, x,             y+half_size+1)
-				elif self.style.marker == "x":
-					DC.DrawLine(x-half_size, y-half_size, x+half_size+1, y+half_size+1)
-					DC.DrawLine(x-half_size, y+half_size, x+half_size+1, y-half_size-1)
-				elif self.style.marker == "^":
-					DC.DrawLine(x-half_size, y+half_size, x,             y            )
-					DC.DrawLine(x,           y,           x+half_size+1, y+half_size+1)
-				elif self.style.marker == "v":
-					DC.DrawLine(x-half_size, y-half_size, x,             y            )
-					DC.DrawLine(x,           y,           x+half_size+1, y-half_size-1)
-				elif self.style.marker == "o":
-					DC.DrawCircle(x, y, half_size)
-				x_minus_1 = x
-				y_minus_1 = y
+			# If a minimal x value is defined, search for the last point
+			# where x is smaller than or equal to the minimum value. We
+			# might keep one exterior point in order to draw the line from
+			# that point to the interior point.
+			if min_x_value is not None:
+				x, y = self.get_points(first_point, last_point)
+				first_point += min(max(bisect.bisect_right(x, min_x_value)-1, 0), max(self.nb_points-2, 0))
+		# If nb_points is non-zero, only the last nb_points should be
+		# drawn.
+		else:
+			first_point = self.starting_point+self.nb_points-nb_points
+			last_point = self.starting_point+self.nb_points
+		
+		# If the first point is not the starting point, the previous
+		# point is considered to do the line.
+		if first_point == self.starting_point:
+			previous_point = first_point
+		else:
+			previous_point = first_point-1
+		
+		x, y = self.get_points(previous_point, last_point)
+		points = zip(to_device_coordinates(x, shift_x, scale_x, axis_x), to_device_coordinates(y, shift_y, scale_y, axis_y))
+		
+		if self.style.width > 0 and len(points) > 1:
+			DC.DrawLines(points)
+		
+		if self.style.marker:
+			half_size = limited_int(0.5*self.style.marker_size)
+			draw_markers(DC, points[first_point-previous_point:], self.style.marker, half_size)
 	
 	
 	######################################################################
@@ -742,6 +981,8 @@ class plot_curve(object):
 		
 		nb_added_points = len(x)
 		
+		self.decimator = None
+		
 		# If the size of the self.x and self.y arrays is not big enough
 		# to fit all the new data and the policy is to APPEND new points,
 		# self.x and self.y are expanded to fit all this new data. This
@@ -760,11 +1001,12 @@ class plot_curve(object):
 				
 				self.size = new_size
 		
-		# Inserting the new points in the array.
+		# Inserting the new points in the array. When there are more
+		# points than the size of the array, only the last ones would
+		# remain.
 		first_added_point = self.starting_point-self.size+self.nb_points
-		for i in range(nb_added_points):
-			self.x[(first_added_point+i) % self.size] = x[i]
-			self.y[(first_added_point+i) % self.size] = y[i]
+		nb_kept_points = min(nb_added_points, self.size)
+		self.set_points(first_added_point+nb_added_points-nb_kept_points, x[nb_added_points-nb_kept_points:], y[nb_added_points-nb_kept_points:])
 		
 		self.nb_points = (self.nb_points + nb_added_points)
 		
@@ -800,6 +1042,8 @@ class plot_curve(object):
 		
 		nb_new_points = len(x)
 		
+		self.decimator = None
+		
 		# If the size of the self.x and self.y arrays is not big enough
 		# to fit all the new data and the policy is to APPEND new points,
 		# self.x and self.y are expanded to fit all this new data. This
@@ -817,10 +1061,11 @@ class plot_curve(object):
 				
 				self.size = new_size
 		
-		# Inserting the new points in the array.
-		for i in range(nb_new_points):
-			self.x[i % self.size] = x[i]
-			self.y[i % self.size] = y[i]
+		# Inserting the new points in the array. When there are more
+		# points than the size of the array, only the last ones would
+		# remain.
+		nb_kept_points = min(nb_new_points, self.size)
+		self.set_points(nb_new_points-nb_kept_points, x[nb_new_points-nb_kept_points:], y[nb_new_points-nb_kept_points:])
 		
 		self.nb_points = nb_new_points
 		
@@ -838,6 +1083,73 @@ class plot_curve(object):
 		return x_min, x_max, y_min, y_max
 	
 	
+	######################################################################
+	#                                                                    #
+	# set_points                                                         #
+	#                                                                    #
+	######################################################################
+	def set_points(self, position, x, y):
+		"""Set points in the arrays
+		
+		This method takes 3 arguments:
+		  position           the position of the first point in the
+		                     arrays, it may be outside of the arrays and
+		                     is wrapped around their size;
+		  x, y               vectors of x and y values, not longer than
+		                     the size of the arrays.
+		
+		The points are copied with at most two slice assignments, the
+		second one when the points go around the end of the arrays."""
+		
+		if isinstance(self.x, array.array):
+			x = array.array("d", x)
+			y = array.array("d", y)
+		else:
+			x = list(x)
+			y = list(y)
+		
+		nb_points = len(x)
+		if nb_points == 0:
+			return
+		
+		position %= self.size
+		nb_points_at_end = min(nb_points, self.size-position)
+		self.x[position:position+nb_points_at_end] = x[:nb_points_at_end]
+		self.y[position:position+nb_points_at_end] = y[:nb_points_at_end]
+		self.x[:nb_points-nb_points_at_end] = x[nb_points_at_end:]
+		self.y[:nb_points-nb_points_at_end] = y[nb_points_at_end:]
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_points                                                         #
+	#                                                                    #
+	######################################################################
+	def get_points(self, first_point, last_point):
+		"""Get points from the arrays
+		
+		This method takes 2 arguments:
+		  first_point        the position of the first point in the
+		                     arrays, it may be outside of the arrays and
+		                     is wrapped around their size;
+		  last_point         the position after the last point, not more
+		                     than the size of the arrays after first_point;
+		and returns copies of the x and y vectors of these points, in
+		order.
+		
+		The points are copied with at most two slices, the second one
+		when the points go around the end of the arrays."""
+		
+		nb_points = last_point-first_point
+		first_point %= self.size
+		last_point = first_point+nb_points
+		if last_point <= self.size:
+			return self.x[first_point:last_point], self.y[first_point:last_point]
+		else:
+			last_point -= self.size
+			return self.x[first_point:] + self.x[:last_point], self.y[first_point:] + self.y[:last_point]
+	
+	
 	######################################################################
 	#                                                                    #
 	# get_x                                                              #
@@ -897,7 +1209,7 @@ class plot_curve(object):
 		This method returns a string with all the data in text format.
 		Every line contains a point."""
 		
-		return "".join("%15s   %15s\n" % (self.x[i%self.size], self.y[i%self.size]) for i in range(self.starting_point, self.starting_point+self.nb_points))
+		return "".join("%15s   %15s\n" % point for point in zip(self.get_x(), self.get_y()))
 	
 	
 	######################################################################
@@ -913,6 +1225,8 @@ class plot_curve(object):
 		
 		self.nb_points = 0
 		self.starting_point = 0
+		
+		self.decimator = None
 	
 	
 	######################################################################
@@ -1214,45 +1528,12 @@ class plot_curve_segmented(object):
 					DC.SetPen(wx.Pen(wx.NamedColour(self.style.colour_2), self.style.width))
 					DC.SetBrush(wx.Brush(wx.NamedColour(self.style.colour_2), wx.TRANSPARENT))
 				
-				if len(self.Xs[i]) > 0:
-					
-					# The first point.
-					x = self.Xs[i][0]
-					y = self.Ys[i][0]
-					if axis_x == LOG:
-						x = limited_log10(x)
-					if axis_y == LOG:
-						y = limited_log10(y)
-					x_minus_1 = limited_int(scale_x*(x-shift_x))
-					y_minus_1 = limited_int(scale_y*(y-shift_y))
-					
-					# The curve.
-					for j in range(len(self.Xs[i])):
-						x = self.Xs[i][j]
-						y = self.Ys[i][j]
-						if axis_x == LOG:
-							x = limited_log10(x)
-						if axis_y == LOG:
-							y = limited_log10(y)
-						x = limited_int(scale_x*(x-shift_x))
-						y = limited_int(scale_y*(y-shift_y))
-						DC.DrawLine(x_minus_1, y_minus_1, x, y)
-						if self.style.marker == "+":
-							DC.DrawLine(x-half_size, y,           x+half_size+1, y            )
-							DC.DrawLine(x,           y-half_size, x,             y+half_size+1)
-						elif self.style.marker == "x":
-							DC.DrawLine(x-half_size, y-half_size, x+half_size+1, y+half_size+1)
-							DC.DrawLine(x-half_size, y+half_size, x+half_size+1, y-half_size-1)
-						elif self.style.marker == "^":
-							DC.DrawLine(x-half_size, y+half_size, x,             y            )
-							DC.DrawLine(x,           y,           x+half_size+1, y+half_size+1)
-						elif self.style.marker == "v":
-							DC.DrawLine(x-half_size, y-half_size, x,             y            )
-							DC.DrawLine(x,           y,           x+half_size+1, y-half_size-1)
-						elif self.style.marker == "o":
-							DC.DrawCircle(x, y, half_size)
-						x_minus_1 = x
-						y_minus_1 = y
+				points = zip(to_device_coordinates(self.Xs[i], shift_x, scale_x, axis_x), to_device_coordinates(self.Ys[i], shift_y, scale_y, axis_y))
+				
+				if len(points) > 1:
+					DC.DrawLines(points)
+				
+				draw_markers(DC, points, self.style.marker, half_size)
 	
 	
 	######################################################################
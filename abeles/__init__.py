@@ -53,6 +53,7 @@ if abeles_dll_import_failed:
 	from r_and_t import *
 	from spectro import *
 	from phase import *
+	from omega_derivatives import *
 	from ellipso import *
 	from admittance import *
 	from circle import *
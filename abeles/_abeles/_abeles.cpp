@@ -91,10 +91,13 @@ PyMODINIT_FUNC init_abeles()
 	if (PyType_Ready(&dR_wrapper_type) < 0) return;
 	if (PyType_Ready(&dT_wrapper_type) < 0) return;
 	if (PyType_Ready(&dA_wrapper_type) < 0) return;
+	if (PyType_Ready(&dPsi_and_Delta_wrapper_type) < 0) return;
 	if (PyType_Ready(&dphase_wrapper_type) < 0) return;
 	if (PyType_Ready(&dGD_wrapper_type) < 0) return;
 	if (PyType_Ready(&dGDD_wrapper_type) < 0) return;
 	if (PyType_Ready(&needle_matrices_wrapper_type) < 0) return;
+	if (PyType_Ready(&N_and_derivatives_wrapper_type) < 0) return;
+	if (PyType_Ready(&matrices_and_derivatives_wrapper_type) < 0) return;
 
 
 	module = Py_InitModule("_abeles", abeles_methods);
@@ -206,6 +209,9 @@ PyMODINIT_FUNC init_abeles()
 	Py_INCREF(&dA_wrapper_type);
 	PyModule_AddObject(module, "dA", (PyObject *)&dA_wrapper_type);
 
+	Py_INCREF(&dPsi_and_Delta_wrapper_type);
+	PyModule_AddObject(module, "dPsi_and_Delta", (PyObject *)&dPsi_and_Delta_wrapper_type);
+
 	Py_INCREF(&dphase_wrapper_type);
 	PyModule_AddObject(module, "dphase", (PyObject *)&dphase_wrapper_type);
 
@@ -217,6 +223,12 @@ PyMODINIT_FUNC init_abeles()
 
 	Py_INCREF(&needle_matrices_wrapper_type);
 	PyModule_AddObject(module, "needle_matrices", (PyObject *)&needle_matrices_wrapper_type);
+
+	Py_INCREF(&N_and_derivatives_wrapper_type);
+	PyModule_AddObject(module, "N_and_derivatives", (PyObject *)&N_and_derivatives_wrapper_type);
+
+	Py_INCREF(&matrices_and_derivatives_wrapper_type);
+	PyModule_AddObject(module, "matrices_and_derivatives", (PyObject *)&matrices_and_derivatives_wrapper_type);
 }
 
 
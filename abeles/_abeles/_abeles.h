@@ -344,6 +344,22 @@ typedef struct
 	matrices_type						**M;
 } needle_matrices_type;
 
+typedef struct
+{
+	const wvls_type					*wvls;
+	std::complex<double>		*N;
+	std::complex<double>		*dN;
+	std::complex<double>		*d2N;
+} N_and_derivatives_type;
+
+typedef struct
+{
+	const wvls_type					*wvls;
+	matrices_type						*M;
+	matrices_type						*dM;
+	matrices_type						*d2M;
+} matrices_and_derivatives_type;
+
 
 
 /* Functions from PCHIP.cpp */
@@ -416,12 +432,14 @@ Cauchy_type * new_Cauchy();
 void del_Cauchy(Cauchy_type *material);
 void set_Cauchy(Cauchy_type *material, const double A, const double B, const double C, const double Ak, const double exponent, const double edge);
 abeles_error_type set_N_Cauchy(const Cauchy_type *material, const N_type *N);
+abeles_error_type set_dN_Cauchy(const Cauchy_type *material, const N_type *dN, const long parameter_nb);
 
 /* Sellmeier dispersion. */
 Sellmeier_type * new_Sellmeier();
 void del_Sellmeier(Sellmeier_type *material);
 void set_Sellmeier(Sellmeier_type *material,  double B1, const double C1, const double B2, const double C2, const double B3, const double C3, const double Ak, const double exponent, const double edge);
 abeles_error_type set_N_Sellmeier(const Sellmeier_type *material, const N_type *N);
+abeles_error_type set_dN_Sellmeier(const Sellmeier_type *material, const N_type *dN, const long parameter_nb);
 
 
 /* Functions from dispersion_mixtures.cpp */
@@ -518,12 +536,15 @@ void calculate_r_and_t_reverse(const r_and_t_type *r_and_t, const matrices_type
 /* Constructors and destructors. */
 spectrum_type * new_spectrum(const wvls_type *wvls);
 void del_spectrum(spectrum_type *spectrum);
+void add_weighted_spectrum(const spectrum_type *sum, const spectrum_type *spectrum, const double weight);
 
 /* Calculate transmission and reflexion. */
 void calculate_R(const spectrum_type *R, const r_and_t_type *r_and_t, const double polarization);
 void calculate_R_with_backside(const spectrum_type *R, const spectrum_type *T_front, const spectrum_type *R_front, const spectrum_type *T_front_reverse, const spectrum_type *R_front_reverse, const spectrum_type *R_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0);
 void calculate_T(const spectrum_type *T, const r_and_t_type *r_and_t, const N_type *N_i, const N_type *N_e, const sin2_type *sin2_theta_0, const double polarization);
 void calculate_T_with_backside(const spectrum_type *T, const spectrum_type *T_front, const spectrum_type *R_front_reverse, const spectrum_type *T_back, const spectrum_type *R_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0);
+void calculate_R_with_partial_coherence(const spectrum_type *R, const r_and_t_type *r_and_t_front, const r_and_t_type *r_and_t_front_reverse, const r_and_t_type *r_and_t_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0, const double polarization, const double coherence_length);
+void calculate_T_with_partial_coherence(const spectrum_type *T, const r_and_t_type *r_and_t_front, const r_and_t_type *r_and_t_front_reverse, const r_and_t_type *r_and_t_back, const N_type *N_i, const N_type *N_s, const N_type *N_e, const double thickness, const sin2_type *sin2_theta_0, const double polarization, const double coherence_length);
 void calculate_A(const spectrum_type *A, const spectrum_type *R, const spectrum_type *T);
 
 
@@ -537,6 +558,12 @@ void calculate_t_phase(const spectrum_type *phase, const matrices_type *M, const
 void calculate_GD(const spectrum_type *GD, const spectrum_type *phase);
 void calculate_GDD(const spectrum_type *GDD, const spectrum_type *phase);
 
+/* Calculate the group delay and group delay dispersion analytically. */
+void calculate_r_GD(const spectrum_type *GD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization);
+void calculate_t_GD(const spectrum_type *GD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization);
+void calculate_r_GDD(const spectrum_type *GDD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization);
+void calculate_t_GDD(const spectrum_type *GDD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization);
+
 
 /* Functions from ellipso.cpp */
 
@@ -628,6 +655,7 @@ void calculate_dr_and_dt_reverse(const r_and_t_type *dr_and_dt, const matrices_t
 void calculate_dR(const spectrum_type *dR, const r_and_t_type *dr_and_dt, const r_and_t_type *r_and_t, const double polarization);
 void calculate_dT(const spectrum_type *dT, const r_and_t_type *dr_and_dt, const r_and_t_type *r_and_t, const N_type *N1, const N_type *N2, const sin2_type *sin2_theta_0, const double polarization);
 void calculate_dA(const spectrum_type *dA, const spectrum_type *dR, const spectrum_type *dT);
+void calculate_dPsi_and_Delta(const Psi_and_Delta_type *dPsi_and_Delta, const r_and_t_type *r_and_t, const r_and_t_type *dr_and_dt);
 void calculate_dR_with_backside(const spectrum_type *dR, const spectrum_type *T_front, const spectrum_type *dT_front, const spectrum_type *dR_front, const spectrum_type *T_front_reverse, const spectrum_type *dT_front_reverse, const spectrum_type *R_front_reverse, const spectrum_type *dR_front_reverse, const spectrum_type *R_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0);
 void calculate_dT_with_backside(const spectrum_type *dT, const spectrum_type *T_front, const spectrum_type *dT_front, const spectrum_type *R_front_reverse, const spectrum_type *dR_front_reverse, const spectrum_type *T_back, const spectrum_type *R_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0);
 void calculate_dR_with_backside_2(const spectrum_type *dR, const spectrum_type *T_front, const spectrum_type *T_front_reverse, const spectrum_type *R_front_reverse, const spectrum_type *R_back, const spectrum_type *dR_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0);
@@ -659,6 +687,27 @@ void calculate_dMi_needles_fast(const needle_matrices_type **dMi, const N_type *
 void calculate_dMi_steps(const needle_matrices_type *dMi, const N_type *N, const N_type *dN, const double thickness, const sin2_type *sin2_theta_0);
 
 
+/* Functions from omega_derivatives.cpp */
+
+/* Constructors and destructors. */
+N_and_derivatives_type * new_N_and_derivatives(const wvls_type *wvls);
+void del_N_and_derivatives(N_and_derivatives_type *N);
+matrices_and_derivatives_type * new_matrices_and_derivatives(const wvls_type *wvls);
+void del_matrices_and_derivatives(matrices_and_derivatives_type *M);
+
+/* Calculate the derivatives of the index of refraction with regard to
+ * the angular frequency. */
+void set_N_and_derivatives(const N_and_derivatives_type *N_and_derivatives, const N_type *N_minus, const N_type *N, const N_type *N_plus, const double step);
+
+/* Set and multiply the matrices and their derivatives. */
+void set_matrices_and_derivatives_unity(const matrices_and_derivatives_type *M);
+void set_matrices_and_derivatives(const matrices_and_derivatives_type *M, const N_and_derivatives_type *N, const double thickness, const N_and_derivatives_type *N_m, const sin2_type *sin2_theta_0);
+void multiply_matrices_and_derivatives(const matrices_and_derivatives_type *M1, const matrices_and_derivatives_type *M2);
+
+/* Calculate the derivatives of the phase at one wavelength. */
+void calculate_phase_derivatives(const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization, const long i, double *dphi_r, double *d2phi_r, double *dphi_t, double *d2phi_t);
+
+
 #ifdef __cplusplus
 }
 #endif
@@ -183,6 +183,18 @@ typedef struct {
 	matrices_wrapper_object								**needle_matrices_wrappers;
 } needle_matrices_wrapper_object;
 
+typedef struct {
+	PyObject_HEAD
+	wvls_wrapper_object										*wvls;
+	N_and_derivatives_type								*N;
+} N_and_derivatives_wrapper_object;
+
+typedef struct {
+	PyObject_HEAD
+	wvls_wrapper_object										*wvls;
+	matrices_and_derivatives_type					*matrices;
+} matrices_and_derivatives_wrapper_object;
+
 
 /* The types related with those objects. */
 
@@ -219,10 +231,13 @@ extern PyTypeObject dr_and_dt_wrapper_type;
 extern PyTypeObject dR_wrapper_type;
 extern PyTypeObject dT_wrapper_type;
 extern PyTypeObject dA_wrapper_type;
+extern PyTypeObject dPsi_and_Delta_wrapper_type;
 extern PyTypeObject dphase_wrapper_type;
 extern PyTypeObject dGD_wrapper_type;
 extern PyTypeObject dGDD_wrapper_type;
 extern PyTypeObject needle_matrices_wrapper_type;
+extern PyTypeObject N_and_derivatives_wrapper_type;
+extern PyTypeObject matrices_and_derivatives_wrapper_type;
 
 
 /* Macros the check the type of objects. */
@@ -260,10 +275,13 @@ extern PyTypeObject needle_matrices_wrapper_type;
 #define dR_wrapper_Check(op) PyObject_TypeCheck(op, &dR_wrapper_type)
 #define dT_wrapper_Check(op) PyObject_TypeCheck(op, &dT_wrapper_type)
 #define dA_wrapper_Check(op) PyObject_TypeCheck(op, &dA_wrapper_type)
+#define dPsi_and_Delta_wrapper_Check(op) PyObject_TypeCheck(op, &dPsi_and_Delta_wrapper_type)
 #define dphase_wrapper_Check(op) PyObject_TypeCheck(op, &dphase_wrapper_type)
 #define dGD_wrapper_Check(op) PyObject_TypeCheck(op, &dGD_wrapper_type)
 #define dGDD_wrapper_Check(op) PyObject_TypeCheck(op, &dGDD_wrapper_type)
 #define needle_matrices_wrapper_Check(op) PyObject_TypeCheck(op, &needle_matrices_wrapper_type)
+#define N_and_derivatives_wrapper_Check(op) PyObject_TypeCheck(op, &N_and_derivatives_wrapper_type)
+#define matrices_and_derivatives_wrapper_Check(op) PyObject_TypeCheck(op, &matrices_and_derivatives_wrapper_type)
 
 
 #ifdef __cplusplus
@@ -49,6 +49,7 @@ extern void _calculate_GDD(const spectrum_type *GDD, const spectrum_type *phase,
 
 
 const double two_pi = 2.0*M_PI;
+const double one_hundred_eighty_over_pi = 180.0/M_PI;
 
 
 
@@ -398,7 +399,10 @@ void set_dMi_thickness(const matrices_type *dMi, const N_type *N, const double t
 /* The derivative of the index of refraction, dN, is with regard to  */
 /* the real part of the index of refraction at the reference         */
 /* wavelength and is calculated from the dispersion relation of the  */
-/* mixture considered (see N_mixture).                               */
+/* mixture considered (see N_mixture). It can also be the derivative */
+/* with regard to a parameter of a dispersion model (see             */
+/* set_dN_Cauchy and set_dN_Sellmeier), dMi is then the derivative   */
+/* with regard to that parameter.                                    */
 /*                                                                   */
 /*********************************************************************/
 void set_dMi_index(const matrices_type *dMi, const N_type *N, const N_type *dN, const double thickness, const sin2_type *sin2_theta_0)
@@ -989,6 +993,55 @@ void calculate_dA(const spectrum_type *dA, const spectrum_type *dR, const spectr
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* calculate_dPsi_and_Delta                                          */
+/*                                                                   */
+/* Calculate the derivative of the ellipsometric variables           */
+/*                                                                   */
+/* This function takes 3 arguments:                                  */
+/*   dPsi_and_Delta    the structure in which to store the results;  */
+/*   r_and_t           the amplitude reflection and transmission of  */
+/*                     the filter;                                   */
+/*   dr_and_dt         the derivative of the amplitude reflection and */
+/*                     transmission of the filter.                   */
+/*                                                                   */
+/* Since tan(Psi)*exp(j*Delta) = -r_p/r_s, the derivative of its     */
+/* logarithm is dr_p/r_p - dr_s/r_s. Its real part gives the         */
+/* derivative of Psi (divided by sin(Psi)*cos(Psi)) and its imaginary */
+/* part the derivative of Delta. The derivatives are in degres and   */
+/* are set to 0 where r_p or r_s is 0.                               */
+/*                                                                   */
+/*********************************************************************/
+void calculate_dPsi_and_Delta(const Psi_and_Delta_type *dPsi_and_Delta, const r_and_t_type *r_and_t, const r_and_t_type *dr_and_dt)
+{
+	long														i;
+	std::complex<double>						dln_rho;
+	double													abs_r_p, abs_r_s;
+	double													sin_Psi_cos_Psi;
+
+	for (i = 0; i < dPsi_and_Delta->wvls->length; i++)
+	{
+		if (r_and_t->r_p[i] == 0.0 || r_and_t->r_s[i] == 0.0)
+		{
+			dPsi_and_Delta->Psi[i] = 0.0;
+			dPsi_and_Delta->Delta[i] = 0.0;
+		}
+		else
+		{
+			dln_rho = dr_and_dt->r_p[i]/r_and_t->r_p[i] - dr_and_dt->r_s[i]/r_and_t->r_s[i];
+
+			abs_r_p = abs(r_and_t->r_p[i]);
+			abs_r_s = abs(r_and_t->r_s[i]);
+			sin_Psi_cos_Psi = abs_r_p*abs_r_s/(abs_r_p*abs_r_p+abs_r_s*abs_r_s);
+
+			dPsi_and_Delta->Psi[i] = real(dln_rho)*sin_Psi_cos_Psi*one_hundred_eighty_over_pi;
+			dPsi_and_Delta->Delta[i] = imag(dln_rho)*one_hundred_eighty_over_pi;
+		}
+	}
+}
+
+
 /*********************************************************************/
 /*                                                                   */
 /* calculate_dR_with_backside                                        */
@@ -1700,6 +1700,96 @@ PyTypeObject dA_wrapper_type = {
 };
 
 
+/*********************************************************************/
+/*                                                                   */
+/* calculate_dPsi_and_Delta_wrapper                                  */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_dPsi_and_Delta_wrapper(Psi_and_Delta_wrapper_object *self, PyObject *args)
+{
+	r_and_t_wrapper_object										*r_and_t;
+	r_and_t_wrapper_object										*dr_and_dt;
+
+	if (!PyArg_ParseTuple(args, "OO:dPsi_and_Delta.calculate_dPsi_and_Delta", &r_and_t, &dr_and_dt))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!r_and_t_wrapper_Check(r_and_t))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be r_and_t");
+		return NULL;
+	}
+	if (!dr_and_dt_wrapper_Check(dr_and_dt))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be dr_and_dt");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (r_and_t->wvls != self->wvls || dr_and_dt->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_dPsi_and_Delta(self->Psi_and_Delta, r_and_t->r_and_t, dr_and_dt->r_and_t);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+static PyMethodDef dPsi_and_Delta_wrapper_type_methods[] =
+{
+	{"calculate_dPsi_and_Delta",								(PyCFunction)calculate_dPsi_and_Delta_wrapper,								METH_VARARGS},
+	{NULL} /* Sentinel */
+};
+
+
+PyTypeObject dPsi_and_Delta_wrapper_type = {
+	PyObject_HEAD_INIT(NULL)
+	0,																									/* ob_size */
+	"abeles.dPsi_and_Delta",														/* tp_name */
+	0,																									/* tp_basicsize */
+	0,																									/* tp_itemsize */
+	0,																									/* tp_dealloc */
+	0,																									/* tp_print */
+	0,																									/* tp_getattr */
+	0,																									/* tp_setattr */
+	0,																									/* tp_compare */
+	0,																									/* tp_repr */
+	0,																									/* tp_as_number */
+	0,																									/* tp_as_sequence */
+	0,																									/* tp_as_mapping */
+	0,																									/* tp_hash */
+	0,																									/* tp_call */
+	0,																									/* tp_str */
+	0,																									/* tp_getattro */
+	0,																									/* tp_setattro */
+	0,																									/* tp_as_buffer */
+	Py_TPFLAGS_DEFAULT,																	/* tp_flags */
+	"dPsi_and_Delta class",															/* tp_doc */
+	0,																									/* tp_traverse */
+	0,																									/* tp_clear */
+	0,																									/* tp_richcompare */
+	0,																									/* tp_weaklistoffset */
+	0,																									/* tp_iter */
+	0,																									/* tp_iternext */
+	dPsi_and_Delta_wrapper_type_methods,								/* tp_methods */
+	0,																									/* tp_members */
+	0,																									/* tp_getset */
+	&Psi_and_Delta_wrapper_type,												/* tp_base */
+	0,																									/* tp_dict */
+	0,																									/* tp_descr_get */
+	0,																									/* tp_descr_set */
+	0,																									/* tp_dictoffset */
+	0,																									/* tp_init */
+	0,																									/* tp_alloc */
+	0,																									/* tp_new */
+};
+
+
 /*********************************************************************/
 /*                                                                   */
 /* calculate_dr_phase_wrapper                                        */
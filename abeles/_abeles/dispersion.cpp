@@ -434,6 +434,59 @@ abeles_error_type set_N_Cauchy(const Cauchy_type *material, const N_type *N)
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* set_dN_Cauchy                                                     */
+/*                                                                   */
+/* Set the derivative of the index of refraction of a Cauchy         */
+/* dispersion with regard to one of its parameters                   */
+/*                                                                   */
+/* This function takes 3 arguments:                                  */
+/*   material          the Cauchy dispersion structure;              */
+/*   dN                the index of refraction structure that must   */
+/*                     be set with the derivative;                   */
+/*   parameter_nb      the number of the parameter, in the order of  */
+/*                     set_Cauchy (0 for A, ..., 5 for edge).        */
+/* It always returns ABELES_SUCCESS.                                 */
+/*                                                                   */
+/*********************************************************************/
+abeles_error_type set_dN_Cauchy(const Cauchy_type *material, const N_type *dN, const long parameter_nb)
+{
+	long														i;
+	double													wvl_micron, wvl_micron_square;
+	double													exponential;
+
+	for (i = 0; i < dN->wvls->length; i++)
+	{
+		wvl_micron = 0.001*dN->wvls->wvls[i];
+		wvl_micron_square = wvl_micron*wvl_micron;
+		exponential = exp(12400.0*material->exponent*((1.0/(10000.0*wvl_micron))-(1.0/material->edge)));
+		switch (parameter_nb)
+		{
+			case 0:
+				dN->N[i] = 1.0;
+				break;
+			case 1:
+				dN->N[i] = 1.0/wvl_micron_square;
+				break;
+			case 2:
+				dN->N[i] = 1.0/(wvl_micron_square*wvl_micron_square);
+				break;
+			case 3:
+				dN->N[i] = std::complex<double>(0.0, -exponential);
+				break;
+			case 4:
+				dN->N[i] = std::complex<double>(0.0, -material->Ak*exponential*12400.0*((1.0/(10000.0*wvl_micron))-(1.0/material->edge)));
+				break;
+			default:
+				dN->N[i] = std::complex<double>(0.0, -material->Ak*exponential*12400.0*material->exponent/(material->edge*material->edge));
+		}
+	}
+
+	return ABELES_SUCCESS;
+}
+
+
 /*********************************************************************/
 /*                                                                   */
 /* new_Sellmeier                                                     */
@@ -541,6 +594,71 @@ abeles_error_type set_N_Sellmeier(const Sellmeier_type *material, const N_type *
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* set_dN_Sellmeier                                                  */
+/*                                                                   */
+/* Set the derivative of the index of refraction of a Sellmeier      */
+/* dispersion with regard to one of its parameters                   */
+/*                                                                   */
+/* This function takes 3 arguments:                                  */
+/*   material          the Sellmeier dispersion structure;           */
+/*   dN                the index of refraction structure that must   */
+/*                     be set with the derivative;                   */
+/*   parameter_nb      the number of the parameter, in the order of  */
+/*                     set_Sellmeier (0 for B1, ..., 8 for edge).    */
+/* It always returns ABELES_SUCCESS.                                 */
+/*                                                                   */
+/* Where the index of refraction is undefined, the derivative is set */
+/* to 0.                                                             */
+/*                                                                   */
+/*********************************************************************/
+abeles_error_type set_dN_Sellmeier(const Sellmeier_type *material, const N_type *dN, const long parameter_nb)
+{
+	long														i, term;
+	double													B[3], C[3];
+	double													wvl_micron, wvl_micron_square;
+	double													n_square, n, exponential;
+
+	B[0] = material->B1; C[0] = material->C1;
+	B[1] = material->B2; C[1] = material->C2;
+	B[2] = material->B3; C[2] = material->C3;
+
+	term = parameter_nb/2;
+
+	for (i = 0; i < dN->wvls->length; i++)
+	{
+		wvl_micron = 0.001*dN->wvls->wvls[i];
+		wvl_micron_square = wvl_micron*wvl_micron;
+		if (parameter_nb < 6)
+		{
+			n_square = 1.0+B[0]*wvl_micron_square/(wvl_micron_square-C[0])\
+			              +B[1]*wvl_micron_square/(wvl_micron_square-C[1])\
+			              +B[2]*wvl_micron_square/(wvl_micron_square-C[2]);
+			n = (n_square > 0.0 && std::isfinite(n_square)) ? sqrt(n_square) : 0.0;
+			if (n == 0.0)
+				dN->N[i] = 0.0;
+			else if (parameter_nb % 2 == 0)
+				dN->N[i] = 0.5*wvl_micron_square/(wvl_micron_square-C[term])/n;
+			else
+				dN->N[i] = 0.5*B[term]*wvl_micron_square/((wvl_micron_square-C[term])*(wvl_micron_square-C[term]))/n;
+		}
+		else
+		{
+			exponential = exp(12400.0*material->exponent*((1.0/(10000.0*wvl_micron))-(1.0/material->edge)));
+			if (parameter_nb == 6)
+				dN->N[i] = std::complex<double>(0.0, -exponential);
+			else if (parameter_nb == 7)
+				dN->N[i] = std::complex<double>(0.0, -material->Ak*exponential*12400.0*((1.0/(10000.0*wvl_micron))-(1.0/material->edge)));
+			else
+				dN->N[i] = std::complex<double>(0.0, -material->Ak*exponential*12400.0*material->exponent/(material->edge*material->edge));
+		}
+	}
+
+	return ABELES_SUCCESS;
+}
+
+
 #ifdef __cplusplus
 }
 #endif
@@ -572,10 +572,48 @@ static PyObject * set_N_Cauchy_wrapper(Cauchy_wrapper_object *self, PyObject *ar
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* set_dN_Cauchy_wrapper                                             */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * set_dN_Cauchy_wrapper(Cauchy_wrapper_object *self, PyObject *args)
+{
+	N_wrapper_object													*dN;
+	long																			parameter_nb;
+	abeles_error_type													return_value;
+
+	if (!PyArg_ParseTuple(args, "Ol:Cauchy.set_dN_Cauchy", &dN, &parameter_nb))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!N_wrapper_Check(dN))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be N");
+		return NULL;
+	}
+	if (parameter_nb < 0 || parameter_nb > 5)
+	{
+		PyErr_SetString(PyExc_IndexError, "parameter number out of range");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	return_value = set_dN_Cauchy(self->dispersion, dN->N, parameter_nb);
+	Py_END_ALLOW_THREADS
+
+	if (return_value == ABELES_OUT_OF_MEMORY)
+		return PyErr_NoMemory();
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef Cauchy_wrapper_type_methods[] =
 {
 	{"set_Cauchy",															(PyCFunction)set_Cauchy_wrapper,															METH_VARARGS},
 	{"set_N_Cauchy",														(PyCFunction)set_N_Cauchy_wrapper,														METH_VARARGS},
+	{"set_dN_Cauchy",														(PyCFunction)set_dN_Cauchy_wrapper,														METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
@@ -731,10 +769,48 @@ static PyObject * set_N_Sellmeier_wrapper(Sellmeier_wrapper_object *self, PyObje
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* set_dN_Sellmeier_wrapper                                          */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * set_dN_Sellmeier_wrapper(Sellmeier_wrapper_object *self, PyObject *args)
+{
+	N_wrapper_object													*dN;
+	long																			parameter_nb;
+	abeles_error_type													return_value;
+
+	if (!PyArg_ParseTuple(args, "Ol:Sellmeier.set_dN_Sellmeier", &dN, &parameter_nb))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!N_wrapper_Check(dN))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be N");
+		return NULL;
+	}
+	if (parameter_nb < 0 || parameter_nb > 8)
+	{
+		PyErr_SetString(PyExc_IndexError, "parameter number out of range");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	return_value = set_dN_Sellmeier(self->dispersion, dN->N, parameter_nb);
+	Py_END_ALLOW_THREADS
+
+	if (return_value == ABELES_OUT_OF_MEMORY)
+		return PyErr_NoMemory();
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef Sellmeier_wrapper_type_methods[] =
 {
 	{"set_Sellmeier",														(PyCFunction)set_Sellmeier_wrapper,														METH_VARARGS},
 	{"set_N_Sellmeier",													(PyCFunction)set_N_Sellmeier_wrapper,													METH_VARARGS},
+	{"set_dN_Sellmeier",												(PyCFunction)set_dN_Sellmeier_wrapper,												METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
@@ -0,0 +1,586 @@
+/*
+ *
+ *  omega_derivatives.cpp
+ *
+ *
+ *  Functions to calculate the characteristic matrices of a stack
+ *  together with their first and second derivatives with regard to the
+ *  angular frequency. They are used to calculate the GD and the GDD
+ *  analytically.
+ *
+ *  Copyright (c) 2016 Stephane Larouche.
+ *
+ *  This file is part of OpenFilters.
+ *
+ *  OpenFilters is free software; you can redistribute it and/or modify
+ *  it under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation; either version 2 of the License, or (at
+ *  your option) any later version.
+ *
+ *  OpenFilters is distributed in the hope that it will be useful, but
+ *  WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ *  General Public License for more details.
+ *
+ *  You should have received a copy of the GNU General Public License
+ *  along with this program; if not, write to the Free Software
+ *  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+ *  USA
+ *
+ */
+
+
+#include <cstdlib>
+#include <cmath>
+#include <complex>
+
+#include "_abeles.h"
+
+
+static const std::complex<double> j = std::complex<double>(0.0, 1.0);
+
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+
+static const double two_pi = 2.0*M_PI;
+
+/* The speed of light in nm/s. */
+static const double c = 299792458.0 * 1e9;
+static const double two_pi_c = two_pi*c;
+
+
+/*********************************************************************/
+/*                                                                   */
+/* new_N_and_derivatives                                             */
+/*                                                                   */
+/* Create a new N_and_derivatives structure to store an index of     */
+/* refraction and its first and second derivatives with regard to    */
+/* the angular frequency                                             */
+/*                                                                   */
+/* This function takes 1 argument:                                   */
+/*   wvls              the wavelengths at which to calculate the     */
+/*                     index of refraction and its derivatives;      */
+/* and returns a N_and_derivatives structure.                        */
+/*                                                                   */
+/* If the creation of the structure fails because of a lack of heap  */
+/* memory, a NULL pointer is returned.                               */
+/*                                                                   */
+/*********************************************************************/
+N_and_derivatives_type * new_N_and_derivatives(const wvls_type *wvls)
+{
+	N_and_derivatives_type					*N;
+
+	N = (N_and_derivatives_type *)malloc(sizeof(N_and_derivatives_type));
+
+	if (!N) return NULL;
+
+	N->wvls = wvls;
+	N->N = (std::complex<double> *)malloc(N->wvls->length*sizeof(std::complex<double>));
+	N->dN = (std::complex<double> *)malloc(N->wvls->length*sizeof(std::complex<double>));
+	N->d2N = (std::complex<double> *)malloc(N->wvls->length*sizeof(std::complex<double>));
+
+	if (!N->N || !N->dN || !N->d2N)
+	{
+		del_N_and_derivatives(N);
+		return NULL;
+	}
+
+	return N;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* del_N_and_derivatives                                             */
+/*                                                                   */
+/* Delete a N_and_derivatives structure                              */
+/*                                                                   */
+/* This function takes 1 argument:                                   */
+/*   N                 the structure to delete.                      */
+/*                                                                   */
+/* If the argument is a NULL pointer, the function does nothing.     */
+/*                                                                   */
+/*********************************************************************/
+void del_N_and_derivatives(N_and_derivatives_type *N)
+{
+	if (!N) return;
+
+	free(N->N);
+	free(N->dN);
+	free(N->d2N);
+
+	free(N);
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* set_N_and_derivatives                                             */
+/*                                                                   */
+/* Set the index of refraction and its derivatives                   */
+/*                                                                   */
+/* This function takes 5 arguments:                                  */
+/*   N_and_derivatives the structure in which to store the results;  */
+/*   N_minus           the index of refraction at the angular        */
+/*                     frequencies (1-step) times those of the       */
+/*                     wavelengths;                                  */
+/*   N                 the index of refraction at the wavelengths;   */
+/*   N_plus            the index of refraction at the angular        */
+/*                     frequencies (1+step) times those of the       */
+/*                     wavelengths;                                  */
+/*   step              the relative step on the angular frequency.   */
+/*                                                                   */
+/* The derivatives are determined by centered differences. The       */
+/* dispersion of materials is smooth, so a small step gives precise  */
+/* derivatives.                                                      */
+/*                                                                   */
+/*********************************************************************/
+void set_N_and_derivatives(const N_and_derivatives_type *N_and_derivatives, const N_type *N_minus, const N_type *N, const N_type *N_plus, const double step)
+{
+	long														i;
+	double													h;
+
+	for (i = 0; i < N_and_derivatives->wvls->length; i++)
+	{
+		h = step*two_pi_c/N_and_derivatives->wvls->wvls[i];
+
+		N_and_derivatives->N[i] = N->N[i];
+		N_and_derivatives->dN[i] = (N_plus->N[i]-N_minus->N[i])/(2.0*h);
+		N_and_derivatives->d2N[i] = (N_plus->N[i]-2.0*N->N[i]+N_minus->N[i])/(h*h);
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_admittances_and_derivatives                             */
+/*                                                                   */
+/* Calculate the admittances of a material and their derivatives     */
+/*                                                                   */
+/* This function takes 5 arguments:                                  */
+/*   N                 the index of refraction of the material and   */
+/*                     its derivatives;                              */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle;                            */
+/*   i                 the position of the wavelength;               */
+/*   Y                 an array of 6 elements in which to store the  */
+/*                     s and p admittances and their first and       */
+/*                     second derivatives with regard to the angular */
+/*                     frequency (N_s, dN_s, d2N_s, N_p, dN_p,       */
+/*                     d2N_p).                                       */
+/*                                                                   */
+/* The normalized sinus squared of the propagation angle is          */
+/* proportional to the square of the index of the medium and its     */
+/* derivatives are calculated accordingly.                           */
+/*                                                                   */
+/*********************************************************************/
+static void calculate_admittances_and_derivatives(const N_and_derivatives_type *N, const N_and_derivatives_type *N_m, const sin2_type *sin2_theta_0, const long i, std::complex<double> *Y)
+{
+	std::complex<double>						N_square, dN_square, d2N_square;
+	std::complex<double>						sin2, dsin2, d2sin2, sin2_theta;
+	std::complex<double>						N_s, dN_s, d2N_s, N_p, dN_p, d2N_p;
+
+	N_square = N->N[i]*N->N[i];
+	dN_square = 2.0*N->N[i]*N->dN[i];
+	d2N_square = 2.0*(N->dN[i]*N->dN[i] + N->N[i]*N->d2N[i]);
+
+	sin2 = sin2_theta_0->sin2[i];
+	if (sin2 == 0.0)
+	{
+		dsin2 = 0.0;
+		d2sin2 = 0.0;
+	}
+	else
+	{
+		sin2_theta = sin2/(N_m->N[i]*N_m->N[i]);
+		dsin2 = 2.0*sin2_theta*N_m->N[i]*N_m->dN[i];
+		d2sin2 = 2.0*sin2_theta*(N_m->dN[i]*N_m->dN[i] + N_m->N[i]*N_m->d2N[i]);
+	}
+
+	N_s = sqrt(N_square-sin2);
+
+	/* Correct branch selection. */
+	if (real(N_s) == 0.0) N_s = -N_s;
+
+	/* Since N_s^2 = N^2 - sin2 and N_p*N_s = N^2, the derivatives are
+	 * obtained by differentiating these products. */
+	dN_s = (dN_square-dsin2)/(2.0*N_s);
+	d2N_s = (d2N_square-d2sin2-2.0*dN_s*dN_s)/(2.0*N_s);
+
+	N_p = N_square/N_s;
+	dN_p = (dN_square-N_p*dN_s)/N_s;
+	d2N_p = (d2N_square-2.0*dN_p*dN_s-N_p*d2N_s)/N_s;
+
+	Y[0] = N_s;
+	Y[1] = dN_s;
+	Y[2] = d2N_s;
+	Y[3] = N_p;
+	Y[4] = dN_p;
+	Y[5] = d2N_p;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* new_matrices_and_derivatives                                      */
+/*                                                                   */
+/* Create a new matrices_and_derivatives structure to store the      */
+/* characteristic matrices of a stack and their first and second     */
+/* derivatives with regard to the angular frequency                  */
+/*                                                                   */
+/* This function takes 1 argument:                                   */
+/*   wvls              the wavelengths at which to calculate the     */
+/*                     matrices;                                     */
+/* and returns a matrices_and_derivatives structure.                 */
+/*                                                                   */
+/* If the creation of the structure fails because of a lack of heap  */
+/* memory, a NULL pointer is returned.                               */
+/*                                                                   */
+/*********************************************************************/
+matrices_and_derivatives_type * new_matrices_and_derivatives(const wvls_type *wvls)
+{
+	matrices_and_derivatives_type		*M;
+
+	M = (matrices_and_derivatives_type *)malloc(sizeof(matrices_and_derivatives_type));
+
+	if (!M) return NULL;
+
+	M->wvls = wvls;
+	M->M = new_matrices(M->wvls);
+	M->dM = new_matrices(M->wvls);
+	M->d2M = new_matrices(M->wvls);
+
+	if (!M->M || !M->dM || !M->d2M)
+	{
+		del_matrices_and_derivatives(M);
+		return NULL;
+	}
+
+	return M;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* del_matrices_and_derivatives                                      */
+/*                                                                   */
+/* Delete a matrices_and_derivatives structure                       */
+/*                                                                   */
+/* This function takes 1 argument:                                   */
+/*   M                 the structure to delete.                      */
+/*                                                                   */
+/* If the argument is a NULL pointer, the function does nothing.     */
+/*                                                                   */
+/*********************************************************************/
+void del_matrices_and_derivatives(matrices_and_derivatives_type *M)
+{
+	if (!M) return;
+
+	del_matrices(M->M);
+	del_matrices(M->dM);
+	del_matrices(M->d2M);
+
+	free(M);
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* set_matrices_and_derivatives_unity                                */
+/*                                                                   */
+/* Set the caracteristic matrices to unity matrices and their        */
+/* derivatives to 0                                                  */
+/*                                                                   */
+/* This function takes 1 argument:                                   */
+/*   M                 the matrices to set to unity.                 */
+/*                                                                   */
+/*********************************************************************/
+void set_matrices_and_derivatives_unity(const matrices_and_derivatives_type *M)
+{
+	long														i;
+	int															k;
+
+	set_matrices_unity(M->M);
+
+	for (i = 0; i < M->wvls->length; i++)
+	{
+		for (k = 0; k < 4; k++)
+		{
+			M->dM->matrices[i].s[k] = 0.0;
+			M->dM->matrices[i].p[k] = 0.0;
+			M->d2M->matrices[i].s[k] = 0.0;
+			M->d2M->matrices[i].p[k] = 0.0;
+		}
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* set_matrices_and_derivatives                                      */
+/*                                                                   */
+/* Set the caracteristic matrices of a layer and their derivatives   */
+/*                                                                   */
+/* This function takes 5 arguments:                                  */
+/*   M                 the structure in which to store the results;  */
+/*   N                 the index of refraction of the layer and its  */
+/*                     derivatives;                                  */
+/*   thickness         the thickness of the layer;                   */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle.                            */
+/*                                                                   */
+/*********************************************************************/
+void set_matrices_and_derivatives(const matrices_and_derivatives_type *M, const N_and_derivatives_type *N, const double thickness, const N_and_derivatives_type *N_m, const sin2_type *sin2_theta_0)
+{
+	long														i;
+	int															polarization;
+	double													omega;
+	std::complex<double>						Y[6];
+	std::complex<double>						phi, dphi, d2phi;
+	std::complex<double>						cos_phi, dcos_phi, d2cos_phi;
+	std::complex<double>						j_sin_phi, dj_sin_phi, d2j_sin_phi;
+	std::complex<double>						*Mi, *dMi, *d2Mi;
+	std::complex<double>						Y_i, dY_i, d2Y_i;
+
+	for (i = 0; i < M->wvls->length; i++)
+	{
+		omega = two_pi_c/M->wvls->wvls[i];
+
+		calculate_admittances_and_derivatives(N, N_m, sin2_theta_0, i, Y);
+
+		/* phi = omega/c*N_s*thickness. */
+		phi = omega/c*Y[0]*thickness;
+		dphi = (Y[0] + omega*Y[1])*thickness/c;
+		d2phi = (2.0*Y[1] + omega*Y[2])*thickness/c;
+
+		if (imag(phi) < -100.0) phi = real(phi) + -100.0 * j;
+
+		cos_phi = cos(phi);
+		j_sin_phi = j*sin(phi);
+
+		dcos_phi = j_sin_phi*j*dphi;
+		d2cos_phi = -cos_phi*dphi*dphi + j_sin_phi*j*d2phi;
+		dj_sin_phi = j*cos_phi*dphi;
+		d2j_sin_phi = -j_sin_phi*dphi*dphi + j*cos_phi*d2phi;
+
+		M->M->matrices[i].s[0] = M->M->matrices[i].s[3] = M->M->matrices[i].p[0] = M->M->matrices[i].p[3] = cos_phi;
+		M->dM->matrices[i].s[0] = M->dM->matrices[i].s[3] = M->dM->matrices[i].p[0] = M->dM->matrices[i].p[3] = dcos_phi;
+		M->d2M->matrices[i].s[0] = M->d2M->matrices[i].s[3] = M->d2M->matrices[i].p[0] = M->d2M->matrices[i].p[3] = d2cos_phi;
+
+		for (polarization = 0; polarization < 2; polarization++)
+		{
+			if (polarization == 0)
+			{
+				Mi = M->M->matrices[i].s;
+				dMi = M->dM->matrices[i].s;
+				d2Mi = M->d2M->matrices[i].s;
+			}
+			else
+			{
+				Mi = M->M->matrices[i].p;
+				dMi = M->dM->matrices[i].p;
+				d2Mi = M->d2M->matrices[i].p;
+			}
+			Y_i = Y[3*polarization];
+			dY_i = Y[3*polarization+1];
+			d2Y_i = Y[3*polarization+2];
+
+			/* M12*Y = j*sin(phi) and M21 = Y*j*sin(phi). */
+			Mi[1] = j_sin_phi/Y_i;
+			dMi[1] = (dj_sin_phi - Mi[1]*dY_i)/Y_i;
+			d2Mi[1] = (d2j_sin_phi - 2.0*dMi[1]*dY_i - Mi[1]*d2Y_i)/Y_i;
+			Mi[2] = Y_i*j_sin_phi;
+			dMi[2] = dY_i*j_sin_phi + Y_i*dj_sin_phi;
+			d2Mi[2] = d2Y_i*j_sin_phi + 2.0*dY_i*dj_sin_phi + Y_i*d2j_sin_phi;
+		}
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* multiply_matrices_and_derivatives                                 */
+/*                                                                   */
+/* Multiply the caracteristic matrices and their derivatives         */
+/*                                                                   */
+/* This function takes 2 arguments:                                  */
+/*   M1, M2            2 sets of matrices and derivatives.           */
+/*                                                                   */
+/* This function stores M2*M1 in M1. The derivatives of the product  */
+/* are obtained from the product rule.                               */
+/*                                                                   */
+/*********************************************************************/
+void multiply_matrices_and_derivatives(const matrices_and_derivatives_type *M1, const matrices_and_derivatives_type *M2)
+{
+	long														i;
+	int															polarization;
+	std::complex<double>						temp0, temp1, temp2;
+	std::complex<double>						*A, *dA, *d2A, *B, *dB, *d2B;
+
+	for (i = 0; i < M1->wvls->length; i++)
+	{
+		for (polarization = 0; polarization < 2; polarization++)
+		{
+			if (polarization == 0)
+			{
+				A = M2->M->matrices[i].s;
+				dA = M2->dM->matrices[i].s;
+				d2A = M2->d2M->matrices[i].s;
+				B = M1->M->matrices[i].s;
+				dB = M1->dM->matrices[i].s;
+				d2B = M1->d2M->matrices[i].s;
+			}
+			else
+			{
+				A = M2->M->matrices[i].p;
+				dA = M2->dM->matrices[i].p;
+				d2A = M2->d2M->matrices[i].p;
+				B = M1->M->matrices[i].p;
+				dB = M1->dM->matrices[i].p;
+				d2B = M1->d2M->matrices[i].p;
+			}
+
+			/* (AB)'' = A''B + 2A'B' + AB''. */
+			temp0 = d2A[0]*B[0] + d2A[1]*B[2] + 2.0*(dA[0]*dB[0] + dA[1]*dB[2]) + A[0]*d2B[0] + A[1]*d2B[2];
+			temp1 = d2A[0]*B[1] + d2A[1]*B[3] + 2.0*(dA[0]*dB[1] + dA[1]*dB[3]) + A[0]*d2B[1] + A[1]*d2B[3];
+			temp2 = d2A[2]*B[0] + d2A[3]*B[2] + 2.0*(dA[2]*dB[0] + dA[3]*dB[2]) + A[2]*d2B[0] + A[3]*d2B[2];
+			d2B[3] = d2A[2]*B[1] + d2A[3]*B[3] + 2.0*(dA[2]*dB[1] + dA[3]*dB[3]) + A[2]*d2B[1] + A[3]*d2B[3];
+			d2B[0] = temp0;
+			d2B[1] = temp1;
+			d2B[2] = temp2;
+
+			/* (AB)' = A'B + AB'. */
+			temp0 = dA[0]*B[0] + dA[1]*B[2] + A[0]*dB[0] + A[1]*dB[2];
+			temp1 = dA[0]*B[1] + dA[1]*B[3] + A[0]*dB[1] + A[1]*dB[3];
+			temp2 = dA[2]*B[0] + dA[3]*B[2] + A[2]*dB[0] + A[3]*dB[2];
+			dB[3] = dA[2]*B[1] + dA[3]*B[3] + A[2]*dB[1] + A[3]*dB[3];
+			dB[0] = temp0;
+			dB[1] = temp1;
+			dB[2] = temp2;
+
+			temp0 = A[0]*B[0] + A[1]*B[2];
+			temp1 = A[0]*B[1] + A[1]*B[3];
+			temp2 = A[2]*B[0] + A[3]*B[2];
+			B[3] = A[2]*B[1] + A[3]*B[3];
+			B[0] = temp0;
+			B[1] = temp1;
+			B[2] = temp2;
+		}
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_phase_derivatives                                       */
+/*                                                                   */
+/* Calculate the derivatives of the phase shifts of a stack          */
+/*                                                                   */
+/* This function takes 10 arguments:                                 */
+/*   M                 the characteristic matrices of the stack and  */
+/*                     their derivatives;                            */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   N_s               the index of refraction of the substrate and  */
+/*                     its derivatives;                              */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle;                            */
+/*   polarization      the polarization of light;                    */
+/*   i                 the position of the wavelength;               */
+/*   dphi_r, d2phi_r   the first and second derivatives of the phase */
+/*                     shift upon reflection;                        */
+/*   dphi_t, d2phi_t   the first and second derivatives of the phase */
+/*                     shift upon transmission.                      */
+/*                                                                   */
+/* The reflection phase is the argument of (N_m*B-C)/(N_m*B+C) and   */
+/* the transmission phase the argument of 1/(N_m*B+C), where N_m is  */
+/* the admittance of the medium and (B, C) is the product of the     */
+/* characteristic matrices with (1, N_s). The derivatives of the     */
+/* argument of a function f are Im(f'/f) and Im(f''/f - (f'/f)^2).   */
+/*                                                                   */
+/*********************************************************************/
+void calculate_phase_derivatives(const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization, const long i, double *dphi_r, double *d2phi_r, double *dphi_t, double *d2phi_t)
+{
+	std::complex<double>						Y_m[6], Y_s[6];
+	const std::complex<double>			*Mi, *dMi, *d2Mi;
+	int															k;
+	std::complex<double>						B, dB, d2B, C, dC, d2C;
+	std::complex<double>						Y_m_B, dY_m_B, d2Y_m_B;
+	std::complex<double>						f[2], df[2], d2f[2], df_f;
+	double													darg[2], d2arg[2];
+
+	if (polarization == S)
+	{
+		k = 0;
+		Mi = M->M->matrices[i].s;
+		dMi = M->dM->matrices[i].s;
+		d2Mi = M->d2M->matrices[i].s;
+	}
+	else if (polarization == P)
+	{
+		k = 3;
+		Mi = M->M->matrices[i].p;
+		dMi = M->dM->matrices[i].p;
+		d2Mi = M->d2M->matrices[i].p;
+	}
+	else
+	{
+		*dphi_r = *d2phi_r = *dphi_t = *d2phi_t = 0.0;
+		return;
+	}
+
+	calculate_admittances_and_derivatives(N_m, N_m, sin2_theta_0, i, Y_m);
+	calculate_admittances_and_derivatives(N_s, N_m, sin2_theta_0, i, Y_s);
+
+	B = Mi[0] + Mi[1]*Y_s[k];
+	dB = dMi[0] + dMi[1]*Y_s[k] + Mi[1]*Y_s[k+1];
+	d2B = d2Mi[0] + d2Mi[1]*Y_s[k] + 2.0*dMi[1]*Y_s[k+1] + Mi[1]*Y_s[k+2];
+	C = Mi[2] + Mi[3]*Y_s[k];
+	dC = dMi[2] + dMi[3]*Y_s[k] + Mi[3]*Y_s[k+1];
+	d2C = d2Mi[2] + d2Mi[3]*Y_s[k] + 2.0*dMi[3]*Y_s[k+1] + Mi[3]*Y_s[k+2];
+
+	Y_m_B = Y_m[k]*B;
+	dY_m_B = Y_m[k+1]*B + Y_m[k]*dB;
+	d2Y_m_B = Y_m[k+2]*B + 2.0*Y_m[k+1]*dB + Y_m[k]*d2B;
+
+	/* The derivatives of the argument of the numerator and of the
+	 * denominator of r. When they are 0, the phase is considered to be
+	 * 0 (see calculate_r_phase). */
+	f[0] = Y_m_B-C;
+	df[0] = dY_m_B-dC;
+	d2f[0] = d2Y_m_B-d2C;
+	f[1] = Y_m_B+C;
+	df[1] = dY_m_B+dC;
+	d2f[1] = d2Y_m_B+d2C;
+	for (k = 0; k < 2; k++)
+	{
+		if (f[k] == 0.0)
+		{
+			darg[k] = 0.0;
+			d2arg[k] = 0.0;
+		}
+		else
+		{
+			df_f = df[k]/f[k];
+			darg[k] = imag(df_f);
+			d2arg[k] = imag(d2f[k]/f[k] - df_f*df_f);
+		}
+	}
+
+	*dphi_r = darg[0]-darg[1];
+	*d2phi_r = d2arg[0]-d2arg[1];
+	*dphi_t = -darg[1];
+	*d2phi_t = -d2arg[1];
+}
+
+
+#ifdef __cplusplus
+}
+#endif
@@ -0,0 +1,445 @@
+/*
+ *
+ *  omega_derivatives_wrapper.cpp
+ *
+ *
+ *  Wrapper around functions in omega_derivatives.cpp to make them
+ *  available to Python in multiple classes.
+ *
+ *  Copyright (c) 2016 Stephane Larouche.
+ *
+ *  This file is part of OpenFilters.
+ *
+ *  OpenFilters is free software; you can redistribute it and/or modify
+ *  it under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation; either version 2 of the License, or (at
+ *  your option) any later version.
+ *
+ *  OpenFilters is distributed in the hope that it will be useful, but
+ *  WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ *  General Public License for more details.
+ *
+ *  You should have received a copy of the GNU General Public License
+ *  along with this program; if not, write to the Free Software
+ *  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+ *  USA
+ *
+ */
+
+
+#include <Python.h>
+
+#include "_abeles.h"
+#include "_abeles_wrapper.h"
+
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+
+/*********************************************************************/
+/*                                                                   */
+/* new_N_and_derivatives_wrapper                                     */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * new_N_and_derivatives_wrapper(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+	N_and_derivatives_wrapper_object					*self;
+
+	self = (N_and_derivatives_wrapper_object *)type->tp_alloc(type, 0);
+
+	if (self)
+	{
+		self->wvls = NULL;
+		self->N = NULL;
+	}
+
+	return (PyObject *)self;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* init_N_and_derivatives_wrapper                                    */
+/*                                                                   */
+/*********************************************************************/
+static int init_N_and_derivatives_wrapper(N_and_derivatives_wrapper_object *self, PyObject *args, PyObject *kwds)
+{
+	wvls_wrapper_object												*wvls;
+	PyObject																	*tmp;
+
+	if (!PyArg_ParseTuple(args, "O:N_and_derivatives.__init__", &wvls))
+		return -1;
+
+	/* Check the type of the arguments. */
+	if (!wvls_wrapper_Check(wvls))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be wvls");
+		return -1;
+	}
+
+	/* Delete previous instance of N_and_derivatives, if it exists. */
+	if (self->N) del_N_and_derivatives(self->N);
+
+	/* Keep a local copy of wvls. */
+	tmp = (PyObject *)self->wvls;
+	Py_INCREF(wvls);
+	self->wvls = wvls;
+	Py_XDECREF(tmp);
+
+	/* Create the N_and_derivatives. */
+	self->N = new_N_and_derivatives(wvls->wvls);
+	if (!self->N)
+	{
+		PyErr_NoMemory();
+		return -1;
+	}
+
+	return 0;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* dealloc_N_and_derivatives_wrapper                                 */
+/*                                                                   */
+/*********************************************************************/
+static void dealloc_N_and_derivatives_wrapper(N_and_derivatives_wrapper_object *self)
+{
+	if (self->N) del_N_and_derivatives(self->N);
+
+	Py_XDECREF(self->wvls);
+
+	self->ob_type->tp_free((PyObject*)self);
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* set_N_and_derivatives_wrapper                                     */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * set_N_and_derivatives_wrapper(N_and_derivatives_wrapper_object *self, PyObject *args)
+{
+	N_wrapper_object													*N_minus;
+	N_wrapper_object													*N;
+	N_wrapper_object													*N_plus;
+	double																		step;
+
+	if (!PyArg_ParseTuple(args, "OOOd:N_and_derivatives.set_N_and_derivatives", &N_minus, &N, &N_plus, &step))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!N_wrapper_Check(N_minus))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be N");
+		return NULL;
+	}
+	if (!N_wrapper_Check(N))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be N");
+		return NULL;
+	}
+	if (!N_wrapper_Check(N_plus))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be N");
+		return NULL;
+	}
+
+	/* Check the value of arguments. The indices at other angular
+	 * frequencies are calculated at other wavelengths, so only the
+	 * number of wavelengths is verified. */
+	if (N_minus->wvls->wvls->length != self->wvls->wvls->length || N->wvls->wvls->length != self->wvls->wvls->length || N_plus->wvls->wvls->length != self->wvls->wvls->length)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must have the same length as the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	set_N_and_derivatives(self->N, N_minus->N, N->N, N_plus->N, step);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+static PyMethodDef N_and_derivatives_wrapper_type_methods[] =
+{
+	{"set_N_and_derivatives",										(PyCFunction)set_N_and_derivatives_wrapper,										METH_VARARGS},
+	{NULL} /* Sentinel */
+};
+
+
+PyTypeObject N_and_derivatives_wrapper_type = {
+	PyObject_HEAD_INIT(NULL)
+	0,																									/* ob_size */
+	"abeles.N_and_derivatives",													/* tp_name */
+	sizeof(N_and_derivatives_wrapper_object),						/* tp_basicsize */
+	0,																									/* tp_itemsize */
+	(destructor)dealloc_N_and_derivatives_wrapper,			/* tp_dealloc */
+	0,																									/* tp_print */
+	0,																									/* tp_getattr */
+	0,																									/* tp_setattr */
+	0,																									/* tp_compare */
+	0,																									/* tp_repr */
+	0,																									/* tp_as_number */
+	0,																									/* tp_as_sequence */
+	0,																									/* tp_as_mapping */
+	0,																									/* tp_hash */
+	0,																									/* tp_call */
+	0,																									/* tp_str */
+	0,																									/* tp_getattro */
+	0,																									/* tp_setattro */
+	0,																									/* tp_as_buffer */
+	Py_TPFLAGS_DEFAULT,																	/* tp_flags */
+	"N_and_derivatives class",													/* tp_doc */
+	0,																									/* tp_traverse */
+	0,																									/* tp_clear */
+	0,																									/* tp_richcompare */
+	0,																									/* tp_weaklistoffset */
+	0,																									/* tp_iter */
+	0,																									/* tp_iternext */
+	N_and_derivatives_wrapper_type_methods,							/* tp_methods */
+	0,																									/* tp_members */
+	0,																									/* tp_getset */
+	0,																									/* tp_base */
+	0,																									/* tp_dict */
+	0,																									/* tp_descr_get */
+	0,																									/* tp_descr_set */
+	0,																									/* tp_dictoffset */
+	(initproc)init_N_and_derivatives_wrapper,						/* tp_init */
+	0,																									/* tp_alloc */
+	new_N_and_derivatives_wrapper,											/* tp_new */
+};
+
+
+/*********************************************************************/
+/*                                                                   */
+/* new_matrices_and_derivatives_wrapper                              */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * new_matrices_and_derivatives_wrapper(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+	matrices_and_derivatives_wrapper_object		*self;
+
+	self = (matrices_and_derivatives_wrapper_object *)type->tp_alloc(type, 0);
+
+	if (self)
+	{
+		self->wvls = NULL;
+		self->matrices = NULL;
+	}
+
+	return (PyObject *)self;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* init_matrices_and_derivatives_wrapper                             */
+/*                                                                   */
+/*********************************************************************/
+static int init_matrices_and_derivatives_wrapper(matrices_and_derivatives_wrapper_object *self, PyObject *args, PyObject *kwds)
+{
+	wvls_wrapper_object												*wvls;
+	PyObject																	*tmp;
+
+	if (!PyArg_ParseTuple(args, "O:matrices_and_derivatives.__init__", &wvls))
+		return -1;
+
+	/* Check the type of the arguments. */
+	if (!wvls_wrapper_Check(wvls))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be wvls");
+		return -1;
+	}
+
+	/* Delete previous instance of matrices_and_derivatives, if it exists. */
+	if (self->matrices) del_matrices_and_derivatives(self->matrices);
+
+	/* Keep a local copy of wvls. */
+	tmp = (PyObject *)self->wvls;
+	Py_INCREF(wvls);
+	self->wvls = wvls;
+	Py_XDECREF(tmp);
+
+	/* Create the matrices_and_derivatives. */
+	self->matrices = new_matrices_and_derivatives(wvls->wvls);
+	if (!self->matrices)
+	{
+		PyErr_NoMemory();
+		return -1;
+	}
+
+	return 0;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* dealloc_matrices_and_derivatives_wrapper                          */
+/*                                                                   */
+/*********************************************************************/
+static void dealloc_matrices_and_derivatives_wrapper(matrices_and_derivatives_wrapper_object *self)
+{
+	if (self->matrices) del_matrices_and_derivatives(self->matrices);
+
+	Py_XDECREF(self->wvls);
+
+	self->ob_type->tp_free((PyObject*)self);
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* set_matrices_unity_wrapper                                        */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * set_matrices_unity_wrapper(matrices_and_derivatives_wrapper_object *self)
+{
+	Py_BEGIN_ALLOW_THREADS
+	set_matrices_and_derivatives_unity(self->matrices);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* set_matrices_wrapper                                              */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * set_matrices_wrapper(matrices_and_derivatives_wrapper_object *self, PyObject *args)
+{
+	N_and_derivatives_wrapper_object					*N;
+	double																		thickness;
+	N_and_derivatives_wrapper_object					*N_m;
+	sin2_wrapper_object												*sin2_theta_0;
+
+	if (!PyArg_ParseTuple(args, "OdOO:matrices_and_derivatives.set_matrices", &N, &thickness, &N_m, &sin2_theta_0))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!N_and_derivatives_wrapper_Check(N))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_m))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (N->wvls != self->wvls || N_m->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	set_matrices_and_derivatives(self->matrices, N->N, thickness, N_m->N, sin2_theta_0->sin2);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* multiply_matrices_wrapper                                         */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * multiply_matrices_wrapper(matrices_and_derivatives_wrapper_object *self, PyObject *args)
+{
+	matrices_and_derivatives_wrapper_object		*M;
+
+	if (!PyArg_ParseTuple(args, "O:matrices_and_derivatives.multiply_matrices", &M))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!matrices_and_derivatives_wrapper_Check(M))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be matrices_and_derivatives");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (M->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	multiply_matrices_and_derivatives(self->matrices, M->matrices);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+static PyMethodDef matrices_and_derivatives_wrapper_type_methods[] =
+{
+	{"set_matrices_unity",											(PyCFunction)set_matrices_unity_wrapper,											METH_NOARGS},
+	{"set_matrices",														(PyCFunction)set_matrices_wrapper,														METH_VARARGS},
+	{"multiply_matrices",												(PyCFunction)multiply_matrices_wrapper,												METH_VARARGS},
+	{NULL} /* Sentinel */
+};
+
+
+PyTypeObject matrices_and_derivatives_wrapper_type = {
+	PyObject_HEAD_INIT(NULL)
+	0,																									/* ob_size */
+	"abeles.matrices_and_derivatives",									/* tp_name */
+	sizeof(matrices_and_derivatives_wrapper_object),		/* tp_basicsize */
+	0,																									/* tp_itemsize */
+	(destructor)dealloc_matrices_and_derivatives_wrapper,	/* tp_dealloc */
+	0,																									/* tp_print */
+	0,																									/* tp_getattr */
+	0,																									/* tp_setattr */
+	0,																									/* tp_compare */
+	0,																									/* tp_repr */
+	0,																									/* tp_as_number */
+	0,																									/* tp_as_sequence */
+	0,																									/* tp_as_mapping */
+	0,																									/* tp_hash */
+	0,																									/* tp_call */
+	0,																									/* tp_str */
+	0,																									/* tp_getattro */
+	0,																									/* tp_setattro */
+	0,																									/* tp_as_buffer */
+	Py_TPFLAGS_DEFAULT,																	/* tp_flags */
+	"matrices_and_derivatives class",										/* tp_doc */
+	0,																									/* tp_traverse */
+	0,																									/* tp_clear */
+	0,																									/* tp_richcompare */
+	0,																									/* tp_weaklistoffset */
+	0,																									/* tp_iter */
+	0,																									/* tp_iternext */
+	matrices_and_derivatives_wrapper_type_methods,			/* tp_methods */
+	0,																									/* tp_members */
+	0,																									/* tp_getset */
+	0,																									/* tp_base */
+	0,																									/* tp_dict */
+	0,																									/* tp_descr_get */
+	0,																									/* tp_descr_set */
+	0,																									/* tp_dictoffset */
+	(initproc)init_matrices_and_derivatives_wrapper,		/* tp_init */
+	0,																									/* tp_alloc */
+	new_matrices_and_derivatives_wrapper,								/* tp_new */
+};
+
+
+#ifdef __cplusplus
+}
+#endif
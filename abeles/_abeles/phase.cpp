@@ -484,6 +484,159 @@ void _calculate_GDD(const spectrum_type *GDD, const spectrum_type *phase, const
 }
 
 
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_r_GD                                                    */
+/*                                                                   */
+/* Calculate the group delay upon reflection                         */
+/* analytically                                                      */
+/*                                                                   */
+/* This function takes 6 arguments:                                  */
+/*   GD                the structure in which to store the results;  */
+/*   M                 the characteristic matrices of the stack and  */
+/*                     their derivatives;                            */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   N_s               the index of refraction of the substrate and  */
+/*                     its derivatives;                              */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle;                            */
+/*   polarization      the polarization of light.                    */
+/*                                                                   */
+/* The GD is determined from the derivatives of the                  */
+/* characteristic matrices with regard to angular frequency.         */
+/* Contrary to calculate_GD, it is exact whatever the spacing of     */
+/* the wavelengths.                                                  */
+/*                                                                   */
+/*********************************************************************/
+void calculate_r_GD(const spectrum_type *GD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization)
+{
+	long														i;
+	double													dphi[4];
+
+	for (i = 0; i < GD->wvls->length; i++)
+	{
+		calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i, &dphi[0], &dphi[1], &dphi[2], &dphi[3]);
+		GD->data[i] = -dphi[0];
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_t_GD                                                    */
+/*                                                                   */
+/* Calculate the group delay upon transmission                       */
+/* analytically                                                      */
+/*                                                                   */
+/* This function takes 6 arguments:                                  */
+/*   GD                the structure in which to store the results;  */
+/*   M                 the characteristic matrices of the stack and  */
+/*                     their derivatives;                            */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   N_s               the index of refraction of the substrate and  */
+/*                     its derivatives;                              */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle;                            */
+/*   polarization      the polarization of light.                    */
+/*                                                                   */
+/* The GD is determined from the derivatives of the                  */
+/* characteristic matrices with regard to angular frequency.         */
+/* Contrary to calculate_GD, it is exact whatever the spacing of     */
+/* the wavelengths.                                                  */
+/*                                                                   */
+/*********************************************************************/
+void calculate_t_GD(const spectrum_type *GD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization)
+{
+	long														i;
+	double													dphi[4];
+
+	for (i = 0; i < GD->wvls->length; i++)
+	{
+		calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i, &dphi[0], &dphi[1], &dphi[2], &dphi[3]);
+		GD->data[i] = -dphi[2];
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_r_GDD                                                   */
+/*                                                                   */
+/* Calculate the group delay dispersion upon reflection              */
+/* analytically                                                      */
+/*                                                                   */
+/* This function takes 6 arguments:                                  */
+/*   GDD               the structure in which to store the results;  */
+/*   M                 the characteristic matrices of the stack and  */
+/*                     their derivatives;                            */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   N_s               the index of refraction of the substrate and  */
+/*                     its derivatives;                              */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle;                            */
+/*   polarization      the polarization of light.                    */
+/*                                                                   */
+/* The GDD is determined from the derivatives of the                 */
+/* characteristic matrices with regard to angular frequency.         */
+/* Contrary to calculate_GDD, it is exact whatever the spacing of    */
+/* the wavelengths.                                                  */
+/*                                                                   */
+/*********************************************************************/
+void calculate_r_GDD(const spectrum_type *GDD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization)
+{
+	long														i;
+	double													dphi[4];
+
+	for (i = 0; i < GDD->wvls->length; i++)
+	{
+		calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i, &dphi[0], &dphi[1], &dphi[2], &dphi[3]);
+		GDD->data[i] = -dphi[1];
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_t_GDD                                                   */
+/*                                                                   */
+/* Calculate the group delay dispersion upon transmission            */
+/* analytically                                                      */
+/*                                                                   */
+/* This function takes 6 arguments:                                  */
+/*   GDD               the structure in which to store the results;  */
+/*   M                 the characteristic matrices of the stack and  */
+/*                     their derivatives;                            */
+/*   N_m               the index of refraction of the medium and its */
+/*                     derivatives;                                  */
+/*   N_s               the index of refraction of the substrate and  */
+/*                     its derivatives;                              */
+/*   sin2_theta_0      the normalized sinus squared of the           */
+/*                     propagation angle;                            */
+/*   polarization      the polarization of light.                    */
+/*                                                                   */
+/* The GDD is determined from the derivatives of the                 */
+/* characteristic matrices with regard to angular frequency.         */
+/* Contrary to calculate_GDD, it is exact whatever the spacing of    */
+/* the wavelengths.                                                  */
+/*                                                                   */
+/*********************************************************************/
+void calculate_t_GDD(const spectrum_type *GDD, const matrices_and_derivatives_type *M, const N_and_derivatives_type *N_m, const N_and_derivatives_type *N_s, const sin2_type *sin2_theta_0, const double polarization)
+{
+	long														i;
+	double													dphi[4];
+
+	for (i = 0; i < GDD->wvls->length; i++)
+	{
+		calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i, &dphi[0], &dphi[1], &dphi[2], &dphi[3]);
+		GDD->data[i] = -dphi[3];
+	}
+}
+
+
 #ifdef __cplusplus
 }
 #endif
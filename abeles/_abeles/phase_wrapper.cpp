@@ -230,9 +230,117 @@ static PyObject * calculate_GD_wrapper(spectrum_wrapper_object *self, PyObject *
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* calculate_r_GD_wrapper                                            */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_r_GD_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	matrices_and_derivatives_wrapper_object		*M;
+	N_and_derivatives_wrapper_object					*N_m;
+	N_and_derivatives_wrapper_object					*N_s;
+	sin2_wrapper_object												*sin2_theta_0;
+	double																		polarization;
+
+	if (!PyArg_ParseTuple(args, "OOOOd:GD.calculate_r_GD", &M, &N_m, &N_s, &sin2_theta_0, &polarization))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!matrices_and_derivatives_wrapper_Check(M))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be matrices_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_m))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_s))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (M->wvls != self->wvls || N_m->wvls != self->wvls || N_s->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_r_GD(self->spectrum, M->matrices, N_m->N, N_s->N, sin2_theta_0->sin2, polarization);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_t_GD_wrapper                                            */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_t_GD_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	matrices_and_derivatives_wrapper_object		*M;
+	N_and_derivatives_wrapper_object					*N_m;
+	N_and_derivatives_wrapper_object					*N_s;
+	sin2_wrapper_object												*sin2_theta_0;
+	double																		polarization;
+
+	if (!PyArg_ParseTuple(args, "OOOOd:GD.calculate_t_GD", &M, &N_m, &N_s, &sin2_theta_0, &polarization))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!matrices_and_derivatives_wrapper_Check(M))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be matrices_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_m))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_s))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (M->wvls != self->wvls || N_m->wvls != self->wvls || N_s->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_t_GD(self->spectrum, M->matrices, N_m->N, N_s->N, sin2_theta_0->sin2, polarization);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef GD_wrapper_type_methods[] =
 {
 	{"calculate_GD",														(PyCFunction)calculate_GD_wrapper,												METH_VARARGS},
+	{"calculate_r_GD",													(PyCFunction)calculate_r_GD_wrapper,													METH_VARARGS},
+	{"calculate_t_GD",													(PyCFunction)calculate_t_GD_wrapper,													METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
@@ -314,9 +422,117 @@ static PyObject * calculate_GDD_wrapper(spectrum_wrapper_object *self, PyObject
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* calculate_r_GDD_wrapper                                           */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_r_GDD_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	matrices_and_derivatives_wrapper_object		*M;
+	N_and_derivatives_wrapper_object					*N_m;
+	N_and_derivatives_wrapper_object					*N_s;
+	sin2_wrapper_object												*sin2_theta_0;
+	double																		polarization;
+
+	if (!PyArg_ParseTuple(args, "OOOOd:GDD.calculate_r_GDD", &M, &N_m, &N_s, &sin2_theta_0, &polarization))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!matrices_and_derivatives_wrapper_Check(M))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be matrices_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_m))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_s))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (M->wvls != self->wvls || N_m->wvls != self->wvls || N_s->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_r_GDD(self->spectrum, M->matrices, N_m->N, N_s->N, sin2_theta_0->sin2, polarization);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_t_GDD_wrapper                                           */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_t_GDD_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	matrices_and_derivatives_wrapper_object		*M;
+	N_and_derivatives_wrapper_object					*N_m;
+	N_and_derivatives_wrapper_object					*N_s;
+	sin2_wrapper_object												*sin2_theta_0;
+	double																		polarization;
+
+	if (!PyArg_ParseTuple(args, "OOOOd:GDD.calculate_t_GDD", &M, &N_m, &N_s, &sin2_theta_0, &polarization))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!matrices_and_derivatives_wrapper_Check(M))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be matrices_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_m))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!N_and_derivatives_wrapper_Check(N_s))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be N_and_derivatives");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (M->wvls != self->wvls || N_m->wvls != self->wvls || N_s->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_t_GDD(self->spectrum, M->matrices, N_m->N, N_s->N, sin2_theta_0->sin2, polarization);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef GDD_wrapper_type_methods[] =
 {
 	{"calculate_GDD",														(PyCFunction)calculate_GDD_wrapper,												METH_VARARGS},
+	{"calculate_r_GDD",													(PyCFunction)calculate_r_GDD_wrapper,													METH_VARARGS},
+	{"calculate_t_GDD",													(PyCFunction)calculate_t_GDD_wrapper,													METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
@@ -41,6 +41,7 @@ extern "C" {
 
 
 const double two_pi = 2.0*M_PI;
+static const std::complex<double> j = std::complex<double>(0.0, 1.0);
 
 
 /*********************************************************************/
@@ -54,13 +55,15 @@ const double two_pi = 2.0*M_PI;
 /*                     spectrum;                                     */
 /* and returns a spectrum structure.                                 */
 /*                                                                   */
-/* If the creation of the structure fails because of a lack of heap  */
-/* memory, a NULL pointer is returned.                               */
+/* The spectrum is initialized to 0. If the creation of the          */
+/* structure fails because of a lack of heap memory, a NULL pointer  */
+/* is returned.                                                      */
 /*                                                                   */
 /*********************************************************************/
 spectrum_type * new_spectrum(const wvls_type *wvls)
 {
 	spectrum_type										*spectrum;
+	long														i;
 
 	spectrum = (spectrum_type *)malloc(sizeof(spectrum_type));
 
@@ -75,6 +78,9 @@ spectrum_type * new_spectrum(const wvls_type *wvls)
 		return NULL;
 	}
 
+	for (i = 0; i < spectrum->wvls->length; i++)
+		spectrum->data[i] = 0.0;
+
 	return spectrum;
 }
 
@@ -101,6 +107,30 @@ void del_spectrum(spectrum_type *spectrum)
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* add_weighted_spectrum                                             */
+/*                                                                   */
+/* Add a weighted spectrum to another one                            */
+/*                                                                   */
+/* This function takes 3 arguments:                                  */
+/*   sum               the structure to which to add the spectrum;   */
+/*   spectrum          the spectrum to add;                          */
+/*   weight            the weight of the spectrum.                   */
+/*                                                                   */
+/* This function is used to average spectra, for example over the    */
+/* angles of a cone of light.                                        */
+/*                                                                   */
+/*********************************************************************/
+void add_weighted_spectrum(const spectrum_type *sum, const spectrum_type *spectrum, const double weight)
+{
+	long														i;
+
+	for (i = 0; i < sum->wvls->length; i++)
+		sum->data[i] += weight * spectrum->data[i];
+}
+
+
 /*********************************************************************/
 /*                                                                   */
 /* calculate_R                                                       */
@@ -297,6 +327,228 @@ void calculate_T_with_backside(const spectrum_type *T, const spectrum_type *T_fr
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* partial_coherence_sums                                            */
+/*                                                                   */
+/* Calculate the sums of the round trips in a partially coherent     */
+/* substrate                                                         */
+/*                                                                   */
+/* This function takes 4 arguments:                                  */
+/*   z                 the amplitude of a round trip in the          */
+/*                     substrate;                                    */
+/*   a                 the exponent of the degree of coherence,      */
+/*                     which is exp(-a*k*k) for k round trips;       */
+/*   sum_T             a pointer to store the sum of                 */
+/*                     z^k*exp(-a*k*k) for k from 1;                 */
+/*   sum_R             a pointer to store the sum of                 */
+/*                     z^(k-1)*exp(-a*k*k) for k from 1.             */
+/*                                                                   */
+/* The sums are truncated when the terms become negligible.          */
+/*                                                                   */
+/*********************************************************************/
+static void partial_coherence_sums(const std::complex<double> z, const double a, std::complex<double> *sum_T, std::complex<double> *sum_R)
+{
+	std::complex<double>						z_k_minus_1, term;
+	long														k;
+
+	*sum_T = 0.0;
+	*sum_R = 0.0;
+	z_k_minus_1 = 1.0;
+	for (k = 1;; k++)
+	{
+		term = z_k_minus_1*exp(-a*(double)(k*k));
+		if (abs(term) < 1.0e-15) break;
+		*sum_R += term;
+		*sum_T += term*z;
+		z_k_minus_1 *= z;
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_R_with_partial_coherence                                */
+/*                                                                   */
+/* Calculate reflectance with consideration of the backside for a    */
+/* partially coherent substrate                                      */
+/*                                                                   */
+/* This function takes 9 arguments:                                  */
+/*   R                     the structure in which to store the       */
+/*                         results;                                  */
+/*   r_and_t_front         the amplitude reflection and transmission */
+/*                         of the front side;                        */
+/*   r_and_t_front_reverse the amplitude reflection and transmission */
+/*                         of the front side in reverse direction;   */
+/*   r_and_t_back          the amplitude reflection and transmission */
+/*                         of the back side;                         */
+/*   N_s                   the index of refraction of the substrate; */
+/*   thickness             the thickness of the substrate;           */
+/*   sin2_theta_0          the normalized sinus squared of the       */
+/*                         propagation angle;                        */
+/*   polarization          the polarization of light;                */
+/*   coherence_length      the coherence length of light.            */
+/*                                                                   */
+/* The multiple reflections in the substrate are added coherently    */
+/* and averaged over the phase of the substrate. The degree of       */
+/* coherence of two waves whose optical paths differ by Delta is     */
+/* exp(-Delta^2/(2*coherence_length^2)).                             */
+/*                                                                   */
+/*********************************************************************/
+void calculate_R_with_partial_coherence(const spectrum_type *R, const r_and_t_type *r_and_t_front, const r_and_t_type *r_and_t_front_reverse, const r_and_t_type *r_and_t_back, const N_type *N_s, const double thickness, const sin2_type *sin2_theta_0, const double polarization, const double coherence_length)
+{
+	std::complex<double>						N_square, N_s_s, exp_minus_2j_beta;
+	std::complex<double>						r_front[2], t_front[2], r_front_reverse[2], t_front_reverse[2], r_back[2];
+	std::complex<double>						z, B, sum_T, sum_R;
+	double													Psi, sin_Psi, weights[2];
+	double													Delta, a;
+	long														i;
+	int															i_pol;
+
+	Psi = polarization*M_PI/180.0;
+	sin_Psi = sin(Psi);
+	weights[0] = sin_Psi*sin_Psi;
+	weights[1] = 1.0-weights[0];
+
+	for (i = 0; i < R->wvls->length; i++)
+	{
+		N_square = N_s->N[i]*N_s->N[i];
+		N_s_s = sqrt(N_square - sin2_theta_0->sin2[i]);
+
+		/* Correct branch selection. */
+		if (real(N_s_s) == 0.0)
+			N_s_s = -N_s_s;
+
+		exp_minus_2j_beta = exp(-2.0*j*two_pi*thickness*N_s_s/R->wvls->wvls[i]);
+		Delta = 2.0*thickness*real(N_s_s)/coherence_length;
+		a = 0.5*Delta*Delta;
+
+		r_front[0] = r_and_t_front->r_s[i];
+		t_front[0] = r_and_t_front->t_s[i];
+		r_front_reverse[0] = r_and_t_front_reverse->r_s[i];
+		t_front_reverse[0] = r_and_t_front_reverse->t_s[i];
+		r_back[0] = r_and_t_back->r_s[i];
+		r_front[1] = r_and_t_front->r_p[i];
+		t_front[1] = r_and_t_front->t_p[i];
+		r_front_reverse[1] = r_and_t_front_reverse->r_p[i];
+		t_front_reverse[1] = r_and_t_front_reverse->t_p[i];
+		r_back[1] = r_and_t_back->r_p[i];
+
+		R->data[i] = 0.0;
+
+		for (i_pol = 0; i_pol < 2; i_pol++)
+		{
+			if (weights[i_pol] == 0.0) continue;
+
+			z = r_front_reverse[i_pol]*r_back[i_pol]*exp_minus_2j_beta;
+			B = t_front[i_pol]*t_front_reverse[i_pol]*r_back[i_pol]*exp_minus_2j_beta;
+
+			partial_coherence_sums(z, a, &sum_T, &sum_R);
+
+			R->data[i] += weights[i_pol] * (norm(r_front[i_pol])\
+			                                + 2.0*real(conj(r_front[i_pol])*B*sum_R)\
+			                                + norm(B)/(1.0-norm(z))*(1.0+2.0*real(sum_T)));
+		}
+	}
+}
+
+
+/*********************************************************************/
+/*                                                                   */
+/* calculate_T_with_partial_coherence                                */
+/*                                                                   */
+/* Calculate transmittance with consideration of the backside for a  */
+/* partially coherent substrate                                      */
+/*                                                                   */
+/* This function takes 11 arguments:                                 */
+/*   T                     the structure in which to store the       */
+/*                         results;                                  */
+/*   r_and_t_front         the amplitude reflection and transmission */
+/*                         of the front side;                        */
+/*   r_and_t_front_reverse the amplitude reflection and transmission */
+/*                         of the front side in reverse direction;   */
+/*   r_and_t_back          the amplitude reflection and transmission */
+/*                         of the back side;                         */
+/*   N_i                   the index of refraction of the incidence  */
+/*                         medium;                                   */
+/*   N_s                   the index of refraction of the substrate; */
+/*   N_e                   the index of refraction of the exit       */
+/*                         medium;                                   */
+/*   thickness             the thickness of the substrate;           */
+/*   sin2_theta_0          the normalized sinus squared of the       */
+/*                         propagation angle;                        */
+/*   polarization          the polarization of light;                */
+/*   coherence_length      the coherence length of light.            */
+/*                                                                   */
+/* See calculate_R_with_partial_coherence for the definition of the  */
+/* coherence length.                                                 */
+/*                                                                   */
+/*********************************************************************/
+void calculate_T_with_partial_coherence(const spectrum_type *T, const r_and_t_type *r_and_t_front, const r_and_t_type *r_and_t_front_reverse, const r_and_t_type *r_and_t_back, const N_type *N_i, const N_type *N_s, const N_type *N_e, const double thickness, const sin2_type *sin2_theta_0, const double polarization, const double coherence_length)
+{
+	std::complex<double>						N_square, N_s_s, exp_minus_2j_beta;
+	std::complex<double>						N_i_s, N_i_p, N_e_s, N_e_p;
+	std::complex<double>						t_front[2], r_front_reverse[2], r_back[2], t_back[2];
+	std::complex<double>						z, sum_T, sum_R;
+	double													Psi, sin_Psi, weights[2], ratios[2];
+	double													Delta, a;
+	long														i;
+	int															i_pol;
+
+	Psi = polarization*M_PI/180.0;
+	sin_Psi = sin(Psi);
+	weights[0] = sin_Psi*sin_Psi;
+	weights[1] = 1.0-weights[0];
+
+	for (i = 0; i < T->wvls->length; i++)
+	{
+		N_square = N_s->N[i]*N_s->N[i];
+		N_s_s = sqrt(N_square - sin2_theta_0->sin2[i]);
+
+		/* Correct branch selection. */
+		if (real(N_s_s) == 0.0)
+			N_s_s = -N_s_s;
+
+		exp_minus_2j_beta = exp(-2.0*j*two_pi*thickness*N_s_s/T->wvls->wvls[i]);
+		Delta = 2.0*thickness*real(N_s_s)/coherence_length;
+		a = 0.5*Delta*Delta;
+
+		N_square = N_i->N[i]*N_i->N[i];
+		N_i_s = sqrt(N_square - sin2_theta_0->sin2[i]);
+		N_i_p = N_square/N_i_s;
+		N_square = N_e->N[i]*N_e->N[i];
+		N_e_s = sqrt(N_square - sin2_theta_0->sin2[i]);
+		N_e_p = N_square/N_e_s;
+
+		t_front[0] = r_and_t_front->t_s[i];
+		r_front_reverse[0] = r_and_t_front_reverse->r_s[i];
+		r_back[0] = r_and_t_back->r_s[i];
+		t_back[0] = r_and_t_back->t_s[i];
+		ratios[0] = real(N_e_s)/real(N_i_s);
+		t_front[1] = r_and_t_front->t_p[i];
+		r_front_reverse[1] = r_and_t_front_reverse->r_p[i];
+		r_back[1] = r_and_t_back->r_p[i];
+		t_back[1] = r_and_t_back->t_p[i];
+		ratios[1] = real(N_e_p)/real(N_i_p);
+
+		T->data[i] = 0.0;
+
+		for (i_pol = 0; i_pol < 2; i_pol++)
+		{
+			if (weights[i_pol] == 0.0) continue;
+
+			z = r_front_reverse[i_pol]*r_back[i_pol]*exp_minus_2j_beta;
+
+			partial_coherence_sums(z, a, &sum_T, &sum_R);
+
+			/* The norm of exp(-j*beta) is the absolute value of
+			 * exp(-2j*beta). */
+			T->data[i] += weights[i_pol] * ratios[i_pol]*norm(t_front[i_pol]*t_back[i_pol])*abs(exp_minus_2j_beta)/(1.0-norm(z))*(1.0+2.0*real(sum_T));
+		}
+	}
+}
+
+
 /*********************************************************************/
 /*                                                                   */
 /* calculate_A                                                       */
@@ -214,8 +214,44 @@ static PyObject * spectrum_wrapper_subscript(spectrum_wrapper_object* self, PyOb
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* add_weighted_spectrum_wrapper                                     */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * add_weighted_spectrum_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	spectrum_wrapper_object										*spectrum;
+	double																		weight;
+
+	if (!PyArg_ParseTuple(args, "Od:spectrum.add_weighted_spectrum", &spectrum, &weight))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!spectrum_wrapper_Check(spectrum))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be a spectrum");
+		return NULL;
+	}
+
+	/* Check that the spectra have the same length. */
+	if (spectrum->spectrum->wvls->length != self->spectrum->wvls->length)
+	{
+		PyErr_SetString(PyExc_ValueError, "spectra must have the same length");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	add_weighted_spectrum(self->spectrum, spectrum->spectrum, weight);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef spectrum_wrapper_type_methods[] =
 {
+	{"add_weighted_spectrum",										(PyCFunction)add_weighted_spectrum_wrapper,										METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
@@ -387,10 +423,72 @@ static PyObject * calculate_R_with_backside_wrapper(spectrum_wrapper_object *sel
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* calculate_R_with_partial_coherence_wrapper                        */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_R_with_partial_coherence_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	r_and_t_wrapper_object										*r_and_t_front;
+	r_and_t_wrapper_object										*r_and_t_front_reverse;
+	r_and_t_wrapper_object										*r_and_t_back;
+	N_wrapper_object													*N_s;
+	double																		thickness;
+	sin2_wrapper_object												*sin2_theta_0;
+	double																		polarization;
+	double																		coherence_length;
+
+	if (!PyArg_ParseTuple(args, "OOOOdOdd:spectrum.calculate_R_with_partial_coherence", &r_and_t_front, &r_and_t_front_reverse, &r_and_t_back, &N_s, &thickness, &sin2_theta_0, &polarization, &coherence_length))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!r_and_t_wrapper_Check(r_and_t_front))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be r_and_t");
+		return NULL;
+	}
+	if (!r_and_t_wrapper_Check(r_and_t_front_reverse))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be r_and_t");
+		return NULL;
+	}
+	if (!r_and_t_wrapper_Check(r_and_t_back))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be r_and_t");
+		return NULL;
+	}
+	if (!N_wrapper_Check(N_s))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be N");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "6th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (r_and_t_front->wvls != self->wvls || r_and_t_front_reverse->wvls != self->wvls || r_and_t_back->wvls != self->wvls || N_s->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_R_with_partial_coherence(self->spectrum, r_and_t_front->r_and_t, r_and_t_front_reverse->r_and_t, r_and_t_back->r_and_t, N_s->N, thickness, sin2_theta_0->sin2, polarization, coherence_length);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef R_wrapper_type_methods[] =
 {
 	{"calculate_R",															(PyCFunction)calculate_R_wrapper,															METH_VARARGS},
 	{"calculate_R_with_backside",								(PyCFunction)calculate_R_with_backside_wrapper,								METH_VARARGS},
+	{"calculate_R_with_partial_coherence",			(PyCFunction)calculate_R_with_partial_coherence_wrapper,			METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
@@ -556,10 +654,84 @@ static PyObject * calculate_T_with_backside_wrapper(spectrum_wrapper_object *sel
 }
 
 
+/*********************************************************************/
+/*                                                                   */
+/* calculate_T_with_partial_coherence_wrapper                        */
+/*                                                                   */
+/*********************************************************************/
+static PyObject * calculate_T_with_partial_coherence_wrapper(spectrum_wrapper_object *self, PyObject *args)
+{
+	r_and_t_wrapper_object										*r_and_t_front;
+	r_and_t_wrapper_object										*r_and_t_front_reverse;
+	r_and_t_wrapper_object										*r_and_t_back;
+	N_wrapper_object													*N_i;
+	N_wrapper_object													*N_s;
+	N_wrapper_object													*N_e;
+	double																		thickness;
+	sin2_wrapper_object												*sin2_theta_0;
+	double																		polarization;
+	double																		coherence_length;
+
+	if (!PyArg_ParseTuple(args, "OOOOOOdOdd:spectrum.calculate_T_with_partial_coherence", &r_and_t_front, &r_and_t_front_reverse, &r_and_t_back, &N_i, &N_s, &N_e, &thickness, &sin2_theta_0, &polarization, &coherence_length))
+		return NULL;
+
+	/* Check the type of the arguments. */
+	if (!r_and_t_wrapper_Check(r_and_t_front))
+	{
+		PyErr_SetString(PyExc_TypeError, "first argument must be r_and_t");
+		return NULL;
+	}
+	if (!r_and_t_wrapper_Check(r_and_t_front_reverse))
+	{
+		PyErr_SetString(PyExc_TypeError, "2nd argument must be r_and_t");
+		return NULL;
+	}
+	if (!r_and_t_wrapper_Check(r_and_t_back))
+	{
+		PyErr_SetString(PyExc_TypeError, "3rd argument must be r_and_t");
+		return NULL;
+	}
+	if (!N_wrapper_Check(N_i))
+	{
+		PyErr_SetString(PyExc_TypeError, "4th argument must be N");
+		return NULL;
+	}
+	if (!N_wrapper_Check(N_s))
+	{
+		PyErr_SetString(PyExc_TypeError, "5th argument must be N");
+		return NULL;
+	}
+	if (!N_wrapper_Check(N_e))
+	{
+		PyErr_SetString(PyExc_TypeError, "6th argument must be N");
+		return NULL;
+	}
+	if (!sin2_wrapper_Check(sin2_theta_0))
+	{
+		PyErr_SetString(PyExc_TypeError, "8th argument must be sin2");
+		return NULL;
+	}
+
+	/* Check the value of arguments. */
+	if (r_and_t_front->wvls != self->wvls || r_and_t_front_reverse->wvls != self->wvls || r_and_t_back->wvls != self->wvls || N_i->wvls != self->wvls || N_s->wvls != self->wvls || N_e->wvls != self->wvls || sin2_theta_0->wvls != self->wvls)
+	{
+		PyErr_SetString(PyExc_ValueError, "arguments must share wvls of the object");
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	calculate_T_with_partial_coherence(self->spectrum, r_and_t_front->r_and_t, r_and_t_front_reverse->r_and_t, r_and_t_back->r_and_t, N_i->N, N_s->N, N_e->N, thickness, sin2_theta_0->sin2, polarization, coherence_length);
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
+}
+
+
 static PyMethodDef T_wrapper_type_methods[] =
 {
 	{"calculate_T",															(PyCFunction)calculate_T_wrapper,															METH_VARARGS},
 	{"calculate_T_with_backside",								(PyCFunction)calculate_T_with_backside_wrapper,								METH_VARARGS},
+	{"calculate_T_with_partial_coherence",			(PyCFunction)calculate_T_with_partial_coherence_wrapper,			METH_VARARGS},
 	{NULL} /* Sentinel */
 };
 
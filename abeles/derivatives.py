@@ -37,6 +37,7 @@ from matrices import matrices
 from r_and_t import r_and_t
 from spectro import spectrum
 from phase import GD, GDD
+from ellipso import Psi_and_Delta
 
 
 
@@ -46,6 +47,7 @@ N_class = N
 
 
 two_pi = 2.0*math.pi
+one_hundred_eighty_over_pi = 180.0/math.pi
 
 
 
@@ -248,7 +250,10 @@ class dM(matrices):
 		The derivative of the index of refraction, dN, is with regard to
 		the real part of the index of refraction at the reference
 		wavelength and is calculated from the dispersion relation of the
-		mixture considered (see N_mixture)."""
+		mixture considered (see N_mixture). It can also be the derivative
+		with regard to a parameter of a dispersion model (see
+		set_dN_Cauchy and set_dN_Sellmeier), dMi is then the derivative
+		with regard to that parameter."""
 		
 		for i in range(self.wvls.length):
 			k = two_pi/self.wvls.wvls[i]
@@ -961,6 +966,53 @@ class dA(spectrum):
 
 
 
+########################################################################
+#                                                                      #
+# dPsi_and_Delta                                                       #
+#                                                                      #
+########################################################################
+class dPsi_and_Delta(Psi_and_Delta):
+	"""A class to calculate the derivative of the ellipsometric
+	variables"""
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_dPsi_and_Delta                                           #
+	#                                                                    #
+	######################################################################
+	def calculate_dPsi_and_Delta(self, r_and_t, dr_and_dt):
+		"""Calculate the derivative of Psi and Delta
+		
+		This method takes 2 arguments:
+		  r_and_t           the amplitude reflection and transmission of
+		                    the filter;
+		  dr_and_dt         the derivative of the amplitude reflection and
+		                    transmission of the filter.
+		
+		Since tan(Psi)*exp(j*Delta) = -r_p/r_s, the derivative of its
+		logarithm is dr_p/r_p - dr_s/r_s. Its real part gives the
+		derivative of Psi (divided by sin(Psi)*cos(Psi)) and its imaginary
+		part the derivative of Delta. The derivatives are in degres and
+		are set to 0 where r_p or r_s is 0."""
+		
+		for i in range(self.wvls.length):
+			if r_and_t.r_p[i] == 0.0 or r_and_t.r_s[i] == 0.0:
+				self.Psi[i] = 0.0
+				self.Delta[i] = 0.0
+			
+			else:
+				dln_rho = dr_and_dt.r_p[i]/r_and_t.r_p[i] - dr_and_dt.r_s[i]/r_and_t.r_s[i]
+				
+				abs_r_p = abs(r_and_t.r_p[i])
+				abs_r_s = abs(r_and_t.r_s[i])
+				sin_Psi_cos_Psi = abs_r_p*abs_r_s/(abs_r_p*abs_r_p+abs_r_s*abs_r_s)
+				
+				self.Psi[i] = dln_rho.real*sin_Psi_cos_Psi*one_hundred_eighty_over_pi
+				self.Delta[i] = dln_rho.imag*one_hundred_eighty_over_pi
+
+
+
 ########################################################################
 #                                                                      #
 # dphase                                                               #
@@ -273,6 +273,43 @@ class Cauchy(object):
 			wvl_micron_square = wvl_micron*wvl_micron
 			N.N[i] = complex(self.A + self.B/wvl_micron_square + self.C/(wvl_micron_square*wvl_micron_square),
 			                 -self.Ak*math.exp(12400.0*self.exponent*((1.0/(10000.0*wvl_micron))-(1.0/self.edge))))
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_dN_Cauchy                                                      #
+	#                                                                    #
+	######################################################################
+	def set_dN_Cauchy(self, dN, parameter_nb):
+		"""Set the derivative of the index of refraction of a Cauchy
+		dispersion with regard to one of its parameters
+		
+		This method takes 2 arguments:
+		  dN                the index of refraction instance that must
+		                    be set with the derivative;
+		  parameter_nb      the number of the parameter, in the order of
+		                    set_Cauchy (0 for A, ..., 5 for edge)."""
+		
+		if parameter_nb < 0 or parameter_nb > 5:
+			raise IndexError("parameter number out of range")
+		
+		for i in range(dN.wvls.length):
+			wvl_micron = 0.001*dN.wvls.wvls[i]
+			wvl_micron_square = wvl_micron*wvl_micron
+			if parameter_nb == 0:
+				dN.N[i] = 1.0+0.0j
+			elif parameter_nb == 1:
+				dN.N[i] = complex(1.0/wvl_micron_square, 0.0)
+			elif parameter_nb == 2:
+				dN.N[i] = complex(1.0/(wvl_micron_square*wvl_micron_square), 0.0)
+			else:
+				exponential = math.exp(12400.0*self.exponent*((1.0/(10000.0*wvl_micron))-(1.0/self.edge)))
+				if parameter_nb == 3:
+					dN.N[i] = complex(0.0, -exponential)
+				elif parameter_nb == 4:
+					dN.N[i] = complex(0.0, -self.Ak*exponential*12400.0*((1.0/(10000.0*wvl_micron))-(1.0/self.edge)))
+				else:
+					dN.N[i] = complex(0.0, -self.Ak*exponential*12400.0*self.exponent/(self.edge*self.edge))
 
 
 
@@ -353,3 +390,55 @@ class Sellmeier(object):
 			except (ZeroDivisionError, ValueError):
 				n = 0.0
 			N.N[i] = complex(n, -self.Ak*math.exp(12400.0*self.exponent*((1.0/(10000.0*wvl_micron))-(1.0/self.edge))))
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_dN_Sellmeier                                                   #
+	#                                                                    #
+	######################################################################
+	def set_dN_Sellmeier(self, dN, parameter_nb):
+		"""Set the derivative of the index of refraction of a Sellmeier
+		dispersion with regard to one of its parameters
+		
+		This method takes 2 arguments:
+		  dN                the index of refraction instance that must
+		                    be set with the derivative;
+		  parameter_nb      the number of the parameter, in the order of
+		                    set_Sellmeier (0 for B1, ..., 8 for edge).
+		
+		Where the index of refraction is undefined, the derivative is
+		set to 0."""
+		
+		if parameter_nb < 0 or parameter_nb > 8:
+			raise IndexError("parameter number out of range")
+		
+		B = [self.B1, self.B2, self.B3]
+		C = [self.C1, self.C2, self.C3]
+		
+		for i in range(dN.wvls.length):
+			wvl_micron = 0.001*dN.wvls.wvls[i]
+			wvl_micron_square = wvl_micron*wvl_micron
+			if parameter_nb < 6:
+				try:
+					n = math.sqrt(1.0+B[0]*wvl_micron_square/(wvl_micron_square-C[0])\
+					                 +B[1]*wvl_micron_square/(wvl_micron_square-C[1])\
+					                 +B[2]*wvl_micron_square/(wvl_micron_square-C[2]))
+				except (ZeroDivisionError, ValueError):
+					n = 0.0
+				if n == 0.0:
+					dN.N[i] = 0.0+0.0j
+				else:
+					term = parameter_nb//2
+					if parameter_nb % 2 == 0:
+						dN.N[i] = complex(0.5*wvl_micron_square/(wvl_micron_square-C[term])/n, 0.0)
+					else:
+						dN.N[i] = complex(0.5*B[term]*wvl_micron_square/((wvl_micron_square-C[term])*(wvl_micron_square-C[term]))/n, 0.0)
+			else:
+				exponential = math.exp(12400.0*self.exponent*((1.0/(10000.0*wvl_micron))-(1.0/self.edge)))
+				if parameter_nb == 6:
+					dN.N[i] = complex(0.0, -exponential)
+				elif parameter_nb == 7:
+					dN.N[i] = complex(0.0, -self.Ak*exponential*12400.0*((1.0/(10000.0*wvl_micron))-(1.0/self.edge)))
+				else:
+					dN.N[i] = complex(0.0, -self.Ak*exponential*12400.0*self.exponent/(self.edge*self.edge))
@@ -0,0 +1,369 @@
+# omega_derivatives.py
+#
+# Classes to calculate the characteristic matrices of a stack together
+# with their first and second derivatives with regard to the angular
+# frequency. They are used to calculate the GD and the GDD
+# analytically.
+#
+# Copyright (c) 2016 Stephane Larouche.
+#
+# This file is part of OpenFilters.
+#
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+
+import math
+import cmath
+
+# Import seperatly the elements of the abeles module to avoid the
+# loading of the dll if it exists.
+from definitions import *
+from matrices import matrices
+
+
+
+two_pi = 2.0*math.pi
+
+# The speed of light in nm/s.
+c = 299792458.0 * 1e9
+two_pi_c = two_pi*c
+
+
+
+########################################################################
+#                                                                      #
+# N_and_derivatives                                                    #
+#                                                                      #
+########################################################################
+class N_and_derivatives(object):
+	"""A class to store an index of refraction and its first and second
+	derivatives with regard to the angular frequency"""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, wvls):
+		"""Initialize an instance of the N_and_derivatives class
+		
+		This method takes 1 argument:
+		  wvls              the wavelengths at which to calculate the
+		                    index of refraction and its derivatives."""
+		
+		self.wvls = wvls
+		self.N = [0.0+0.0j]*self.wvls.length
+		self.dN = [0.0+0.0j]*self.wvls.length
+		self.d2N = [0.0+0.0j]*self.wvls.length
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_N_and_derivatives                                              #
+	#                                                                    #
+	######################################################################
+	def set_N_and_derivatives(self, N_minus, N, N_plus, step):
+		"""Set the index of refraction and its derivatives
+		
+		This method takes 4 arguments:
+		  N_minus           the index of refraction at the angular
+		                    frequencies (1-step) times those of the
+		                    wavelengths;
+		  N                 the index of refraction at the wavelengths;
+		  N_plus            the index of refraction at the angular
+		                    frequencies (1+step) times those of the
+		                    wavelengths;
+		  step              the relative step on the angular frequency.
+		
+		The derivatives are determined by centered differences. The
+		dispersion of materials is smooth, so a small step gives precise
+		derivatives."""
+		
+		for i in range(self.wvls.length):
+			h = step*two_pi_c/self.wvls.wvls[i]
+			
+			self.N[i] = N.N[i]
+			self.dN[i] = (N_plus.N[i]-N_minus.N[i])/(2.0*h)
+			self.d2N[i] = (N_plus.N[i]-2.0*N.N[i]+N_minus.N[i])/(h*h)
+
+
+
+########################################################################
+#                                                                      #
+# calculate_admittances_and_derivatives                                #
+#                                                                      #
+########################################################################
+def calculate_admittances_and_derivatives(N, N_m, sin2_theta_0, i):
+	"""Calculate the admittances of a material and their derivatives
+	
+	This function takes 4 arguments:
+	  N                 the index of refraction of the material and its
+	                    derivatives;
+	  N_m               the index of refraction of the medium and its
+	                    derivatives;
+	  sin2_theta_0      the normalized sinus squared of the propagation
+	                    angle;
+	  i                 the position of the wavelength;
+	and returns the s and p admittances and their first and second
+	derivatives with regard to the angular frequency as a tuple
+	(N_s, dN_s, d2N_s, N_p, dN_p, d2N_p).
+	
+	The normalized sinus squared of the propagation angle is
+	proportional to the square of the index of the medium and its
+	derivatives are calculated accordingly."""
+	
+	N_square = N.N[i]*N.N[i]
+	dN_square = 2.0*N.N[i]*N.dN[i]
+	d2N_square = 2.0*(N.dN[i]*N.dN[i] + N.N[i]*N.d2N[i])
+	
+	sin2 = sin2_theta_0.sin2[i]
+	if sin2 == 0.0:
+		dsin2 = d2sin2 = 0.0
+	else:
+		sin2_theta = sin2/(N_m.N[i]*N_m.N[i])
+		dsin2 = 2.0*sin2_theta*N_m.N[i]*N_m.dN[i]
+		d2sin2 = 2.0*sin2_theta*(N_m.dN[i]*N_m.dN[i] + N_m.N[i]*N_m.d2N[i])
+	
+	N_s = cmath.sqrt(N_square-sin2)
+	
+	# Correct branch selection.
+	if N_s.real == 0.0:
+		N_s = -N_s
+	
+	# Since N_s^2 = N^2 - sin2 and N_p*N_s = N^2, the derivatives are
+	# obtained by differentiating these products.
+	dN_s = (dN_square-dsin2)/(2.0*N_s)
+	d2N_s = (d2N_square-d2sin2-2.0*dN_s*dN_s)/(2.0*N_s)
+	
+	N_p = N_square/N_s
+	dN_p = (dN_square-N_p*dN_s)/N_s
+	d2N_p = (d2N_square-2.0*dN_p*dN_s-N_p*d2N_s)/N_s
+	
+	return N_s, dN_s, d2N_s, N_p, dN_p, d2N_p
+
+
+
+########################################################################
+#                                                                      #
+# matrices_and_derivatives                                             #
+#                                                                      #
+########################################################################
+class matrices_and_derivatives(object):
+	"""A class to calculate the characteristic matrices of a stack and
+	their first and second derivatives with regard to the angular
+	frequency"""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, wvls):
+		"""Initialize an instance of the matrices_and_derivatives class
+		
+		This method takes 1 argument:
+		  wvls              the wavelengths at which to calculate the
+		                    characteristic matrices."""
+		
+		self.wvls = wvls
+		
+		self.M = matrices(self.wvls)
+		self.dM = matrices(self.wvls)
+		self.d2M = matrices(self.wvls)
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_matrices_unity                                                 #
+	#                                                                    #
+	######################################################################
+	def set_matrices_unity(self):
+		"""Set the caracteristic matrices to unity matrices and their
+		derivatives to 0"""
+		
+		self.M.set_matrices_unity()
+		
+		for i in range(self.wvls.length):
+			for j in range(4):
+				self.dM.s[i][j] = self.dM.p[i][j] = 0.0+0.0j
+				self.d2M.s[i][j] = self.d2M.p[i][j] = 0.0+0.0j
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_matrices                                                       #
+	#                                                                    #
+	######################################################################
+	def set_matrices(self, N, thickness, N_m, sin2_theta_0):
+		"""Set the caracteristic matrices of a layer and their derivatives
+		
+		This method takes 4 arguments:
+		  N                 the index of refraction of the layer and its
+		                    derivatives;
+		  thickness         the thickness of the layer;
+		  N_m               the index of refraction of the medium and its
+		                    derivatives;
+		  sin2_theta_0      the normalized sinus squared of the propagation
+		                    angle."""
+		
+		for i in range(self.wvls.length):
+			omega = two_pi_c/self.wvls.wvls[i]
+			
+			N_s, dN_s, d2N_s, N_p, dN_p, d2N_p = calculate_admittances_and_derivatives(N, N_m, sin2_theta_0, i)
+			
+			# phi = omega/c*N_s*thickness.
+			phi = omega/c*N_s*thickness
+			dphi = (N_s + omega*dN_s)*thickness/c
+			d2phi = (2.0*dN_s + omega*d2N_s)*thickness/c
+			
+			if phi.imag < -100.0:
+				phi = phi.real + -100.0j
+			
+			cos_phi = cmath.cos(phi)
+			j_sin_phi = 1.0j*cmath.sin(phi)
+			
+			dcos_phi = j_sin_phi*1.0j*dphi
+			d2cos_phi = -cos_phi*dphi*dphi + j_sin_phi*1.0j*d2phi
+			dj_sin_phi = 1.0j*cos_phi*dphi
+			d2j_sin_phi = j_sin_phi*(-dphi*dphi) + 1.0j*cos_phi*d2phi
+			
+			self.M.s[i][0] = self.M.s[i][3] = self.M.p[i][0] = self.M.p[i][3] = cos_phi
+			self.dM.s[i][0] = self.dM.s[i][3] = self.dM.p[i][0] = self.dM.p[i][3] = dcos_phi
+			self.d2M.s[i][0] = self.d2M.s[i][3] = self.d2M.p[i][0] = self.d2M.p[i][3] = d2cos_phi
+			
+			for Mi, dMi, d2Mi, Y, dY, d2Y in ((self.M.s[i], self.dM.s[i], self.d2M.s[i], N_s, dN_s, d2N_s), (self.M.p[i], self.dM.p[i], self.d2M.p[i], N_p, dN_p, d2N_p)):
+				
+				# M12*Y = j*sin(phi) and M21 = Y*j*sin(phi).
+				Mi[1] = j_sin_phi/Y
+				dMi[1] = (dj_sin_phi - Mi[1]*dY)/Y
+				d2Mi[1] = (d2j_sin_phi - 2.0*dMi[1]*dY - Mi[1]*d2Y)/Y
+				Mi[2] = Y*j_sin_phi
+				dMi[2] = dY*j_sin_phi + Y*dj_sin_phi
+				d2Mi[2] = d2Y*j_sin_phi + 2.0*dY*dj_sin_phi + Y*d2j_sin_phi
+	
+	
+	######################################################################
+	#                                                                    #
+	# multiply_matrices                                                  #
+	#                                                                    #
+	######################################################################
+	def multiply_matrices(self, M):
+		"""Multiply the caracteristic matrices and their derivatives
+		
+		This method takes 1 argument:
+		  M                 a second set of matrices and derivatives.
+		
+		This method multiply M by the matrices kept in the instance used
+		to call the method and stores the result in that instance. The
+		derivatives of the product are obtained from the product rule."""
+		
+		for i in range(self.wvls.length):
+			for A, dA, d2A, B, dB, d2B in ((M.M.s[i], M.dM.s[i], M.d2M.s[i], self.M.s[i], self.dM.s[i], self.d2M.s[i]), (M.M.p[i], M.dM.p[i], M.d2M.p[i], self.M.p[i], self.dM.p[i], self.d2M.p[i])):
+				
+				# (AB)'' = A''B + 2A'B' + AB''.
+				temp0 = d2A[0]*B[0] + d2A[1]*B[2] + 2.0*(dA[0]*dB[0] + dA[1]*dB[2]) + A[0]*d2B[0] + A[1]*d2B[2]
+				temp1 = d2A[0]*B[1] + d2A[1]*B[3] + 2.0*(dA[0]*dB[1] + dA[1]*dB[3]) + A[0]*d2B[1] + A[1]*d2B[3]
+				temp2 = d2A[2]*B[0] + d2A[3]*B[2] + 2.0*(dA[2]*dB[0] + dA[3]*dB[2]) + A[2]*d2B[0] + A[3]*d2B[2]
+				d2B[3] = d2A[2]*B[1] + d2A[3]*B[3] + 2.0*(dA[2]*dB[1] + dA[3]*dB[3]) + A[2]*d2B[1] + A[3]*d2B[3]
+				d2B[0] = temp0
+				d2B[1] = temp1
+				d2B[2] = temp2
+				
+				# (AB)' = A'B + AB'.
+				temp0 = dA[0]*B[0] + dA[1]*B[2] + A[0]*dB[0] + A[1]*dB[2]
+				temp1 = dA[0]*B[1] + dA[1]*B[3] + A[0]*dB[1] + A[1]*dB[3]
+				temp2 = dA[2]*B[0] + dA[3]*B[2] + A[2]*dB[0] + A[3]*dB[2]
+				dB[3] = dA[2]*B[1] + dA[3]*B[3] + A[2]*dB[1] + A[3]*dB[3]
+				dB[0] = temp0
+				dB[1] = temp1
+				dB[2] = temp2
+				
+				temp0 = A[0]*B[0] + A[1]*B[2]
+				temp1 = A[0]*B[1] + A[1]*B[3]
+				temp2 = A[2]*B[0] + A[3]*B[2]
+				B[3] = A[2]*B[1] + A[3]*B[3]
+				B[0] = temp0
+				B[1] = temp1
+				B[2] = temp2
+
+
+
+########################################################################
+#                                                                      #
+# calculate_phase_derivatives                                          #
+#                                                                      #
+########################################################################
+def calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i):
+	"""Calculate the derivatives of the phase shifts of a stack
+	
+	This function takes 6 arguments:
+	  M                 the characteristic matrices of the stack and their
+	                    derivatives;
+	  N_m               the index of refraction of the medium and its
+	                    derivatives;
+	  N_s               the index of refraction of the substrate and its
+	                    derivatives;
+	  sin2_theta_0      the normalized sinus squared of the propagation
+	                    angle;
+	  polarization      the polarization of light;
+	  i                 the position of the wavelength;
+	and returns the first and second derivatives of the phase shifts
+	upon reflection and transmission with regard to the angular
+	frequency as a tuple (dphi_r, d2phi_r, dphi_t, d2phi_t).
+	
+	The reflection phase is the argument of (N_m*B-C)/(N_m*B+C) and the
+	transmission phase the argument of 1/(N_m*B+C), where N_m is the
+	admittance of the medium and (B, C) is the product of the
+	characteristic matrices with (1, N_s). The derivatives of the
+	argument of a function f are Im(f'/f) and Im(f''/f - (f'/f)^2)."""
+	
+	if polarization == S:
+		Y_m, dY_m, d2Y_m = calculate_admittances_and_derivatives(N_m, N_m, sin2_theta_0, i)[0:3]
+		Y_s, dY_s, d2Y_s = calculate_admittances_and_derivatives(N_s, N_m, sin2_theta_0, i)[0:3]
+		Mi, dMi, d2Mi = M.M.s[i], M.dM.s[i], M.d2M.s[i]
+	elif polarization == P:
+		Y_m, dY_m, d2Y_m = calculate_admittances_and_derivatives(N_m, N_m, sin2_theta_0, i)[3:6]
+		Y_s, dY_s, d2Y_s = calculate_admittances_and_derivatives(N_s, N_m, sin2_theta_0, i)[3:6]
+		Mi, dMi, d2Mi = M.M.p[i], M.dM.p[i], M.d2M.p[i]
+	else:
+		return 0.0, 0.0, 0.0, 0.0
+	
+	B = Mi[0] + Mi[1]*Y_s
+	dB = dMi[0] + dMi[1]*Y_s + Mi[1]*dY_s
+	d2B = d2Mi[0] + d2Mi[1]*Y_s + 2.0*dMi[1]*dY_s + Mi[1]*d2Y_s
+	C = Mi[2] + Mi[3]*Y_s
+	dC = dMi[2] + dMi[3]*Y_s + Mi[3]*dY_s
+	d2C = d2Mi[2] + d2Mi[3]*Y_s + 2.0*dMi[3]*dY_s + Mi[3]*d2Y_s
+	
+	Y_m_B = Y_m*B
+	dY_m_B = dY_m*B + Y_m*dB
+	d2Y_m_B = d2Y_m*B + 2.0*dY_m*dB + Y_m*d2B
+	
+	# The derivatives of the argument of the numerator and of the
+	# denominator of r. When they are 0, the phase is considered to be 0
+	# (see calculate_r_phase).
+	darg = [0.0, 0.0]
+	d2arg = [0.0, 0.0]
+	for j, (f, df, d2f) in enumerate(((Y_m_B-C, dY_m_B-dC, d2Y_m_B-d2C), (Y_m_B+C, dY_m_B+dC, d2Y_m_B+d2C))):
+		if f != 0.0:
+			df_f = df/f
+			darg[j] = df_f.imag
+			d2arg[j] = (d2f/f - df_f*df_f).imag
+	
+	return darg[0]-darg[1], d2arg[0]-d2arg[1], -darg[1], -d2arg[1]
@@ -29,6 +29,7 @@ import cmath
 
 from definitions import *
 from spectro import spectrum
+from omega_derivatives import calculate_phase_derivatives
 
 from moremath.Newton_polynomials import Newton_quadratic
 
@@ -279,6 +280,62 @@ class GD(spectrum):
 		# used for the second to last point, now giving a formula similar
 		# to backward difference.
 		self.data[-1] = -(a1 + 2.0*a2*omega[-1])
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_r_GD                                                     #
+	#                                                                    #
+	######################################################################
+	def calculate_r_GD(self, M, N_m, N_s, sin2_theta_0, polarization):
+		"""Calculate the GD upon reflection analytically
+		
+		This method takes 5 arguments:
+		  M                 the characteristic matrices of the stack and
+		                    their derivatives;
+		  N_m               the index of refraction of the medium and its
+		                    derivatives;
+		  N_s               the index of refraction of the substrate and
+		                    its derivatives;
+		  sin2_theta_0      the normalized sinus squared of the propagation
+		                    angle;
+		  polarization      the polarization of light.
+		
+		The GD is determined from the derivatives of the characteristic
+		matrices with regard to angular frequency. Contrary to
+		calculate_GD, it is exact whatever the spacing of the
+		wavelengths."""
+		
+		for i in range(self.wvls.length):
+			self.data[i] = -calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i)[0]
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_t_GD                                                     #
+	#                                                                    #
+	######################################################################
+	def calculate_t_GD(self, M, N_m, N_s, sin2_theta_0, polarization):
+		"""Calculate the GD upon transmission analytically
+		
+		This method takes 5 arguments:
+		  M                 the characteristic matrices of the stack and
+		                    their derivatives;
+		  N_m               the index of refraction of the medium and its
+		                    derivatives;
+		  N_s               the index of refraction of the substrate and
+		                    its derivatives;
+		  sin2_theta_0      the normalized sinus squared of the propagation
+		                    angle;
+		  polarization      the polarization of light.
+		
+		The GD is determined from the derivatives of the characteristic
+		matrices with regard to angular frequency. Contrary to
+		calculate_GD, it is exact whatever the spacing of the
+		wavelengths."""
+		
+		for i in range(self.wvls.length):
+			self.data[i] = -calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i)[2]
 
 
 
@@ -353,3 +410,59 @@ class GDD(spectrum):
 		# used for the second to last point, now giving a formula similar
 		# to backward difference.
 		self.data[-1] = -2.0*a2
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_r_GDD                                                    #
+	#                                                                    #
+	######################################################################
+	def calculate_r_GDD(self, M, N_m, N_s, sin2_theta_0, polarization):
+		"""Calculate the GDD upon reflection analytically
+		
+		This method takes 5 arguments:
+		  M                 the characteristic matrices of the stack and
+		                    their derivatives;
+		  N_m               the index of refraction of the medium and its
+		                    derivatives;
+		  N_s               the index of refraction of the substrate and
+		                    its derivatives;
+		  sin2_theta_0      the normalized sinus squared of the propagation
+		                    angle;
+		  polarization      the polarization of light.
+		
+		The GDD is determined from the derivatives of the characteristic
+		matrices with regard to angular frequency. Contrary to
+		calculate_GDD, it is exact whatever the spacing of the
+		wavelengths."""
+		
+		for i in range(self.wvls.length):
+			self.data[i] = -calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i)[1]
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_t_GDD                                                    #
+	#                                                                    #
+	######################################################################
+	def calculate_t_GDD(self, M, N_m, N_s, sin2_theta_0, polarization):
+		"""Calculate the GDD upon transmission analytically
+		
+		This method takes 5 arguments:
+		  M                 the characteristic matrices of the stack and
+		                    their derivatives;
+		  N_m               the index of refraction of the medium and its
+		                    derivatives;
+		  N_s               the index of refraction of the substrate and
+		                    its derivatives;
+		  sin2_theta_0      the normalized sinus squared of the propagation
+		                    angle;
+		  polarization      the polarization of light.
+		
+		The GDD is determined from the derivatives of the characteristic
+		matrices with regard to angular frequency. Contrary to
+		calculate_GDD, it is exact whatever the spacing of the
+		wavelengths."""
+		
+		for i in range(self.wvls.length):
+			self.data[i] = -calculate_phase_derivatives(M, N_m, N_s, sin2_theta_0, polarization, i)[3]
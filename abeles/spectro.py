@@ -87,6 +87,63 @@ class spectrum(object):
 		items requested by the key."""
 		
 		return self.data[key]
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_weighted_spectrum                                              #
+	#                                                                    #
+	######################################################################
+	def add_weighted_spectrum(self, spectrum, weight):
+		"""Add a weighted spectrum to this one
+		
+		This method takes 2 arguments:
+		  spectrum          the spectrum to add;
+		  weight            the weight of the spectrum.
+		
+		This method is used to average spectra, for example over the
+		angles of a cone of light."""
+		
+		if spectrum.wvls.length != self.wvls.length:
+			raise ValueError("spectra must have the same length")
+		
+		for i in range(self.wvls.length):
+			self.data[i] += weight*spectrum.data[i]
+
+
+
+########################################################################
+#                                                                      #
+# partial_coherence_sums                                               #
+#                                                                      #
+########################################################################
+def partial_coherence_sums(z, a):
+	"""Calculate the sums of the round trips in a partially coherent
+	substrate
+	
+	This function takes 2 arguments:
+	  z                 the amplitude of a round trip in the substrate;
+	  a                 the exponent of the degree of coherence, which is
+	                    exp(-a*k*k) for k round trips;
+	and returns the sums of z**k*exp(-a*k*k) for k from 1 and of
+	z**(k-1)*exp(-a*k*k) for k from 1, as a tuple.
+	
+	The sums are truncated when the terms become negligible."""
+	
+	sum_T = 0.0
+	sum_R = 0.0
+	z_k_minus_1 = 1.0
+	k = 1
+	while True:
+		term = z_k_minus_1*math.exp(-a*k*k)
+		if abs(term) < 1.0e-15:
+			break
+		sum_R += term
+		sum_T += term*z
+		z_k_minus_1 *= z
+		k += 1
+	
+	return sum_T, sum_R
 
 
 
@@ -161,6 +218,76 @@ class R(spectrum):
 			exp_4_beta_imag = math.exp(4.0*beta_imag)
 			
 			self.data[i] = R_front.data[i] + ((T_front.data[i]*T_front_reverse.data[i]*R_back.data[i]*exp_4_beta_imag)/(1.0-R_front_reverse.data[i]*R_back.data[i]*exp_4_beta_imag))
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_R_with_partial_coherence                                 #
+	#                                                                    #
+	######################################################################
+	def calculate_R_with_partial_coherence(self, r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_s, thickness, sin2_theta_0, polarization, coherence_length):
+		"""Calculate reflectance with consideration of the backside for
+		a partially coherent substrate
+		
+		This method takes 8 arguments:
+		  r_and_t_front          the amplitude reflection and transmission
+		                         of the front side;
+		  r_and_t_front_reverse  the amplitude reflection and transmission
+		                         of the front side in reverse direction;
+		  r_and_t_back           the amplitude reflection and transmission
+		                         of the back side;
+		  N_s                    the index of refraction of the substrate;
+		  thickness              the thickness of the substrate;
+		  sin2_theta_0           the normalized sinus squared of the
+		                         propagation angle;
+		  polarization           the polarization of light;
+		  coherence_length       the coherence length of light.
+		
+		The multiple reflections in the substrate are added coherently
+		and averaged over the phase of the substrate. The degree of
+		coherence of two waves whose optical paths differ by Delta is
+		exp(-Delta**2/(2*coherence_length**2)). For a gaussian spectrum
+		of standard deviation Delta_lambda, the coherence length is
+		lambda**2/(2*pi*Delta_lambda). The result tends toward the
+		incoherent one when the coherence length is much smaller than the
+		optical thickness of the substrate. Contrary to
+		calculate_R_with_backside, the s and p polarizations are combined
+		after the backside is considered."""
+		
+		Psi = polarization*math.pi/180.0;
+		sin_Psi = math.sin(Psi);
+		sin_Psi_square = sin_Psi*sin_Psi;
+		cos_Psi_square = 1.0-sin_Psi_square;
+		
+		for i in range(self.wvls.length):
+			N_square = N_s.N[i]*N_s.N[i]
+			N_s_s = cmath.sqrt(N_square - sin2_theta_0.sin2[i])
+			
+			# Correct branch selection.
+			if N_s_s.real == 0.0:
+				N_s_s = -N_s_s
+			
+			exp_minus_2j_beta = cmath.exp(-2.0j*two_pi*thickness*N_s_s/self.wvls.wvls[i])
+			Delta = 2.0*thickness*N_s_s.real/coherence_length
+			a = 0.5*Delta*Delta
+			
+			self.data[i] = 0.0
+			
+			for r_front, t_front, r_front_reverse, t_front_reverse, r_back, weight in [(r_and_t_front.r_s[i], r_and_t_front.t_s[i], r_and_t_front_reverse.r_s[i], r_and_t_front_reverse.t_s[i], r_and_t_back.r_s[i], sin_Psi_square), (r_and_t_front.r_p[i], r_and_t_front.t_p[i], r_and_t_front_reverse.r_p[i], r_and_t_front_reverse.t_p[i], r_and_t_back.r_p[i], cos_Psi_square)]:
+				if weight == 0.0:
+					continue
+				
+				z = r_front_reverse*r_back*exp_minus_2j_beta
+				B = t_front*t_front_reverse*r_back*exp_minus_2j_beta
+				norm_z = (z*z.conjugate()).real
+				
+				sum_T, sum_R = partial_coherence_sums(z, a)
+				
+				R = (r_front*r_front.conjugate()).real\
+				  + 2.0*(r_front.conjugate()*B*sum_R).real\
+				  + (B*B.conjugate()).real/(1.0-norm_z)*(1.0+2.0*sum_T.real)
+				
+				self.data[i] += weight*R
 
 
 
@@ -256,6 +383,79 @@ class T(spectrum):
 			beta_imag = (two_pi*thickness*N_s_s/self.wvls.wvls[i]).imag
 			
 			self.data[i] = (T_front.data[i]*T_back.data[i]*math.exp(2.0*beta_imag))/(1.0-R_back.data[i]*R_front_reverse.data[i]*math.exp(4.0*beta_imag));
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_T_with_partial_coherence                                 #
+	#                                                                    #
+	######################################################################
+	def calculate_T_with_partial_coherence(self, r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_i, N_s, N_e, thickness, sin2_theta_0, polarization, coherence_length):
+		"""Calculate transmittance with consideration of the backside for
+		a partially coherent substrate
+		
+		This method takes 10 arguments:
+		  r_and_t_front          the amplitude reflection and transmission
+		                         of the front side;
+		  r_and_t_front_reverse  the amplitude reflection and transmission
+		                         of the front side in reverse direction;
+		  r_and_t_back           the amplitude reflection and transmission
+		                         of the back side;
+		  N_i                    the index of refraction of the incidence
+		                         medium;
+		  N_s                    the index of refraction of the substrate;
+		  N_e                    the index of refraction of the exit
+		                         medium;
+		  thickness              the thickness of the substrate;
+		  sin2_theta_0           the normalized sinus squared of the
+		                         propagation angle;
+		  polarization           the polarization of light;
+		  coherence_length       the coherence length of light.
+		
+		See calculate_R_with_partial_coherence for the definition of the
+		coherence length."""
+		
+		Psi = polarization*math.pi/180.0;
+		sin_Psi = math.sin(Psi);
+		sin_Psi_square = sin_Psi*sin_Psi;
+		cos_Psi_square = 1.0-sin_Psi_square;
+		
+		for i in range(self.wvls.length):
+			N_square = N_s.N[i]*N_s.N[i]
+			N_s_s = cmath.sqrt(N_square - sin2_theta_0.sin2[i])
+			
+			# Correct branch selection.
+			if N_s_s.real == 0.0:
+				N_s_s = -N_s_s
+			
+			exp_minus_2j_beta = cmath.exp(-2.0j*two_pi*thickness*N_s_s/self.wvls.wvls[i])
+			Delta = 2.0*thickness*N_s_s.real/coherence_length
+			a = 0.5*Delta*Delta
+			
+			N_square = N_i.N[i]*N_i.N[i]
+			N_i_s = cmath.sqrt(N_square - sin2_theta_0.sin2[i])
+			N_i_p = N_square/N_i_s
+			N_square = N_e.N[i]*N_e.N[i]
+			N_e_s = cmath.sqrt(N_square - sin2_theta_0.sin2[i])
+			N_e_p = N_square/N_e_s
+			
+			self.data[i] = 0.0
+			
+			for t_front, r_front_reverse, r_back, t_back, ratio, weight in [(r_and_t_front.t_s[i], r_and_t_front_reverse.r_s[i], r_and_t_back.r_s[i], r_and_t_back.t_s[i], N_e_s.real/N_i_s.real, sin_Psi_square), (r_and_t_front.t_p[i], r_and_t_front_reverse.r_p[i], r_and_t_back.r_p[i], r_and_t_back.t_p[i], N_e_p.real/N_i_p.real, cos_Psi_square)]:
+				if weight == 0.0:
+					continue
+				
+				z = r_front_reverse*r_back*exp_minus_2j_beta
+				norm_z = (z*z.conjugate()).real
+				
+				sum_T, sum_R = partial_coherence_sums(z, a)
+				
+				# The norm of exp(-j*beta) is the absolute value of
+				# exp(-2j*beta).
+				A = t_front*t_back
+				T = ratio*(A*A.conjugate()).real*abs(exp_minus_2j_beta)/(1.0-norm_z)*(1.0+2.0*sum_T.real)
+				
+				self.data[i] += weight*T
 
 
 
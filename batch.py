@@ -0,0 +1,621 @@
+# batch.py
+#
+# Run analyses, optimizations and preproduction studies on a project
+# from the command line, without the graphical user interface. This
+# module does not import wx and can therefore be used on computers
+# without a display.
+#
+# Usage examples:
+#   python batch.py project.ofp reflection -a 10 -p s -o R.csv
+#   python batch.py project.ofp color_trajectory --angles 0,15,30,45 -o colors.csv
+#   python batch.py project.ofp reflection_monitoring -w 550,650 -o monitoring.csv.gz
+#   python batch.py project.ofp needles -n 100 -o optimized.ofp
+#   python batch.py project.ofp multistart -f 0 --nb-starts 50 -o explored.ofp
+#   python batch.py project.ofp random_errors --data-types reflection,transmission -o errors.csv
+#
+# Copyright (c) 2015 Stephane Larouche.
+#
+# This file is part of OpenFilters.
+#
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+
+import os
+import sys
+import optparse
+
+from definitions import *
+import config
+import localize
+import materials
+import targets
+import project
+import optical_filter
+import data_holder
+import export
+import preproduction
+import optimization
+import optimization_refinement
+import optimization_needles
+import optimization_steps
+import optimization_Fourier
+import optimization_multistart
+
+
+
+# The analyses, with the method of the filter used to calculate them,
+# the data holder used to export them and the parameters they take.
+ANALYSES = {"reflection": (optical_filter.optical_filter.reflection, data_holder.reflection_data, ("angle", "polarization")),
+            "transmission": (optical_filter.optical_filter.transmission, data_holder.transmission_data, ("angle", "polarization")),
+            "absorption": (optical_filter.optical_filter.absorption, data_holder.absorption_data, ("angle", "polarization")),
+            "reflection_phase": (optical_filter.optical_filter.reflection_phase, data_holder.reflection_phase_data, ("angle", "polarization")),
+            "transmission_phase": (optical_filter.optical_filter.transmission_phase, data_holder.transmission_phase_data, ("angle", "polarization")),
+            "reflection_GD": (optical_filter.optical_filter.reflection_GD, data_holder.reflection_GD_data, ("angle", "polarization")),
+            "transmission_GD": (optical_filter.optical_filter.transmission_GD, data_holder.transmission_GD_data, ("angle", "polarization")),
+            "reflection_GDD": (optical_filter.optical_filter.reflection_GDD, data_holder.reflection_GDD_data, ("angle", "polarization")),
+            "transmission_GDD": (optical_filter.optical_filter.transmission_GDD, data_holder.transmission_GDD_data, ("angle", "polarization")),
+            "ellipsometry": (optical_filter.optical_filter.ellipsometry, data_holder.ellipsometry_data, ("angle",)),
+            "color": (optical_filter.optical_filter.color, data_holder.color_data, ("angle", "polarization", "illuminant", "observer")),
+            "color_trajectory": (optical_filter.optical_filter.color_trajectory, data_holder.color_trajectory_data, ("angles", "polarization", "illuminant", "observer")),
+            "admittance": (optical_filter.optical_filter.admittance, data_holder.admittance_data, ("wavelength", "angle", "polarization")),
+            "circle": (optical_filter.optical_filter.circle, data_holder.circle_data, ("wavelength", "angle", "polarization")),
+            "electric_field": (optical_filter.optical_filter.electric_field, data_holder.electric_field_data, ("wavelength", "angle", "polarization")),
+            "electric_field_map": (optical_filter.optical_filter.electric_field_map, data_holder.electric_field_map_data, ("wavelengths", "angles", "polarization")),
+            "reflection_monitoring": (optical_filter.optical_filter.reflection_monitoring, data_holder.reflection_monitoring_data, ("wavelengths", "angle", "polarization")),
+            "transmission_monitoring": (optical_filter.optical_filter.transmission_monitoring, data_holder.transmission_monitoring_data, ("wavelengths", "angle", "polarization")),
+            "ellipsometry_monitoring": (optical_filter.optical_filter.ellipsometry_monitoring, data_holder.ellipsometry_monitoring_data, ("wavelengths", "angle")),
+            "reflection_reverse": (optical_filter.optical_filter.reflection_reverse, data_holder.reflection_reverse_data, ("angle", "polarization")),
+            "transmission_reverse": (optical_filter.optical_filter.transmission_reverse, data_holder.transmission_reverse_data, ("angle", "polarization")),
+            "absorption_reverse": (optical_filter.optical_filter.absorption_reverse, data_holder.absorption_reverse_data, ("angle", "polarization")),
+            "ellipsometry_reverse": (optical_filter.optical_filter.ellipsometry_reverse, data_holder.ellipsometry_reverse_data, ("angle",)),
+            "color_reverse": (optical_filter.optical_filter.color_reverse, data_holder.color_reverse_data, ("angle", "polarization", "illuminant", "observer")),
+            "color_trajectory_reverse": (optical_filter.optical_filter.color_trajectory_reverse, data_holder.color_trajectory_reverse_data, ("angles", "polarization", "illuminant", "observer")),
+            "reflection_monitoring_reverse": (optical_filter.optical_filter.reflection_monitoring_reverse, data_holder.reflection_monitoring_reverse_data, ("wavelengths", "angle", "polarization")),
+            "transmission_monitoring_reverse": (optical_filter.optical_filter.transmission_monitoring_reverse, data_holder.transmission_monitoring_reverse_data, ("wavelengths", "angle", "polarization")),
+            "ellipsometry_monitoring_reverse": (optical_filter.optical_filter.ellipsometry_monitoring_reverse, data_holder.ellipsometry_monitoring_reverse_data, ("wavelengths", "angle"))}
+
+OPTIMIZATIONS = {"refinement": optimization_refinement.optimization_refinement,
+                 "needles": optimization_needles.optimization_needles,
+                 "steps": optimization_steps.optimization_steps,
+                 "Fourier": optimization_Fourier.optimization_Fourier}
+
+RANDOM_ERRORS_DATA_TYPES = {"reflection": data_holder.REFLECTION,
+                            "transmission": data_holder.TRANSMISSION,
+                            "absorption": data_holder.ABSORPTION,
+                            "reflection_phase": data_holder.REFLECTION_PHASE,
+                            "transmission_phase": data_holder.TRANSMISSION_PHASE,
+                            "reflection_GD": data_holder.REFLECTION_GD,
+                            "transmission_GD": data_holder.TRANSMISSION_GD,
+                            "reflection_GDD": data_holder.REFLECTION_GDD,
+                            "transmission_GDD": data_holder.TRANSMISSION_GDD,
+                            "color": data_holder.COLOR}
+
+JOBS = sorted(ANALYSES.keys()) + sorted(OPTIMIZATIONS.keys()) + ["multistart", "random_errors"]
+
+
+
+########################################################################
+#                                                                      #
+# batch_error                                                          #
+#                                                                      #
+########################################################################
+class batch_error(Exception):
+	"""Exception class for batch errors"""
+	
+	def __init__(self, value = ""):
+		self.value = value
+	
+	def __str__(self):
+		if self.value:
+			return "Batch error: %s." % self.value
+		else:
+			return "Batch error."
+
+
+
+########################################################################
+#                                                                      #
+# optimization_reporter                                                #
+#                                                                      #
+########################################################################
+class optimization_reporter(object):
+	"""A replacement for the user interface of optimizations that
+	reports their progress on a stream"""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, stream, name):
+		"""Initialize the reporter
+		
+		This method takes 2 arguments:
+		  stream             the stream on which to write;
+		  name               a name to identify the optimization."""
+		
+		self.stream = stream
+		self.name = name
+		self.optimization = None
+		self.last_iteration = None
+	
+	
+	######################################################################
+	#                                                                    #
+	# update                                                             #
+	#                                                                    #
+	######################################################################
+	def update(self, working, status):
+		"""Report the progress of the optimization
+		
+		This method takes 2 arguments:
+		  working            a boolean indicating if the optimization is
+		                     running;
+		  status             the status of the optimization."""
+		
+		if self.optimization is None or not self.stream:
+			return
+		
+		iteration = self.optimization.get_iteration()
+		if iteration != self.last_iteration or not working:
+			self.last_iteration = iteration
+			self.stream.write("%s: iteration %i, chi 2 = %g\n" % (self.name, iteration, self.optimization.get_chi_2()))
+			self.stream.flush()
+
+
+
+########################################################################
+#                                                                      #
+# parse_polarization                                                   #
+# parse_list                                                           #
+#                                                                      #
+########################################################################
+def parse_polarization(text):
+	"""Convert the polarization given on the command line
+	
+	The polarization is either s, p, unpolarized (or u) or an angle in
+	degrees."""
+	
+	if text.lower() == "s":
+		return S
+	elif text.lower() == "p":
+		return P
+	elif text.lower() in ["u", "unpolarized"]:
+		return UNPOLARIZED
+	try:
+		return float(text)
+	except ValueError:
+		raise batch_error("Invalid polarization %s" % text)
+
+def parse_list(text, kind = float):
+	"""Convert a comma separated list given on the command line"""
+	
+	try:
+		return [kind(element) for element in text.split(",") if element.strip()]
+	except ValueError:
+		raise batch_error("Invalid list %s" % text)
+
+
+
+########################################################################
+#                                                                      #
+# run_analysis                                                         #
+#                                                                      #
+########################################################################
+def run_analysis(filter, analysis, angle = 0.0, polarization = UNPOLARIZED, illuminant = None, observer = None, angles = None, wavelength = None, wavelengths = None):
+	"""Calculate a property of a filter
+	
+	This function takes 2 to 9 arguments:
+	  filter             the filter;
+	  analysis           the name of the analysis (a key of ANALYSES);
+	  angle              (optional) the angle of incidence, default is
+	                     0;
+	  polarization       (optional) the polarization, default is
+	                     unpolarized;
+	  illuminant         (optional) the illuminant for colors, default
+	                     is the one of the filter;
+	  observer           (optional) the observer for colors, default is
+	                     the one of the filter;
+	  angles             (optional) the angles for color trajectories
+	                     and electric field maps;
+	  wavelength         (optional) the wavelength for admittance and
+	                     circle diagrams and the electric field, default
+	                     is the center wavelength of the filter;
+	  wavelengths        (optional) the wavelengths for monitoring
+	                     curves and electric field maps, default is the
+	                     center wavelength of the filter;
+	and returns the result in a data holder, or None if the
+	calculation was stopped."""
+	
+	if analysis not in ANALYSES:
+		raise batch_error("Unknown analysis %s" % analysis)
+	method, holder, parameter_names = ANALYSES[analysis]
+	
+	if illuminant is None:
+		illuminant = filter.get_illuminant()
+	if observer is None:
+		observer = filter.get_observer()
+	if angles is None:
+		angles = [float(i_angle) for i_angle in range(0, 90, 5)]
+	if wavelength is None:
+		wavelength = filter.get_center_wavelength()
+	if wavelengths is None:
+		wavelengths = [filter.get_center_wavelength()]
+	
+	values = {"angle": angle,
+	          "polarization": polarization,
+	          "illuminant": illuminant,
+	          "observer": observer,
+	          "angles": angles,
+	          "wavelength": wavelength,
+	          "wavelengths": wavelengths}
+	parameters = [values[name] for name in parameter_names]
+	
+	answer = method(filter, *parameters)
+	
+	if answer:
+		return holder(filter, answer, *parameters)
+	
+	return None
+
+
+
+########################################################################
+#                                                                      #
+# run_optimization                                                     #
+#                                                                      #
+########################################################################
+def run_optimization(filter, targets, method, max_iterations = None, min_thickness = None, nb_needles = None, nb_steps = None, stream = None, name = ""):
+	"""Optimize a filter
+	
+	This function takes 3 to 9 arguments:
+	  filter             the filter, it is modified by the optimization;
+	  targets            the targets;
+	  method             the name of the optimization method (a key of
+	                     OPTIMIZATIONS);
+	  max_iterations     (optional) the maximum number of iterations,
+	                     by default the one of the configuration is used;
+	  min_thickness      (optional) the minimal thickness of the layers
+	                     for methods that accept it;
+	  nb_needles         (optional) the number of needles added at once;
+	  nb_steps           (optional) the number of steps added at once;
+	  stream             (optional) a stream on which to report the
+	                     progress of the optimization;
+	  name               (optional) a name to identify the filter in the
+	                     report;
+	and returns the optimization object.
+	
+	The needles and steps methods are run in automatic mode."""
+	
+	if method not in OPTIMIZATIONS:
+		raise batch_error("Unknown optimization method %s" % method)
+	
+	reporter = optimization_reporter(stream, name)
+	optimization = OPTIMIZATIONS[method](filter, targets, reporter)
+	reporter.optimization = optimization
+	
+	if max_iterations is not None:
+		optimization.max_iterations = max_iterations
+		optimization.initial_max_iterations = max_iterations
+	if min_thickness is not None and hasattr(optimization, "set_min_thickness"):
+		optimization.set_min_thickness(min_thickness)
+	if method == "needles":
+		optimization.set_automatic_mode(True)
+		if nb_needles is not None:
+			optimization.set_nb_needles(nb_needles)
+	elif method == "steps":
+		optimization.set_automatic_mode(True)
+		if nb_steps is not None:
+			optimization.set_nb_steps(nb_steps)
+	
+	optimization.go()
+	optimization.copy_to_filter()
+	
+	return optimization
+
+
+
+########################################################################
+#                                                                      #
+# run_multistart                                                       #
+#                                                                      #
+########################################################################
+def run_multistart(filter, targets, nb_starts = None, thickness_variation = None, max_removed_layers = None, max_iterations = None, min_thickness = None, nb_processes = None, seed = None, stream = None, name = ""):
+	"""Explore the design space around a filter with many refinements
+	
+	This function takes 2 to 11 arguments:
+	  filter               the filter from which to start;
+	  targets              the targets;
+	  nb_starts            (optional) the number of starting designs;
+	  thickness_variation  (optional) the relative variation of the
+	                       thickness of the layers;
+	  max_removed_layers   (optional) the maximum number of layers
+	                       removed from the starting designs;
+	  max_iterations       (optional) the maximum number of iterations of
+	                       every refinement;
+	  min_thickness        (optional) the minimal thickness of the layers;
+	  nb_processes         (optional) the number of worker processes;
+	  seed                 (optional) the seed of the random number
+	                       generator;
+	  stream               (optional) a stream on which to report the
+	                       solutions;
+	  name                 (optional) a name to identify the filter in the
+	                       report;
+	and returns the multi-start optimization object. By default, the
+	values of the configuration are used."""
+	
+	optimization = optimization_multistart.optimization_multistart(filter, targets)
+	
+	if nb_starts is not None:
+		optimization.set_nb_starts(nb_starts)
+	if thickness_variation is not None:
+		optimization.set_thickness_variation(thickness_variation)
+	if max_removed_layers is not None:
+		optimization.set_max_removed_layers(max_removed_layers)
+	if max_iterations is not None:
+		optimization.set_max_iterations(max_iterations)
+	if min_thickness is not None:
+		optimization.set_min_thickness(min_thickness)
+	if nb_processes is not None:
+		optimization.set_nb_processes(nb_processes)
+	if seed is not None:
+		optimization.set_seed(seed)
+	
+	optimization.go()
+	
+	if stream:
+		for chi_2, solution, nb_times_found in optimization.get_solutions():
+			stream.write("%s: chi 2 = %g with %i layers, found %i times\n" % (name, chi_2, solution.get_nb_layers(FRONT), nb_times_found))
+		if optimization.get_nb_failed_starts():
+			stream.write("%s: %i refinements failed\n" % (name, optimization.get_nb_failed_starts()))
+	
+	return optimization
+
+
+
+########################################################################
+#                                                                      #
+# run_random_errors                                                    #
+#                                                                      #
+########################################################################
+def run_random_errors(filter, data_types = None, angle = 0.0, polarization = S, illuminant = None, observer = None, relative_thickness_error = None, physical_thickness_error = None, distribution = None, nb_tests = None):
+	"""Simulate random thickness errors on a filter
+	
+	This function takes 1 to 10 arguments:
+	  filter                     the filter;
+	  data_types                 (optional) the names of the properties
+	                             to calculate (keys of
+	                             RANDOM_ERRORS_DATA_TYPES), default is
+	                             reflection and transmission;
+	  angle                      (optional) the angle of incidence,
+	                             default is 0;
+	  polarization               (optional) the polarization, default is
+	                             s;
+	  illuminant                 (optional) the illuminant for colors;
+	  observer                   (optional) the observer for colors;
+	  relative_thickness_error   (optional) the relative thickness error;
+	  physical_thickness_error   (optional) the physical thickness error,
+	                             used instead of the relative thickness
+	                             error when it is given;
+	  distribution               (optional) the distribution, "uniform" or
+	                             "normal";
+	  nb_tests                   (optional) the number of tests;
+	and returns the random_errors object after the simulation. By
+	default, the values of the configuration are used."""
+	
+	analyser = preproduction.random_errors(filter)
+	
+	if data_types is not None:
+		try:
+			analyser.set_data_types([RANDOM_ERRORS_DATA_TYPES[data_type] for data_type in data_types])
+		except KeyError, error:
+			raise batch_error("Unknown data type %s" % error.args[0])
+	analyser.set_angle(angle)
+	analyser.set_polarization(polarization)
+	if illuminant is not None:
+		analyser.set_illuminant(illuminant)
+	if observer is not None:
+		analyser.set_observer(observer)
+	if physical_thickness_error is not None:
+		analyser.set_thickness_error_type(preproduction.PHYSICAL_THICKNESS)
+		analyser.set_physical_thickness_error(physical_thickness_error)
+	elif relative_thickness_error is not None:
+		analyser.set_thickness_error_type(preproduction.RELATIVE_THICKNESS)
+		analyser.set_relative_thickness_error(relative_thickness_error)
+	if distribution == "uniform":
+		analyser.set_distribution(preproduction.UNIFORM)
+	elif distribution == "normal":
+		analyser.set_distribution(preproduction.NORMAL)
+	elif distribution is not None:
+		raise batch_error("Unknown distribution %s" % distribution)
+	if nb_tests is not None:
+		analyser.set_nb_tests(nb_tests)
+	
+	analyser.simulate()
+	
+	return analyser
+
+
+
+########################################################################
+#                                                                      #
+# make_option_parser                                                   #
+#                                                                      #
+########################################################################
+def make_option_parser():
+	"""Make the parser of the command line options"""
+	
+	parser = optparse.OptionParser(usage = "%prog [options] project job\n\njob is one of: " + ", ".join(JOBS))
+	
+	parser.add_option("-f", "--filter", dest = "filters", action = "append", type = "int", metavar = "NB", help = "number of the filter to use (starting at 0), can be repeated, default is all filters")
+	parser.add_option("-o", "--output", dest = "output", metavar = "FILE", help = "file in which to write the results (.csv, .txt, .npy, .npz, .h5, optionally followed by .gz) or the optimized project (.ofp), required for every job; the project given as input is never overwritten")
+	parser.add_option("-z", "--compress", dest = "compress", action = "store_true", default = False, help = "compress the results")
+	parser.add_option("--precision", dest = "precision", type = "int", metavar = "DIGITS", help = "number of significant digits in text results")
+	parser.add_option("-q", "--quiet", dest = "quiet", action = "store_true", default = False, help = "do not report progress")
+	
+	group = optparse.OptionGroup(parser, "Analysis options")
+	group.add_option("-a", "--angle", dest = "angle", type = "float", default = 0.0, help = "angle of incidence in degrees (default: 0)")
+	group.add_option("-p", "--polarization", dest = "polarization", help = "s, p, unpolarized or an angle in degrees (default: unpolarized, s for random_errors)")
+	group.add_option("--angles", dest = "angles", metavar = "LIST", help = "comma separated angles for color trajectories and electric field maps")
+	group.add_option("-w", "--wavelengths", dest = "wavelengths", metavar = "LIST", help = "comma separated wavelengths for monitoring curves and electric field maps, the first one is used for diagrams and the electric field (default: center wavelength)")
+	group.add_option("--illuminant", dest = "illuminant", help = "illuminant for colors (default: the one of the filter)")
+	group.add_option("--observer", dest = "observer", help = "observer for colors (default: the one of the filter)")
+	parser.add_option_group(group)
+	
+	group = optparse.OptionGroup(parser, "Optimization options")
+	group.add_option("-n", "--max-iterations", dest = "max_iterations", type = "int", help = "maximum number of iterations")
+	group.add_option("--min-thickness", dest = "min_thickness", type = "float", help = "minimal thickness of the layers")
+	group.add_option("--nb-needles", dest = "nb_needles", type = "int", help = "number of needles added at once")
+	group.add_option("--nb-steps", dest = "nb_steps", type = "int", help = "number of steps added at once")
+	parser.add_option_group(group)
+	
+	group = optparse.OptionGroup(parser, "Multi-start options")
+	group.add_option("--nb-starts", dest = "nb_starts", type = "int", help = "number of starting designs")
+	group.add_option("--thickness-variation", dest = "thickness_variation", type = "float", help = "relative variation of the thickness of the layers (0.2 is 20%)")
+	group.add_option("--max-removed-layers", dest = "max_removed_layers", type = "int", help = "maximum number of layers removed from the starting designs")
+	group.add_option("--nb-processes", dest = "nb_processes", type = "int", help = "number of worker processes (0 for one per processor)")
+	group.add_option("--seed", dest = "seed", type = "int", help = "seed of the random number generator")
+	group.add_option("--nb-solutions", dest = "nb_solutions", type = "int", default = 1, help = "number of solutions added to the project, by increasing chi 2 (default: 1)")
+	parser.add_option_group(group)
+	
+	group = optparse.OptionGroup(parser, "Random errors options")
+	group.add_option("--data-types", dest = "data_types", metavar = "LIST", help = "comma separated properties among " + ", ".join(sorted(RANDOM_ERRORS_DATA_TYPES.keys())))
+	group.add_option("--relative-error", dest = "relative_thickness_error", type = "float", help = "relative thickness error (0.01 is 1%)")
+	group.add_option("--physical-error", dest = "physical_thickness_error", type = "float", help = "physical thickness error in nm")
+	group.add_option("--distribution", dest = "distribution", choices = ["uniform", "normal"], help = "uniform or normal")
+	group.add_option("--nb-tests", dest = "nb_tests", type = "int", help = "number of tests")
+	group.add_option("--all-results", dest = "all_results", action = "store_true", default = False, help = "export the results of all tests instead of the statistics")
+	parser.add_option_group(group)
+	
+	return parser
+
+
+
+########################################################################
+#                                                                      #
+# main                                                                 #
+#                                                                      #
+########################################################################
+def main(argv = None):
+	"""Run a job from the command line
+	
+	This function takes an optional argument:
+	  argv               (optional) the command line arguments, default
+	                     is sys.argv[1:];
+	and returns the exit status."""
+	
+	parser = make_option_parser()
+	options, arguments = parser.parse_args(argv)
+	
+	if len(arguments) != 2:
+		parser.error("a project and a job must be given")
+	project_filename, job = arguments
+	if job not in JOBS:
+		parser.error("unknown job %s" % job)
+	if not options.output:
+		parser.error("an output file must be given")
+	if os.path.realpath(options.output) == os.path.realpath(project_filename):
+		parser.error("the output file must not be the project given as input")
+	if job in OPTIMIZATIONS or job == "multistart":
+		if not options.output.lower().endswith(".ofp"):
+			parser.error("the optimized project must be saved in a .ofp file")
+	
+	if options.quiet:
+		stream = None
+	else:
+		stream = sys.stderr
+	
+	localize.localize()
+	
+	try:
+		# Verify that the results can be exported before calculating
+		# them.
+		if job in ANALYSES or job == "random_errors":
+			export.check_filename(options.output, options.compress)
+		
+		if options.polarization is not None:
+			polarization = parse_polarization(options.polarization)
+		elif job == "random_errors":
+			polarization = S
+		else:
+			polarization = UNPOLARIZED
+		angles = parse_list(options.angles) if options.angles else None
+		wavelengths = parse_list(options.wavelengths) if options.wavelengths else None
+		wavelength = wavelengths[0] if wavelengths else None
+		data_types = parse_list(options.data_types, str) if options.data_types else None
+		
+		# Some jobs only need a single filter, so filters are loaded
+		# lazily.
+		the_project = project.read_project(project_filename, lazy = True)
+		if options.filters:
+			filter_nbs = options.filters
+		else:
+			filter_nbs = range(the_project.get_nb_filters())
+		for filter_nb in filter_nbs:
+			if filter_nb < 0 or filter_nb >= the_project.get_nb_filters():
+				raise batch_error("The project does not contain filter %i" % filter_nb)
+		
+		if job in ANALYSES:
+			results = []
+			for filter_nb in filter_nbs:
+				if stream:
+					stream.write("Filter %i: %s\n" % (filter_nb, job))
+				result = run_analysis(the_project.get_filter(filter_nb), job, options.angle, polarization, options.illuminant, options.observer, angles, wavelength, wavelengths)
+				if result:
+					results.append(result)
+			
+			export.export_results(options.output, results, options.compress, options.precision)
+		
+		elif job in OPTIMIZATIONS:
+			project_targets = the_project.get_targets()
+			for filter_nb in filter_nbs:
+				run_optimization(the_project.get_filter(filter_nb), project_targets, job, options.max_iterations, options.min_thickness, options.nb_needles, options.nb_steps, stream, "Filter %i" % filter_nb)
+			
+			project.write_project(the_project, options.output)
+		
+		elif job == "multistart":
+			# The solutions are added to the project after the original
+			# filters.
+			project_targets = the_project.get_targets()
+			for filter_nb in filter_nbs:
+				multistart = run_multistart(the_project.get_filter(filter_nb), project_targets, options.nb_starts, options.thickness_variation, options.max_removed_layers, options.max_iterations, options.min_thickness, options.nb_processes, options.seed, stream, "Filter %i" % filter_nb)
+				for chi_2, solution, nb_times_found in multistart.get_solutions()[:options.nb_solutions]:
+					the_project.add_filter(solution)
+			
+			project.write_project(the_project, options.output)
+		
+		elif job == "random_errors":
+			tables = []
+			for filter_nb in filter_nbs:
+				if stream:
+					stream.write("Filter %i: %s\n" % (filter_nb, job))
+				analyser = run_random_errors(the_project.get_filter(filter_nb), data_types, options.angle, polarization, options.illuminant, options.observer, options.relative_thickness_error, options.physical_thickness_error, options.distribution, options.nb_tests)
+				tables += analyser.get_columns(options.all_results)
+			
+			export.export_columns(options.output, tables, options.compress, options.precision)
+	
+	except (batch_error, export.export_error, project.project_error, optical_filter.filter_error, materials.material_error, targets.target_error, optimization.optimization_error, optimization_multistart.multistart_error), error:
+		sys.stderr.write("%s\n" % error)
+		return 1
+	
+	return 0
+
+
+
+if __name__ == "__main__":
+	sys.exit(main())
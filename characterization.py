@@ -0,0 +1,1307 @@
+# characterization.py
+#
+# Characterization of filters by fitting the thickness of their layers
+# and the dispersion of their materials to measured spectra.
+#
+# Copyright (c) 2015 Stephane Larouche.
+#
+# This file is part of OpenFilters.
+#
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+
+try:
+	import multiprocessing
+except ImportError:
+	multiprocessing = None
+
+import config
+from definitions import *
+import data_holder
+import materials
+import optical_filter
+import optimization
+import targets
+import release
+import version
+import workers
+from moremath import Levenberg_Marquardt
+from moremath import linear_algebra
+
+
+
+# The kinds of fitted parameters.
+THICKNESS = 0
+MATERIAL_PROPERTY = 1
+
+# The data types that can be measured.
+MEASURED_DATA_TYPES = [data_holder.REFLECTION, data_holder.TRANSMISSION, data_holder.ABSORPTION, data_holder.ELLIPSOMETRY]
+
+# The spectrum targets corresponding to photometric measurements.
+TARGET_CLASSES = {data_holder.REFLECTION: targets.reflection_spectrum_target,
+                  data_holder.TRANSMISSION: targets.transmission_spectrum_target,
+                  data_holder.ABSORPTION: targets.absorption_spectrum_target}
+
+
+
+########################################################################
+#                                                                      #
+# characterization_error                                               #
+#                                                                      #
+########################################################################
+class characterization_error(Exception):
+	"""Exception class for characterization errors"""
+	
+	def __init__(self, value = ""):
+		self.value = value
+	
+	def __str__(self):
+		if self.value:
+			return "Characterization error: %s." % self.value
+		else:
+			return "Characterization error."
+
+
+
+########################################################################
+#                                                                      #
+# measurement                                                          #
+#                                                                      #
+########################################################################
+class measurement(object):
+	"""A class to hold a measured spectrum
+	
+	Photometric measurements (reflection, transmission or absorption)
+	have a single channel of values. Ellipsometric measurements have
+	two channels, Psi and Delta, in degrees."""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, data_type, wavelengths, values, deltas, angle = 0.0, polarization = UNPOLARIZED, direction = FORWARD):
+		"""Initialize an instance of the measurement class
+		
+		This method takes 4 to 7 arguments:
+		  data_type          the measured data type (REFLECTION,
+		                     TRANSMISSION, ABSORPTION or ELLIPSOMETRY, as
+		                     defined in data_holder);
+		  wavelengths        the wavelengths of the measurement;
+		  values             a list of channels of measured values, [R],
+		                     [T], [A] or [Psi, Delta];
+		  deltas             the tolerances on the values, organized like
+		                     the values;
+		  angle              (optional) the angle of incidence, the
+		                     default value is 0;
+		  polarization       (optional) the polarization of the light, the
+		                     default value is UNPOLARIZED, ignored for
+		                     ellipsometry;
+		  direction          (optional) the direction of the light
+		                     (FORWARD or BACKWARD), the default value is
+		                     FORWARD."""
+		
+		if data_type not in MEASURED_DATA_TYPES:
+			raise characterization_error("Cannot fit %s" % data_holder.DATA_TYPE_NAMES[data_type].lower())
+		
+		if data_type == data_holder.ELLIPSOMETRY:
+			nb_channels = 2
+		else:
+			nb_channels = 1
+		
+		if len(values) != nb_channels or len(deltas) != nb_channels:
+			raise characterization_error("%s measurements must have %i channel(s)" % (data_holder.DATA_TYPE_NAMES[data_type], nb_channels))
+		
+		for channel in list(values) + list(deltas):
+			if len(channel) != len(wavelengths):
+				raise characterization_error("The measured values do not correspond to the wavelengths")
+		
+		if any(delta <= 0.0 for channel in deltas for delta in channel):
+			raise characterization_error("The tolerances must be positive")
+		
+		self.data_type = data_type
+		self.wavelengths = list(wavelengths)
+		self.values = [list(channel) for channel in values]
+		self.deltas = [list(channel) for channel in deltas]
+		self.angle = angle
+		self.polarization = polarization
+		self.direction = direction
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_data_type                                                      #
+	# get_wavelengths                                                    #
+	# get_values                                                         #
+	# get_deltas                                                         #
+	# get_angle                                                          #
+	# get_polarization                                                   #
+	# get_direction                                                      #
+	#                                                                    #
+	######################################################################
+	def get_data_type(self):
+		"""Get the measured data type"""
+		
+		return self.data_type
+	
+	def get_wavelengths(self):
+		"""Get the wavelengths of the measurement"""
+		
+		return self.wavelengths
+	
+	def get_values(self):
+		"""Get the channels of measured values"""
+		
+		return self.values
+	
+	def get_deltas(self):
+		"""Get the tolerances on the measured values"""
+		
+		return self.deltas
+	
+	def get_angle(self):
+		"""Get the angle of incidence"""
+		
+		return self.angle
+	
+	def get_polarization(self):
+		"""Get the polarization of the light"""
+		
+		return self.polarization
+	
+	def get_direction(self):
+		"""Get the direction of the light"""
+		
+		return self.direction
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_description                                                    #
+	#                                                                    #
+	######################################################################
+	def get_description(self):
+		"""Get a description of the measurement
+		
+		This method returns a tuple of simple types that can be given to
+		the constructor of the class to recreate the measurement."""
+		
+		return self.data_type, self.wavelengths, self.values, self.deltas, self.angle, self.polarization, self.direction
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_target                                                         #
+	#                                                                    #
+	######################################################################
+	def get_target(self):
+		"""Get a target built from the measurement
+		
+		This method returns a spectrum target whose values are the measured
+		values, which can be used by the optimization methods. Only
+		photometric measurements can be converted to targets."""
+		
+		if self.data_type not in TARGET_CLASSES:
+			raise characterization_error("Only photometric measurements can be converted to targets")
+		
+		target = TARGET_CLASSES[self.data_type]()
+		target.set_angle(self.angle)
+		target.set_polarization(self.polarization)
+		target.set_direction(self.direction)
+		target.set_target(0.0, 0.0, 0.0, self.wavelengths[:], self.values[0][:], self.deltas[0][:])
+		
+		return target
+
+
+
+########################################################################
+#                                                                      #
+# read_measurement                                                     #
+#                                                                      #
+########################################################################
+def read_measurement(filename, data_type, angle = 0.0, polarization = UNPOLARIZED, direction = FORWARD):
+	"""Read a measurement from a text file
+	
+	This function takes 2 to 5 arguments:
+	  filename           the name of the text file;
+	  data_type          the measured data type (REFLECTION, TRANSMISSION,
+	                     ABSORPTION or ELLIPSOMETRY, as defined in
+	                     data_holder);
+	  angle              (optional) the angle of incidence, the default
+	                     value is 0;
+	  polarization       (optional) the polarization of the light, the
+	                     default value is UNPOLARIZED;
+	  direction          (optional) the direction of the light (FORWARD
+	                     or BACKWARD), the default value is FORWARD;
+	and returns the measurement.
+	
+	Every line of the file contains the wavelength (in nm) followed by
+	the value and, optionally, its tolerance. For ellipsometry, the
+	wavelength is followed by Psi and Delta and, optionally, their
+	tolerances (all in degrees). Photometric values are between 0 and 1.
+	Columns are separated by spaces, tabs or commas; empty lines and
+	lines starting with # are ignored. When the tolerances are not given,
+	they are set according to the configuration."""
+	
+	if data_type == data_holder.ELLIPSOMETRY:
+		nb_channels = 2
+		default_deltas = [config.CHARACTERIZATION_PSI_TOLERANCE, config.CHARACTERIZATION_DELTA_TOLERANCE]
+	else:
+		nb_channels = 1
+		default_deltas = [config.CHARACTERIZATION_PHOTOMETRIC_TOLERANCE]
+	
+	try:
+		file = open(filename, "r")
+	except IOError:
+		raise characterization_error("Impossible to open the file %s" % filename)
+	
+	lines = file.readlines()
+	
+	file.close()
+	
+	wavelengths = []
+	values = [[] for i_channel in range(nb_channels)]
+	deltas = [[] for i_channel in range(nb_channels)]
+	
+	for i in range(len(lines)):
+		line = lines[i].strip()
+		
+		# Skip empty lines and comments.
+		if not line or line.startswith("#"):
+			continue
+		
+		# Replace commas by spaces to handle csv files.
+		elements = line.replace(",", " ").split()
+		
+		if len(elements) not in (1+nb_channels, 1+2*nb_channels):
+			raise characterization_error("Line %i of the file is formatted incorectly" % (i+1))
+		
+		try:
+			elements = [float(element) for element in elements]
+		except ValueError:
+			raise characterization_error("Line %i of the file is formatted incorectly" % (i+1))
+		
+		wavelengths.append(elements[0])
+		for i_channel in range(nb_channels):
+			values[i_channel].append(elements[1+i_channel])
+			if len(elements) == 1+2*nb_channels:
+				deltas[i_channel].append(elements[1+nb_channels+i_channel])
+			else:
+				deltas[i_channel].append(default_deltas[i_channel])
+	
+	if not wavelengths:
+		raise characterization_error("The file %s contains no measurement" % filename)
+	
+	return measurement(data_type, wavelengths, values, deltas, angle, polarization, direction)
+
+
+
+########################################################################
+#                                                                      #
+# characterization                                                     #
+#                                                                      #
+########################################################################
+class characterization(optimization.optimization):
+	"""A class to fit the thickness of layers and the properties of
+	materials to measured spectra
+	
+	Every measurement is calculated by a clone of the filter whose
+	wavelengths are those of the measurement; measurements made at the
+	same wavelengths share the clone and therefore its analysis. The
+	fitted materials are clones of the materials of the filter and the
+	filter itself is only modified by copy_to_filter."""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, filter, measurements, parent = None):
+		"""Initialize an instance of the characterization class
+		
+		This method takes 2 or 3 arguments:
+		  filter             the filter being characterized;
+		  measurements       a list of measurements;
+		  parent             (optional) the user interface used to do the
+		                     characterization.
+		
+		If given, the parent must implement an update method taking two
+		arguments (working, status)."""
+		
+		optimization.optimization.__init__(self, filter, measurements, parent)
+		
+		self.measurements = measurements
+		
+		self.max_iterations = config.CHARACTERIZATION_MAX_ITERATIONS
+		self.initial_max_iterations = self.max_iterations
+		self.min_gradient = config.CHARACTERIZATION_MIN_GRADIENT
+		self.acceptable_chi_2 = config.CHARACTERIZATION_ACCEPTABLE_CHI_2
+		self.min_chi_2_change = config.CHARACTERIZATION_MIN_CHI_2_CHANGE
+		self.derivative_step = config.CHARACTERIZATION_DERIVATIVE_STEP
+		
+		# The fitted parameters, described by their kind and a tuple
+		# identifying them.
+		self.parameters = []
+		self.starting_values = None
+		
+		self.optimizer = None
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_thickness_parameter                                            #
+	#                                                                    #
+	######################################################################
+	def add_thickness_parameter(self, position, side = FRONT):
+		"""Fit the thickness of a layer
+		
+		This method takes 1 or 2 arguments:
+		  position           the position of the layer;
+		  side               (optional) the side of the layer (FRONT or
+		                     BACK), the default value is FRONT."""
+		
+		if position < 0 or position >= self.filter.get_nb_layers(side):
+			raise characterization_error("There is no layer %i" % position)
+		
+		if self.filter.is_graded(position, side):
+			raise characterization_error("The thickness of graded-index layers cannot be fitted")
+		
+		self.add_parameter(THICKNESS, (position, side))
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_material_parameter                                             #
+	#                                                                    #
+	######################################################################
+	def add_material_parameter(self, material_name, property_nb):
+		"""Fit a property of a material
+		
+		This method takes 2 arguments:
+		  material_name      the name of the material;
+		  property_nb        the position of the property in the list
+		                     returned by the get_properties method of the
+		                     material (for example 0, 1 and 2 for A, B and
+		                     C of the Cauchy model).
+		
+		The material must be used in the filter and must not be a
+		mixture."""
+		
+		material = self.get_filter_material(self.filter, material_name)
+		
+		if material.is_mixture():
+			raise characterization_error("The properties of mixtures cannot be fitted")
+		
+		properties = material.get_properties()
+		if property_nb < 0 or property_nb >= len(properties) or not isinstance(properties[property_nb], (int, float)):
+			raise characterization_error("Property %i of %s cannot be fitted" % (property_nb, material_name))
+		
+		self.add_parameter(MATERIAL_PROPERTY, (material_name, property_nb))
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_parameter                                                      #
+	#                                                                    #
+	######################################################################
+	def add_parameter(self, kind, identification):
+		"""Add a parameter to the fit
+		
+		This method takes 2 arguments:
+		  kind               the kind of parameter (THICKNESS or
+		                     MATERIAL_PROPERTY);
+		  identification     a tuple identifying the parameter, (position,
+		                     side) for thicknesses or (material_name,
+		                     property_nb) for material properties."""
+		
+		if (kind, identification) in self.parameters:
+			raise characterization_error("The parameter is already fitted")
+		
+		self.parameters.append((kind, identification))
+		
+		# The fit must be prepared again.
+		self.optimizer = None
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_parameters                                                     #
+	#                                                                    #
+	######################################################################
+	def get_parameters(self):
+		"""Get the fitted parameters
+		
+		This method returns a list of (kind, identification) tuples."""
+		
+		return self.parameters
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_starting_values                                                #
+	#                                                                    #
+	######################################################################
+	def set_starting_values(self, starting_values):
+		"""Set the starting values of the parameters
+		
+		This method takes a single argument:
+		  starting_values    a list of the starting values of the
+		                     parameters, or None to start from the values
+		                     in the filter."""
+		
+		self.starting_values = starting_values
+		
+		self.optimizer = None
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_parameter_values                                               #
+	#                                                                    #
+	######################################################################
+	def get_parameter_values(self):
+		"""Get the values of the parameters
+		
+		This method returns a list of the current values of the
+		parameters, or of their values in the filter if the fit was not
+		prepared."""
+		
+		if self.optimizer:
+			return self.parameter_values[:]
+		
+		return self.get_filter_parameter_values(self.filter)
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_filter_parameter_values                                        #
+	#                                                                    #
+	######################################################################
+	def get_filter_parameter_values(self, filter):
+		"""Get the values of the parameters in a filter
+		
+		This method takes a single argument:
+		  filter             the filter;
+		and returns a list of the values of the parameters."""
+		
+		values = []
+		for kind, identification in self.parameters:
+			if kind == THICKNESS:
+				position, side = identification
+				values.append(filter.get_layer_thickness(position, side))
+			else:
+				material_name, property_nb = identification
+				values.append(self.get_filter_material(filter, material_name).get_properties()[property_nb])
+		
+		return values
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_filter_material                                                #
+	#                                                                    #
+	######################################################################
+	def get_filter_material(self, filter, material_name):
+		"""Get a material used in a filter
+		
+		This method takes 2 arguments:
+		  filter             the filter;
+		  material_name      the name of the material;
+		and returns the material."""
+		
+		for material in filter.get_materials():
+			if material.get_name() == material_name:
+				return material
+		
+		raise characterization_error("%s is not used in the filter" % material_name)
+	
+	
+	######################################################################
+	#                                                                    #
+	# prepare                                                            #
+	#                                                                    #
+	######################################################################
+	def prepare(self):
+		"""Prepare the fit
+		
+		This method is automatically called before the first iteration."""
+		
+		if not self.parameters:
+			raise characterization_error("At least one parameter must be fitted")
+		
+		if not self.measurements:
+			raise characterization_error("At least one measurement is necessary")
+		
+		# Make one clone of the filter by set of wavelengths.
+		self.filters = []
+		self.measurement_filters = []
+		filters_by_wavelengths = {}
+		for measurement in self.measurements:
+			wavelengths = tuple(measurement.get_wavelengths())
+			if wavelengths not in filters_by_wavelengths:
+				filter = self.filter.clone()
+				filter.set_wavelengths(list(wavelengths))
+				filters_by_wavelengths[wavelengths] = filter
+				self.filters.append(filter)
+			self.measurement_filters.append(filters_by_wavelengths[wavelengths])
+		
+		# The fitted materials are clones shared by all the filters. Keep
+		# the parameters of every material together to modify them all at
+		# once.
+		self.materials = {}
+		self.material_parameters = {}
+		for i_parameter, (kind, identification) in enumerate(self.parameters):
+			if kind == MATERIAL_PROPERTY:
+				material_name, property_nb = identification
+				if material_name not in self.materials:
+					self.materials[material_name] = self.get_filter_material(self.filter, material_name).clone()
+					self.material_parameters[material_name] = []
+					for filter in self.filters:
+						filter.set_material(filter.get_material_nb(material_name), self.materials[material_name])
+				self.material_parameters[material_name].append((i_parameter, property_nb))
+		
+		if self.starting_values:
+			self.parameter_values = list(self.starting_values)
+		else:
+			self.parameter_values = self.get_filter_parameter_values(self.filter)
+		
+		# Thicknesses cannot be negative, other parameters are not bounded.
+		self.parameter_min = []
+		self.parameter_max = []
+		for kind, identification in self.parameters:
+			if kind == THICKNESS:
+				self.parameter_min.append(0.0)
+			else:
+				self.parameter_min.append(-Levenberg_Marquardt.INFINITY)
+			self.parameter_max.append(Levenberg_Marquardt.INFINITY)
+		
+		# Put all the measured values in a single list for the Levenberg-
+		# Marquardt algorithm.
+		self.all_measured_values = []
+		self.all_tolerances = []
+		for measurement in self.measurements:
+			for channel in measurement.get_values():
+				self.all_measured_values += channel
+			for channel in measurement.get_deltas():
+				self.all_tolerances += channel
+		
+		self.optimizer = Levenberg_Marquardt.Levenberg_Marquardt(self.calculate_values, self.calculate_derivatives, self.parameter_values[:], self.all_measured_values, self.all_tolerances)
+		self.optimizer.set_stop_criteria(self.min_gradient, self.acceptable_chi_2, self.min_chi_2_change)
+		self.optimizer.set_limits(self.parameter_min, self.parameter_max)
+		self.optimizer.prepare()
+		self.status = Levenberg_Marquardt.IMPROVING
+		self.chi_2 = self.optimizer.get_chi_2()
+		
+		self.reset_iterations()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_parameter_values                                               #
+	#                                                                    #
+	######################################################################
+	def set_parameter_values(self, parameter_values):
+		"""Set the values of the parameters in the clones of the filter
+		
+		This method takes a single argument:
+		  parameter_values   the values of the parameters.
+		
+		Only the modified parameters are changed, to keep as much of the
+		analysis of the filters as possible."""
+		
+		for i_parameter, (kind, identification) in enumerate(self.parameters):
+			if kind == THICKNESS:
+				position, side = identification
+				for filter in self.filters:
+					if filter.get_layer_thickness(position, side) != parameter_values[i_parameter]:
+						filter.change_layer_thickness(parameter_values[i_parameter], position, side)
+		
+		for material_name, material_parameters in self.material_parameters.iteritems():
+			material = self.materials[material_name]
+			properties = list(material.get_properties())
+			modified = False
+			for i_parameter, property_nb in material_parameters:
+				if properties[property_nb] != parameter_values[i_parameter]:
+					properties[property_nb] = parameter_values[i_parameter]
+					modified = True
+			if modified:
+				material.set_properties(*properties)
+				for filter in self.filters:
+					filter.set_material(filter.get_material_nb(material_name), material)
+		
+		self.parameter_values = list(parameter_values)
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_values                                                   #
+	#                                                                    #
+	######################################################################
+	def calculate_values(self, parameter_values):
+		"""Calculate the values corresponding to the measurements
+		
+		This method takes a single argument:
+		  parameter_values   the values of the parameters;
+		and returns a list of the calculated values, in the order of the
+		measured values.
+		
+		Delta is brought within 180 degrees of the measured value to avoid
+		jumps in the residuals."""
+		
+		self.set_parameter_values(parameter_values)
+		
+		all_calculated_values = []
+		
+		for measurement, filter in zip(self.measurements, self.measurement_filters):
+			data_type = measurement.get_data_type()
+			angle = measurement.get_angle()
+			polarization = measurement.get_polarization()
+			backward = measurement.get_direction() == BACKWARD
+			nb_wvls = len(measurement.get_wavelengths())
+			
+			if data_type == data_holder.REFLECTION:
+				if backward:
+					channels = [filter.reflection_reverse(angle, polarization)]
+				else:
+					channels = [filter.reflection(angle, polarization)]
+			elif data_type == data_holder.TRANSMISSION:
+				if backward:
+					channels = [filter.transmission_reverse(angle, polarization)]
+				else:
+					channels = [filter.transmission(angle, polarization)]
+			elif data_type == data_holder.ABSORPTION:
+				if backward:
+					channels = [filter.absorption_reverse(angle, polarization)]
+				else:
+					channels = [filter.absorption(angle, polarization)]
+			else:
+				if backward:
+					channels = list(filter.ellipsometry_reverse(angle))
+				else:
+					channels = list(filter.ellipsometry(angle))
+			
+			calculated_values = [[channel[i_wvl] for i_wvl in range(nb_wvls)] for channel in channels]
+			
+			if data_type == data_holder.ELLIPSOMETRY:
+				measured_Delta = measurement.get_values()[1]
+				for i_wvl in range(nb_wvls):
+					calculated_values[1][i_wvl] = measured_Delta[i_wvl] + (calculated_values[1][i_wvl]-measured_Delta[i_wvl]+180.0)%360.0 - 180.0
+			
+			for channel in calculated_values:
+				all_calculated_values += channel
+		
+		return all_calculated_values
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_derivatives                                              #
+	#                                                                    #
+	######################################################################
+	def calculate_derivatives(self, parameter_values):
+		"""Calculate the derivatives of the values
+		
+		This method takes a single argument:
+		  parameter_values   the values of the parameters;
+		and returns a list of the derivatives of the calculated values
+		according to every parameter.
+		
+		The derivatives are calculated analytically when possible (see
+		calculate_analytic_derivatives). Otherwise, they are calculated by
+		finite differences."""
+		
+		self.set_parameter_values(parameter_values)
+		
+		nb_parameters = len(self.parameters)
+		derivatives = [[] for i_parameter in range(nb_parameters)]
+		finite_differences = None
+		
+		position = 0
+		for measurement, filter in zip(self.measurements, self.measurement_filters):
+			nb_values = len(measurement.get_wavelengths())*len(measurement.get_values())
+			
+			measurement_derivatives = self.calculate_analytic_derivatives(measurement, filter)
+			
+			# The finite differences are calculated for all the measurements
+			# at once, and only if they are needed.
+			if measurement_derivatives is None:
+				if finite_differences is None:
+					finite_differences = self.calculate_finite_differences(parameter_values)
+				measurement_derivatives = [finite_differences[i_parameter][position:position+nb_values] for i_parameter in range(nb_parameters)]
+			
+			for i_parameter in range(nb_parameters):
+				derivatives[i_parameter] += measurement_derivatives[i_parameter]
+			
+			position += nb_values
+		
+		return derivatives
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_analytic_derivatives                                     #
+	#                                                                    #
+	######################################################################
+	def calculate_analytic_derivatives(self, measurement, filter):
+		"""Calculate the derivatives of the values of a measurement
+		analytically
+		
+		This method takes 2 arguments:
+		  measurement        the measurement;
+		  filter             the clone of the filter corresponding to the
+		                     measurement;
+		and returns a list of the derivatives of the values of the
+		measurement according to every parameter, or None if they cannot
+		be calculated analytically.
+		
+		The derivatives are calculated analytically for measurements in
+		the forward direction, except ellipsometric measurements when the
+		backside is considered, if all the parameters are thicknesses of
+		front layers or properties of materials, with a dispersion model
+		that can be differentiated, that are only used in front layers."""
+		
+		if measurement.get_direction() != FORWARD:
+			return None
+		
+		data_type = measurement.get_data_type()
+		if data_type == data_holder.ELLIPSOMETRY and filter.get_consider_backside():
+			return None
+		
+		parameters = []
+		for kind, identification in self.parameters:
+			if kind == THICKNESS:
+				position, side = identification
+				if side != FRONT:
+					return None
+				parameters.append((optical_filter.THICKNESS_DERIVATIVE, position))
+			else:
+				material_name, property_nb = identification
+				parameters.append((optical_filter.MATERIAL_DERIVATIVE, (filter.get_material_nb(material_name), property_nb)))
+		
+		try:
+			property_derivatives = filter.property_derivatives(parameters, measurement.get_angle(), measurement.get_polarization())
+		except (optical_filter.filter_error, NotImplementedError):
+			return None
+		
+		derivatives = []
+		for dR, dT, dA, dPsi, dDelta, dphi_r, dphi_t in property_derivatives:
+			if data_type == data_holder.REFLECTION:
+				derivatives.append(dR)
+			elif data_type == data_holder.TRANSMISSION:
+				derivatives.append(dT)
+			elif data_type == data_holder.ABSORPTION:
+				derivatives.append(dA)
+			else:
+				derivatives.append(dPsi + dDelta)
+		
+		return derivatives
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_finite_differences                                       #
+	#                                                                    #
+	######################################################################
+	def calculate_finite_differences(self, parameter_values):
+		"""Calculate the derivatives of the values by finite differences
+		
+		This method takes a single argument:
+		  parameter_values   the values of the parameters;
+		and returns a list of the derivatives of the calculated values
+		according to every parameter.
+		
+		The derivatives are calculated by central finite differences, or
+		forward differences when the parameter is at its lower limit."""
+		
+		derivatives = []
+		
+		for i_parameter in range(len(self.parameters)):
+			step = self.derivative_step*max(abs(parameter_values[i_parameter]), 1.0)
+			
+			upper_values = list(parameter_values)
+			upper_values[i_parameter] += step
+			upper = self.calculate_values(upper_values)
+			
+			lower_values = list(parameter_values)
+			if parameter_values[i_parameter]-step >= self.parameter_min[i_parameter]:
+				lower_values[i_parameter] -= step
+				span = 2.0*step
+			else:
+				span = step
+			lower = self.calculate_values(lower_values)
+			
+			derivatives.append([(upper[i]-lower[i])/span for i in range(len(upper))])
+		
+		self.set_parameter_values(parameter_values)
+		
+		return derivatives
+	
+	
+	######################################################################
+	#                                                                    #
+	# iterate_                                                           #
+	#                                                                    #
+	######################################################################
+	def iterate_(self):
+		"""Do one iteration"""
+		
+		if self.optimizer is None:
+			self.prepare()
+		
+		# Execute one Levenberg-Marquardt iteration.
+		self.status = self.optimizer.iterate()
+		
+		# Get chi square.
+		self.chi_2 = self.optimizer.get_chi_2()
+		
+		# The last values calculated by the optimizer may have been
+		# rejected; go back to the accepted ones.
+		self.set_parameter_values(self.optimizer.a)
+		
+		self.iteration += 1
+		
+		# Stop if the solution is not improving.
+		if self.status != Levenberg_Marquardt.IMPROVING:
+			self.stop_criteria_met = True
+		
+		# Verify if the maximum number of iterations has been reached (when
+		# specified).
+		if self.max_iterations and self.iteration >= self.max_iterations:
+			self.max_iterations_reached = True
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_measured_values                                                #
+	#                                                                    #
+	######################################################################
+	def get_measured_values(self):
+		"""Get the measured values
+		
+		This method returns a list of the channels of measured values of
+		every measurement."""
+		
+		return [measurement.get_values() for measurement in self.measurements]
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_calculated_values                                              #
+	#                                                                    #
+	######################################################################
+	def get_calculated_values(self):
+		"""Get the calculated values
+		
+		This method returns a list of the channels of calculated values
+		of every measurement, organized like the measured values."""
+		
+		if self.optimizer is None:
+			self.prepare()
+		
+		all_calculated_values = self.calculate_values(self.parameter_values)
+		
+		calculated_values = []
+		position = 0
+		for measurement in self.measurements:
+			nb_wvls = len(measurement.get_wavelengths())
+			channels = []
+			for channel in measurement.get_values():
+				channels.append(all_calculated_values[position:position+nb_wvls])
+				position += nb_wvls
+			calculated_values.append(channels)
+		
+		return calculated_values
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_correlation_matrix                                             #
+	#                                                                    #
+	######################################################################
+	def get_correlation_matrix(self):
+		"""Get the correlation matrix
+		
+		This method returns the correlation matrix of the parameters."""
+		
+		if self.optimizer is None:
+			self.prepare()
+		
+		correlation_matrix = self.optimizer.get_correlation_matrix()
+		
+		self.set_parameter_values(self.optimizer.a)
+		
+		return correlation_matrix
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_fitted_materials                                               #
+	#                                                                    #
+	######################################################################
+	def get_fitted_materials(self):
+		"""Get the fitted materials
+		
+		This method returns a dictionary of the fitted materials, by
+		name."""
+		
+		if self.optimizer is None:
+			return {}
+		
+		return self.materials
+	
+	
+	######################################################################
+	#                                                                    #
+	# copy_to_filter                                                     #
+	#                                                                    #
+	######################################################################
+	def copy_to_filter(self):
+		"""Copy the fitted parameters to the filter instance
+		
+		The fitted materials replace the materials of the filter."""
+		
+		if self.optimizer is None:
+			return
+		
+		for i_parameter, (kind, identification) in enumerate(self.parameters):
+			if kind == THICKNESS:
+				position, side = identification
+				self.filter.change_layer_thickness(self.parameter_values[i_parameter], position, side)
+		
+		for material_name, material in self.materials.iteritems():
+			self.filter.set_material(self.filter.get_material_nb(material_name), material.clone())
+	
+	
+	######################################################################
+	#                                                                    #
+	# save_values                                                        #
+	#                                                                    #
+	######################################################################
+	def save_values(self, outfile):
+		"""Save the measured and calculated values
+		
+		This method takes one argument:
+		  outfile            the file in which to write."""
+		
+		calculated_values = self.get_calculated_values()
+		
+		outfile.write("%10s  %10s  %10s  %10s\n" %("measure nb", "wvl", "measured", "result"))
+		for i_measurement, measurement in enumerate(self.measurements):
+			wavelengths = measurement.get_wavelengths()
+			for i_channel, channel in enumerate(measurement.get_values()):
+				for i_wvl in range(len(wavelengths)):
+					outfile.write("%10i  %10.3f  %10.4f  %10.4f\n" %(i_measurement, wavelengths[i_wvl], channel[i_wvl], calculated_values[i_measurement][i_channel][i_wvl]))
+
+
+
+########################################################################
+#                                                                      #
+# batch_characterization                                               #
+#                                                                      #
+########################################################################
+class batch_characterization(object):
+	"""A class to characterize many samples of the same filter
+	
+	The same parameters are fitted for every sample, starting from the
+	filter. The samples are characterized in parallel by worker
+	processes, or in the calling process when a single process is used."""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, filter, parent = None):
+		"""Initialize an instance of the batch characterization class
+		
+		This method takes 1 or 2 arguments:
+		  filter             the filter from which to start;
+		  parent             (optional) the user interface used to do the
+		                     characterization.
+		
+		If given, the parent must implement an update method taking two
+		arguments (working, status). The status is the number of samples
+		whose characterization is completed."""
+		
+		self.filter = filter
+		self.parent = parent
+		
+		# The parameters are validated and kept by a characterization
+		# without measurements.
+		self.template = characterization(filter, [])
+		
+		self.samples = []
+		self.max_iterations = config.CHARACTERIZATION_MAX_ITERATIONS
+		self.nb_processes = config.CHARACTERIZATION_NB_PROCESSES
+		
+		self.results = []
+		self.nb_failed_samples = 0
+		self.status = 0
+		
+		self.working = False
+		self.continue_characterization = False
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_thickness_parameter                                            #
+	# add_material_parameter                                             #
+	# get_parameters                                                     #
+	#                                                                    #
+	######################################################################
+	def add_thickness_parameter(self, position, side = FRONT):
+		"""Fit the thickness of a layer (see characterization)"""
+		
+		self.template.add_thickness_parameter(position, side)
+	
+	def add_material_parameter(self, material_name, property_nb):
+		"""Fit a property of a material (see characterization)"""
+		
+		self.template.add_material_parameter(material_name, property_nb)
+	
+	def get_parameters(self):
+		"""Get the fitted parameters"""
+		
+		return self.template.get_parameters()
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_sample                                                         #
+	#                                                                    #
+	######################################################################
+	def add_sample(self, measurements):
+		"""Add a sample
+		
+		This method takes a single argument:
+		  measurements       the list of the measurements of the sample;
+		and returns the number of the sample."""
+		
+		self.samples.append(measurements)
+		
+		return len(self.samples)-1
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_max_iterations                                                 #
+	# set_nb_processes                                                   #
+	#                                                                    #
+	######################################################################
+	def set_max_iterations(self, max_iterations):
+		"""Set the maximum number of iterations of every characterization"""
+		
+		self.max_iterations = max_iterations
+	
+	def set_nb_processes(self, nb_processes):
+		"""Set the number of worker processes (0 for one per processor)"""
+		
+		self.nb_processes = nb_processes
+	
+	
+	######################################################################
+	#                                                                    #
+	# go                                                                 #
+	#                                                                    #
+	######################################################################
+	def go(self):
+		"""Characterize all the samples
+		
+		The characterizations are done in worker processes unless the
+		number of processes is 1 or the multiprocessing module is not
+		available. When it is done, the results can be obtained with
+		get_results."""
+		
+		if not self.template.get_parameters():
+			raise characterization_error("At least one parameter must be fitted")
+		
+		self.continue_characterization = True
+		self.working = True
+		self.results = [None]*len(self.samples)
+		self.nb_failed_samples = 0
+		self.status = 0
+		
+		if self.parent:
+			self.parent.update(self.working, self.status)
+		
+		parameters = self.template.get_parameters()
+		starting_values = self.template.get_parameter_values()
+		
+		nb_processes = workers.get_nb_processes(self.nb_processes, len(self.samples))
+		
+		# Worker processes recreate the filter and its materials from
+		# their description; in this process, the filter is used
+		# directly.
+		if nb_processes > 1:
+			catalog_description = materials.describe_material_catalog(self.filter.get_material_catalog())
+			material_states = materials.describe_materials(self.filter.get_materials())
+			filter_text = workers.write_to_text(optical_filter.write_filter, self.filter)
+			arguments = [(i_sample, catalog_description, material_states, filter_text, parameters, starting_values, [measurement.get_description() for measurement in sample], self.max_iterations) for i_sample, sample in enumerate(self.samples)]
+			pool = multiprocessing.Pool(nb_processes)
+			answers = pool.imap_unordered(characterize_sample, arguments)
+		else:
+			pool = None
+			answers = ((i_sample, fit_sample(self.filter, parameters, starting_values, sample, self.max_iterations)) for i_sample, sample in enumerate(self.samples))
+		
+		try:
+			for i_sample, answer in answers:
+				if answer is None:
+					self.nb_failed_samples += 1
+				else:
+					self.results[i_sample] = answer
+				
+				self.status += 1
+				
+				if not self.continue_characterization:
+					break
+				
+				if self.parent:
+					self.parent.update(self.working, self.status)
+		
+		finally:
+			if pool:
+				pool.terminate()
+				pool.join()
+		
+		self.working = False
+		
+		if self.parent:
+			self.parent.update(self.working, self.status)
+	
+	
+	######################################################################
+	#                                                                    #
+	# stop                                                               #
+	#                                                                    #
+	######################################################################
+	def stop(self):
+		"""Stop the characterization
+		
+		This will stop the characterization after the current sample. The
+		results already obtained are kept."""
+		
+		self.continue_characterization = False
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_results                                                        #
+	#                                                                    #
+	######################################################################
+	def get_results(self):
+		"""Get the results
+		
+		This method returns a list, by sample, of tuples (chi_2,
+		parameter_values), or None for samples whose characterization
+		failed or was not done."""
+		
+		return self.results
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_nb_failed_samples                                              #
+	# get_status                                                         #
+	# get_working                                                        #
+	#                                                                    #
+	######################################################################
+	def get_nb_failed_samples(self):
+		"""Get the number of samples whose characterization failed"""
+		
+		return self.nb_failed_samples
+	
+	def get_status(self):
+		"""Get the number of samples already characterized"""
+		
+		return self.status
+	
+	def get_working(self):
+		"""Get if the characterization is working"""
+		
+		return self.working
+
+
+
+########################################################################
+#                                                                      #
+# characterize_sample                                                  #
+#                                                                      #
+########################################################################
+def characterize_sample(arguments):
+	"""Characterize a sample
+	
+	This function takes a single argument, a tuple containing the number
+	of the sample, the description of the material catalog, the states
+	of the materials of the filter, the filter written as text, the
+	fitted parameters and their starting values, the descriptions of the
+	measurements and the maximum number of iterations. It returns a
+	tuple containing the number of the sample and the result of
+	fit_sample.
+	
+	This function is executed in worker processes; its arguments and
+	return value are therefore made of simple types."""
+	
+	i_sample, catalog_description, material_states, filter_text, parameters, starting_values, measurement_descriptions, max_iterations = arguments
+	
+	try:
+		material_catalog = materials.material_catalog_from_states(catalog_description, material_states)
+		filter = optical_filter.parse_filter(filter_text.splitlines(), version.version(release.VERSION), material_catalog)
+		measurements = [measurement(*description) for description in measurement_descriptions]
+	except (characterization_error, optical_filter.filter_error, materials.material_error):
+		return i_sample, None
+	
+	return i_sample, fit_sample(filter, parameters, starting_values, measurements, max_iterations)
+
+
+
+########################################################################
+#                                                                      #
+# fit_sample                                                           #
+#                                                                      #
+########################################################################
+def fit_sample(filter, parameters, starting_values, measurements, max_iterations):
+	"""Fit the parameters of a filter to the measurements of a sample
+	
+	This function takes 5 arguments:
+	  filter             the filter from which to start, it is not
+	                     modified;
+	  parameters         the fitted parameters;
+	  starting_values    their starting values;
+	  measurements       the measurements of the sample;
+	  max_iterations     the maximum number of iterations;
+	and returns a tuple (chi_2, parameter_values), or None if the
+	characterization failed."""
+	
+	try:
+		fit = characterization(filter, measurements)
+		for kind, identification in parameters:
+			fit.add_parameter(kind, identification)
+		fit.set_starting_values(starting_values)
+		fit.max_iterations = max_iterations
+		fit.initial_max_iterations = max_iterations
+		fit.go()
+	
+	# A sample that cannot be characterized, for example because its
+	# measurements are inconsistent or because the fit diverged, must
+	# not stop the others. Other errors are bugs and are propagated.
+	except (characterization_error, optical_filter.filter_error, materials.material_error, linear_algebra.matrix_error, ArithmeticError, ValueError):
+		return None
+	
+	return fit.get_chi_2(), fit.get_parameter_values()
@@ -432,9 +432,11 @@ class observers(object):
 
 
 # Make a list of observers and illuminants. This way they only need
-# to be read once. And provide functions to access these lists.
-__illuminants = illuminants(illuminants_directory)
-__observers = observers(observers_directory)
+# to be read once. And provide functions to access these lists. The
+# directories are only listed when the lists are first used so that
+# importing this module does not access the disk.
+__illuminants = None
+__observers = None
 
 
 
@@ -450,22 +452,50 @@ __observers = observers(observers_directory)
 ########################################################################
 
 def get_illuminant_names():
-	return __illuminants.get_illuminant_names()
+	return get_illuminants().get_illuminant_names()
 
 def get_illuminant(illuminant_name):
-	return __illuminants.get_illuminant(illuminant_name)
+	return get_illuminants().get_illuminant(illuminant_name)
 
 def illuminant_exists(illuminant_name):
-	return __illuminants.illuminant_exists(illuminant_name)
+	return get_illuminants().illuminant_exists(illuminant_name)
 
 def get_observer_names():
-	return __observers.get_observer_names()
+	return get_observers().get_observer_names()
 
 def get_observer(observer_name):
-	return __observers.get_observer(observer_name)
+	return get_observers().get_observer(observer_name)
 
 def observer_exists(observer_name):
-	return __observers.observer_exists(observer_name)
+	return get_observers().observer_exists(observer_name)
+
+
+
+########################################################################
+#                                                                      #
+# get_illuminants                                                      #
+# get_observers                                                        #
+#                                                                      #
+########################################################################
+def get_illuminants():
+	"""Get the list of illuminants, making it on first use"""
+	
+	global __illuminants
+	
+	if __illuminants is None:
+		__illuminants = illuminants(illuminants_directory)
+	
+	return __illuminants
+
+def get_observers():
+	"""Get the list of observers, making it on first use"""
+	
+	global __observers
+	
+	if __observers is None:
+		__observers = observers(observers_directory)
+	
+	return __observers
 
 
 
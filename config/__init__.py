@@ -22,19 +22,22 @@
 # USA
 
 
-__all__ = ["config_color",
+__all__ = ["config_characterization",
+           "config_color",
            "config_dispersive",
            "config_Fourier",
            "config_general",
            "config_GUI",
            "config_interface",
            "config_materials",
+           "config_multistart",
            "config_needles",
            "config_preproduction"
            "config_refinement",
            "config_special"]
 
 
+from config_characterization import *
 from config_color import *
 from config_dispersive import *
 from config_Fourier import *
@@ -42,6 +45,7 @@ from config_general import *
 from config_GUI import *
 from config_interface import *
 from config_materials import *
+from config_multistart import *
 from config_needles import *
 from config_preproduction import *
 from config_refinement import *
@@ -0,0 +1,46 @@
+# config_characterization.py
+# 
+# Configurations related to the characterization of filters from
+# measured spectra for the Filters software.
+# 
+# Copyright (c) 2015 Stephane Larouche.
+# 
+# This file is part of OpenFilters.
+# 
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+# Stopping criteria of the fit with the Levenberg-Marquardt method.
+CHARACTERIZATION_MAX_ITERATIONS = 100
+CHARACTERIZATION_MIN_GRADIENT = 1E-9
+CHARACTERIZATION_ACCEPTABLE_CHI_2 = 0.0
+CHARACTERIZATION_MIN_CHI_2_CHANGE = 1E-6
+
+# The relative step used to calculate the derivatives by finite
+# differences. For parameters smaller than 1, the step is absolute.
+CHARACTERIZATION_DERIVATIVE_STEP = 1E-5
+
+# The tolerances given to measured values when they are not specified in
+# the measurement files (reflection, transmission and absorption are
+# between 0 and 1, Psi and Delta are in degrees).
+CHARACTERIZATION_PHOTOMETRIC_TOLERANCE = 0.005
+CHARACTERIZATION_PSI_TOLERANCE = 0.1
+CHARACTERIZATION_DELTA_TOLERANCE = 0.2
+
+# The number of worker processes used to characterize many samples.
+# When 0, one process is started for every processor; when 1, the
+# samples are characterized in the calling process.
+CHARACTERIZATION_NB_PROCESSES = 0
@@ -24,3 +24,62 @@
 
 # The module directory.
 MODULE_DIRECTORY = "modules",
+
+# Graded-index layers with at least this number of sublayers are
+# written in a packed binary form in filter and project files. Set to
+# None to always write them as text.
+PACKED_GRADED_LAYER_MIN_SUBLAYERS = None
+
+# The characteristic matrices of the sublayers of graded-index layers
+# are reused during an analysis when the same step appears with the
+# same thickness. This is the maximum number of matrices kept, times
+# the number of wavelengths. Set to 0 to disable the cache.
+SUBLAYER_MATRICES_CACHE_SIZE = 250000
+
+# The characteristic matrices of the filter are kept for the most
+# recently used angles of incidence. This is the maximum number of
+# matrices kept (one per side and per angle), times the number of
+# wavelengths.
+ANALYSIS_CACHE_SIZE = 1000000
+
+# Periodic parts of a filter are multiplied only once and then raised
+# to the number of periods. This is the maximum number of layers (or
+# sublayers of graded-index layers) in a period that is searched for.
+# Set to 0 to multiply every layer.
+PERIODIC_MAX_PERIOD = 100
+
+# The GD and the GDD are calculated analytically from the derivatives
+# of the characteristic matrices with regard to the angular frequency,
+# which does not require closely spaced wavelengths. The dispersion of
+# the materials is differentiated numerically with this relative step
+# on the angular frequency. Set to 0 to determine the GD and the GDD
+# numerically from the phase instead.
+ANALYTIC_GD_STEP = 1e-4
+
+# The number of worker processes used to evaluate the filters of a
+# parameter sweep. When 0, one process is started for every processor;
+# when 1, the filters are evaluated in the calling process.
+SWEEP_NB_PROCESSES = 0
+
+# Adaptive sampling of the wavelengths (see
+# optical_filter.set_wavelengths_adaptively). The range is first
+# sampled with ADAPTIVE_WAVELENGTHS_INITIAL_NB wavelengths. Intervals are
+# then divided until the linear interpolation of the reflection and the
+# transmission is within ADAPTIVE_WAVELENGTHS_TOLERANCE (and the phase
+# within ADAPTIVE_WAVELENGTHS_PHASE_TOLERANCE degrees) or until the
+# intervals are smaller than ADAPTIVE_WAVELENGTHS_MIN_STEP nm.
+ADAPTIVE_WAVELENGTHS_INITIAL_NB = 201
+ADAPTIVE_WAVELENGTHS_TOLERANCE = 0.001
+ADAPTIVE_WAVELENGTHS_PHASE_TOLERANCE = 1.0
+ADAPTIVE_WAVELENGTHS_MIN_STEP = 0.001
+ADAPTIVE_WAVELENGTHS_MAX_NB = 100000
+
+# Averaging of the reflection, the transmission and the absorption over
+# a cone of light and over the bandwidth of the instrument (see
+# optical_filter.set_cone_half_angle and optical_filter.set_bandwidth).
+# These are the numbers of points of the Gauss-Legendre quadratures over
+# the polar angle and the azimuth of the rays in the cone, and over
+# each half of the slit function.
+CONE_NB_POLAR_ANGLES = 5
+CONE_NB_AZIMUTHS = 4
+BANDWIDTH_NB_WAVELENGTHS = 3
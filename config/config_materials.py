@@ -23,3 +23,12 @@
 
 
 MATERIALS_DIRECTORY = "materials",
+
+# Number of threads used to read the materials of a catalog when it is
+# first used.
+MATERIAL_LOADING_THREADS = 8
+
+# Keep a pre-parsed copy of the materials in the user configuration
+# directory to avoid parsing the material files every time they are
+# read.
+MATERIAL_CACHE = True
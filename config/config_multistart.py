@@ -0,0 +1,50 @@
+# config_multistart.py
+# 
+# Configurations related to the multi-start optimization for the
+# Filters software.
+# 
+# Copyright (c) 2015 Stephane Larouche.
+# 
+# This file is part of OpenFilters.
+# 
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+# The number of starting designs, including the original design.
+MULTISTART_NB_STARTS = 20
+
+# The relative variation of the thickness of the layers in the starting
+# designs.
+MULTISTART_THICKNESS_VARIATION = 0.2
+
+# The maximum number of layers removed from the starting designs.
+MULTISTART_MAX_REMOVED_LAYERS = 0
+
+# The sampling of the thickness variations (0 for random, 1 for
+# quasi-random).
+MULTISTART_SAMPLING = 1
+
+# The maximum number of iterations of every refinement.
+MULTISTART_MAX_ITERATIONS = 100
+
+# The number of worker processes. When 0, one process is started for
+# every processor; when 1, the refinements are done in the calling
+# process.
+MULTISTART_NB_PROCESSES = 0
+
+# Two solutions with the same materials whose thicknesses differ by less
+# than this tolerance (in nm) are considered identical.
+MULTISTART_DUPLICATE_TOLERANCE = 0.1
@@ -29,3 +29,9 @@ RELATIVE_THICKNESS_ERROR = 0.01
 PHYSICAL_THICKNESS_ERROR = 1.0
 DISTRIBUTION = 0
 NB_TESTS = 100
+
+# Default parameters for sensitivity analysis. Derivatives whose
+# contribution to the error (derivative times error) never exceeds the
+# threshold times the largest contribution are not kept.
+INDEX_ERROR = 0.01
+SENSITIVITY_THRESHOLD = 1.0e-3
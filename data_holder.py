@@ -47,6 +47,7 @@ ELECTRIC_FIELD = 14
 REFLECTION_MONITORING = 15
 TRANSMISSION_MONITORING = 16
 ELLIPSOMETRY_MONITORING = 17
+ELECTRIC_FIELD_MAP = 18
 
 DISPERSIVE_DATA_TYPES = [REFLECTION_PHASE, TRANSMISSION_PHASE, REFLECTION_GD, TRANSMISSION_GD, REFLECTION_GDD, TRANSMISSION_GDD]
 
@@ -67,7 +68,8 @@ DATA_TYPE_NAMES = {REFLECTION: "Reflection",
                    ELECTRIC_FIELD: "Electric field distribution",
                    REFLECTION_MONITORING: "Reflection monitoring",
                    TRANSMISSION_MONITORING: "Transmission monitoring",
-                   ELLIPSOMETRY_MONITORING: "Ellipsometric variable monitoring"}
+                   ELLIPSOMETRY_MONITORING: "Ellipsometric variable monitoring",
+                   ELECTRIC_FIELD_MAP: "Electric field intensity map"}
 
 
 
@@ -567,6 +569,40 @@ class electric_field_data(diagram_data):
 
 
 
+########################################################################
+#                                                                      #
+# electric_field_map_data                                              #
+#                                                                      #
+########################################################################
+class electric_field_map_data(data_holder):
+	"""A data holder for electric field intensity map data"""
+	
+	data_type = ELECTRIC_FIELD_MAP
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, filter, data, wavelengths, angles, polarization):
+		"""Initialize the data holder
+		
+		This method takes 5 arguments:
+		  filter             the filter giving the data;
+		  data               the data;
+		  wavelengths        the wavelengths;
+		  angles             the incidence angles;
+		  polarization       the polarization."""
+		
+		data_holder.__init__(self, filter, data)
+		
+		self.wavelengths = wavelengths
+		self.angles = angles
+		self.polarization = polarization
+
+
+
 ########################################################################
 #                                                                      #
 # photometry_monitoring_data                                           #
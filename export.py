@@ -23,6 +23,11 @@
 
 
 
+import os
+import csv
+import gzip
+import itertools
+
 from definitions import *
 from data_holder import REFLECTION,\
                         TRANSMISSION,\
@@ -42,6 +47,7 @@ from data_holder import REFLECTION,\
                         REFLECTION_MONITORING,\
                         TRANSMISSION_MONITORING,\
                         ELLIPSOMETRY_MONITORING,\
+                        ELECTRIC_FIELD_MAP,\
                         DATA_TYPE_NAMES
 
 
@@ -72,6 +78,44 @@ COLUMN_TITLES = {REFLECTION: "R",
                  REFLECTION_MONITORING: "R",
                  TRANSMISSION_MONITORING: "T"}
 
+COLOR_COLUMN_TITLES = ["X", "Y", "Z", "x", "y", "L", "u*", "v*", "a*", "b*", "C*(u*v*)", "h(u*v*)", "C*(a*b*)", "h(a*b*)"]
+
+# The formats for the bulk export of results, according to the
+# extension of the file.
+CSV = 0
+NPY = 1
+NPZ = 2
+HDF5 = 3
+
+EXPORT_FORMATS = {".csv": CSV,
+                  ".txt": CSV,
+                  ".npy": NPY,
+                  ".npz": NPZ,
+                  ".h5": HDF5,
+                  ".hdf5": HDF5}
+
+# The number of rows written at once in text files.
+EXPORT_BLOCK_SIZE = 10000
+
+
+
+########################################################################
+#                                                                      #
+# export_error                                                         #
+#                                                                      #
+########################################################################
+class export_error(Exception):
+	"""Exception class for export errors"""
+	
+	def __init__(self, value = ""):
+		self.value = value
+	
+	def __str__(self):
+		if self.value:
+			return "Export error: %s." % self.value
+		else:
+			return "Export error."
+
 
 
 ########################################################################
@@ -110,7 +154,7 @@ def export_results_to_text(filename, results):
 	  filename        the name of the file in which to write;
 	  results         a list of results to export.
 	
-	The results must be data_handler instances. All results are exported
+	The results must be data_holder instances. All results are exported
 	in a single file."""
 	
 	outfile = open(filename, "w")
@@ -250,6 +294,31 @@ def export_results_to_text(filename, results):
 				for i_sublayer in range(len(thickness[i_layer])):
 					outfile.write("%5i %15.6f %15.6f\n" % (i_layer, thickness[i_layer][i_sublayer], field[i_layer][i_sublayer]))
 		
+		elif data_type == ELECTRIC_FIELD_MAP:
+			
+			# Get the data and the properties.
+			wavelengths = result.get_wavelengths()
+			angles = result.get_angles()
+			polarization = result.get_polarization()
+			thickness, E2 = result.get_data()
+			
+			for i_angle in range(len(angles)):
+				# Write the header
+				outfile.write("%s at %.2f degrees for %s\n" % (DATA_TYPE_NAMES[data_type], angles[i_angle], polarization_text(polarization)))
+				outfile.write("%21s" % "Wavelength (nm)")
+				for i_wvl in range(len(wavelengths)):
+					outfile.write(" %15.6f" % wavelengths[i_wvl])
+				outfile.write("\n")
+				outfile.write("%5s %15s\n" % ("layer", "thickness (nm)"))
+				
+				# Write the data
+				for i_layer in range(len(thickness)):
+					for i_sublayer in range(len(thickness[i_layer])):
+						outfile.write("%5i %15.6f" % (i_layer, thickness[i_layer][i_sublayer]))
+						for i_wvl in range(len(wavelengths)):
+							outfile.write(" %15.6f" % E2[i_angle][i_wvl][i_layer][i_sublayer])
+						outfile.write("\n")
+		
 		elif data_type in SPECTROPHOTOMETRIC_MONITORING_TYPES:
 			
 			# Get the data and the properties.
@@ -351,3 +420,316 @@ def polarization_text(polarization):
 	
 	else:
 		return "a polarization of %.2f degrees" % polarization
+
+
+
+########################################################################
+#                                                                      #
+# get_result_columns                                                   #
+#                                                                      #
+########################################################################
+def get_result_columns(result):
+	"""Get the data of a result in columns
+	
+	This function takes a single argument:
+	  result          a data_holder instance;
+	and returns 3 output arguments:
+	  title           a description of the result;
+	  column_titles   the titles of the columns;
+	  columns         a list of columns, all of the same length.
+	
+	All the columns contain numbers. Results calculated layer by layer
+	(diagrams, electric field, electric field maps and monitoring) are
+	flattened and the first column gives the number of the layer."""
+	
+	data_type = result.get_data_type()
+	
+	if data_type in SPECTROPHOTOMETRIC_DATA_TYPES:
+		title = "%s at %.2f degrees for %s" % (DATA_TYPE_NAMES[data_type], result.get_angle(), polarization_text(result.get_polarization()))
+		column_titles = ["wavelength (nm)", COLUMN_TITLES[data_type]]
+		columns = [to_list(result.get_wavelengths()), to_list(result.get_data())]
+	
+	elif data_type == ELLIPSOMETRY:
+		Psi, Delta = result.get_data()
+		title = "%s at %.2f degrees" % (DATA_TYPE_NAMES[data_type], result.get_angle())
+		column_titles = ["wavelength (nm)", "Psi (deg.)", "Delta (deg.)"]
+		columns = [to_list(result.get_wavelengths()), to_list(Psi), to_list(Delta)]
+	
+	elif data_type == COLOR:
+		R_color, T_color = result.get_data()
+		title = "%s at %.2f degrees (%s, %s)" % (DATA_TYPE_NAMES[data_type], result.get_angle(), result.get_illuminant(), result.get_observer())
+		column_titles = ["R %s" % name for name in COLOR_COLUMN_TITLES] + ["T %s" % name for name in COLOR_COLUMN_TITLES]
+		columns = [[value] for value in get_color_values(R_color) + get_color_values(T_color)]
+	
+	elif data_type == COLOR_TRAJECTORY:
+		R_colors, T_colors = result.get_data()
+		title = "%s (%s, %s)" % (DATA_TYPE_NAMES[data_type], result.get_illuminant(), result.get_observer())
+		column_titles = ["angle (deg)"] + ["R %s" % name for name in COLOR_COLUMN_TITLES] + ["T %s" % name for name in COLOR_COLUMN_TITLES]
+		rows = [get_color_values(R_colors[i_angle]) + get_color_values(T_colors[i_angle]) for i_angle in range(len(R_colors))]
+		columns = [to_list(result.get_angles())] + [list(column) for column in zip(*rows)]
+	
+	elif data_type in DIAGRAM_DATA_TYPES:
+		thickness, real_part, imag_part = result.get_data()
+		title = "%s at %.2f degrees for %s" % (DATA_TYPE_NAMES[data_type], result.get_angle(), polarization_text(result.get_polarization()))
+		column_titles = ["layer", "thickness (nm)", "real part", "imag. part"]
+		columns = [get_layer_numbers(thickness), flatten(thickness), flatten(real_part), flatten(imag_part)]
+	
+	elif data_type == ELECTRIC_FIELD:
+		thickness, field = result.get_data()
+		title = "%s at %.2f degrees for %s" % (DATA_TYPE_NAMES[data_type], result.get_angle(), polarization_text(result.get_polarization()))
+		column_titles = ["layer", "thickness (nm)", "field"]
+		columns = [get_layer_numbers(thickness), flatten(thickness), flatten(field)]
+	
+	elif data_type == ELECTRIC_FIELD_MAP:
+		wavelengths = result.get_wavelengths()
+		angles = result.get_angles()
+		thickness, E2 = result.get_data()
+		title = "%s for %s" % (DATA_TYPE_NAMES[data_type], polarization_text(result.get_polarization()))
+		column_titles = ["layer", "thickness (nm)"]
+		columns = [get_layer_numbers(thickness), flatten(thickness)]
+		for i_angle in range(len(angles)):
+			column_titles += ["field^2 at %.6f nm and %.2f degrees" % (wavelength, angles[i_angle]) for wavelength in wavelengths]
+			columns += [flatten(E2[i_angle][i_wvl]) for i_wvl in range(len(wavelengths))]
+	
+	elif data_type in SPECTROPHOTOMETRIC_MONITORING_TYPES:
+		wavelengths = result.get_wavelengths()
+		thickness, spectrum = result.get_data()
+		title = "%s at %.2f degrees for %s" % (DATA_TYPE_NAMES[data_type], result.get_angle(), polarization_text(result.get_polarization()))
+		column_titles = ["layer", "thickness (nm)"] + ["%s at %.6f nm" % (COLUMN_TITLES[data_type], wavelength) for wavelength in wavelengths]
+		columns = [get_layer_numbers(thickness), flatten(thickness)] + [flatten(spectrum[i_wvl]) for i_wvl in range(len(wavelengths))]
+	
+	elif data_type == ELLIPSOMETRY_MONITORING:
+		wavelengths = result.get_wavelengths()
+		thickness, Psi, Delta = result.get_data()
+		title = "%s at %.2f degrees" % (DATA_TYPE_NAMES[data_type], result.get_angle())
+		column_titles = ["layer", "thickness (nm)"]
+		columns = [get_layer_numbers(thickness), flatten(thickness)]
+		for i_wvl in range(len(wavelengths)):
+			column_titles += ["Psi at %.6f nm (deg.)" % wavelengths[i_wvl], "Delta at %.6f nm (deg.)" % wavelengths[i_wvl]]
+			columns += [flatten(Psi[i_wvl]), flatten(Delta[i_wvl])]
+	
+	else:
+		raise export_error("Cannot export %s" % DATA_TYPE_NAMES.get(data_type, "unknown data"))
+	
+	return title, column_titles, columns
+
+
+
+########################################################################
+#                                                                      #
+# export_results                                                       #
+#                                                                      #
+########################################################################
+def export_results(filename, results, compress = False, precision = None):
+	"""Export results to a file in columns
+	
+	This function takes 2 to 4 arguments:
+	  filename        the name of the file in which to write;
+	  results         a list of results to export;
+	  compress        (optional) a boolean indicating if the file must be
+	                  compressed, default is False;
+	  precision       (optional) the number of significant digits in
+	                  text files, default is None.
+	
+	The results must be data_holder instances. The format is determined
+	by the extension of the file; see export_columns."""
+	
+	export_columns(filename, [get_result_columns(result) for result in results], compress, precision)
+
+
+
+########################################################################
+#                                                                      #
+# check_filename                                                       #
+#                                                                      #
+########################################################################
+def check_filename(filename, compress = False):
+	"""Check that results can be exported to a file
+	
+	This function takes 1 or 2 arguments:
+	  filename        the name of the file in which to write;
+	  compress        (optional) a boolean indicating if the file must be
+	                  compressed, default is False;
+	and returns:
+	  format          the format of the file (CSV, NPY, NPZ or HDF5);
+	  compress        a boolean indicating if the file must be
+	                  compressed, which is also the case when the name
+	                  ends with .gz.
+	
+	An export_error is raised if the format is unknown or if the package
+	it requires is not available. This function can be called before
+	calculating the results to export (see export_columns)."""
+	
+	name, extension = os.path.splitext(filename)
+	if extension.lower() == ".gz":
+		compress = True
+		extension = os.path.splitext(name)[1]
+	extension = extension.lower()
+	
+	if extension not in EXPORT_FORMATS:
+		raise export_error("Unknown file format %s" % extension)
+	format = EXPORT_FORMATS[extension]
+	
+	if format == NPY or format == NPZ:
+		try:
+			import numpy
+		except ImportError:
+			raise export_error("The numpy package is required to export in %s format" % extension)
+	
+	elif format == HDF5:
+		try:
+			import h5py
+		except ImportError:
+			raise export_error("The h5py package is required to export in HDF5 format")
+	
+	return format, compress
+
+
+
+########################################################################
+#                                                                      #
+# export_columns                                                       #
+#                                                                      #
+########################################################################
+def export_columns(filename, tables, compress = False, precision = None):
+	"""Export tables of columns to a file
+	
+	This function takes 2 to 4 arguments:
+	  filename        the name of the file in which to write;
+	  tables          a list of tables, each one being a tuple of a
+	                  title, a list of column titles and a list of
+	                  columns (as returned by get_result_columns);
+	  compress        (optional) a boolean indicating if the file must be
+	                  compressed, default is False;
+	  precision       (optional) the number of significant digits in
+	                  text files, default is None.
+	
+	The format is determined by the extension of the file:
+	  .csv, .txt      comma separated values, the tables are separated by
+	                  an empty line and each one starts by its title on a
+	                  line starting with "#" followed by the column titles.
+	                  If precision is None, floats are written with all
+	                  the digits necessary to read them back exactly. If
+	                  the name ends with .gz, the file is compressed;
+	  .npy            a 2D numpy array (only for a single table);
+	  .npz            a numpy archive containing an array for every
+	                  column, named by the number of the table and the
+	                  title of the column, and the titles of the tables;
+	  .h5, .hdf5      a HDF5 file containing a group for every table with
+	                  a dataset for every column.
+	The numpy and HDF5 formats respectively require the numpy and h5py
+	packages. An export_error is raised if the format is unknown or if
+	the package it requires is not available (see check_filename)."""
+	
+	format, compress = check_filename(filename, compress)
+	
+	if format == CSV:
+		if compress:
+			outfile = gzip.open(filename, "wb", 6)
+		else:
+			outfile = open(filename, "wb")
+		if precision is None:
+			value_format = "%r"
+		else:
+			value_format = "%%.%ig" % precision
+		
+		try:
+			writer = csv.writer(outfile, lineterminator = "\n")
+			for i_table, (title, column_titles, columns) in enumerate(tables):
+				if i_table:
+					outfile.write("\n")
+				outfile.write("# %s\n" % title)
+				writer.writerow(column_titles)
+				
+				# Format whole rows at once and write them by blocks.
+				row_format = ",".join([value_format]*len(columns)) + "\n"
+				rows = itertools.imap(row_format.__mod__, itertools.izip(*columns))
+				while True:
+					block = "".join(itertools.islice(rows, EXPORT_BLOCK_SIZE))
+					if not block:
+						break
+					outfile.write(block)
+		finally:
+			outfile.close()
+	
+	elif format == NPY or format == NPZ:
+		import numpy
+		
+		if format == NPY:
+			if len(tables) != 1:
+				raise export_error("Only a single result can be exported in .npy format")
+			title, column_titles, columns = tables[0]
+			numpy.save(filename, numpy.array(columns, dtype = numpy.float64).T)
+		
+		else:
+			arrays = {}
+			for i_table, (title, column_titles, columns) in enumerate(tables):
+				arrays["%i title" % i_table] = numpy.array(title)
+				for column_title, column in zip(column_titles, columns):
+					arrays["%i %s" % (i_table, column_title)] = numpy.array(column, dtype = numpy.float64)
+			if compress:
+				numpy.savez_compressed(filename, **arrays)
+			else:
+				numpy.savez(filename, **arrays)
+	
+	elif format == HDF5:
+		import h5py
+		
+		if compress:
+			compression = "gzip"
+		else:
+			compression = None
+		
+		outfile = h5py.File(filename, "w")
+		try:
+			for i_table, (title, column_titles, columns) in enumerate(tables):
+				group = outfile.create_group("%i" % i_table)
+				group.attrs["title"] = title
+				for i_column, (column_title, column) in enumerate(zip(column_titles, columns)):
+					dataset = group.create_dataset("%i" % i_column, data = column, dtype = "f8", compression = compression)
+					dataset.attrs["title"] = column_title
+		finally:
+			outfile.close()
+
+
+
+########################################################################
+#                                                                      #
+# to_list                                                              #
+# flatten                                                              #
+# get_layer_numbers                                                    #
+# get_color_values                                                     #
+#                                                                      #
+########################################################################
+def to_list(values):
+	"""Convert a sequence (such as a spectrum or wavelengths) to a list"""
+	
+	# Spectra and wavelengths implemented in Python accept slices, which
+	# is much faster than getting values one by one.
+	try:
+		return list(values[:])
+	except TypeError:
+		return [values[i] for i in range(len(values))]
+
+def flatten(values):
+	"""Flatten a list of values by layer into a single list"""
+	
+	return [value for layer_values in values for value in layer_values]
+
+def get_layer_numbers(values):
+	"""Get the layer number of every value of a list of values by layer"""
+	
+	return [i_layer for i_layer in range(len(values)) for value in values[i_layer]]
+
+def get_color_values(color):
+	"""Get all the colorimetric coordinates of a color in the order of
+	COLOR_COLUMN_TITLES"""
+	
+	XYZ = color.XYZ()
+	xyY = color.xyY()
+	Luv = color.Luv()
+	Lab = color.Lab()
+	LChuv = color.LChuv()
+	LChab = color.LChab()
+	
+	return [XYZ[0], XYZ[1], XYZ[2], xyY[0], xyY[1], Luv[0], Luv[1], Luv[2], Lab[1], Lab[2], LChuv[1], LChuv[2], LChab[1], LChab[2]]
@@ -26,8 +26,11 @@
 from __future__ import division
 
 import math
+import collections
 
 from definitions import *
+import config
+import abeles
 from moremath import interpolation
 from moremath import limits
 
@@ -65,6 +68,112 @@ class grading_error(Exception):
 
 
 
+########################################################################
+#                                                                      #
+# sublayer_matrices_cache                                              #
+#                                                                      #
+########################################################################
+class sublayer_matrices_cache(object):
+	"""A class to reuse the characteristic matrices of sublayers
+	
+	Graded-index layers are made of a limited number of steps and many
+	sublayers share the same step and the same thickness. This class
+	keeps the matrices of the last sublayers used, for a given angle of
+	incidence, so that identical sublayers are calculated only once."""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, wvls, sin2_theta_0, max_size = None):
+		"""Initialize the cache
+		
+		This method takes 2 or 3 arguments:
+		  wvls               the wavelengths at which to calculate the
+		                     matrices;
+		  sin2_theta_0       the normalized sinus squared of the
+		                     propagation angle;
+		  max_size           (optional) the maximum number of matrices
+		                     kept in the cache, by default it is
+		                     determined from SUBLAYER_MATRICES_CACHE_SIZE
+		                     in the configuration."""
+		
+		self.wvls = wvls
+		self.sin2_theta_0 = sin2_theta_0
+		
+		if max_size is None:
+			max_size = config.SUBLAYER_MATRICES_CACHE_SIZE//max(len(wvls), 1)
+		self.max_size = max_size
+		
+		# The matrices ordered from the least recently used to the most
+		# recently used.
+		self.matrices = collections.OrderedDict()
+		self.temp_matrices = None
+		
+		self.hits = 0
+		self.misses = 0
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_matrices                                                       #
+	#                                                                    #
+	######################################################################
+	def get_matrices(self, N, key, thickness):
+		"""Get the characteristic matrices of a sublayer
+		
+		This method takes 3 arguments:
+		  N                  the index of refraction of the sublayer;
+		  key                a hashable value identifying the index,
+		                     typically the material and the step;
+		  thickness          the thickness of the sublayer;
+		and returns the characteristic matrices of the sublayer.
+		
+		The returned matrices must not be modified."""
+		
+		full_key = (key, thickness)
+		
+		try:
+			matrices = self.matrices.pop(full_key)
+		except KeyError:
+			self.misses += 1
+			
+			# When the cache is disabled, always reuse the same matrices.
+			if self.max_size < 1:
+				if self.temp_matrices is None:
+					self.temp_matrices = abeles.matrices(self.wvls)
+				self.temp_matrices.set_matrices(N, thickness, self.sin2_theta_0)
+				return self.temp_matrices
+			
+			# Reuse the matrices of the least recently used sublayer when
+			# the cache is full.
+			if len(self.matrices) >= self.max_size:
+				matrices = self.matrices.popitem(last = False)[1]
+			else:
+				matrices = abeles.matrices(self.wvls)
+			matrices.set_matrices(N, thickness, self.sin2_theta_0)
+		else:
+			self.hits += 1
+		
+		self.matrices[full_key] = matrices
+		
+		return matrices
+	
+	
+	######################################################################
+	#                                                                    #
+	# clear                                                              #
+	#                                                                    #
+	######################################################################
+	def clear(self):
+		"""Empty the cache"""
+		
+		self.matrices.clear()
+
+
+
 ########################################################################
 #                                                                      #
 # calculate_steps                                                      #
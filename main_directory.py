@@ -27,7 +27,6 @@
 
 
 import os, sys
-import platform
 
 
 
@@ -61,6 +60,7 @@ def get_main_directory():
 	
 	
 	if main_is_frozen():
+		import platform
 		system = platform.system()
 		if system == "Windows":
 			pathname = os.path.dirname(sys.executable)
@@ -26,10 +26,18 @@
 
 import os
 import os.path
+import sys
 import re
 import math
 import cmath
 import copy
+import threading
+import hashlib
+import tempfile
+try:
+	import cPickle as pickle
+except ImportError:
+	import pickle
 
 import config
 from definitions import *
@@ -61,6 +69,17 @@ base_directory = main_directory.get_main_directory()
 default_material_directory = os.path.join(base_directory, *config.MATERIALS_DIRECTORY)
 
 
+# Materials read from files are shared by all catalogs, which get
+# clones of them. They are kept with the modification time and size of
+# their file, to know when they must be read again. The pre-parsed
+# materials kept on disk, for every directory, are also kept here once
+# they are loaded.
+shared_materials = {}
+cached_materials = {}
+modified_material_caches = set()
+shared_materials_lock = threading.RLock()
+
+
 
 ########################################################################
 #                                                                      #
@@ -331,6 +350,28 @@ class material(object):
 		raise NotImplementedError("Subclass must implement this method")
 	
 	
+	######################################################################
+	#                                                                    #
+	# get_dN                                                             #
+	#                                                                    #
+	######################################################################
+	def get_dN(self, wvls, property_nb):
+		"""Get the derivative of the dispersion curve of the material
+		
+		This method takes 2 arguments:
+		  wvls               a wavelengths structure;
+		  property_nb        the position of the property in the list
+		                     returned by get_properties;
+		and returns an index structure with the derivative of the
+		dispersion curve of the material at those wavelengths with regard
+		to that property.
+		
+		The derived class implement this method when the derivatives
+		of its dispersion model are known."""
+		
+		raise NotImplementedError("Derivatives are not available for this dispersion model")
+	
+	
 	######################################################################
 	#                                                                    #
 	# set_deposition_rate                                                #
@@ -908,6 +949,28 @@ class material_Cauchy(material):
 		self.dispersion.set_N_Cauchy(N)
 		
 		return N
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_dN                                                             #
+	#                                                                    #
+	######################################################################
+	def get_dN(self, wvls, property_nb):
+		"""Get the derivative of the dispersion curve of the material
+		
+		This method takes 2 arguments:
+		  wvls               a wavelengths structure;
+		  property_nb        the position of the property in the list
+		                     returned by get_properties;
+		and returns an index structure with the derivative of the
+		dispersion curve of the material at those wavelengths with regard
+		to that property."""
+		
+		dN = abeles.N(wvls)
+		self.dispersion.set_dN_Cauchy(dN, property_nb)
+		
+		return dN
 
 
 
@@ -1029,6 +1092,28 @@ class material_Sellmeier(material):
 		self.dispersion.set_N_Sellmeier(N)
 		
 		return N
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_dN                                                             #
+	#                                                                    #
+	######################################################################
+	def get_dN(self, wvls, property_nb):
+		"""Get the derivative of the dispersion curve of the material
+		
+		This method takes 2 arguments:
+		  wvls               a wavelengths structure;
+		  property_nb        the position of the property in the list
+		                     returned by get_properties;
+		and returns an index structure with the derivative of the
+		dispersion curve of the material at those wavelengths with regard
+		to that property."""
+		
+		dN = abeles.N(wvls)
+		self.dispersion.set_dN_Sellmeier(dN, property_nb)
+		
+		return dN
 
 
 
@@ -1722,6 +1807,89 @@ class material_catalog(object):
 			self.default_material_catalog = False
 		
 		self.materials = dict((str(os.path.splitext(filename)[0]), None) for filename in os.listdir(self.directory) if os.path.splitext(filename)[1].upper() == ".MAT")
+		
+		# All the materials are read the first time a material is
+		# requested. The errors that occured while reading them are kept,
+		# by material name.
+		self.loaded = False
+		self.loading_errors = {}
+	
+	
+	######################################################################
+	#                                                                    #
+	# load_materials                                                     #
+	#                                                                    #
+	######################################################################
+	def load_materials(self):
+		"""Read all the materials of the catalog
+		
+		The materials are read concurrently by multiple threads (see
+		config.MATERIAL_LOADING_THREADS), which hides the latency of
+		network directories.
+		Materials that cannot be read are left unread; their errors are
+		kept (see get_loading_errors) and the error will be raised again
+		when they are requested with get_material. Other exceptions are
+		raised once all threads are done."""
+		
+		self.loaded = True
+		
+		material_names = [material_name for material_name in self.materials if self.materials[material_name] is None]
+		
+		if not material_names:
+			return
+		
+		# Every thread reads materials until none is left.
+		remaining_material_names = material_names[:]
+		unexpected_errors = []
+		lock = threading.Lock()
+		
+		def read_materials():
+			while True:
+				with lock:
+					if not remaining_material_names:
+						return
+					material_name = remaining_material_names.pop()
+				try:
+					material = read_material(material_name, self.directory)
+				except (material_error, IOError, OSError), error:
+					with lock:
+						self.loading_errors[material_name] = error
+					continue
+				except Exception:
+					with lock:
+						unexpected_errors.append(sys.exc_info())
+					return
+				with lock:
+					if self.materials.get(material_name, False) is None:
+						self.materials[material_name] = material
+		
+		nb_threads = min(config.MATERIAL_LOADING_THREADS, len(material_names))
+		threads = [threading.Thread(target = read_materials) for i in range(nb_threads)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		
+		save_material_cache(self.directory)
+		
+		if unexpected_errors:
+			error_type, error_value, error_traceback = unexpected_errors[0]
+			raise error_type, error_value, error_traceback
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_loading_errors                                                 #
+	#                                                                    #
+	######################################################################
+	def get_loading_errors(self):
+		"""Get the errors that occured while reading all the materials
+		
+		This method returns a dictionary of the errors, by material name,
+		of the materials that could not be read by load_materials and that
+		were not successfully read since."""
+		
+		return dict(self.loading_errors)
 	
 	
 	######################################################################
@@ -1745,9 +1913,11 @@ class material_catalog(object):
 		
 		if write:
 			write_material(material, directory = self.directory)
+			forget_material(material.get_name(), self.directory)
 		
 		material_name = material.get_name()
 		self.materials[material_name] = material
+		self.loading_errors.pop(material_name, None)
 	
 	
 	######################################################################
@@ -1769,8 +1939,10 @@ class material_catalog(object):
 		
 		if delete:
 			delete_material(material_name, self.directory)
+			forget_material(material_name, self.directory)
 		
 		del self.materials[material_name]
+		self.loading_errors.pop(material_name, None)
 	
 	
 	######################################################################
@@ -1809,9 +1981,13 @@ class material_catalog(object):
 		if material_name not in self.materials:
 			raise material_does_not_exist_error(material_name)
 		
+		if not self.loaded:
+			self.load_materials()
+		
 		# Read the material only if necessary.
 		if self.materials[material_name] is None:
 			self.materials[material_name] = read_material(material_name, self.directory)
+			self.loading_errors.pop(material_name, None)
 		
 		return self.materials[material_name]
 	
@@ -1951,6 +2127,99 @@ class material_catalogs(object):
 
 
 
+########################################################################
+#                                                                      #
+# material_list_catalog                                                #
+#                                                                      #
+########################################################################
+class material_list_catalog(object):
+	"""A class to use a list of materials held in memory as a catalog
+	
+	It is used by worker processes to provide the materials of a filter,
+	including materials that were modified or never saved."""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, materials):
+		"""Initialize the material catalog instance
+		
+		This method takes a single argument:
+		  materials          a list of the materials."""
+		
+		self.materials = dict((material.get_name(), material) for material in materials)
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_material_names                                                 #
+	#                                                                    #
+	######################################################################
+	def get_material_names(self):
+		"""Get all material names
+		
+		This method return a list of the names of all the materials in
+		alphabetical order."""
+		
+		material_names = self.materials.keys()
+		
+		# Sort the material names in a case insensitive manner.
+		material_names.sort(key = str.upper)
+		
+		return material_names
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_material                                                       #
+	#                                                                    #
+	######################################################################
+	def get_material(self, material_name):
+		"""Get a material
+		
+		This method takes one argument:
+		  material_name      the name of a material;
+		and returns the material instance corresponding to that name. If
+		the material does not exist, an exception is raised."""
+		
+		if material_name not in self.materials:
+			raise material_does_not_exist_error(material_name)
+		
+		return self.materials[material_name]
+	
+	
+	######################################################################
+	#                                                                    #
+	# material_exists                                                    #
+	#                                                                    #
+	######################################################################
+	def material_exists(self, material_name):
+		"""Get if a material exist
+		
+		This method takes one argument:
+		  material_name      the name of a material;
+		and returns a boolean indicating if the material exists."""
+		
+		return material_name in self.materials
+	
+	
+	######################################################################
+	#                                                                    #
+	# is_default_material_catalog                                        #
+	#                                                                    #
+	######################################################################
+	def is_default_material_catalog(self):
+		"""Get if the catalog is the one for default materials
+		
+		This method takes no argument and returns False."""
+		
+		return False
+
+
+
 ########################################################################
 #                                                                      #
 # parse_material                                                       #
@@ -1962,7 +2231,8 @@ def parse_material(name, lines):
 	This function interprets the description of a material. It takes a
 	two input arguments:
 		name                 the name of the material and
-	  lines                a list of lines describing the material;
+	  lines                the lines describing the material (a list
+	                       of lines or an open file);
 	and returns the material.
 	
 	The material material_file must contain, in that order
@@ -2404,23 +2674,329 @@ def read_material(name, directory = None):
 	  name       the name of the material;
 	  directory  (optional) the directory where to read the material, by
 	             default it is the default material directory;
-	and returns the material."""
+	and returns the material.
+	
+	As long as the file is not modified, the file is only parsed once
+	and a clone of the same material is returned every time the
+	material is read; catalogs can therefore modify the materials they
+	get without affecting the others. When the material cache
+	is enabled (config.MATERIAL_CACHE), a material is only parsed when
+	its file has been modified since the last time it was cached."""
 	
 	if not directory:
 		directory = default_material_directory
 	
 	filename = os.path.join(directory, (name + ".mat"))
 	
+	try:
+		stat = os.stat(filename)
+		stamp = (stat.st_mtime, stat.st_size)
+	except OSError:
+		stamp = None
+	
+	if stamp:
+		with shared_materials_lock:
+			if filename in shared_materials and shared_materials[filename][0] == stamp:
+				return shared_materials[filename][1].clone()
+			cache = get_material_cache(directory)
+			if name in cache and cache[name][0] == stamp:
+				try:
+					new_material = material_from_state(name, cache[name][1])
+				except Exception:
+					del cache[name]
+					modified_material_caches.add(directory)
+				else:
+					shared_materials[filename] = (stamp, new_material)
+					return new_material.clone()
+	
 	infile = open(filename)
-	lines = infile.readlines()
-	infile.close()
+	try:
+		new_material = parse_material(name, infile)
+	finally:
+		infile.close()
+	
+	if stamp:
+		with shared_materials_lock:
+			shared_materials[filename] = (stamp, new_material)
+			cache = get_material_cache(directory)
+			cache[name] = (stamp, get_material_state(new_material))
+			modified_material_caches.add(directory)
+		
+		return new_material.clone()
+	
+	return new_material
+
+
+
+########################################################################
+#                                                                      #
+# forget_material                                                      #
+#                                                                      #
+########################################################################
+def forget_material(name, directory = None):
+	"""Forget the shared and cached copies of a material
+	
+	This function takes 1 or 2 arguments:
+	  name       the name of the material;
+	  directory  (optional) the directory of the material, by default it
+	             is the default material directory.
+	
+	It must be called when a material file is written or deleted, since
+	the modification time of the file may not change if it is modified
+	quickly."""
+	
+	if not directory:
+		directory = default_material_directory
+	
+	filename = os.path.join(directory, (name + ".mat"))
+	
+	with shared_materials_lock:
+		shared_materials.pop(filename, None)
+		cache = get_material_cache(directory)
+		if name in cache:
+			del cache[name]
+			modified_material_caches.add(directory)
+
+
+
+########################################################################
+#                                                                      #
+# get_material_state                                                   #
+# material_from_state                                                  #
+#                                                                      #
+########################################################################
+MATERIAL_CLASSES = dict((cls.__name__, cls) for cls in (material_constant, material_table, material_Cauchy, material_Sellmeier, material_mixture_constant, material_mixture_table, material_mixture_Cauchy, material_mixture_Sellmeier))
+
+def get_material_state(material):
+	"""Get the state of a material in a form that can be pickled
+	
+	This function takes a single argument:
+	  material   the material;
+	and returns a tuple describing the material."""
+	
+	if material.is_mixture():
+		variables, variable_values = material.get_deposition_variables()
+	else:
+		variables, variable_values = [], []
+	constants, constant_values = material.get_deposition_constants()
+	
+	return (material.__class__.__name__, material.get_description(), material.get_properties(), material.get_deposition_rate(), constants, constant_values, variables, variable_values)
+
+def material_from_state(name, state):
+	"""Create a material from its state
 	
-	new_material = parse_material(name, lines)
+	This function takes 2 arguments:
+	  name       the name of the material;
+	  state      the state returned by get_material_state;
+	and returns the material."""
+	
+	class_name, description, properties, rate, constants, constant_values, variables, variable_values = state
+	
+	new_material = MATERIAL_CLASSES[class_name]()
+	new_material.set_name(name)
+	new_material.set_description(description)
+	new_material.set_properties(*properties)
+	if rate:
+		new_material.set_deposition_rate(rate)
+	if constants:
+		new_material.set_deposition_constants(constants, constant_values)
+	if variables:
+		new_material.set_deposition_variables(variables, variable_values)
 	
 	return new_material
 
 
 
+########################################################################
+#                                                                      #
+# get_material_cache_filename                                          #
+# get_material_cache                                                   #
+# save_material_cache                                                  #
+#                                                                      #
+########################################################################
+def get_material_cache_filename(directory):
+	"""Get the name of the file of the material cache of a directory
+	
+	This function takes a single argument:
+	  directory  the material directory;
+	and returns the name of the file, or an empty string if the cache is
+	disabled or if there is no user configuration directory."""
+	
+	if not config.MATERIAL_CACHE:
+		return ""
+	
+	# Only import the user configuration when it is necessary since it
+	# creates the configuration directory.
+	import user_config
+	
+	if not user_config.user_config_directory:
+		return ""
+	
+	key = hashlib.md5(os.path.abspath(directory)).hexdigest()
+	
+	return os.path.join(user_config.user_config_directory, "materials_%s.cache" % key)
+
+def get_material_cache(directory):
+	"""Get the material cache of a directory
+	
+	This function takes a single argument:
+	  directory  the material directory;
+	and returns a dictionary whose keys are material names and values
+	are tuples of the time stamp of the file and the state of the
+	material. The cache is read from the disk the first time it is
+	requested."""
+	
+	with shared_materials_lock:
+		if directory not in cached_materials:
+			cache = {}
+			filename = get_material_cache_filename(directory)
+			if filename and os.path.exists(filename):
+				try:
+					cache_file = open(filename, "rb")
+					try:
+						cache = pickle.load(cache_file)
+					finally:
+						cache_file.close()
+				except Exception:
+					cache = {}
+				if not isinstance(cache, dict):
+					cache = {}
+			cached_materials[directory] = cache
+		
+		return cached_materials[directory]
+
+def save_material_cache(directory):
+	"""Save the material cache of a directory if it was modified
+	
+	This function takes a single argument:
+	  directory  the material directory.
+	
+	The cache is written in a temporary file which then replaces the
+	cache, so that other processes never read a partially written
+	cache. Errors are silently ignored since the cache is only used to
+	accelerate the reading of materials."""
+	
+	with shared_materials_lock:
+		if directory not in modified_material_caches:
+			return
+		modified_material_caches.discard(directory)
+		
+		filename = get_material_cache_filename(directory)
+		if not filename:
+			return
+		
+		temporary_file_name = None
+		try:
+			temporary_file = tempfile.NamedTemporaryFile(mode = "wb", suffix = ".cache", prefix = "", dir = os.path.dirname(filename), delete = False)
+			temporary_file_name = temporary_file.name
+			try:
+				pickle.dump(cached_materials[directory], temporary_file, pickle.HIGHEST_PROTOCOL)
+			finally:
+				temporary_file.close()
+			
+			# On Windows, a file cannot be renamed over an existing one.
+			try:
+				os.rename(temporary_file_name, filename)
+			except OSError:
+				os.remove(filename)
+				os.rename(temporary_file_name, filename)
+			temporary_file_name = None
+		except Exception:
+			pass
+		
+		if temporary_file_name:
+			try:
+				os.remove(temporary_file_name)
+			except OSError:
+				pass
+
+
+
+########################################################################
+#                                                                      #
+# describe_material_catalog                                            #
+# material_catalog_from_description                                    #
+# describe_materials                                                   #
+# material_catalog_from_states                                         #
+#                                                                      #
+########################################################################
+def describe_material_catalog(material_catalog):
+	"""Describe a material catalog in a form that can be pickled
+	
+	This function takes a single argument:
+	  material_catalog  the material catalog or catalogs;
+	and returns a tuple of the directories of the catalogs, None being
+	used for the default catalog.
+	
+	This is used to recreate the catalogs in worker processes."""
+	
+	if isinstance(material_catalog, material_catalogs):
+		catalogs = material_catalog.get_catalogs()
+	else:
+		catalogs = [material_catalog]
+	
+	return tuple(None if catalog.is_default_material_catalog() else catalog.directory for catalog in catalogs)
+
+# The catalogs created from descriptions are kept so that the materials
+# of a process are read only once.
+described_material_catalogs = {}
+
+def material_catalog_from_description(description):
+	"""Get the material catalog corresponding to a description
+	
+	This function takes a single argument:
+	  description       the description returned by
+	                    describe_material_catalog;
+	and returns the material catalog or catalogs."""
+	
+	with shared_materials_lock:
+		if description not in described_material_catalogs:
+			catalogs = [material_catalog(directory) for directory in description]
+			if len(catalogs) == 1:
+				described_material_catalogs[description] = catalogs[0]
+			else:
+				described_material_catalogs[description] = material_catalogs(catalogs)
+		
+		return described_material_catalogs[description]
+
+def describe_materials(material_list):
+	"""Describe materials in a form that can be pickled
+	
+	This function takes a single argument:
+	  material_list     a list of materials, typically the materials of a
+	                    filter;
+	and returns a tuple of the names and the states of the materials.
+	
+	Unlike describe_material_catalog, this keeps the materials held in
+	memory, including those that were modified or never saved."""
+	
+	return tuple((material.get_name(), get_material_state(material)) for material in material_list)
+
+def material_catalog_from_states(description, material_states):
+	"""Get a material catalog containing materials described by states
+	
+	This function takes 2 arguments:
+	  description       the description of the catalogs returned by
+	                    describe_material_catalog;
+	  material_states   the description of materials returned by
+	                    describe_materials;
+	and returns the material catalogs where the materials recreated from
+	their states are prefered to those of the described catalogs.
+	
+	The described catalogs provide the materials that are only referred
+	to by name, for example the materials of needles."""
+	
+	catalog = material_catalog_from_description(description)
+	if isinstance(catalog, material_catalogs):
+		catalogs = catalog.get_catalogs()[:]
+	else:
+		catalogs = [catalog]
+	catalogs.append(material_list_catalog([material_from_state(name, state) for name, state in material_states]))
+	
+	return material_catalogs(catalogs)
+
+
+
 ######################################################################
 #                                                                    #
 # write_material                                                     #
@@ -23,6 +23,9 @@
 # USA
 
 
+import math
+
+
 	
 three_eighth = 0.375
 seven_sixth = 7.0/6.0
@@ -93,3 +96,65 @@ def cubic(f, xa, xb, n):
 	y += h * (twenty_three_twenty_forth*f(xb-2*h) + seven_sixth*f(xb-h) + three_eighth*f(xb))
 	
 	return y
+
+
+
+########################################################################
+#                                                                      #
+# Gauss_Legendre                                                       #
+#                                                                      #
+########################################################################
+def Gauss_Legendre(n, xa = -1.0, xb = 1.0):
+	"""Get the abscissas and weights of the Gauss-Legendre quadrature
+	
+	This function takes 1 to 3 input arguments:
+	  n                    the number of points of the quadrature;
+	  xa, xb               (optional) the integration limits, by default
+	                       -1 and 1;
+	and returns 2 lists:
+	  x                    the abscissas;
+	  w                    the weights.
+	
+	The integral of f between xa and xb is approximated by the sum of
+	w[i]*f(x[i]); it is exact for polynomials of degree up to 2*n-1.
+	The abscissas are the roots of the Legendre polynomial of degree n,
+	found by Newton's method. For details on this method, see:
+	  Press et al. Numerical Recipes in C, Cambridge University Press,
+	  1992, pp. 147-152."""
+	
+	x = [0.0]*n
+	w = [0.0]*n
+	
+	center = 0.5*(xb+xa)
+	half_width = 0.5*(xb-xa)
+	
+	# The roots are symmetric, only half of them are searched.
+	for i in range((n+1)//2):
+		
+		# Approximation of the i-th root.
+		z = math.cos(math.pi*(i+0.75)/(n+0.5))
+		
+		while True:
+			
+			# Calculate the Legendre polynomial using the recurrence
+			# relation and its derivative.
+			p_1 = 1.0
+			p_2 = 0.0
+			for j in range(1, n+1):
+				p_3 = p_2
+				p_2 = p_1
+				p_1 = ((2.0*j-1.0)*z*p_2-(j-1.0)*p_3)/j
+			dp = n*(z*p_1-p_2)/(z*z-1.0)
+			
+			z_old = z
+			z = z_old-p_1/dp
+			
+			if abs(z-z_old) <= 3.0e-14:
+				break
+		
+		x[i] = center-half_width*z
+		x[n-1-i] = center+half_width*z
+		w[i] = 2.0*half_width/((1.0-z*z)*dp*dp)
+		w[n-1-i] = w[i]
+	
+	return x, w
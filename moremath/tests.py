@@ -128,7 +128,7 @@ if "integration" in tests:
 	print ""
 	
 	from moremath import integration
-
+	
 	import math
 	
 	# Test using the sinus function.
@@ -143,6 +143,14 @@ if "integration" in tests:
 		print "for n =", n, " trapezoidal error is: ", numerical_trapezoidal - analytical
 		print "for n =", n, " cubic error is: ", numerical_cubic - analytical
 	
+	nb_points = [2, 3, 5, 10]
+	for n in nb_points:
+		x, w = integration.Gauss_Legendre(n, a, b)
+		numerical_Gauss_Legendre = sum(w[i]*math.sin(x[i]) for i in range(n))
+		analytical = math.cos(a)-math.cos(b)
+		
+		print "for n =", n, " Gauss-Legendre error is: ", numerical_Gauss_Legendre - analytical
+	
 	print ""
 
 
@@ -662,7 +670,7 @@ if "QR" in tests:
 	print "solved in %.4f s." % (end-start)
 	print "found rank = %i" % rank
 	print "norm(Ax-b) (should be small):", linear_algebra.norm(linear_algebra.matrix_difference(Ax, [b])[0])
-
+	
 	# Make a system.
 	print ""
 	print "----- Rectangular system: -----"
@@ -32,8 +32,12 @@ import cmath
 import array
 import string
 import copy
+import collections
 import warnings
 import time
+import sys
+import zlib
+import base64
 try:
 	from ast import literal_eval as _eval
 except ImportError:
@@ -43,17 +47,27 @@ except ImportError:
 from definitions import *
 import config
 import abeles
+from moremath import integration
 import materials
 import stack
 import graded
 import simple_parser
 import color
-import optimization_Fourier
 
 
 
 one_hundred_eighty_over_pi = 180.0/math.pi
 
+# The lists describing the layers of every side. The name of the
+# attributes of the filter are made by prefixing them by front_ or back_.
+layer_lists = ("layers", "layer_descriptions", "thickness", "step_profiles", "index", "refine_thickness", "refine_index", "preserve_OT", "add_needles", "add_steps")
+
+# The kinds of parameters with regard to which the amplitude reflection
+# and transmission can be differentiated.
+THICKNESS_DERIVATIVE = 0
+INDEX_DERIVATIVE = 1
+MATERIAL_DERIVATIVE = 2
+
 
 
 ########################################################################
@@ -114,11 +128,30 @@ class optical_filter(object):
 		self.material_indices = []
 		self.N = []
 		
+		# The wavelengths shifted within the bandwidth, the indices at
+		# those wavelengths and their weights, used to average the spectra
+		# over the bandwidth (see get_bandwidth_nodes).
+		self.bandwidth_nodes = []
+		
+		# The copies of the indices of the mixtures used as substrate and
+		# medium when they are not considered, kept so that the analysis
+		# of the same conditions is found again (see
+		# get_substrate_and_medium_indices).
+		self.N_mixture_copies = {}
+		
 		# The angles at which the analysis have already been done and the
-		# matrices for the front and back coatings.
-		self.sin2_theta_0 = []
-		self.matrices_front = []
-		self.matrices_back = []
+		# matrices for the front and back coatings, by analysis conditions
+		# (see analyse). The index of the medium and the wavelengths of
+		# the conditions are kept from the least recently used to the most
+		# recently used. The amplitude reflection and transmission
+		# calculated from these matrices are kept with them.
+		self.sin2_theta_0 = {}
+		self.matrices_front = {}
+		self.matrices_back = {}
+		self.r_and_t = {}
+		self.analysis_references = collections.OrderedDict()
+		self.analysis_cache_hits = 0
+		self.analysis_cache_misses = 0
 		
 		# The center wavelength is the wavelength at which the index
 		# profile is defined. By default, the center wavelength is 550nm.
@@ -144,6 +177,17 @@ class optical_filter(object):
 		# Same thing, for monitoring.
 		self.consider_backside_on_monitoring = True
 		
+		# The coherence length of the light, used to add the reflections
+		# in the substrate when the backside is considered. By default, it
+		# is 0 and the substrate is incoherent.
+		self.coherence_length = 0.0
+		
+		# The half angle of the cone of light and the spectral bandwidth
+		# over which the spectra are averaged. By default, they are 0 and
+		# the light is collimated and monochromatic.
+		self.cone_half_angle = 0.0
+		self.bandwidth = 0.0
+		
 		# Ellipsometer type is used to determine Delta. Possible values
 		# are RAE for a rotating analyser, RPE for a rotating polarizer
 		# ellipsometer and RCE for a rotating compensator ellipsometer. By
@@ -217,17 +261,22 @@ class optical_filter(object):
 		self.front_add_steps = []
 		self.back_add_steps = []
 		
+		# The names of the layer lists that are shared with clones of the
+		# filter. They must be copied before being modified.
+		self.shared_layer_lists = set()
+		
 		# The wavelengths at which the monitoring have been calculated and
 		# the refractive indices at those wavelengths.
 		self.monitoring_wvls = []
 		self.monitoring_n = []
 		
 		# Saved matrices for monitoring conditions and the thicknesses for
-		# those matrices.
-		self.monitoring_sin2_theta_0 = []
-		self.monitoring_thicknesses = []
-		self.monitoring_matrices_front = []
-		self.monitoring_matrices_back = []
+		# those matrices, by monitoring conditions (see monitoring).
+		self.monitoring_sin2_theta_0 = {}
+		self.monitoring_thicknesses = {}
+		self.monitoring_matrices_front = {}
+		self.monitoring_matrices_back = {}
+		self.monitoring_references = {}
 		
 		# The materials to use for needles and for the Fourier transform
 		# method.
@@ -252,78 +301,62 @@ class optical_filter(object):
 	def clone(self):
 		"""Get a copy of the filter
 		
-		This method returns a clone of the filter."""
-		
-		clone = self.__class__(self.material_catalog)
-		
-		clone.set_description(self.description)
-		clone.set_center_wavelength(self.center_wavelength)
-		if self.from_wavelength:
-			clone.set_wavelengths_by_range(self.from_wavelength, self.to_wavelength, self.by_wavelength)
-		else:
-			clone.set_wavelengths(self.wvls)
-		clone.set_step_spacing(self.step_spacing)
-		clone.set_minimum_thickness(self.minimum_thickness)
-		clone.set_consider_backside(self.consider_backside)
-		clone.set_consider_backside_on_monitoring(self.consider_backside_on_monitoring)
-		clone.set_ellipsometer_type(self.ellipsometer_type)
-		clone.set_Delta_min(self.Delta_min)
-		clone.set_monitoring_ellipsometer_type(self.monitoring_ellipsometer_type)
-		clone.set_monitoring_Delta_min(self.monitoring_Delta_min)
-		clone.set_observer(self.observer_name)
-		clone.set_illuminant(self.illuminant_name)
-		clone.set_monitoring_sublayer_thickness(self.monitoring_sublayer_thickness)
-		clone.set_dont_consider_substrate(self.dont_consider_substrate)
-		clone.set_substrate(self.materials[self.substrate].get_name())
-		clone.set_substrate_thickness(self.substrate_thickness)
-		clone.set_medium(self.materials[self.front_medium].get_name(), FRONT)
-		clone.set_medium(self.materials[self.back_medium].get_name(), BACK)
-		if self.front_stack_formula:
-			clone.set_stack_formula(self.front_stack_formula, self.front_stack_materials, FRONT)
-		if self.back_stack_formula:
-			clone.set_stack_formula(self.back_stack_formula, self.back_stack_materials, BACK)
-		for i in range(len(self.front_layers)):
-			material = self.materials[self.front_layers[i]]
-			material_name = material.get_name()
-			if self.front_step_profiles[i]:
-				clone.add_graded_layer_from_steps(material_name, self.front_step_profiles[i], self.front_thickness[i], TOP, FRONT, description = self.front_layer_descriptions[i])
-			elif material.is_mixture():	
-				clone.add_layer(material_name, self.front_thickness[i], TOP, FRONT, index = self.front_index[i], description = self.front_layer_descriptions[i])
-				clone.set_refine_layer_thickness(i, self.front_refine_thickness[i], FRONT)
-				clone.set_refine_layer_index(i, self.front_refine_index[i], FRONT)
-				clone.set_preserve_OT(i, self.front_preserve_OT[i], FRONT)
-				clone.set_add_needles(i, self.front_add_needles[i], FRONT)
-				clone.set_add_steps(i, self.front_add_steps[i], FRONT)
-			else:
-				clone.add_layer(material_name, self.front_thickness[i], TOP, FRONT, description = self.front_layer_descriptions[i])
-				clone.set_refine_layer_thickness(i, self.front_refine_thickness[i], FRONT)
-				clone.set_add_needles(i, self.front_add_needles[i], FRONT)
-		for i in range(len(self.back_layers)):
-			material = self.materials[self.back_layers[i]]
-			material_name = material.get_name()
-			if self.back_step_profiles[i]:
-				clone.add_graded_layer_from_steps(material_name, self.back_step_profiles[i], self.back_thickness[i], TOP, BACK, description = self.back_layer_descriptions[i])
-			elif material.is_mixture():	
-				clone.add_layer(material_name, self.back_thickness[i], TOP, BACK, index = self.back_index[i], description = self.back_layer_descriptions[i])
-				clone.set_refine_layer_thickness(i, self.back_refine_thickness[i], BACK)
-				clone.set_refine_layer_index(i, self.back_refine_index[i], BACK)
-				clone.set_preserve_OT(i, self.back_preserve_OT[i], BACK)
-				clone.set_add_needles(i, self.back_add_needles[i], BACK)
-				clone.set_add_steps(i, self.back_add_steps[i], BACK)
-			else:
-				clone.add_layer(material_name, self.back_thickness[i], TOP, BACK, description = self.back_layer_descriptions[i])
-				clone.set_refine_layer_thickness(i, self.back_refine_thickness[i], BACK)
-				clone.set_add_needles(i, self.back_add_needles[i], BACK)
-		if self.needle_materials:
-			clone.set_needle_materials(self.needle_materials)
-		if self.Fourier_parameters:
-			clone.set_Fourier_parameters(self.Fourier_parameters)
+		This method returns a clone of the filter. Cloning takes a
+		constant time, whatever the number of layers."""
+		
+		# The clone starts with the same attributes and shares the layer
+		# lists with the filter. They are copied only when one of the
+		# filters modifies them (see unshare_layer_lists).
+		clone = copy.copy(self)
+		
+		self.shared_layer_lists = set(get_layer_list_names(BOTH))
+		clone.shared_layer_lists = set(self.shared_layer_lists)
+		
+		# The list of materials may grow independently in both filters
+		# and the calculations are not shared.
+		clone.materials = self.materials[:]
+		clone.material_indices = self.material_indices[:]
+		clone.reset_n()
+		clone.reset_analysis()
+		clone.reset_monitoring()
+		clone.analysis_cache_hits = 0
+		clone.analysis_cache_misses = 0
+		clone.progress = 0.0
+		clone.stop_ = False
 		
 		clone.set_modified(False)
 		
 		return clone
 	
 	
+	######################################################################
+	#                                                                    #
+	# unshare_layer_lists                                                #
+	#                                                                    #
+	######################################################################
+	def unshare_layer_lists(self, side = BOTH, lists = layer_lists, copy = True):
+		"""Stop sharing layer lists with clones
+		
+		This method takes 0 to 3 arguments:
+		  side               (optional) the side of the lists (FRONT, BACK
+		                     or BOTH), the default value is BOTH;
+		  lists              (optional) the names of the lists, without
+		                     the side prefix, by default all the lists;
+		  copy               (optional) a boolean indicating if the lists
+		                     must be copied, the default value is True.
+		
+		This method must be called before modifying the lists in place.
+		Lists shared with a clone are copied, the others are left
+		untouched. If the lists were replaced by new ones, copy should be
+		False."""
+		
+		for name in get_layer_list_names(side, lists):
+			if name in self.shared_layer_lists:
+				if copy:
+					setattr(self, name, getattr(self, name)[:])
+				self.shared_layer_lists.remove(name)
+	
+	
 	######################################################################
 	#                                                                    #
 	# get_material_catalog                                               #
@@ -433,10 +466,10 @@ class optical_filter(object):
 					new_back_index[i_layer] = graded.steps_to_index(new_back_step_profiles[i_layer], new_material_indices[self.back_layers[i_layer]])
 				elif self.materials[self.back_layers[i_layer]].is_mixture():
 					new_back_thickness[i_layer] = self.back_thickness[i_layer]
-					self.back_index[i_layer] = self.materials[self.back_layers[i_layer]].change_index_wavelength(self.back_index[i_layer], old_center_wavelength, self.center_wavelength)
+					new_back_index[i_layer] = self.materials[self.back_layers[i_layer]].change_index_wavelength(self.back_index[i_layer], self.center_wavelength, center_wavelength)
 				else:
 					new_back_thickness[i_layer] = self.back_thickness[i_layer]
-					self.back_index[i_layer] = self.material_indices[self.back_layers[i_layer]]
+					new_back_index[i_layer] = new_material_indices[self.back_layers[i_layer]]
 			
 			# If no error occured, we can now safely save modified values in
 			# class attributes.
@@ -448,6 +481,7 @@ class optical_filter(object):
 			self.back_thickness = new_back_thickness
 			self.back_step_profiles = new_back_step_profiles
 			self.back_index = new_back_index
+			self.unshare_layer_lists(BOTH, ("thickness", "step_profiles", "index"), copy = False)
 			
 			# If there are graded-index layers, their steps have been
 			# modified: indices, monitoring and analysis must be
@@ -565,6 +599,121 @@ class optical_filter(object):
 		return self.from_wavelength, self.to_wavelength, self.by_wavelength
 	
 	
+	######################################################################
+	#                                                                    #
+	# set_wavelengths_adaptively                                         #
+	#                                                                    #
+	######################################################################
+	def set_wavelengths_adaptively(self, from_wavelength, to_wavelength, tolerance = None, min_step = None, angle = 0.0, polarization = UNPOLARIZED, consider_phase = False):
+		"""Set the wavelengths of the filter by adaptive sampling
+		
+		This method takes 2 to 7 arguments:
+		  from_wavelength    the lowest limit of the range;
+		  to_wavelength      the largest limit of the range;
+		  tolerance          (optional) the largest acceptable error of the
+		                     linear interpolation of the reflection and the
+		                     transmission between wavelengths, by default
+		                     config.ADAPTIVE_WAVELENGTHS_TOLERANCE is used;
+		  min_step           (optional) the smallest interval between
+		                     wavelengths, by default
+		                     config.ADAPTIVE_WAVELENGTHS_MIN_STEP is used;
+		  angle              (optional) the angle of incidence used to
+		                     sample the properties, the default is 0;
+		  polarization       (optional) the polarization used to sample
+		                     the properties, the default is UNPOLARIZED;
+		  consider_phase     (optional) a boolean indicating if the
+		                     transmission phase must also be interpolated
+		                     within config.ADAPTIVE_WAVELENGTHS_PHASE_TOLERANCE
+		                     degrees (for s polarization when the light is
+		                     unpolarized), the default is False.
+		
+		The range is first sampled with config.ADAPTIVE_WAVELENGTHS_INITIAL_NB
+		uniformly distributed wavelengths. Every interval is then divided in
+		two as long as the properties at its center differ from the linear
+		interpolation between its ends by more than the tolerance. Features
+		narrower than the initial sampling may therefore be missed. The
+		number of wavelengths is limited to
+		config.ADAPTIVE_WAVELENGTHS_MAX_NB; when this limit is reached, the
+		intervals with the largest errors are divided first.
+		
+		The wavelengths are set only if the calculation was not stopped. A
+		filter_error is raised if the tolerances are not positive."""
+		
+		if tolerance is None:
+			tolerance = config.ADAPTIVE_WAVELENGTHS_TOLERANCE
+		if min_step is None:
+			min_step = config.ADAPTIVE_WAVELENGTHS_MIN_STEP
+		phase_tolerance = config.ADAPTIVE_WAVELENGTHS_PHASE_TOLERANCE
+		max_nb_wvls = config.ADAPTIVE_WAVELENGTHS_MAX_NB
+		
+		if tolerance <= 0.0:
+			raise filter_error("The tolerance must be positive")
+		if consider_phase and phase_tolerance <= 0.0:
+			raise filter_error("The phase tolerance must be positive")
+		
+		if polarization == UNPOLARIZED:
+			phase_polarization = S
+		else:
+			phase_polarization = polarization
+		
+		# The properties are calculated with a copy of the filter, only for
+		# the new wavelengths at every pass.
+		sampling_filter = self.clone()
+		
+		def calculate_properties(wavelengths):
+			sampling_filter.set_wavelengths(wavelengths)
+			properties = [sampling_filter.reflection(angle, polarization), sampling_filter.transmission(angle, polarization)]
+			if consider_phase:
+				properties.append(sampling_filter.transmission_phase(angle, phase_polarization))
+			if None in properties:
+				return None
+			return [[values[i] for values in properties] for i in range(len(wavelengths))]
+		
+		def error(values, left_values, right_values):
+			largest_error = max(abs(values[i]-0.5*(left_values[i]+right_values[i]))/tolerance for i in range(2))
+			if consider_phase:
+				half_change = 0.5*((right_values[2]-left_values[2]+180.0)%360.0-180.0)
+				largest_error = max(largest_error, abs((values[2]-left_values[2]-half_change+180.0)%360.0-180.0)/phase_tolerance)
+			return largest_error
+		
+		nb_initial_wvls = config.ADAPTIVE_WAVELENGTHS_INITIAL_NB
+		by_wavelength = (to_wavelength-from_wavelength)/(nb_initial_wvls-1)
+		wavelengths = [from_wavelength+i*by_wavelength for i in range(nb_initial_wvls-1)] + [to_wavelength]
+		
+		values = calculate_properties(wavelengths)
+		if values is None:
+			return
+		properties = dict(zip(wavelengths, values))
+		
+		intervals = zip(wavelengths[:-1], wavelengths[1:])
+		
+		while intervals and len(properties) < max_nb_wvls:
+			centers = [0.5*(left+right) for left, right in intervals]
+			
+			values = calculate_properties(centers)
+			if values is None:
+				return
+			
+			errors = [error(center_values, properties[left], properties[right]) for (left, right), center_values in zip(intervals, values)]
+			
+			# When the number of wavelengths is limited, the intervals with
+			# the largest errors are divided first.
+			order = sorted(range(len(intervals)), key = lambda i: errors[i], reverse = True)
+			order = [i for i in order if errors[i] > 1.0][:max_nb_wvls-len(properties)]
+			
+			new_intervals = []
+			for i in sorted(order):
+				left, right = intervals[i]
+				properties[centers[i]] = values[i]
+				if 0.5*(right-left) >= 2.0*min_step:
+					new_intervals.append((left, centers[i]))
+					new_intervals.append((centers[i], right))
+			
+			intervals = new_intervals
+		
+		self.set_wavelengths(sorted(properties.keys()))
+	
+	
 	######################################################################
 	#                                                                    #
 	# set_step_spacing                                                   #
@@ -645,6 +794,7 @@ class optical_filter(object):
 			self.back_thickness = new_back_thickness
 			self.back_step_profiles = new_back_step_profiles
 			self.back_index = new_back_index
+			self.unshare_layer_lists(BOTH, ("thickness", "step_profiles", "index"), copy = False)
 			
 			# If there are graded-index layers, their steps have been
 			# modified: indices, monitoring and analysis must be
@@ -732,6 +882,7 @@ class optical_filter(object):
 			self.back_thickness = new_back_thickness
 			self.back_step_profiles = new_back_step_profiles
 			self.back_index = new_back_index
+			self.unshare_layer_lists(BOTH, ("thickness", "step_profiles", "index"), copy = False)
 			
 			# If there are graded-index layers, their steps have been
 			# modified: monitoring and analysis must be recalculated.
@@ -831,6 +982,127 @@ class optical_filter(object):
 		return self.consider_backside
 	
 	
+	######################################################################
+	#                                                                    #
+	# set_coherence_length                                               #
+	#                                                                    #
+	######################################################################
+	def set_coherence_length(self, coherence_length):
+		"""Set the coherence length
+		
+		This method takes a single input argument:
+		  coherence_length      the coherence length of the light (in nm).
+		
+		When the backside is considered, the reflections in the substrate
+		are added with a degree of coherence exp(-Delta**2/(2*L**2)),
+		where Delta is the difference of optical path and L the coherence
+		length, which amounts to averaging over the phase of the
+		substrate. For a gaussian spectrum of standard deviation
+		Delta_lambda, L is lambda**2/(2*pi*Delta_lambda). A coherence
+		length of 0 corresponds to an incoherent substrate. Only the
+		reflection, the transmission, the absorption and the color
+		consider it; the ellipsometry, the monitoring and the
+		optimization consider an incoherent substrate."""
+		
+		if coherence_length != self.coherence_length:
+			self.coherence_length = coherence_length
+			
+			self.modified = True
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_coherence_length                                               #
+	#                                                                    #
+	######################################################################
+	def get_coherence_length(self):
+		"""Get the coherence length
+		
+		This function returns the coherence length of the light, 0 if the
+		substrate is incoherent."""
+		
+		return self.coherence_length
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_cone_half_angle                                                #
+	#                                                                    #
+	######################################################################
+	def set_cone_half_angle(self, cone_half_angle):
+		"""Set the half angle of the cone of light
+		
+		This method takes a single input argument:
+		  cone_half_angle    the half angle of the cone of light (in
+		                     degres).
+		
+		When it is not 0, the reflection, the transmission and the
+		absorption are averaged over a cone of light centered on the
+		direction of incidence, in which the rays are uniformly
+		distributed over the solid angle. For a beam of f-number F, the
+		half angle is atan(1/(2*F)). The other properties are calculated
+		for collimated light."""
+		
+		if cone_half_angle != self.cone_half_angle:
+			self.cone_half_angle = cone_half_angle
+			
+			self.modified = True
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_cone_half_angle                                                #
+	#                                                                    #
+	######################################################################
+	def get_cone_half_angle(self):
+		"""Get the half angle of the cone of light
+		
+		This function returns the half angle of the cone of light, 0 if
+		the light is collimated."""
+		
+		return self.cone_half_angle
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_bandwidth                                                      #
+	#                                                                    #
+	######################################################################
+	def set_bandwidth(self, bandwidth):
+		"""Set the spectral bandwidth
+		
+		This method takes a single input argument:
+		  bandwidth          the spectral bandwidth of the instrument (in
+		                     nm).
+		
+		When it is not 0, the reflection, the transmission and the
+		absorption are averaged over a triangular slit function whose
+		full width at half maximum is the bandwidth, as for a grating
+		monochromator whose entrance and exit slits have the same width.
+		The other properties are calculated for monochromatic light."""
+		
+		if bandwidth != self.bandwidth:
+			self.bandwidth = bandwidth
+			
+			self.bandwidth_nodes = []
+			
+			self.modified = True
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_bandwidth                                                      #
+	#                                                                    #
+	######################################################################
+	def get_bandwidth(self):
+		"""Get the spectral bandwidth
+		
+		This function returns the spectral bandwidth, 0 if the light is
+		monochromatic."""
+		
+		return self.bandwidth
+	
+	
 	######################################################################
 	#                                                                    #
 	# set_consider_backside_on_monitoring                                #
@@ -1168,6 +1440,8 @@ class optical_filter(object):
 			self.materials.append(new_material)
 			self.material_indices.append(new_material_indices)
 			self.N.append(None)
+			for wvls_, N_, weight in self.bandwidth_nodes:
+				N_.append(None)
 			
 			material_nb = len(self.materials) - 1
 		
@@ -1219,6 +1493,60 @@ class optical_filter(object):
 		return self.materials
 	
 	
+	######################################################################
+	#                                                                    #
+	# set_material                                                       #
+	#                                                                    #
+	######################################################################
+	def set_material(self, material_nb, material):
+		"""Replace a material in the internal list
+		
+		This method takes 2 arguments:
+		  material_nb        the material number;
+		  material           the new material.
+		
+		The new material is used by all the layers, substrate and media
+		made of the replaced material. It is typically a clone of the
+		material from the catalog whose properties were modified. Only
+		materials that are not mixtures can be replaced. The new material
+		is not written in the filter file, the catalog material being
+		reloaded when the filter is read."""
+		
+		if material.is_mixture() or self.materials[material_nb].is_mixture():
+			raise materials.material_error(material.get_name(), "Mixtures cannot be replaced")
+		
+		index = material.get_index(self.center_wavelength)
+		
+		self.materials[material_nb] = material
+		self.material_indices[material_nb] = index
+		self.N[material_nb] = None
+		for wvls_, N_, weight in self.bandwidth_nodes:
+			N_[material_nb] = None
+		self.N_mixture_copies = {}
+		
+		# The index of the layers of this material is used to calculate
+		# their optical thickness.
+		for side in [FRONT, BACK]:
+			if side == FRONT:
+				layers = self.front_layers
+			else:
+				layers = self.back_layers
+			if material_nb in layers:
+				self.unshare_layer_lists(side, ("index",))
+				if side == FRONT:
+					index_list = self.front_index
+				else:
+					index_list = self.back_index
+				for i_layer in range(len(layers)):
+					if layers[i_layer] == material_nb:
+						index_list[i_layer] = index
+		
+		self.reset_analysis()
+		self.reset_monitoring()
+		
+		self.modified = True
+	
+	
 	######################################################################
 	#                                                                    #
 	# set_substrate                                                      #
@@ -1458,6 +1786,8 @@ class optical_filter(object):
 		elif position == BOTTOM:
 			position = 0
 		
+		self.unshare_layer_lists(side)
+		
 		if side == FRONT:
 			self.front_layers.insert(position, material_nb)
 			self.front_layer_descriptions.insert(position, description)
@@ -1602,6 +1932,8 @@ class optical_filter(object):
 		elif position == BOTTOM:
 			position = 0
 		
+		self.unshare_layer_lists(side)
+		
 		if side == FRONT:
 			self.front_layers.insert(position, material_nb)
 			self.front_layer_descriptions.insert(position, description)
@@ -1672,6 +2004,8 @@ class optical_filter(object):
 			else:
 				thickness /= self.back_index[position]
 		
+		self.unshare_layer_lists(side, ("layer_descriptions", "thickness"))
+		
 		if side == FRONT:
 			self.front_layer_descriptions[position] = []
 			self.front_thickness[position] = thickness
@@ -1723,6 +2057,8 @@ class optical_filter(object):
 			if not self.materials[self.back_layers[position]].is_mixture():
 				return
 		
+		self.unshare_layer_lists(side, ("layer_descriptions", "index"))
+		
 		if side == FRONT:
 			self.front_layer_descriptions[position] = []
 			self.front_index[position] = index
@@ -1753,6 +2089,8 @@ class optical_filter(object):
 		old_nb_front_layers = len(self.front_layers)
 		old_nb_back_layers = len(self.back_layers)
 		
+		self.unshare_layer_lists(BOTH)
+		
 		# Remove layers with with null thickness, starting at the end of
 		# the list to consider every layers and not go behond the length
 		# of the shortened list.
@@ -1794,11 +2132,11 @@ class optical_filter(object):
 					self.front_preserve_OT.pop(i_layer)
 					self.front_add_needles.pop(i_layer)
 					self.front_add_steps.pop(i_layer)
-					self.front_thickness[i_layer-1] += self.front_thickness[i_layer]
+					self.front_thickness[i_layer-1] = self.front_thickness[i_layer-1] + self.front_thickness[i_layer]
 					self.front_thickness.pop(i_layer)
-					self.front_index[i_layer-1] += self.front_index[i_layer]
+					self.front_index[i_layer-1] = self.front_index[i_layer-1] + self.front_index[i_layer]
 					self.front_index.pop(i_layer)
-					self.front_step_profiles[i_layer-1] += self.front_step_profiles[i_layer]
+					self.front_step_profiles[i_layer-1] = self.front_step_profiles[i_layer-1] + self.front_step_profiles[i_layer]
 					self.front_step_profiles.pop(i_layer)
 				# If the layer is not a mixture, it is sure that it is
 				# identical. If it is a mixture, we must verify that the index
@@ -1812,7 +2150,7 @@ class optical_filter(object):
 					self.front_preserve_OT.pop(i_layer)
 					self.front_add_needles.pop(i_layer)
 					self.front_add_steps.pop(i_layer)
-					self.front_thickness[i_layer-1] += self.front_thickness[i_layer]
+					self.front_thickness[i_layer-1] = self.front_thickness[i_layer-1] + self.front_thickness[i_layer]
 					self.front_thickness.pop(i_layer)
 					self.front_index.pop(i_layer)
 					self.front_step_profiles.pop(i_layer)
@@ -1830,11 +2168,11 @@ class optical_filter(object):
 					self.back_preserve_OT.pop(i_layer)
 					self.back_add_needles.pop(i_layer)
 					self.back_add_steps.pop(i_layer)
-					self.back_thickness[i_layer-1] += self.back_thickness[i_layer]
+					self.back_thickness[i_layer-1] = self.back_thickness[i_layer-1] + self.back_thickness[i_layer]
 					self.back_thickness.pop(i_layer)
-					self.back_index[i_layer-1] += self.back_index[i_layer]
+					self.back_index[i_layer-1] = self.back_index[i_layer-1] + self.back_index[i_layer]
 					self.back_index.pop(i_layer)
-					self.back_step_profiles[i_layer-1] += self.back_step_profiles[i_layer]
+					self.back_step_profiles[i_layer-1] = self.back_step_profiles[i_layer-1] + self.back_step_profiles[i_layer]
 					self.back_step_profiles.pop(i_layer)
 				# If the layer is not a mixture, it is sure that it is
 				# identical. If it is a mixture, we must verify that the index
@@ -1848,7 +2186,7 @@ class optical_filter(object):
 					self.back_preserve_OT.pop(i_layer)
 					self.back_add_needles.pop(i_layer)
 					self.back_add_steps.pop(i_layer)
-					self.back_thickness[i_layer-1] += self.back_thickness[i_layer]
+					self.back_thickness[i_layer-1] = self.back_thickness[i_layer-1] + self.back_thickness[i_layer]
 					self.back_thickness.pop(i_layer)
 					self.back_index.pop(i_layer)
 					self.back_step_profiles.pop(i_layer)
@@ -1941,6 +2279,8 @@ class optical_filter(object):
 		elif position == BOTTOM:
 			position = 0
 		
+		self.unshare_layer_lists(side)
+		
 		if side == FRONT:
 			self.front_layers.pop(position)
 			self.front_layer_descriptions.pop(position)
@@ -1998,6 +2338,13 @@ class optical_filter(object):
 		self.front_stack_materials, self.back_stack_materials = self.back_stack_materials, self.front_stack_materials
 		self.matrices_front, self.matrices_back = self.matrices_back, self.matrices_front
 		
+		# The lists shared with clones were also swapped.
+		front_names = get_layer_list_names(FRONT)
+		back_names = get_layer_list_names(BACK)
+		swapped_names = dict(zip(front_names+back_names, back_names+front_names))
+		self.shared_layer_lists = set(swapped_names[name] for name in self.shared_layer_lists)
+		self.unshare_layer_lists(BOTH, ("refine_thickness", "refine_index", "preserve_OT", "add_needles", "add_steps"))
+		
 		# REMOVE when it will be possible to refine back layers.
 		# Since it is not possible now, don't refine back layers and refine
 		# all front layers.
@@ -2073,6 +2420,8 @@ class optical_filter(object):
 			self.back_add_needles = []
 			self.back_add_steps = []
 		
+		self.unshare_layer_lists(side, copy = False)
+		
 		self.reset_analysis()
 		self.reset_monitoring()
 		
@@ -2153,6 +2502,7 @@ class optical_filter(object):
 		# the thickness is not refined.
 		if side == FRONT:
 			if refine != self.front_refine_thickness[position]:
+				self.unshare_layer_lists(FRONT, ("refine_thickness", "add_needles"))
 				self.front_refine_thickness[position] = refine
 				if not refine:
 					self.front_add_needles[position] = False
@@ -2161,6 +2511,7 @@ class optical_filter(object):
 		
 		elif side == BACK:
 			if refine != self.back_refine_thickness[position]:
+				self.unshare_layer_lists(BACK, ("refine_thickness", "add_needles"))
 				self.back_refine_thickness[position] = refine
 				if not refine:
 					self.back_add_needles[position] = False
@@ -2229,11 +2580,13 @@ class optical_filter(object):
 		# Change the settings. Also, it is impossible to add steps or to
 		# preserve OT when the index is not refined.
 		if side == FRONT:
+			self.unshare_layer_lists(FRONT, ("refine_index", "add_steps", "preserve_OT"))
 			self.front_refine_index[position] = refine
 			if not refine:
 				self.front_add_steps[position] = False
 				self.front_preserve_OT[position] = False
 		elif side == BACK:
+			self.unshare_layer_lists(BACK, ("refine_index", "add_steps", "preserve_OT"))
 			self.back_refine_index[position] = refine
 			if not refine:
 				self.back_add_steps[position] = False
@@ -2300,12 +2653,14 @@ class optical_filter(object):
 		
 		if side == FRONT:
 			if preserve_OT != self.front_preserve_OT[position]:
+				self.unshare_layer_lists(FRONT, ("preserve_OT",))
 				self.front_preserve_OT[position] = preserve_OT
 				
 				self.modified = True
 		
 		elif side == BACK:
 			if preserve_OT != self.back_preserve_OT[position]:
+				self.unshare_layer_lists(BACK, ("preserve_OT",))
 				self.back_preserve_OT[position] = preserve_OT
 				
 				self.modified = True
@@ -2371,12 +2726,14 @@ class optical_filter(object):
 		
 		if side == FRONT:
 			if add_needles != self.front_add_needles[position]:
+				self.unshare_layer_lists(FRONT, ("add_needles",))
 				self.front_add_needles[position] = add_needles
 				
 				self.modified = True
 		
 		elif side == BACK:
 			if add_needles != self.back_add_needles[position]:
+				self.unshare_layer_lists(BACK, ("add_needles",))
 				self.back_add_needles[position] = add_needles
 				
 				self.modified = True
@@ -2441,12 +2798,14 @@ class optical_filter(object):
 		
 		if side == FRONT:
 			if add_steps != self.front_add_steps[position]:
+				self.unshare_layer_lists(FRONT, ("add_steps",))
 				self.front_add_steps[position] = add_steps
 				
 				self.modified = True
 		
 		elif side == BACK:
 			if add_steps != self.back_add_steps[position]:
+				self.unshare_layer_lists(BACK, ("add_steps",))
 				self.back_add_steps[position] = add_steps
 				
 				self.modified = True
@@ -3112,6 +3471,8 @@ class optical_filter(object):
 		"""Reset the internal list of indices"""
 		
 		self.N = [None]*len(self.materials)
+		self.bandwidth_nodes = []
+		self.N_mixture_copies = {}
 	
 	
 	######################################################################
@@ -3127,14 +3488,91 @@ class optical_filter(object):
 		                     the default value is BOTH."""
 		
 		if side == BOTH:
-			self.sin2_theta_0 = []
-			self.matrices_front = []
-			self.matrices_back = []
+			self.sin2_theta_0 = {}
+			self.matrices_front = {}
+			self.matrices_back = {}
+			self.analysis_references = collections.OrderedDict()
 		elif side == FRONT:
-			self.matrices_front = [None]*len(self.sin2_theta_0)
+			self.matrices_front = dict.fromkeys(self.sin2_theta_0)
 		elif side == BACK:
-			self.matrices_back = [None]*len(self.sin2_theta_0)
-
+			self.matrices_back = dict.fromkeys(self.sin2_theta_0)
+		
+		self.r_and_t = {}
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_analysis_cache_statistics                                      #
+	#                                                                    #
+	######################################################################
+	def get_analysis_cache_statistics(self):
+		"""Get statistics on the use of the saved analysis
+		
+		This method returns:
+		  hits               the number of analysis that were found in the
+		                     saved results;
+		  misses             the number of analysis that required a
+		                     calculation;
+		  nb_conditions      the number of conditions for which results are
+		                     presently saved."""
+		
+		return self.analysis_cache_hits, self.analysis_cache_misses, len(self.analysis_references)
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_r_and_t                                                        #
+	#                                                                    #
+	######################################################################
+	def get_r_and_t(self, i_angle, N_substrate, N_front_medium, N_back_medium):
+		"""Get the amplitude reflection and transmission of the filter
+		
+		This method takes 4 arguments:
+		  i_angle            the key of the analysis, as returned by
+		                     analyse;
+		  N_substrate        the index of the substrate;
+		  N_front_medium     the index of the front medium;
+		  N_back_medium      the index of the back medium;
+		and returns:
+		  r_and_t_front      the r and t of the front side;
+		  r_and_t_front_reverse  the r and t of the front side in reverse
+		                     direction;
+		  r_and_t_back       the r and t of the back side in reverse
+		                     direction.
+		The last two are None when the backside is not considered.
+		
+		The r and t are kept with the matrices they are calculated from
+		and shared by all the properties calculated for these conditions.
+		They must not be modified."""
+		
+		# The r and t must also be recalculated if the substrate or the
+		# back medium changed.
+		if i_angle in self.r_and_t:
+			references, r_and_t = self.r_and_t[i_angle]
+			if references[0] is N_substrate and references[1] is N_back_medium and (r_and_t[2] is not None) == self.consider_backside:
+				return r_and_t
+		
+		r_and_t_front = abeles.r_and_t(self.wvls)
+		r_and_t_front.calculate_r_and_t(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
+		
+		if self.consider_backside:
+			r_and_t_front_reverse = abeles.r_and_t(self.wvls)
+			r_and_t_front_reverse.calculate_r_and_t_reverse(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
+			
+			# Since the matrices were calculated starting at the substrate, we
+			# have to calculate the reverse r and t.
+			r_and_t_back = abeles.r_and_t(self.wvls)
+			r_and_t_back.calculate_r_and_t_reverse(self.matrices_back[i_angle], N_back_medium, N_substrate, self.sin2_theta_0[i_angle])
+		
+		else:
+			r_and_t_front_reverse = None
+			r_and_t_back = None
+		
+		r_and_t = (r_and_t_front, r_and_t_front_reverse, r_and_t_back)
+		self.r_and_t[i_angle] = ((N_substrate, N_back_medium), r_and_t)
+		
+		return r_and_t
+	
 	
 	######################################################################
 	#                                                                    #
@@ -3219,20 +3657,14 @@ class optical_filter(object):
 			if self.is_graded(0, FRONT):
 				N_substrate = N[self.front_layers[0]].get_N_mixture_graded(self.front_step_profiles[0][0])
 			elif self.materials[self.front_layers[0]].is_mixture():
-				N[self.front_layers[0]].set_N_mixture(self.front_index[0], self.center_wavelength)
-				N_layer = N[self.front_layers[0]].get_N_mixture()
-				N_substrate = abeles.N(self.wvls)
-				N_substrate.copy(N_layer)
+				N_substrate = self.get_N_mixture_copy(N[self.front_layers[0]], self.front_index[0], BOTTOM)
 			else:
 				N_substrate = N[self.front_layers[0]]
 			
 			if self.is_graded(TOP, FRONT):
 				N_front_medium = N[self.front_layers[-1]].get_N_mixture_graded(self.front_step_profiles[-1][-1])
 			elif self.materials[self.front_layers[-1]].is_mixture():
-				N[self.front_layers[-1]].set_N_mixture(self.front_index[-1], self.center_wavelength)
-				N_layer = N[self.front_layers[-1]].get_N_mixture()
-				N_front_medium = abeles.N(self.wvls)
-				N_front_medium.copy(N_layer)
+				N_front_medium = self.get_N_mixture_copy(N[self.front_layers[-1]], self.front_index[-1], TOP)
 			else:
 				N_front_medium = N[self.front_layers[-1]]
 			
@@ -3248,6 +3680,47 @@ class optical_filter(object):
 		return N_substrate, N_front_medium, N_back_medium
 	
 	
+	######################################################################
+	#                                                                    #
+	# get_N_mixture_copy                                                 #
+	#                                                                    #
+	######################################################################
+	def get_N_mixture_copy(self, N_mixture, index, position):
+		"""Get a copy of the index of a mixture
+		
+		This method takes 3 arguments:
+		  N_mixture          the dispersion curve of the mixture;
+		  index              the index of the mixture at the center
+		                     wavelength;
+		  position           the position where the copy is used, TOP for
+		                     the medium or BOTTOM for the substrate;
+		and returns a copy of the dispersion curve of the mixture at that
+		index.
+		
+		The index of a mixture is kept in a structure that is overwritten
+		every time another index is set, hence the copy. The copy is kept
+		and returned again as long as the mixture, its index and the center
+		wavelength are the same, so that the analysis made with this copy
+		as the medium can be found again (see analyse)."""
+		
+		key = (id(N_mixture), position)
+		
+		if key in self.N_mixture_copies:
+			N_mixture_, index_, center_wavelength_, N_copy = self.N_mixture_copies[key]
+			if N_mixture_ is N_mixture and index_ == index and center_wavelength_ == self.center_wavelength:
+				return N_copy
+		
+		N_mixture.set_N_mixture(index, self.center_wavelength)
+		N_copy = abeles.N(self.wvls)
+		N_copy.copy(N_mixture.get_N_mixture())
+		
+		# The mixture is kept with its copy so that its identity is not
+		# reused.
+		self.N_mixture_copies[key] = (N_mixture, index, self.center_wavelength, N_copy)
+		
+		return N_copy
+	
+	
 	######################################################################
 	#                                                                    #
 	# analyse                                                            #
@@ -3261,10 +3734,14 @@ class optical_filter(object):
 		                     to be calculated;
 		  N                  the refractive index of the material in which
 		                     the angle is defined;
-		and returns a position indicating where to find the results of the
+		and returns a key indicating where to find the results of the
 		calculations in class attributes. If the matrices have already been
 		calculated at this angle, the calculations are not repeated and the
-		method simply returns the position.
+		method simply returns the key.
+		
+		The results are kept for the most recently used conditions, up to
+		ANALYSIS_CACHE_SIZE matrices times the number of wavelengths (see
+		the configuration).
 		
 		Calculation are done using the Abeles method first described in
 		  Florin Abeles, "Recherche sur la propagation des ondes
@@ -3279,37 +3756,55 @@ class optical_filter(object):
 		These formula, equivalent to those given by Abeles, are faster
 		to compute."""
 		
-		# The angle of the incident light is normalized to vaccuum to speed
-		# up the calculation.
-		sin2_theta_0 = abeles.sin2(self.wvls)
-		sin2_theta_0.set_sin2_theta_0(N, angle)
+		# The conditions are identified by the angle, the index of the
+		# medium and the wavelengths. The index and the wavelengths are
+		# identified by their identity; since they are referenced by the
+		# cache, their identity cannot be reused while they are in it.
+		key = (angle, id(N), id(self.wvls))
+		
+		# If some analysis has been done for this angle, find the matrices
+		# and recalculate only what has not already been calculated (this
+		# can happen when layers are added on one side, the front and back
+		# side are reversed, or when the consideration of the backside is
+		# changed, for example).
+		if key in self.analysis_references:
+			position = key
+			sin2_theta_0 = self.sin2_theta_0[key]
+			self.analysis_references[key] = self.analysis_references.pop(key)
+		else:
+			position = None
+			
+			# The angle of the incident light is normalized to vaccuum to
+			# speed up the calculation.
+			sin2_theta_0 = abeles.sin2(self.wvls)
+			sin2_theta_0.set_sin2_theta_0(N, angle)
+		
+		calculate_front = position is None or self.matrices_front[position] is None
+		calculate_back = self.consider_backside and (position is None or self.matrices_back[position] is None)
+		
+		if calculate_front or calculate_back:
+			self.analysis_cache_misses += 1
+			self.r_and_t.pop(key, None)
+		else:
+			self.analysis_cache_hits += 1
+			return position
 		
 		# Give other threads a chance...
 		time.sleep(0)
 		
 		if self.stop_: return
 		
-		# If some analysis has been done for this angle, find the position
-		# of the matrices in the list and recalculate only what has not
-		# already been calculated (this can happen when layers are added on
-		# one side, the front and back side are reversed, or when the
-		# consideration of the backside is changed, for example).
-		try:
-			position = self.sin2_theta_0.index(sin2_theta_0)
-		except ValueError:
-			position = None
-		
 		# Determine the total number of layers (including sublayers of
 		# graded index layers) to determine the progress of the
 		# calculation.
 		total_nb_layers = 0
-		if position is None or self.matrices_front[position] is None:
+		if calculate_front:
 			for i_layer in range(len(self.front_layers)):
 				if self.is_graded(i_layer, FRONT):
 					total_nb_layers += len(self.front_step_profiles[i_layer])
 				else:
 					total_nb_layers += 1
-		if self.consider_backside and (position is None or self.matrices_back[position] is None):
+		if calculate_back:
 			for i_layer in range(len(self.back_layers)):
 				if self.is_graded(i_layer, BACK):
 					total_nb_layers += len(self.back_step_profiles[i_layer])
@@ -3323,126 +3818,845 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
+		# Identical sublayers of graded-index layers share the same
+		# matrices.
+		sublayer_cache = graded.sublayer_matrices_cache(self.wvls, sin2_theta_0)
+		
 		# Calculate and multiply the matrices of the front side.
-		if position is None or self.matrices_front[position] is None:
+		if calculate_front:
 			global_matrices_front = abeles.matrices(self.wvls)
 			global_matrices_front.set_matrices_unity()
-			temp_matrices = abeles.matrices(self.wvls)
-			for i_layer in range(len(self.front_layers)):
-				
-				if self.is_graded(i_layer, FRONT):
-					for i_sublayer in range(len(self.front_step_profiles[i_layer])):
-						
-						n_sublayer = self.N[self.front_layers[i_layer]].get_N_mixture_graded(self.front_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.front_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_front.multiply_matrices(temp_matrices)
-						
-						done_layers += 1
-						
-						# Give other threads a chance...
-						time.sleep(0)
-						
-						if self.stop_: return
-						
-						self.progress = done_layers/total_nb_layers
-				
-				else:
-					if self.materials[self.front_layers[i_layer]].is_mixture():
-						self.N[self.front_layers[i_layer]].set_N_mixture(self.front_index[i_layer], self.center_wavelength)
-						N_layer = self.N[self.front_layers[i_layer]].get_N_mixture()
-					else:
-						N_layer = self.N[self.front_layers[i_layer]]
-					temp_matrices.set_matrices(N_layer, self.front_thickness[i_layer], sin2_theta_0)
-					global_matrices_front.multiply_matrices(temp_matrices)
-					
-					done_layers += 1
-					
-					# Give other threads a chance...
-					time.sleep(0)
-					
-					if self.stop_: return
-					
-					self.progress = done_layers/total_nb_layers
+			done_layers = self.multiply_side_matrices(global_matrices_front, FRONT, sin2_theta_0, sublayer_cache, done_layers, total_nb_layers)
+			if done_layers is None: return
 		
-		if self.consider_backside and (position is None or self.matrices_back[position] is None):
+		if calculate_back:
 			
 			# Multiply the matrices of the back side.
 			global_matrices_back = abeles.matrices(self.wvls)
 			global_matrices_back.set_matrices_unity()
-			temp_matrices = abeles.matrices(self.wvls)
-			for i_layer in range(len(self.back_layers)):
-				if self.is_graded(i_layer, BACK):
-					for i_sublayer in range(len(self.back_step_profiles[i_layer])):
-						n_sublayer = self.N[self.back_layers[i_layer]].get_N_mixture_graded(self.back_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.back_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_back.multiply_matrices(temp_matrices)
-						
-						done_layers += 1
-						
-						# Give other threads a chance...
-						time.sleep(0)
-						
-						if self.stop_: return
-						
-						self.progress = done_layers/total_nb_layers
-				
-				else:
-					if self.materials[self.back_layers[i_layer]].is_mixture():
-						self.N[self.back_layers[i_layer]].set_N_mixture(self.back_index[i_layer], self.center_wavelength)
-						N_layer = self.N[self.back_layers[i_layer]].get_N_mixture()
-					else:
-						N_layer = self.N[self.back_layers[i_layer]]
-					temp_matrices.set_matrices(N_layer, self.back_thickness[i_layer], sin2_theta_0)
-					global_matrices_back.multiply_matrices(temp_matrices)
-					
-					done_layers += 1
-					
-					# Give other threads a chance...
-					time.sleep(0)
-					
-					if self.stop_: return
-					
-					self.progress = done_layers/total_nb_layers
+			done_layers = self.multiply_side_matrices(global_matrices_back, BACK, sin2_theta_0, sublayer_cache, done_layers, total_nb_layers)
+			if done_layers is None: return
 		
-		# Append the results for this angle to the results already
-		# saved.
+		# Add the results for this angle to the results already saved.
 		if position is None:
-			self.sin2_theta_0.append(sin2_theta_0)
-			self.matrices_front.append(global_matrices_front)
+			position = key
+			self.sin2_theta_0[key] = sin2_theta_0
+			self.matrices_front[key] = global_matrices_front
 			if self.consider_backside:
-				self.matrices_back.append(global_matrices_back)
+				self.matrices_back[key] = global_matrices_back
 			else:
-				self.matrices_back.append(None)
-			position = len(self.sin2_theta_0)-1
+				self.matrices_back[key] = None
+			self.analysis_references[key] = (N, self.wvls)
 		else:
-			if self.matrices_front[position] is None:
-				self.matrices_front[position] = global_matrices_front
-			if self.consider_backside and self.matrices_back[position] is None:
-				self.matrices_back[position] = global_matrices_back
+			if calculate_front:
+				self.matrices_front[key] = global_matrices_front
+			if calculate_back:
+				self.matrices_back[key] = global_matrices_back
 		
-		# Return the position of the matrices in the list.
+		# Forget the least recently used results when the cache is full,
+		# but always keep the results that were just calculated.
+		nb_wvls = len(self.wvls)
+		cache_size = sum(nb_wvls*((self.matrices_front[other_key] is not None) + (self.matrices_back[other_key] is not None)) for other_key in self.analysis_references)
+		while cache_size > config.ANALYSIS_CACHE_SIZE and len(self.analysis_references) > 1:
+			oldest_key = next(iter(self.analysis_references))
+			cache_size -= nb_wvls*((self.matrices_front[oldest_key] is not None) + (self.matrices_back[oldest_key] is not None))
+			del self.analysis_references[oldest_key]
+			del self.sin2_theta_0[oldest_key]
+			del self.matrices_front[oldest_key]
+			del self.matrices_back[oldest_key]
+			self.r_and_t.pop(oldest_key, None)
+		
+		# Return the key of the matrices in the dictionaries.
 		return position
 	
 	
 	######################################################################
 	#                                                                    #
-	# transmission                                                       #
+	# multiply_side_matrices                                             #
 	#                                                                    #
 	######################################################################
-	def transmission(self, angle = 0.0, polarization = UNPOLARIZED):
-		"""Calculate the transmission of the filter
+	def multiply_side_matrices(self, global_matrices, side, sin2_theta_0, sublayer_cache, done_layers, total_nb_layers):
+		"""Multiply the matrices of all the layers of one side
 		
-		The function takes 2 optional arguments:
-		  angle              (optional) the angle of incidence (in degres),
-		                     the default value is 0;
-		  polarization       (optional) the polarization of the light, it
-		                     can take a numerical value between 0 and 90 or
-		                     the values S, P, or UNPOLARIZED, the default
+		This method takes 6 arguments:
+		  global_matrices    the matrices by which to multiply the matrices
+		                     of the layers;
+		  side               the side;
+		  sin2_theta_0       the normalized sinus squared of the
+		                     propagation angle;
+		  sublayer_cache     the cache of the matrices of the sublayers
+		                     of graded-index layers;
+		  done_layers        the number of layers already done;
+		  total_nb_layers    the total number of layers to do;
+		and returns the number of layers done, or None if the calculation
+		was stopped.
+		
+		When some layers or sublayers are repeated periodically (for
+		example in a stack created from the (HL)^20 formula), the matrices
+		of a period are multiplied once and then raised to the number of
+		periods by repeated squaring."""
+		
+		if side == FRONT:
+			layers = self.front_layers
+			thicknesses = self.front_thickness
+			indices = self.front_index
+			step_profiles = self.front_step_profiles
+		else:
+			layers = self.back_layers
+			thicknesses = self.back_thickness
+			indices = self.back_index
+			step_profiles = self.back_step_profiles
+		
+		# Describe every layer and sublayer by its material, its index (or
+		# step) and its thickness to find the periodic parts of the side.
+		sublayers = []
+		descriptions = []
+		for i_layer in range(len(layers)):
+			if self.is_graded(i_layer, side):
+				for i_sublayer in range(len(step_profiles[i_layer])):
+					sublayers.append((i_layer, i_sublayer))
+					descriptions.append((layers[i_layer], True, step_profiles[i_layer][i_sublayer], thicknesses[i_layer][i_sublayer]))
+			else:
+				sublayers.append((i_layer, None))
+				descriptions.append((layers[i_layer], False, indices[i_layer], thicknesses[i_layer]))
+		
+		if config.PERIODIC_MAX_PERIOD:
+			repetitions = stack.find_repetitions(descriptions, config.PERIODIC_MAX_PERIOD)
+		else:
+			repetitions = [(i, 1, 1) for i in range(len(descriptions))]
+		
+		temp_matrices = abeles.matrices(self.wvls)
+		period_matrices = None
+		power_matrices = None
+		
+		for start, period, nb_repetitions in repetitions:
+			if nb_repetitions == 1:
+				i_layer, i_sublayer = sublayers[start]
+				global_matrices.multiply_matrices(self.get_sublayer_matrices(i_layer, i_sublayer, side, sin2_theta_0, sublayer_cache, temp_matrices))
+			
+			else:
+				if period_matrices is None:
+					period_matrices = abeles.matrices(self.wvls)
+					power_matrices = abeles.matrices(self.wvls)
+				period_matrices.set_matrices_unity()
+				for i_layer, i_sublayer in sublayers[start:start+period]:
+					period_matrices.multiply_matrices(self.get_sublayer_matrices(i_layer, i_sublayer, side, sin2_theta_0, sublayer_cache, temp_matrices))
+				multiply_matrices_by_power(global_matrices, period_matrices, nb_repetitions, power_matrices)
+			
+			done_layers += period*nb_repetitions
+			
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return None
+			
+			self.progress = done_layers/total_nb_layers
+		
+		return done_layers
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_sublayer_matrices                                              #
+	#                                                                    #
+	######################################################################
+	def get_sublayer_matrices(self, i_layer, i_sublayer, side, sin2_theta_0, sublayer_cache, temp_matrices):
+		"""Get the matrices of a layer or of a sublayer
+		
+		This method takes 6 arguments:
+		  i_layer            the position of the layer;
+		  i_sublayer         the position of the sublayer in a graded-index
+		                     layer, or None for an homogeneous layer;
+		  side               the side of the layer;
+		  sin2_theta_0       the normalized sinus squared of the
+		                     propagation angle;
+		  sublayer_cache     the cache of the matrices of the sublayers
+		                     of graded-index layers;
+		  temp_matrices      matrices that can be used to store the
+		                     matrices of homogeneous layers;
+		and returns the matrices of the layer or sublayer. The returned
+		matrices must not be modified."""
+		
+		if side == FRONT:
+			material_nb = self.front_layers[i_layer]
+			thickness = self.front_thickness[i_layer]
+			index = self.front_index[i_layer]
+			step_profile = self.front_step_profiles[i_layer]
+		else:
+			material_nb = self.back_layers[i_layer]
+			thickness = self.back_thickness[i_layer]
+			index = self.back_index[i_layer]
+			step_profile = self.back_step_profiles[i_layer]
+		
+		if i_sublayer is not None:
+			step = step_profile[i_sublayer]
+			n_sublayer = self.N[material_nb].get_N_mixture_graded(step)
+			return sublayer_cache.get_matrices(n_sublayer, (material_nb, step), thickness[i_sublayer])
+		
+		if self.materials[material_nb].is_mixture():
+			self.N[material_nb].set_N_mixture(index, self.center_wavelength)
+			N_layer = self.N[material_nb].get_N_mixture()
+		else:
+			N_layer = self.N[material_nb]
+		temp_matrices.set_matrices(N_layer, thickness, sin2_theta_0)
+		
+		return temp_matrices
+	
+	
+	######################################################################
+	#                                                                    #
+	# analyse_omega_derivatives                                          #
+	#                                                                    #
+	######################################################################
+	def analyse_omega_derivatives(self, angle):
+		"""Calculate the matrices representing the front side of the filter
+		and their derivatives with regard to the angular frequency
+		
+		This method takes 1 argument:
+		  angle              the angle of incidence (in degres);
+		and returns:
+		  M                  the matrices of the front side and their
+		                     derivatives;
+		  N_front_medium     the index of the front medium and its
+		                     derivatives;
+		  N_substrate        the index of the substrate and its
+		                     derivatives;
+		  sin2_theta_0       the normalized sinus squared of the
+		                     propagation angle;
+		or None if the calculation was stopped.
+		
+		The derivatives of the matrices of every layer are propagated
+		through their product. The derivatives of the indices of the
+		materials are determined from their dispersion at angular
+		frequencies ANALYTIC_GD_STEP times higher and lower (see the
+		configuration). The results are not kept."""
+		
+		step = config.ANALYTIC_GD_STEP
+		
+		# Get the indices at the wavelengths of the filter and at the
+		# wavelengths corresponding to the slightly lower and higher
+		# angular frequencies.
+		nb_wvls = len(self.wvls)
+		wvls_minus = abeles.wvls(nb_wvls)
+		wvls_plus = abeles.wvls(nb_wvls)
+		for i_wvl in range(nb_wvls):
+			wvls_minus.set_wvl(i_wvl, self.wvls[i_wvl]/(1.0-step))
+			wvls_plus.set_wvl(i_wvl, self.wvls[i_wvl]/(1.0+step))
+		
+		nb_materials = len(self.materials)
+		N_minus = [None]*nb_materials
+		N_plus = [None]*nb_materials
+		self.prepare_indices()
+		self.prepare_indices(N_minus, wvls_minus)
+		self.prepare_indices(N_plus, wvls_plus)
+		
+		# Give other threads a chance...
+		time.sleep(0)
+		
+		if self.stop_: return
+		
+		Ns = (N_minus, self.N, N_plus)
+		
+		substrate_and_medium_indices = [self.get_substrate_and_medium_indices(N) for N in Ns]
+		N_substrate = abeles.N_and_derivatives(self.wvls)
+		N_substrate.set_N_and_derivatives(substrate_and_medium_indices[0][0], substrate_and_medium_indices[1][0], substrate_and_medium_indices[2][0], step)
+		N_front_medium = abeles.N_and_derivatives(self.wvls)
+		N_front_medium.set_N_and_derivatives(substrate_and_medium_indices[0][1], substrate_and_medium_indices[1][1], substrate_and_medium_indices[2][1], step)
+		
+		# The angle of the incident light is normalized to vaccuum to speed
+		# up the calculation.
+		sin2_theta_0 = abeles.sin2(self.wvls)
+		sin2_theta_0.set_sin2_theta_0(substrate_and_medium_indices[1][1], angle)
+		
+		M = abeles.matrices_and_derivatives(self.wvls)
+		M.set_matrices_unity()
+		layer_M = abeles.matrices_and_derivatives(self.wvls)
+		
+		# The indices of homogeneous layers and of the sublayers of
+		# graded-index layers are differentiated once per material and
+		# index or step.
+		N_layers = {}
+		
+		for i_layer in range(len(self.front_layers)):
+			material_nb = self.front_layers[i_layer]
+			
+			if self.is_graded(i_layer, FRONT):
+				sublayers = [((material_nb, True, step_), thickness) for step_, thickness in zip(self.front_step_profiles[i_layer], self.front_thickness[i_layer])]
+			elif self.materials[material_nb].is_mixture():
+				sublayers = [((material_nb, False, self.front_index[i_layer]), self.front_thickness[i_layer])]
+			else:
+				sublayers = [((material_nb, False, None), self.front_thickness[i_layer])]
+			
+			for key, thickness in sublayers:
+				if key not in N_layers:
+					N_layer = []
+					for N in Ns:
+						if key[1]:
+							N_layer.append(N[material_nb].get_N_mixture_graded(key[2]))
+						elif key[2] is not None:
+							N[material_nb].set_N_mixture(key[2], self.center_wavelength)
+							N_layer.append(N[material_nb].get_N_mixture())
+						else:
+							N_layer.append(N[material_nb])
+					N_layers[key] = abeles.N_and_derivatives(self.wvls)
+					N_layers[key].set_N_and_derivatives(N_layer[0], N_layer[1], N_layer[2], step)
+				
+				layer_M.set_matrices(N_layers[key], thickness, N_front_medium, sin2_theta_0)
+				M.multiply_matrices(layer_M)
+			
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return
+		
+		return M, N_front_medium, N_substrate, sin2_theta_0
+	
+	
+	######################################################################
+	#                                                                    #
+	# analyse_derivatives                                                #
+	#                                                                    #
+	######################################################################
+	def analyse_derivatives(self, angle, parameters):
+		"""Calculate the derivatives of the amplitude reflection and
+		transmission of the front side of the filter
+		
+		This method takes 2 arguments:
+		  angle              the angle of incidence (in degres);
+		  parameters         a list of (kind, identification) tuples, kind
+		                     is THICKNESS_DERIVATIVE or INDEX_DERIVATIVE,
+		                     identified by the position of a front layer,
+		                     or MATERIAL_DERIVATIVE, identified by a
+		                     (material_nb, property_nb) tuple;
+		and returns:
+		  M                  the matrices of the front side;
+		  r_and_t            the r and t of the filter, as returned by
+		                     get_r_and_t;
+		  dr_and_dt          a list of the contributions to the derivative
+		                     of the r and t of the front side with regard
+		                     to every parameter;
+		  N_substrate        the index of the substrate;
+		  N_front_medium     the index of the front medium;
+		  N_back_medium      the index of the back medium;
+		  sin2_theta_0       the normalized sinus squared of the
+		                     propagation angle;
+		or None if the calculation was stopped.
+		
+		Every contribution is a (dM, dr_and_dt_front,
+		dr_and_dt_front_reverse) tuple, the latter being None when the
+		backside is not considered. The derivative with regard to the index
+		of a layer is with regard to the real part of the index at the
+		reference wavelength and is only available for mixtures.
+		The derivatives are determined analytically from the derivatives
+		of the matrices of the layers and the pre and post matrices of the
+		front side. The derivative with regard to a property of a material
+		is split into the contributions of every layer made of that
+		material; since the derivatives of R and T are linear in dr and
+		dt, the derivatives calculated from every contribution can simply
+		be added. A filter_error is raised for graded-index layers, for the
+		index of layers that are not made of mixtures, for materials used
+		as substrate, medium, or on the back side when it is considered,
+		whose derivatives are not available, for partially coherent
+		substrates, and when the spectra are averaged over a cone of light
+		or a bandwidth."""
+		
+		self.stop_ = False
+		
+		if self.dont_consider_substrate:
+			raise filter_error("Derivatives are not available when the substrate is not considered")
+		
+		if self.consider_backside and self.coherence_length:
+			raise filter_error("Derivatives are not available for a partially coherent substrate")
+		
+		if self.cone_half_angle or self.bandwidth:
+			raise filter_error("Derivatives are not available when the spectra are averaged")
+		
+		for kind, identification in parameters:
+			if kind == THICKNESS_DERIVATIVE or kind == INDEX_DERIVATIVE:
+				if self.is_graded(identification, FRONT):
+					raise filter_error("Derivatives are not available for graded-index layers")
+				if kind == INDEX_DERIVATIVE and not self.materials[self.front_layers[identification]].is_mixture():
+					raise filter_error("The index of a layer can only be varied if it is made of a mixture")
+			elif identification[0] in (self.substrate, self.front_medium):
+				raise filter_error("Derivatives are not available for the substrate and the medium")
+			elif self.consider_backside and (identification[0] == self.back_medium or identification[0] in self.back_layers):
+				raise filter_error("Derivatives are not available for the materials of the back side")
+		
+		self.prepare_indices()
+		
+		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
+		
+		# Give other threads a chance...
+		time.sleep(0)
+		
+		if self.stop_: return
+		
+		i_angle = self.analyse(angle, N_front_medium)
+		
+		# Give other threads a chance...
+		time.sleep(0)
+		
+		if self.stop_: return
+		
+		sin2_theta_0 = self.sin2_theta_0[i_angle]
+		r_and_t = self.get_r_and_t(i_angle, N_substrate, N_front_medium, N_back_medium)
+		
+		psi = abeles.psi_matrices(self.wvls)
+		psi.calculate_psi_matrices(r_and_t[0], N_front_medium, N_substrate, sin2_theta_0)
+		if self.consider_backside:
+			psi_reverse = abeles.psi_matrices(self.wvls)
+			psi_reverse.calculate_psi_matrices_reverse(r_and_t[1], N_front_medium, N_substrate, sin2_theta_0)
+		
+		# Set the matrices of every layer and sublayer of the front side,
+		# keeping the position of every layer in the pre and post matrices
+		# and the index of homogeneous layers.
+		nb_sublayers = 0
+		for i_layer in range(len(self.front_layers)):
+			if self.is_graded(i_layer, FRONT):
+				nb_sublayers += len(self.front_step_profiles[i_layer])
+			else:
+				nb_sublayers += 1
+		
+		pre_and_post_matrices = abeles.pre_and_post_matrices(self.wvls, nb_sublayers)
+		positions = []
+		N_layers = []
+		position = 0
+		for i_layer in range(len(self.front_layers)):
+			material_nb = self.front_layers[i_layer]
+			positions.append(position)
+			if self.is_graded(i_layer, FRONT):
+				for step, thickness in zip(self.front_step_profiles[i_layer], self.front_thickness[i_layer]):
+					pre_and_post_matrices.set_pre_and_post_matrices(position, self.N[material_nb].get_N_mixture_graded(step), thickness, sin2_theta_0)
+					position += 1
+				N_layers.append(None)
+			else:
+				if self.materials[material_nb].is_mixture():
+					self.N[material_nb].set_N_mixture(self.front_index[i_layer], self.center_wavelength)
+					N_layer = abeles.N(self.wvls)
+					N_layer.copy(self.N[material_nb].get_N_mixture())
+				else:
+					N_layer = self.N[material_nb]
+				pre_and_post_matrices.set_pre_and_post_matrices(position, N_layer, self.front_thickness[i_layer], sin2_theta_0)
+				position += 1
+				N_layers.append(N_layer)
+		
+		pre_and_post_matrices.multiply_pre_and_post_matrices()
+		
+		# Give other threads a chance...
+		time.sleep(0)
+		
+		if self.stop_: return
+		
+		dMi = abeles.dM(self.wvls)
+		
+		dr_and_dt = []
+		for kind, identification in parameters:
+			if kind == THICKNESS_DERIVATIVE:
+				layer_derivatives = [(identification, None)]
+			elif kind == INDEX_DERIVATIVE:
+				material_nb = self.front_layers[identification]
+				self.N[material_nb].set_dN_mixture(self.front_index[identification], self.center_wavelength)
+				layer_derivatives = [(identification, self.N[material_nb].get_dN_mixture())]
+			else:
+				material_nb, property_nb = identification
+				dN = self.materials[material_nb].get_dN(self.wvls, property_nb)
+				layer_derivatives = [(i_layer, dN) for i_layer in range(len(self.front_layers)) if self.front_layers[i_layer] == material_nb]
+			
+			contributions = []
+			for i_layer, dN in layer_derivatives:
+				if dN is None:
+					dMi.set_dMi_thickness(N_layers[i_layer], self.front_thickness[i_layer], sin2_theta_0)
+				else:
+					dMi.set_dMi_index(N_layers[i_layer], dN, self.front_thickness[i_layer], sin2_theta_0)
+				dM = abeles.dM(self.wvls)
+				dM.calculate_dM(dMi, pre_and_post_matrices, positions[i_layer])
+				
+				dr_and_dt_front = abeles.dr_and_dt(self.wvls)
+				dr_and_dt_front.calculate_dr_and_dt(dM, psi)
+				if self.consider_backside:
+					dr_and_dt_front_reverse = abeles.dr_and_dt(self.wvls)
+					dr_and_dt_front_reverse.calculate_dr_and_dt_reverse(dM, psi_reverse)
+				else:
+					dr_and_dt_front_reverse = None
+				contributions.append((dM, dr_and_dt_front, dr_and_dt_front_reverse))
+			
+			dr_and_dt.append(contributions)
+			
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return
+		
+		return pre_and_post_matrices.get_global_matrices(), r_and_t, dr_and_dt, N_substrate, N_front_medium, N_back_medium, sin2_theta_0
+	
+	
+	######################################################################
+	#                                                                    #
+	# property_derivatives                                               #
+	#                                                                    #
+	######################################################################
+	def property_derivatives(self, parameters, angle = 0.0, polarization = UNPOLARIZED):
+		"""Calculate the derivatives of the properties of the filter
+		
+		This method takes 1 to 3 arguments:
+		  parameters         a list of (kind, identification) tuples, see
+		                     analyse_derivatives;
+		  angle              (optional) the angle of incidence (in degres),
+		                     the default value is 0;
+		  polarization       (optional) the polarization of the light, it
+		                     can take a numerical value between 0 and 90 or
+		                     the values S, P, or UNPOLARIZED, the default
 		                     value is UNPOLARIZED;
-		and returns the transmission of the filter."""
+		and returns a list of the derivatives of the reflection, the
+		transmission, the absorption, Psi, Delta, and the reflection and
+		transmission phases with regard to every parameter, or None if the
+		calculation was stopped. Psi and Delta are in degres and do not
+		depend on the polarization; their derivatives are None when the
+		backside is considered. The phases are in degres and, like the
+		phase properties, are those of the front side; their derivatives
+		are None unless the polarization is S or P.
+		
+		The derivatives are calculated analytically for light in the
+		forward direction. A filter_error is raised in the cases listed
+		in analyse_derivatives."""
+		
+		results = self.analyse_derivatives(angle, parameters)
+		
+		if results is None: return
+		
+		M, r_and_t, dr_and_dt, N_substrate, N_front_medium, N_back_medium, sin2_theta_0 = results
+		r_and_t_front, r_and_t_front_reverse, r_and_t_back = r_and_t
+		
+		nb_wvls = len(self.wvls)
+		
+		dR_front = abeles.dR(self.wvls)
+		dT_front = abeles.dT(self.wvls)
+		dA = abeles.dA(self.wvls)
+		
+		if self.consider_backside:
+			T_front = abeles.T(self.wvls)
+			T_front_reverse = abeles.T(self.wvls)
+			R_front_reverse = abeles.R(self.wvls)
+			T_back = abeles.T(self.wvls)
+			R_back = abeles.R(self.wvls)
+			T_front.calculate_T(r_and_t_front, N_front_medium, N_substrate, sin2_theta_0, polarization)
+			T_front_reverse.calculate_T(r_and_t_front_reverse, N_substrate, N_front_medium, sin2_theta_0, polarization)
+			R_front_reverse.calculate_R(r_and_t_front_reverse, polarization)
+			T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, sin2_theta_0, polarization)
+			R_back.calculate_R(r_and_t_back, polarization)
+			
+			dR_front_reverse = abeles.dR(self.wvls)
+			dT_front_reverse = abeles.dT(self.wvls)
+			dR = abeles.dR(self.wvls)
+			dT = abeles.dT(self.wvls)
+		
+		else:
+			dPsi_and_Delta = abeles.dPsi_and_Delta(self.wvls)
+			dR = dR_front
+			dT = dT_front
+			
+			# When Delta is folded between 0 and 180 degres (see
+			# calculate_ellipsometry), its derivative changes sign where it
+			# is folded.
+			Delta_signs = [1.0]*nb_wvls
+			if self.ellipsometer_type == RAE or self.ellipsometer_type == RPE:
+				Psi_and_Delta = abeles.Psi_and_Delta(self.wvls)
+				Psi_and_Delta.calculate_Psi_and_Delta(r_and_t_front)
+				Delta = Psi_and_Delta.get_Delta()
+				for i_wvl in range(nb_wvls):
+					if Delta[i_wvl] < self.Delta_min:
+						Delta_i = Delta[i_wvl] + 360.0
+					elif Delta[i_wvl] > (self.Delta_min + 360.0):
+						Delta_i = Delta[i_wvl] - 360.0
+					else:
+						Delta_i = Delta[i_wvl]
+					if Delta_i < 0.0 or Delta_i > 180.0:
+						Delta_signs[i_wvl] = -1.0
+		
+		calculate_phases = polarization == S or polarization == P
+		if calculate_phases:
+			dphi_r = abeles.dphase(self.wvls)
+			dphi_t = abeles.dphase(self.wvls)
+		
+		derivatives = []
+		for contributions in dr_and_dt:
+			derivative = [[0.0]*nb_wvls for i in range(7)]
+			if self.consider_backside:
+				derivative[3] = derivative[4] = None
+			if not calculate_phases:
+				derivative[5] = derivative[6] = None
+			
+			for dM, dr_and_dt_front, dr_and_dt_front_reverse in contributions:
+				dR_front.calculate_dR(dr_and_dt_front, r_and_t_front, polarization)
+				dT_front.calculate_dT(dr_and_dt_front, r_and_t_front, N_front_medium, N_substrate, sin2_theta_0, polarization)
+				if self.consider_backside:
+					dR_front_reverse.calculate_dR(dr_and_dt_front_reverse, r_and_t_front_reverse, polarization)
+					dT_front_reverse.calculate_dT(dr_and_dt_front_reverse, r_and_t_front_reverse, N_substrate, N_front_medium, sin2_theta_0, polarization)
+					dR.calculate_dR_with_backside(T_front, dT_front, dR_front, T_front_reverse, dT_front_reverse, R_front_reverse, dR_front_reverse, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
+					dT.calculate_dT_with_backside(T_front, dT_front, R_front_reverse, dR_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
+				dA.calculate_dA(dR, dT)
+				
+				for i_wvl in range(nb_wvls):
+					derivative[0][i_wvl] += dR[i_wvl]
+					derivative[1][i_wvl] += dT[i_wvl]
+					derivative[2][i_wvl] += dA[i_wvl]
+				
+				if not self.consider_backside:
+					dPsi_and_Delta.calculate_dPsi_and_Delta(r_and_t_front, dr_and_dt_front)
+					for i_wvl in range(nb_wvls):
+						dPsi, dDelta = dPsi_and_Delta[i_wvl]
+						derivative[3][i_wvl] += dPsi
+						derivative[4][i_wvl] += Delta_signs[i_wvl]*dDelta
+				
+				if calculate_phases:
+					dphi_r.calculate_dr_phase(M, dM, N_front_medium, N_substrate, sin2_theta_0, polarization)
+					dphi_t.calculate_dt_phase(M, dM, N_front_medium, N_substrate, sin2_theta_0, polarization)
+					for i_wvl in range(nb_wvls):
+						derivative[5][i_wvl] += dphi_r[i_wvl]*one_hundred_eighty_over_pi
+						derivative[6][i_wvl] += dphi_t[i_wvl]*one_hundred_eighty_over_pi
+			
+			derivatives.append(derivative)
+		
+		return derivatives
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_cone_nodes                                                     #
+	#                                                                    #
+	######################################################################
+	def get_cone_nodes(self, angle, polarization):
+		"""Get the angles over which to average the spectra in a cone
+		
+		This method takes 2 arguments:
+		  angle              the angle of incidence of the axis of the cone
+		                     (in degres);
+		  polarization       the polarization of the light;
+		and returns a list of the angles of incidence, the polarizations
+		and the weights of the rays of the cone.
+		
+		The polar angle (the cosine of) and the azimuth of the rays around
+		the axis are sampled with Gauss-Legendre quadratures of
+		config.CONE_NB_POLAR_ANGLES and config.CONE_NB_AZIMUTHS points. The
+		rays symmetric with regard to the plane of incidence have the same
+		angle of incidence and are combined. The polarization of every ray
+		is the one of the light on the axis projected on the plane
+		perpendicular to the ray and expressed in the local plane of
+		incidence. Rays with the same angle of incidence and polarization
+		are combined, as is the case of all the rays around the normal
+		for unpolarized light. When the light is collimated, the only ray
+		is the axis.
+		
+		Since UNPOLARIZED is 45 degres, light linearly polarized at 45
+		degres cannot be told apart from unpolarized light and, in a cone,
+		is averaged as unpolarized light. Outside of the plane of
+		incidence, the two differ: the linear polarization gives rays a
+		share of s polarization other than one half."""
+		
+		if not self.cone_half_angle:
+			return [(angle, polarization, 1.0)]
+		
+		if angle + self.cone_half_angle >= 90.0:
+			raise filter_error("The cone of light must not reach 90 degres")
+		
+		theta_0 = angle/one_hundred_eighty_over_pi
+		sin_theta_0 = math.sin(theta_0)
+		cos_theta_0 = math.cos(theta_0)
+		
+		# Ray directions are uniformly distributed over the solid angle,
+		# that is uniformly in cos(alpha) and in the azimuth.
+		cos_alphas, polar_weights = integration.Gauss_Legendre(config.CONE_NB_POLAR_ANGLES, math.cos(self.cone_half_angle/one_hundred_eighty_over_pi), 1.0)
+		phis, azimuth_weights = integration.Gauss_Legendre(config.CONE_NB_AZIMUTHS, 0.0, math.pi)
+		normalization = 1.0/(sum(polar_weights)*sum(azimuth_weights))
+		
+		# The direction of the axis of the cone and the directions of the
+		# p and s polarizations on the axis, the z axis being normal to
+		# the filter.
+		k_0 = (sin_theta_0, 0.0, cos_theta_0)
+		p_0 = (cos_theta_0, 0.0, -sin_theta_0)
+		s_0 = (0.0, 1.0, 0.0)
+		
+		if polarization != UNPOLARIZED:
+			sin_psi = math.sin(polarization/one_hundred_eighty_over_pi)
+			cos_psi = math.cos(polarization/one_hundred_eighty_over_pi)
+			E_0 = [sin_psi*s_0[i]+cos_psi*p_0[i] for i in range(3)]
+		
+		nodes = collections.OrderedDict()
+		
+		for cos_alpha, polar_weight in zip(cos_alphas, polar_weights):
+			sin_alpha = math.sqrt(1.0-cos_alpha*cos_alpha)
+			
+			for phi, azimuth_weight in zip(phis, azimuth_weights):
+				weight = polar_weight*azimuth_weight*normalization
+				
+				cos_theta = min(max(cos_alpha*cos_theta_0-sin_alpha*math.cos(phi)*sin_theta_0, -1.0), 1.0)
+				angle_ = math.acos(cos_theta)*one_hundred_eighty_over_pi
+				
+				if polarization == UNPOLARIZED:
+					polarization_ = UNPOLARIZED
+				
+				else:
+					# Average the fraction of the power in s polarization of the
+					# ray and of its symmetric.
+					fraction_s = 0.0
+					for sin_phi in (math.sin(phi), -math.sin(phi)):
+						k = [cos_alpha*k_0[i]+sin_alpha*(math.cos(phi)*p_0[i]+sin_phi*s_0[i]) for i in range(3)]
+						E = [E_0[i]-sum(E_0[j]*k[j] for j in range(3))*k[i] for i in range(3)]
+						norm_s = math.sqrt(k[0]*k[0]+k[1]*k[1])
+						norm_E_2 = sum(E[i]*E[i] for i in range(3))
+						if norm_s < 1.0e-12:
+							fraction_s += 0.5*sin_psi*sin_psi
+						else:
+							fraction_s += 0.5*(-k[1]*E[0]+k[0]*E[1])**2/(norm_s*norm_s*norm_E_2)
+					polarization_ = math.asin(math.sqrt(min(fraction_s, 1.0)))*one_hundred_eighty_over_pi
+				
+				nodes[(angle_, polarization_)] = nodes.get((angle_, polarization_), 0.0) + weight
+		
+		return [(angle_, polarization_, weight) for (angle_, polarization_), weight in nodes.items()]
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_bandwidth_nodes                                                #
+	#                                                                    #
+	######################################################################
+	def get_bandwidth_nodes(self):
+		"""Get the wavelengths over which to average the spectra
+		
+		This method returns a list of the wavelengths shifted within the
+		bandwidth, of the lists of the indices at those wavelengths and of
+		the weights of the shifts.
+		
+		Each half of the triangular slit function is sampled with a
+		Gauss-Legendre quadrature of config.BANDWIDTH_NB_WAVELENGTHS
+		points. The shifted wavelengths are kept, with the indices, until
+		the wavelengths, the materials or the bandwidth change; the
+		analysis of the filter at those wavelengths is therefore kept in
+		the same way as at the wavelengths of the filter."""
+		
+		if not self.bandwidth_nodes:
+			nb_wvls = len(self.wvls)
+			
+			shifts, weights = integration.Gauss_Legendre(config.BANDWIDTH_NB_WAVELENGTHS, 0.0, self.bandwidth)
+			
+			for sign in (-1.0, 1.0):
+				for shift, weight in zip(shifts, weights):
+					wvls_ = abeles.wvls(nb_wvls)
+					for i_wvl in range(nb_wvls):
+						wvls_.set_wvl(i_wvl, self.wvls[i_wvl]+sign*shift)
+					
+					# The slit function decreases linearly to 0 at the bandwidth.
+					slit_weight = weight*(self.bandwidth-shift)/(self.bandwidth*self.bandwidth)
+					
+					self.bandwidth_nodes.append((wvls_, [None]*len(self.materials), slit_weight))
+		
+		return self.bandwidth_nodes
+	
+	
+	######################################################################
+	#                                                                    #
+	# average_spectrum                                                   #
+	#                                                                    #
+	######################################################################
+	def average_spectrum(self, calculate, spectrum_class, angle, polarization):
+		"""Average a spectrum over the cone of light and the bandwidth
+		
+		This method takes 4 arguments:
+		  calculate          the method calculating the spectrum for
+		                     collimated and monochromatic light at the
+		                     wavelengths of the filter;
+		  spectrum_class     the class of the spectrum;
+		  angle              the angle of incidence (in degres);
+		  polarization       the polarization of the light;
+		and returns the averaged spectrum.
+		
+		The spectrum is calculated for every angle of the cone at every
+		shift of the wavelengths within the bandwidth. The indices and
+		the analysis of the filter at every angle and every shift are
+		kept and shared by all the properties."""
+		
+		cone_nodes = self.get_cone_nodes(angle, polarization)
+		
+		if self.bandwidth:
+			bandwidth_nodes = self.get_bandwidth_nodes()
+		else:
+			bandwidth_nodes = [(self.wvls, self.N, 1.0)]
+		
+		average = spectrum_class(self.wvls)
+		
+		nb_spectra = len(cone_nodes)*len(bandwidth_nodes)
+		nb_done = 0
+		
+		# The spectra at the shifted wavelengths are calculated as if those
+		# were the wavelengths of the filter.
+		wvls = self.wvls
+		N = self.N
+		
+		try:
+			for wvls_, N_, spectral_weight in bandwidth_nodes:
+				self.wvls = wvls_
+				self.N = N_
+				
+				for angle_, polarization_, angular_weight in cone_nodes:
+					spectrum = calculate(angle_, polarization_)
+					
+					if spectrum is None: return
+					
+					average.add_weighted_spectrum(spectrum, spectral_weight*angular_weight)
+					
+					nb_done += 1
+					self.progress = nb_done/nb_spectra
+		
+		finally:
+			self.wvls = wvls
+			self.N = N
+		
+		return average
+	
+	
+	######################################################################
+	#                                                                    #
+	# transmission                                                       #
+	#                                                                    #
+	######################################################################
+	def transmission(self, angle = 0.0, polarization = UNPOLARIZED):
+		"""Calculate the transmission of the filter
+		
+		The function takes 2 optional arguments:
+		  angle              (optional) the angle of incidence (in degres),
+		                     the default value is 0;
+		  polarization       (optional) the polarization of the light, it
+		                     can take a numerical value between 0 and 90 or
+		                     the values S, P, or UNPOLARIZED, the default
+		                     value is UNPOLARIZED;
+		and returns the transmission of the filter.
+		
+		When a cone of light or a bandwidth is set, the transmission is
+		averaged over them (see average_spectrum)."""
 		
 		self.stop_ = False
 		
+		if self.cone_half_angle or self.bandwidth:
+			return self.average_spectrum(self.calculate_transmission, abeles.T, angle, polarization)
+		
+		return self.calculate_transmission(angle, polarization)
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_transmission                                             #
+	#                                                                    #
+	######################################################################
+	def calculate_transmission(self, angle, polarization):
+		"""Calculate the transmission of the filter for collimated and
+		monochromatic light
+		
+		This method takes 2 arguments:
+		  angle              the angle of incidence (in degres);
+		  polarization       the polarization of the light;
+		and returns the transmission of the filter at the wavelengths of
+		the filter."""
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3461,14 +4675,13 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
-		r_and_t_front = abeles.r_and_t(self.wvls)
+		r_and_t_front, r_and_t_front_reverse, r_and_t_back = self.get_r_and_t(i_angle, N_substrate, N_front_medium, N_back_medium)
+		
 		T_front = abeles.T(self.wvls)
 		
 		if self.consider_backside:
-			r_and_t_front_reverse = abeles.r_and_t(self.wvls)
 			R_front_reverse = abeles.R(self.wvls)
 			
-			r_and_t_back = abeles.r_and_t(self.wvls)
 			T_back = abeles.T(self.wvls)
 			R_back = abeles.R(self.wvls)
 			
@@ -3481,7 +4694,6 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
-		r_and_t_front.calculate_r_and_t(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
 		T_front.calculate_T(r_and_t_front, N_front_medium, N_substrate, self.sin2_theta_0[i_angle], polarization)
 		
 		# Give other threads a chance...
@@ -3490,16 +4702,15 @@ class optical_filter(object):
 		if self.stop_: return
 		
 		if self.consider_backside:
-			r_and_t_front_reverse.calculate_r_and_t_reverse(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
 			R_front_reverse.calculate_R(r_and_t_front_reverse, polarization)
 			
-			# Since the matrices were calculated starting at the substrate, we
-			# have to calculate the reverse r and t.
-			r_and_t_back.calculate_r_and_t_reverse(self.matrices_back[i_angle], N_back_medium, N_substrate, self.sin2_theta_0[i_angle])
 			T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, self.sin2_theta_0[i_angle], polarization)
 			R_back.calculate_R(r_and_t_back, polarization)
 			
-			T_total.calculate_T_with_backside(T_front, R_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
+			if self.coherence_length:
+				T_total.calculate_T_with_partial_coherence(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_front_medium, N_substrate, N_back_medium, self.substrate_thickness, self.sin2_theta_0[i_angle], polarization, self.coherence_length)
+			else:
+				T_total.calculate_T_with_backside(T_front, R_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
 		
 		return T_total
 	
@@ -3519,10 +4730,34 @@ class optical_filter(object):
 		                     can take a numerical value between 0 and 90 or
 		                     the values S, P, or UNPOLARIZED, the default
 		                     value is UNPOLARIZED;
-		and returns the transmission of the filter in reverse direction."""
+		and returns the transmission of the filter in reverse direction.
+		
+		When a cone of light or a bandwidth is set, the transmission is
+		averaged over them (see average_spectrum)."""
 		
 		self.stop_ = False
 		
+		if self.cone_half_angle or self.bandwidth:
+			return self.average_spectrum(self.calculate_transmission_reverse, abeles.T, angle, polarization)
+		
+		return self.calculate_transmission_reverse(angle, polarization)
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_transmission_reverse                                     #
+	#                                                                    #
+	######################################################################
+	def calculate_transmission_reverse(self, angle, polarization):
+		"""Calculate the transmission of the filter in reverse direction for
+		collimated and monochromatic light
+		
+		This method takes 2 arguments:
+		  angle              the angle of incidence (in degres);
+		  polarization       the polarization of the light;
+		and returns the transmission of the filter in reverse direction at the
+		wavelengths of the filter."""
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3584,7 +4819,10 @@ class optical_filter(object):
 			r_and_t_back.calculate_r_and_t_reverse(self.matrices_back[i_angle], N_back_medium, N_substrate, self.sin2_theta_0[i_angle])
 			R_back.calculate_R(r_and_t_back, polarization)
 			
-			T_total_reverse.calculate_T_with_backside(T_back_reverse, R_back, T_front_reverse, R_front_reverse, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
+			if self.coherence_length:
+				T_total_reverse.calculate_T_with_partial_coherence(r_and_t_back_reverse, r_and_t_back, r_and_t_front_reverse, N_back_medium, N_substrate, N_front_medium, self.substrate_thickness, self.sin2_theta_0[i_angle], polarization, self.coherence_length)
+			else:
+				T_total_reverse.calculate_T_with_backside(T_back_reverse, R_back, T_front_reverse, R_front_reverse, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
 		
 		return T_total_reverse
 	
@@ -3604,10 +4842,34 @@ class optical_filter(object):
 		                     can take a numerical value between 0 and 90 or
 		                     the values S, P, or UNPOLARIZED, the default
 		                     value is UNPOLARIZED;
-		and returns the reflection of the filter."""
+		and returns the reflection of the filter.
+		
+		When a cone of light or a bandwidth is set, the reflection is
+		averaged over them (see average_spectrum)."""
 		
 		self.stop_ = False
 		
+		if self.cone_half_angle or self.bandwidth:
+			return self.average_spectrum(self.calculate_reflection, abeles.R, angle, polarization)
+		
+		return self.calculate_reflection(angle, polarization)
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_reflection                                               #
+	#                                                                    #
+	######################################################################
+	def calculate_reflection(self, angle, polarization):
+		"""Calculate the reflection of the filter for collimated and
+		monochromatic light
+		
+		This method takes 2 arguments:
+		  angle              the angle of incidence (in degres);
+		  polarization       the polarization of the light;
+		and returns the reflection of the filter at the wavelengths of
+		the filter."""
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3626,16 +4888,15 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
-		r_and_t_front = abeles.r_and_t(self.wvls)
+		r_and_t_front, r_and_t_front_reverse, r_and_t_back = self.get_r_and_t(i_angle, N_substrate, N_front_medium, N_back_medium)
+		
 		R_front = abeles.R(self.wvls)
 		if self.consider_backside:
 			T_front = abeles.T(self.wvls)
 			
-			r_and_t_front_reverse = abeles.r_and_t(self.wvls)
 			T_front_reverse = abeles.T(self.wvls)
 			R_front_reverse = abeles.R(self.wvls)
 			
-			r_and_t_back = abeles.r_and_t(self.wvls)
 			R_back = abeles.R(self.wvls)
 			
 			R_total = abeles.R(self.wvls)
@@ -3648,21 +4909,19 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
-		r_and_t_front.calculate_r_and_t(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
 		R_front.calculate_R(r_and_t_front, polarization)
 		if self.consider_backside:
 			T_front.calculate_T(r_and_t_front, N_front_medium, N_substrate, self.sin2_theta_0[i_angle], polarization)
 			
-			r_and_t_front_reverse.calculate_r_and_t_reverse(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
 			T_front_reverse.calculate_T(r_and_t_front_reverse, N_substrate, N_front_medium, self.sin2_theta_0[i_angle], polarization)
 			R_front_reverse.calculate_R(r_and_t_front_reverse, polarization)
 			
-			# Since the matrices was calculated starting at the substrate, we
-			# have to calculate the reverse r and t.
-			r_and_t_back.calculate_r_and_t_reverse(self.matrices_back[i_angle], N_back_medium, N_substrate, self.sin2_theta_0[i_angle])
 			R_back.calculate_R(r_and_t_back, polarization)
 			
-			R_total.calculate_R_with_backside(T_front, R_front, T_front_reverse, R_front_reverse, R_back, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
+			if self.coherence_length:
+				R_total.calculate_R_with_partial_coherence(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle], polarization, self.coherence_length)
+			else:
+				R_total.calculate_R_with_backside(T_front, R_front, T_front_reverse, R_front_reverse, R_back, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
 		
 		return R_total
 	
@@ -3682,10 +4941,34 @@ class optical_filter(object):
 		                     can take a numerical value between 0 and 90 or
 		                     the values S, P, or UNPOLARIZED, the default
 		                     value is UNPOLARIZED;
-		and returns the reflection of the filter in reverse direction."""
+		and returns the reflection of the filter in reverse direction.
+		
+		When a cone of light or a bandwidth is set, the reflection is
+		averaged over them (see average_spectrum)."""
 		
 		self.stop_ = False
 		
+		if self.cone_half_angle or self.bandwidth:
+			return self.average_spectrum(self.calculate_reflection_reverse, abeles.R, angle, polarization)
+		
+		return self.calculate_reflection_reverse(angle, polarization)
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_reflection_reverse                                       #
+	#                                                                    #
+	######################################################################
+	def calculate_reflection_reverse(self, angle, polarization):
+		"""Calculate the reflection of the filter in reverse direction for
+		collimated and monochromatic light
+		
+		This method takes 2 arguments:
+		  angle              the angle of incidence (in degres);
+		  polarization       the polarization of the light;
+		and returns the reflection of the filter in reverse direction at the
+		wavelengths of the filter."""
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3743,7 +5026,10 @@ class optical_filter(object):
 			T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, self.sin2_theta_0[i_angle], polarization)
 			R_back.calculate_R(r_and_t_back, polarization)
 			
-			R_total_reverse.calculate_R_with_backside(T_back_reverse, R_back_reverse, T_back, R_back, R_front_reverse, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
+			if self.coherence_length:
+				R_total_reverse.calculate_R_with_partial_coherence(r_and_t_back_reverse, r_and_t_back, r_and_t_front_reverse, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle], polarization, self.coherence_length)
+			else:
+				R_total_reverse.calculate_R_with_backside(T_back_reverse, R_back_reverse, T_back, R_back, R_front_reverse, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle])
 		
 		return R_total_reverse
 	
@@ -3855,6 +5141,20 @@ class optical_filter(object):
 		
 		self.stop_ = False
 		
+		# When possible, the GD is calculated analytically from the
+		# derivatives of the matrices.
+		if config.ANALYTIC_GD_STEP:
+			analysis = self.analyse_omega_derivatives(angle)
+			
+			if analysis is None: return
+			
+			M, N_front_medium, N_substrate, sin2_theta_0 = analysis
+			
+			GD = abeles.GD(self.wvls)
+			GD.calculate_r_GD(M, N_front_medium, N_substrate, sin2_theta_0, polarization)
+			
+			return GD
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3901,6 +5201,20 @@ class optical_filter(object):
 		
 		self.stop_ = False
 		
+		# When possible, the GD is calculated analytically from the
+		# derivatives of the matrices.
+		if config.ANALYTIC_GD_STEP:
+			analysis = self.analyse_omega_derivatives(angle)
+			
+			if analysis is None: return
+			
+			M, N_front_medium, N_substrate, sin2_theta_0 = analysis
+			
+			GD = abeles.GD(self.wvls)
+			GD.calculate_t_GD(M, N_front_medium, N_substrate, sin2_theta_0, polarization)
+			
+			return GD
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3947,6 +5261,20 @@ class optical_filter(object):
 		
 		self.stop_ = False
 		
+		# When possible, the GDD is calculated analytically from the
+		# derivatives of the matrices.
+		if config.ANALYTIC_GD_STEP:
+			analysis = self.analyse_omega_derivatives(angle)
+			
+			if analysis is None: return
+			
+			M, N_front_medium, N_substrate, sin2_theta_0 = analysis
+			
+			GDD = abeles.GDD(self.wvls)
+			GDD.calculate_r_GDD(M, N_front_medium, N_substrate, sin2_theta_0, polarization)
+			
+			return GDD
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -3993,6 +5321,20 @@ class optical_filter(object):
 		
 		self.stop_ = False
 		
+		# When possible, the GDD is calculated analytically from the
+		# derivatives of the matrices.
+		if config.ANALYTIC_GD_STEP:
+			analysis = self.analyse_omega_derivatives(angle)
+			
+			if analysis is None: return
+			
+			M, N_front_medium, N_substrate, sin2_theta_0 = analysis
+			
+			GDD = abeles.GDD(self.wvls)
+			GDD.calculate_t_GDD(M, N_front_medium, N_substrate, sin2_theta_0, polarization)
+			
+			return GDD
+		
 		self.prepare_indices()
 		
 		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
@@ -4018,8 +5360,8 @@ class optical_filter(object):
 		GDD.calculate_GDD(phase)
 		
 		return GDD
-
-
+	
+	
 	######################################################################
 	#                                                                    #
 	# absorption                                                         #
@@ -4063,8 +5405,8 @@ class optical_filter(object):
 		A.calculate_A(R, T)
 		
 		return A
-
-
+	
+	
 	######################################################################
 	#                                                                    #
 	# absorption_reverse                                                 #
@@ -4143,30 +5485,78 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
-		r_and_t_front = abeles.r_and_t(self.wvls)
-		if self.consider_backside:
-			r_and_t_front_reverse = abeles.r_and_t(self.wvls)
-			r_and_t_back = abeles.r_and_t(self.wvls)
+		return self.calculate_ellipsometry(i_angle, N_substrate, N_front_medium, N_back_medium)
+	
+	
+	######################################################################
+	#                                                                    #
+	# variable_angle_ellipsometry                                        #
+	#                                                                    #
+	######################################################################
+	def variable_angle_ellipsometry(self, angles):
+		"""Calculate Psi and Delta of the filter at multiple angles
 		
-		Psi_and_Delta = abeles.Psi_and_Delta(self.wvls)
+		The function takes a single argument:
+		  angles             a list of the angles of incidence (in degres);
+		and returns 2 lists, by angle:
+		  Psi                Psi of the filter;
+		  Delta              Delta of the filter.
 		
-		# Give other threads a chance...
-		time.sleep(0)
+		The indices are prepared once for all the angles. Like for
+		ellipsometry, the r and t are kept with the analysis at every
+		angle and reused by the other properties."""
 		
-		if self.stop_: return
+		self.stop_ = False
 		
-		r_and_t_front.calculate_r_and_t(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
-		if self.consider_backside:
-			r_and_t_front_reverse.calculate_r_and_t_reverse(self.matrices_front[i_angle], N_front_medium, N_substrate, self.sin2_theta_0[i_angle])
+		self.prepare_indices()
+		
+		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices()
+		
+		nb_angles = len(angles)
+		
+		Psi = [None]*nb_angles
+		Delta = [None]*nb_angles
+		
+		for i_angle in range(nb_angles):
 			
-			# Since the matrices was calculated starting at the substrate, we
-			# have to calculate the reverse r and t.
-			r_and_t_back.calculate_r_and_t_reverse(self.matrices_back[i_angle], N_back_medium, N_substrate, self.sin2_theta_0[i_angle])
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return
+			
+			key = self.analyse(angles[i_angle], N_front_medium)
+			
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return
+			
+			Psi[i_angle], Delta[i_angle] = self.calculate_ellipsometry(key, N_substrate, N_front_medium, N_back_medium)
+			
+			self.progress = (i_angle+1)/nb_angles
 		
-		# Give other threads a chance...
-		time.sleep(0)
+		return Psi, Delta
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_ellipsometry                                             #
+	#                                                                    #
+	######################################################################
+	def calculate_ellipsometry(self, i_angle, N_substrate, N_front_medium, N_back_medium):
+		"""Calculate Psi and Delta of the filter from an analysis
 		
-		if self.stop_: return
+		This method takes 4 arguments:
+		  i_angle            the key of the analysis, as returned by
+		                     analyse;
+		  N_substrate        the index of the substrate;
+		  N_front_medium     the index of the front medium;
+		  N_back_medium      the index of the back medium;
+		and returns Psi and Delta of the filter."""
+		
+		r_and_t_front, r_and_t_front_reverse, r_and_t_back = self.get_r_and_t(i_angle, N_substrate, N_front_medium, N_back_medium)
+		
+		Psi_and_Delta = abeles.Psi_and_Delta(self.wvls)
 		
 		if self.consider_backside:
 			Psi_and_Delta.calculate_Psi_and_Delta_with_backside(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_substrate, self.substrate_thickness, self.sin2_theta_0[i_angle]);
@@ -4402,6 +5792,10 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
+		# Identical sublayers of graded-index layers share the same
+		# matrices.
+		sublayer_cache = graded.sublayer_matrices_cache(wvls_, sin2_theta_0)
+		
 		# Calculate and multiply the matrices of the front side.
 		global_matrices_front = abeles.matrices(wvls_)
 		global_matrices_front.set_matrices_unity()
@@ -4409,9 +5803,10 @@ class optical_filter(object):
 		for i_layer in range(len(self.front_layers)):
 			if self.is_graded(i_layer, FRONT):
 				for i_sublayer in range(len(self.front_step_profiles[i_layer])):
-					n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(self.front_step_profiles[i_layer][i_sublayer])
-					temp_matrices.set_matrices(n_sublayer, self.front_thickness[i_layer][i_sublayer], sin2_theta_0)
-					global_matrices_front.multiply_matrices(temp_matrices)
+					step = self.front_step_profiles[i_layer][i_sublayer]
+					n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(step)
+					sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.front_layers[i_layer], step), self.front_thickness[i_layer][i_sublayer])
+					global_matrices_front.multiply_matrices(sublayer_matrices)
 					
 					done_layers += 1
 					
@@ -4447,9 +5842,10 @@ class optical_filter(object):
 			for i_layer in range(len(self.back_layers)):
 				if self.is_graded(i_layer, BACK):
 					for i_sublayer in range(len(self.back_step_profiles[i_layer])):
-						n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(self.back_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.back_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_back.multiply_matrices(temp_matrices)
+						step = self.back_step_profiles[i_layer][i_sublayer]
+						n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(step)
+						sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.back_layers[i_layer], step), self.back_thickness[i_layer][i_sublayer])
+						global_matrices_back.multiply_matrices(sublayer_matrices)
 						
 						done_layers += 1
 						
@@ -4522,8 +5918,12 @@ class optical_filter(object):
 			T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, sin2_theta_0, polarization)
 			R_back.calculate_R(r_and_t_back, polarization)
 			
-			R_total.calculate_R_with_backside(T_front, R_front, T_front_reverse, R_front_reverse, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
-			T_total.calculate_T_with_backside(T_front, R_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
+			if self.coherence_length:
+				R_total.calculate_R_with_partial_coherence(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_substrate, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+				T_total.calculate_T_with_partial_coherence(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_front_medium, N_substrate, N_back_medium, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+			else:
+				R_total.calculate_R_with_backside(T_front, R_front, T_front_reverse, R_front_reverse, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
+				T_total.calculate_T_with_backside(T_front, R_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
 		
 		# Give other threads a chance...
 		time.sleep(0)
@@ -4648,6 +6048,10 @@ class optical_filter(object):
 		
 		if self.stop_: return
 		
+		# Identical sublayers of graded-index layers share the same
+		# matrices.
+		sublayer_cache = graded.sublayer_matrices_cache(wvls_, sin2_theta_0)
+		
 		# Calculate and multiply the matrices of the front side.
 		global_matrices_front = abeles.matrices(wvls_)
 		global_matrices_front.set_matrices_unity()
@@ -4655,9 +6059,10 @@ class optical_filter(object):
 		for i_layer in range(len(self.front_layers)):
 			if self.is_graded(i_layer, FRONT):
 				for i_sublayer in range(len(self.front_step_profiles[i_layer])):
-					n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(self.front_step_profiles[i_layer][i_sublayer])
-					temp_matrices.set_matrices(n_sublayer, self.front_thickness[i_layer][i_sublayer], sin2_theta_0)
-					global_matrices_front.multiply_matrices(temp_matrices)
+					step = self.front_step_profiles[i_layer][i_sublayer]
+					n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(step)
+					sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.front_layers[i_layer], step), self.front_thickness[i_layer][i_sublayer])
+					global_matrices_front.multiply_matrices(sublayer_matrices)
 					
 					done_layers += 1
 					
@@ -4693,9 +6098,10 @@ class optical_filter(object):
 			for i_layer in range(len(self.back_layers)):
 				if self.is_graded(i_layer, BACK):
 					for i_sublayer in range(len(self.back_step_profiles[i_layer])):
-						n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(self.back_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.back_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_back.multiply_matrices(temp_matrices)
+						step = self.back_step_profiles[i_layer][i_sublayer]
+						n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(step)
+						sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.back_layers[i_layer], step), self.back_thickness[i_layer][i_sublayer])
+						global_matrices_back.multiply_matrices(sublayer_matrices)
 						
 						done_layers += 1
 						
@@ -4768,8 +6174,12 @@ class optical_filter(object):
 			T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, sin2_theta_0, polarization)
 			R_back.calculate_R(r_and_t_back, polarization)
 			
-			R_total_reverse.calculate_R_with_backside(T_back_reverse, R_back_reverse, T_back, R_back, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
-			T_total_reverse.calculate_T_with_backside(T_back_reverse, R_back, T_front_reverse, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
+			if self.coherence_length:
+				R_total_reverse.calculate_R_with_partial_coherence(r_and_t_back_reverse, r_and_t_back, r_and_t_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+				T_total_reverse.calculate_T_with_partial_coherence(r_and_t_back_reverse, r_and_t_back, r_and_t_front_reverse, N_back_medium, N_substrate, N_front_medium, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+			else:
+				R_total_reverse.calculate_R_with_backside(T_back_reverse, R_back_reverse, T_back, R_back, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
+				T_total_reverse.calculate_T_with_backside(T_back_reverse, R_back, T_front_reverse, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
 		
 		# Give other threads a chance...
 		time.sleep(0)
@@ -4907,14 +6317,19 @@ class optical_filter(object):
 			
 			if self.stop_: return
 			
+			# Identical sublayers of graded-index layers share the same
+			# matrices.
+			sublayer_cache = graded.sublayer_matrices_cache(wvls_, sin2_theta_0)
+			
 			# Calculate and multiply the matrices of the front side.
 			global_matrices_front.set_matrices_unity()
 			for i_layer in range(len(self.front_layers)):
 				if self.is_graded(i_layer, FRONT):
 					for i_sublayer in range(len(self.front_step_profiles[i_layer])):
-						n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(self.front_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.front_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_front.multiply_matrices(temp_matrices)
+						step = self.front_step_profiles[i_layer][i_sublayer]
+						n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(step)
+						sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.front_layers[i_layer], step), self.front_thickness[i_layer][i_sublayer])
+						global_matrices_front.multiply_matrices(sublayer_matrices)
 						
 						# Give other threads a chance...
 						time.sleep(0)
@@ -4941,9 +6356,10 @@ class optical_filter(object):
 				for i_layer in range(len(self.back_layers)):
 					if self.is_graded(i_layer, BACK):
 						for i_sublayer in range(len(self.back_step_profiles[i_layer])):
-							n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(self.back_step_profiles[i_layer][i_sublayer])
-							temp_matrices.set_matrices(n_sublayer, self.back_thickness[i_layer][i_sublayer], sin2_theta_0)
-							global_matrices_back.multiply_matrices(temp_matrices)
+							step = self.back_step_profiles[i_layer][i_sublayer]
+							n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(step)
+							sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.back_layers[i_layer], step), self.back_thickness[i_layer][i_sublayer])
+							global_matrices_back.multiply_matrices(sublayer_matrices)
 							
 							# Give other threads a chance...
 							time.sleep(0)
@@ -4983,8 +6399,12 @@ class optical_filter(object):
 				T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, sin2_theta_0, polarization)
 				R_back.calculate_R(r_and_t_back, polarization)
 				
-				R_total.calculate_R_with_backside(T_front, R_front, T_front_reverse, R_front_reverse, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
-				T_total.calculate_T_with_backside(T_front, R_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
+				if self.coherence_length:
+					R_total.calculate_R_with_partial_coherence(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_substrate, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+					T_total.calculate_T_with_partial_coherence(r_and_t_front, r_and_t_front_reverse, r_and_t_back, N_front_medium, N_substrate, N_back_medium, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+				else:
+					R_total.calculate_R_with_backside(T_front, R_front, T_front_reverse, R_front_reverse, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
+					T_total.calculate_T_with_backside(T_front, R_front_reverse, T_back, R_back, N_substrate, self.substrate_thickness, sin2_theta_0)
 			
 			# Give other threads a chance...
 			time.sleep(0)
@@ -5128,14 +6548,19 @@ class optical_filter(object):
 			
 			if self.stop_: return
 			
+			# Identical sublayers of graded-index layers share the same
+			# matrices.
+			sublayer_cache = graded.sublayer_matrices_cache(wvls_, sin2_theta_0)
+			
 			# Calculate and multiply the matrices of the front side.
 			global_matrices_front.set_matrices_unity()
 			for i_layer in range(len(self.front_layers)):
 				if self.is_graded(i_layer, FRONT):
 					for i_sublayer in range(len(self.front_step_profiles[i_layer])):
-						n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(self.front_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.front_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_front.multiply_matrices(temp_matrices)
+						step = self.front_step_profiles[i_layer][i_sublayer]
+						n_sublayer = n[self.front_layers[i_layer]].get_N_mixture_graded(step)
+						sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.front_layers[i_layer], step), self.front_thickness[i_layer][i_sublayer])
+						global_matrices_front.multiply_matrices(sublayer_matrices)
 						
 						# Give other threads a chance...
 						time.sleep(0)
@@ -5162,9 +6587,10 @@ class optical_filter(object):
 				for i_layer in range(len(self.back_layers)):
 					if self.is_graded(i_layer, BACK):
 						for i_sublayer in range(len(self.back_step_profiles[i_layer])):
-							n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(self.back_step_profiles[i_layer][i_sublayer])
-							temp_matrices.set_matrices(n_sublayer, self.back_thickness[i_layer][i_sublayer], sin2_theta_0)
-							global_matrices_back.multiply_matrices(temp_matrices)
+							step = self.back_step_profiles[i_layer][i_sublayer]
+							n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(step)
+							sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.back_layers[i_layer], step), self.back_thickness[i_layer][i_sublayer])
+							global_matrices_back.multiply_matrices(sublayer_matrices)
 							
 							# Give other threads a chance...
 							time.sleep(0)
@@ -5204,8 +6630,12 @@ class optical_filter(object):
 				T_back.calculate_T(r_and_t_back, N_substrate, N_back_medium, sin2_theta_0, polarization)
 				R_back.calculate_R(r_and_t_back, polarization)
 				
-				R_total_reverse.calculate_R_with_backside(T_back_reverse, R_back_reverse, T_back, R_back, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
-				T_total_reverse.calculate_T_with_backside(T_back_reverse, R_back, T_front_reverse, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
+				if self.coherence_length:
+					R_total_reverse.calculate_R_with_partial_coherence(r_and_t_back_reverse, r_and_t_back, r_and_t_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+					T_total_reverse.calculate_T_with_partial_coherence(r_and_t_back_reverse, r_and_t_back, r_and_t_front_reverse, N_back_medium, N_substrate, N_front_medium, self.substrate_thickness, sin2_theta_0, polarization, self.coherence_length)
+				else:
+					R_total_reverse.calculate_R_with_backside(T_back_reverse, R_back_reverse, T_back, R_back, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
+					T_total_reverse.calculate_T_with_backside(T_back_reverse, R_back, T_front_reverse, R_front_reverse, N_substrate, self.substrate_thickness, sin2_theta_0)
 			
 			# Give other threads a chance...
 			time.sleep(0)
@@ -5241,10 +6671,11 @@ class optical_filter(object):
 		
 		self.monitoring_wvls = []
 		self.monitoring_n = []
-		self.monitoring_sin2_theta_0 = []
-		self.monitoring_thicknesses = []
-		self.monitoring_matrices_front = []
-		self.monitoring_matrices_back = []
+		self.monitoring_sin2_theta_0 = {}
+		self.monitoring_thicknesses = {}
+		self.monitoring_matrices_front = {}
+		self.monitoring_matrices_back = {}
+		self.monitoring_references = {}
 	
 	
 	######################################################################
@@ -5294,21 +6725,24 @@ class optical_filter(object):
 		  angle              the angle of incidence;
 		  N                  the refractive index of the material in which
 		                     the angle is defined;
-		and returns a position indicating where to find the results	of the
+		and returns a key indicating where to find the results of the
 		calculations in class attributes. If the matrices have already been
 		calculated at this angle, the calculation are not repeated and the
-		method simply returns the position."""
+		method simply returns the key."""
+		
+		# The conditions are identified as in analyse.
+		key = (angle, id(N), id(wvls))
+		
+		# If the analysis is already done for these conditions, simply
+		# return the key of the matrices.
+		if key in self.monitoring_references:
+			return key
 		
 		# The angle of the incident light is normalized to vaccuum to speed
 		# up the calculation.
 		sin2_theta_0 = abeles.sin2(wvls)
 		sin2_theta_0.set_sin2_theta_0(N, angle)
 		
-		# If the analysis is already done for these conditions, simply
-		# return the position of the matrices in the list.
-		if sin2_theta_0 in self.monitoring_sin2_theta_0:
-			return self.monitoring_sin2_theta_0.index(sin2_theta_0)
-		
 		n = self.monitoring_n[self.monitoring_wvls.index(wvls)]
 		
 		nb_front_layers = len(self.front_layers)
@@ -5402,6 +6836,10 @@ class optical_filter(object):
 		
 		if self.consider_backside_on_monitoring:
 			
+			# Identical sublayers of graded-index layers share the same
+			# matrices.
+			sublayer_cache = graded.sublayer_matrices_cache(wvls, sin2_theta_0)
+			
 			# Multiply the matrices of the back side.
 			global_matrices_back = abeles.matrices(wvls)
 			global_matrices_back.set_matrices_unity()
@@ -5409,9 +6847,10 @@ class optical_filter(object):
 			for i_layer in range(len(self.back_layers)):
 				if self.is_graded(i_layer, BACK):
 					for i_sublayer in range(len(self.back_step_profiles[i_layer])):
-						n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(self.back_step_profiles[i_layer][i_sublayer])
-						temp_matrices.set_matrices(n_sublayer, self.back_thickness[i_layer][i_sublayer], sin2_theta_0)
-						global_matrices_back.multiply_matrices(temp_matrices)
+						step = self.back_step_profiles[i_layer][i_sublayer]
+						n_sublayer = n[self.back_layers[i_layer]].get_N_mixture_graded(step)
+						sublayer_matrices = sublayer_cache.get_matrices(n_sublayer, (self.back_layers[i_layer], step), self.back_thickness[i_layer][i_sublayer])
+						global_matrices_back.multiply_matrices(sublayer_matrices)
 						
 						done_layers += 1
 						
@@ -5442,14 +6881,15 @@ class optical_filter(object):
 					self.progress = done_layers/total_nb_layers
 		
 		# Save the results in internal variables.
-		self.monitoring_sin2_theta_0.append(sin2_theta_0)
-		self.monitoring_thicknesses.append(thickness)
-		self.monitoring_matrices_front.append(matrices)
+		self.monitoring_sin2_theta_0[key] = sin2_theta_0
+		self.monitoring_thicknesses[key] = thickness
+		self.monitoring_matrices_front[key] = matrices
 		if self.consider_backside_on_monitoring:
-			self.monitoring_matrices_back.append(global_matrices_back)
+			self.monitoring_matrices_back[key] = global_matrices_back
+		self.monitoring_references[key] = (N, wvls)
 		
-		# Return the position of the matrices in the list.
-		return len(self.monitoring_sin2_theta_0)-1
+		# Return the key of the matrices.
+		return key
 	
 	
 	######################################################################
@@ -6359,6 +7799,100 @@ class optical_filter(object):
 		return self.monitoring_thicknesses[i_conditions], E
 	
 	
+	######################################################################
+	#                                                                    #
+	# electric_field_map                                                 #
+	#                                                                    #
+	######################################################################
+	def electric_field_map(self, wavelengths, angles = [0.0], polarization = UNPOLARIZED):
+		"""Calculate the intensity of the electric field in the filter
+		
+		The function takes 1 to 3 arguments:
+		  wavelengths        a list of wavelengths at which to calculate
+		                     the field;
+		  angles             (optional) a list of angles of incidence (in
+		                     degres), the default value is [0];
+		  polarization       (optional) the polarization of the light, it
+		                     can take a numerical value between 0 and 90 or
+		                     the values S, P, or UNPOLARIZED, the default
+		                     value is UNPOLARIZED;
+		and returns the square of the electric field in the filter
+		(thickness, E2). E2 is indexed by angle, wavelength, layer and
+		sublayer.
+		
+		The field is normalized as in electric_field. The matrices of the
+		sublayers are calculated once for all the wavelengths at every
+		angle. For other polarizations than S and P, the intensities of
+		both polarizations are combined like in reflection. A filter_error
+		is raised if no wavelength or no angle is given."""
+		
+		if len(wavelengths) == 0:
+			raise filter_error("At least one wavelength is necessary to calculate the electric field map")
+		if len(angles) == 0:
+			raise filter_error("At least one angle is necessary to calculate the electric field map")
+		
+		self.stop_ = False
+		
+		wvls, n = self.prepare_monitoring_wvls_and_n(wavelengths)
+		
+		N_substrate, N_front_medium, N_back_medium = self.get_substrate_and_medium_indices(n)
+		
+		nb_wvls = len(wvls)
+		nb_front_layers = len(self.front_layers)
+		
+		# Determine the weight of every polarization.
+		if polarization == S:
+			weights = [(S, 1.0)]
+		elif polarization == P:
+			weights = [(P, 1.0)]
+		else:
+			sin_Psi_square = math.sin(polarization*math.pi/180.0)**2
+			weights = [(S, sin_Psi_square), (P, 1.0-sin_Psi_square)]
+		
+		electric_field = abeles.electric_field(wvls)
+		
+		E2 = [None]*len(angles)
+		
+		for i_angle, angle in enumerate(angles):
+			
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return
+			
+			# Do the analysis (if necessary) and find the position for
+			# these conditions in tables.
+			i_conditions = self.monitoring(wvls, angle, N_front_medium)
+			
+			if self.stop_: return
+			
+			sublayer_matrices = self.monitoring_matrices_front[i_conditions]
+			sin2_theta_0 = self.monitoring_sin2_theta_0[i_conditions]
+			
+			# Create a structure to keep the field.
+			E2[i_angle] = [None]*nb_wvls
+			for i_wvl in range(nb_wvls):
+				E2[i_angle][i_wvl] = [None]*nb_front_layers
+				for i_layer in range(nb_front_layers):
+					E2[i_angle][i_wvl][i_layer] = array.array("d", [0.0]*len(sublayer_matrices[i_layer]))
+			
+			# Calculate the field for every sublayer at all wavelengths at
+			# once.
+			for i_layer in range(nb_front_layers):
+				for i_sublayer in range(len(sublayer_matrices[i_layer])):
+					for polarization_, weight in weights:
+						electric_field.calculate_electric_field(sublayer_matrices[i_layer][i_sublayer], N_substrate, sin2_theta_0, polarization_)
+						for i_wvl in range(nb_wvls):
+							E2[i_angle][i_wvl][i_layer][i_sublayer] += weight*electric_field[i_wvl]*electric_field[i_wvl]
+					
+					# Give other threads a chance...
+					time.sleep(0)
+					
+					if self.stop_: return
+		
+		return self.monitoring_thicknesses[i_conditions], E2
+	
+	
 	######################################################################
 	#                                                                    #
 	# stop                                                               #
@@ -6417,6 +7951,31 @@ class optical_filter(object):
 
 
 
+########################################################################
+#                                                                      #
+# get_layer_list_names                                                 #
+#                                                                      #
+########################################################################
+def get_layer_list_names(side, lists = layer_lists):
+	"""Get the names of the attributes of the layer lists
+	
+	This function takes 1 or 2 arguments:
+	  side                 the side of the lists (FRONT, BACK or BOTH);
+	  lists                (optional) the names of the lists, without the
+	                       side prefix, by default all the lists;
+	and returns a tuple of the names of the attributes of the filter."""
+	
+	if side == FRONT:
+		prefixes = ("front_",)
+	elif side == BACK:
+		prefixes = ("back_",)
+	else:
+		prefixes = ("front_", "back_")
+	
+	return tuple(prefix + name for prefix in prefixes for name in lists)
+
+
+
 ########################################################################
 #                                                                      #
 # parse_filter                                                         #
@@ -6461,6 +8020,9 @@ def parse_filter(lines, file_version, material_catalog = None):
 	illuminant = None
 	observer = None
 	consider_backside = None
+	coherence_length = None
+	cone_half_angle = None
+	bandwidth = None
 	ellipsometer_type = None
 	Delta_min = None
 	consider_backside_on_monitoring = None
@@ -6582,8 +8144,7 @@ def parse_filter(lines, file_version, material_catalog = None):
 				raise filter_error("Multiple definition in filter")
 			if not isinstance(value, list):
 				value = [value]
-			while value:
-				line = value.pop(0)
+			for line in value:
 				elements = line.split()
 				for element in elements:
 					try:
@@ -6674,6 +8235,45 @@ def parse_filter(lines, file_version, material_catalog = None):
 			except ValueError:
 				raise filter_error("Invalid ConsiderBackside")
 		
+		# The coherence length is a float.
+		elif keyword == "CoherenceLength":
+			if coherence_length is not None:
+				raise filter_error("Multiple definition in filter")
+			if isinstance(value, list):
+				raise filter_error("CoherenceLength value must be on a single line")
+			try:
+				coherence_length = float(value)
+			except ValueError:
+				raise filter_error("CoherenceLength must be a float")
+			if coherence_length < 0.0:
+				raise filter_error("CoherenceLength cannot be negative")
+		
+		# The half angle of the cone of light is a float.
+		elif keyword == "ConeHalfAngle":
+			if cone_half_angle is not None:
+				raise filter_error("Multiple definition in filter")
+			if isinstance(value, list):
+				raise filter_error("ConeHalfAngle value must be on a single line")
+			try:
+				cone_half_angle = float(value)
+			except ValueError:
+				raise filter_error("ConeHalfAngle must be a float")
+			if cone_half_angle < 0.0 or cone_half_angle >= 90.0:
+				raise filter_error("ConeHalfAngle must be between 0 and 90 degres")
+		
+		# The bandwidth is a float.
+		elif keyword == "Bandwidth":
+			if bandwidth is not None:
+				raise filter_error("Multiple definition in filter")
+			if isinstance(value, list):
+				raise filter_error("Bandwidth value must be on a single line")
+			try:
+				bandwidth = float(value)
+			except ValueError:
+				raise filter_error("Bandwidth must be a float")
+			if bandwidth < 0.0:
+				raise filter_error("Bandwidth cannot be negative")
+		
 		# The ellipsometer type is an integer.
 		elif keyword == "EllipsometerType":
 			if ellipsometer_type is not None:
@@ -6780,6 +8380,9 @@ def parse_filter(lines, file_version, material_catalog = None):
 				raise filter_error("Optical thickness in FourierParameters must be a float")
 			if not material_catalog.get_material(Fourier_material).is_mixture():
 				raise filter_error("Material in FourierParameters must be a mixture")
+			# The Fourier optimization module is only imported when
+			# needed to keep the import of this module light.
+			import optimization_Fourier
 			if not Q_function in optimization_Fourier.Q_function_choices:
 				raise filter_error("Unknown Q function in FourierParameters")
 			if OT <= 0.0:
@@ -6898,30 +8501,34 @@ def parse_filter(lines, file_version, material_catalog = None):
 		
 		# An inhomogeneous layer is defined by the material name, on
 		# the first line, and by sublayer thickness and index on the
-		# other lines.
-		elif keyword == "FrontGradedLayer" or keyword == "BackGradedLayer":
+		# other lines. In packed graded layers, the sublayer thickness
+		# and index are stored in binary form (see pack_step_profile).
+		elif keyword in ("FrontGradedLayer", "BackGradedLayer", "FrontPackedGradedLayer", "BackPackedGradedLayer"):
 			if (not isinstance(value, list)) or len(value) < 2:
-				raise filter_error("FrontGradedLayer or BackGradedLayer must provide material and at least one step")
-			layer_material = value.pop(0)
+				raise filter_error("%s must provide material and at least one step" % keyword)
+			layer_material = value[0]
 			if not material_catalog.get_material(layer_material).is_mixture():
-				raise filter_error("Material in FrontGradedLayer or BackGradedLayer must be a mixture")
-			layer_thickness = []
-			profile = []
-			while value:
-				sublayer = value.pop(0).split()
-				if len(sublayer) != 2:
-					raise filter_error("Each step in FrontGradedLayer or BackGradedLayer must provide step thickness and number")
-				try:
-					layer_thickness.append(float(sublayer[0]))
-					profile.append(int(sublayer[1]))
-				except ValueError:
-					raise filter_error("FrontGradedLayer or BackGradedLayer step number must be an integer and thickness must be a float")
+				raise filter_error("Material in %s must be a mixture" % keyword)
+			if keyword.endswith("PackedGradedLayer"):
+				layer_thickness, profile = unpack_step_profile(value[1:])
+			else:
+				layer_thickness = []
+				profile = []
+				for i_sublayer in range(1, len(value)):
+					sublayer = value[i_sublayer].split()
+					if len(sublayer) != 2:
+						raise filter_error("Each step in %s must provide step thickness and number" % keyword)
+					try:
+						layer_thickness.append(float(sublayer[0]))
+						profile.append(int(sublayer[1]))
+					except ValueError:
+						raise filter_error("%s step number must be an integer and thickness must be a float" % keyword)
 			if min(profile) < 0:
-				raise filter_error("Steps in FrontGradedLayer or BackGradedLayer must be positive integers")
+				raise filter_error("Steps in %s must be positive integers" % keyword)
 			if min(layer_thickness) < 0.0:
-				raise filter_error("Step thickness in FrontGradedLayer or BackGradedLayer must be positive")
+				raise filter_error("Step thickness in %s must be positive" % keyword)
 			
-			if keyword == "FrontGradedLayer":
+			if keyword.startswith("Front"):
 				front_layers.append(layer_material)
 				front_thickness.append(layer_thickness)
 				front_index.append([])
@@ -7078,6 +8685,12 @@ def parse_filter(lines, file_version, material_catalog = None):
 		new_filter.set_description(description)
 	if consider_backside is not None:
 		new_filter.set_consider_backside(consider_backside)
+	if coherence_length is not None:
+		new_filter.set_coherence_length(coherence_length)
+	if cone_half_angle is not None:
+		new_filter.set_cone_half_angle(cone_half_angle)
+	if bandwidth is not None:
+		new_filter.set_bandwidth(bandwidth)
 	if dont_consider_substrate is not None:
 		new_filter.set_dont_consider_substrate(dont_consider_substrate)
 	if wavelengths != []:
@@ -7268,6 +8881,12 @@ def write_filter(filter, outfile, prefix = ""):
 	outfile.write(prefix + "Illuminant: %s\n" % filter.get_illuminant())
 	outfile.write(prefix + "Observer: %s\n" % filter.get_observer())
 	outfile.write(prefix + "ConsiderBackside: %i\n" % filter.get_consider_backside())
+	if filter.get_coherence_length():
+		outfile.write(prefix + "CoherenceLength: %f\n" % filter.get_coherence_length())
+	if filter.get_cone_half_angle():
+		outfile.write(prefix + "ConeHalfAngle: %f\n" % filter.get_cone_half_angle())
+	if filter.get_bandwidth():
+		outfile.write(prefix + "Bandwidth: %f\n" % filter.get_bandwidth())
 	outfile.write(prefix + "EllipsometerType: %s\n" % filter.get_ellipsometer_type())
 	outfile.write(prefix + "DeltaMin: %f\n" % filter.get_Delta_min())
 	outfile.write(prefix + "ConsiderBacksideOnMonitoring: %i\n" % filter.get_consider_backside_on_monitoring())
@@ -7320,12 +8939,8 @@ def write_filter(filter, outfile, prefix = ""):
 		outfile.write(prefix + "End\n")
 	for i in range(filter.get_nb_layers(FRONT)):
 		if filter.is_graded(i, FRONT):
-			outfile.write(prefix + "FrontGradedLayer:\n")
-			outfile.write(prefix + "\t%s\n" % filter.get_layer_material_name(i, FRONT))
 			thickness, step_profile = filter.get_layer_step_profile(i, FRONT)
-			for j in range(len(thickness)):
-				outfile.write(prefix + "\t%.10f %i\n" % (thickness[j], step_profile[j]))
-			outfile.write(prefix + "End\n")
+			write_graded_layer(outfile, "Front", filter.get_layer_material_name(i, FRONT), thickness, step_profile, prefix)
 		else:
 			if filter.get_layer_material(i, FRONT).is_mixture():
 				outfile.write(prefix + "FrontLayer: %s %.6f %.6f\n" % (filter.get_layer_material_name(i, FRONT), filter.get_layer_thickness(i, FRONT), filter.get_layer_index(i, FRONT)))
@@ -7342,12 +8957,8 @@ def write_filter(filter, outfile, prefix = ""):
 			outfile.write(prefix + "LayerDescription: %s\n" % filter.get_layer_description(i, FRONT))
 	for i in range(filter.get_nb_layers(BACK)):
 		if filter.is_graded(i, BACK):
-			outfile.write(prefix + "BackGradedLayer:\n")
-			outfile.write(prefix + "\t%s\n" % filter.get_layer_material_name(i, BACK))
 			thickness, step_profile = filter.get_layer_step_profile(i, BACK)
-			for j in range(len(filter.back_thickness[i])):
-				outfile.write(prefix + "\t%.10f %i\n" % (thickness[j], step_profile[j]))
-			outfile.write(prefix + "End\n")
+			write_graded_layer(outfile, "Back", filter.get_layer_material_name(i, BACK), thickness, step_profile, prefix)
 		else:
 			if filter.get_layer_material(i, BACK).is_mixture():
 				outfile.write(prefix + "BackLayer: %s %.6f %.6f\n" % (filter.get_layer_material_name(i, BACK), filter.get_layer_thickness(i, BACK), filter.get_layer_index(i, BACK)))
@@ -7364,3 +8975,154 @@ def write_filter(filter, outfile, prefix = ""):
 			outfile.write(prefix + "Description: %s\n" % filter.get_layer_description(i, BACK))
 	
 	filter.set_modified(False)
+
+
+
+######################################################################
+#                                                                    #
+# write_graded_layer                                                 #
+#                                                                    #
+######################################################################
+def write_graded_layer(outfile, side_name, material_name, thickness, step_profile, prefix = ""):
+	"""Write a graded-index layer to a file
+	
+	This function takes 5 or 6 arguments:
+	  outfile        the file in which to write;
+	  side_name      the side of the layer as it appears in the keyword
+	                 ("Front" or "Back");
+	  material_name  the name of the material of the layer;
+	  thickness      the thickness of the sublayers;
+	  step_profile   the steps of the sublayers;
+	  prefix         (optional) a prefix to add to every line.
+	It returns no argument.
+	
+	Layers with at least config.PACKED_GRADED_LAYER_MIN_SUBLAYERS
+	sublayers are written in packed form, the others are written as
+	text with one sublayer per line."""
+	
+	min_sublayers = config.PACKED_GRADED_LAYER_MIN_SUBLAYERS
+	
+	if min_sublayers is not None and len(thickness) >= min_sublayers:
+		outfile.write(prefix + "%sPackedGradedLayer:\n" % side_name)
+		outfile.write(prefix + "\t%s\n" % material_name)
+		for line in pack_step_profile(thickness, step_profile):
+			outfile.write(prefix + "\t%s\n" % line)
+		outfile.write(prefix + "End\n")
+	else:
+		outfile.write(prefix + "%sGradedLayer:\n" % side_name)
+		outfile.write(prefix + "\t%s\n" % material_name)
+		outfile.writelines([prefix + "\t%.10f %i\n" % (thickness[j], step_profile[j]) for j in range(len(thickness))])
+		outfile.write(prefix + "End\n")
+
+
+
+######################################################################
+#                                                                    #
+# pack_step_profile                                                  #
+#                                                                    #
+######################################################################
+def pack_step_profile(thickness, step_profile, line_length = 76):
+	"""Pack the step profile of a graded-index layer
+	
+	This function takes 2 or 3 arguments:
+	  thickness      the thickness of the sublayers;
+	  step_profile   the steps of the sublayers;
+	  line_length    (optional) the maximum length of the lines, 76 by
+	                 default;
+	and returns a list of lines representing the step profile.
+	
+	The first line contains the number of sublayers. The following lines
+	contain the base64 encoding of the zlib compressed little-endian
+	double precision thicknesses followed by the 32 bit integer steps.
+	Since thicknesses are stored in binary form, they are kept exactly."""
+	
+	nb_sublayers = len(thickness)
+	
+	packed_thickness = array.array("d", thickness)
+	packed_step_profile = array.array("i", step_profile)
+	if sys.byteorder == "big":
+		packed_thickness.byteswap()
+		packed_step_profile.byteswap()
+	
+	data = base64.b64encode(zlib.compress(packed_thickness.tostring() + packed_step_profile.tostring()))
+	
+	lines = ["%i" % nb_sublayers]
+	for i in range(0, len(data), line_length):
+		lines.append(data[i:i+line_length])
+	
+	return lines
+
+
+
+######################################################################
+#                                                                    #
+# unpack_step_profile                                                #
+#                                                                    #
+######################################################################
+def unpack_step_profile(lines):
+	"""Unpack the step profile of a graded-index layer
+	
+	This function takes a single argument:
+	  lines          the lines created by pack_step_profile;
+	and returns two output arguments:
+	  thickness      the thickness of the sublayers;
+	  step_profile   the steps of the sublayers.
+	
+	If the lines are not properly formatted, a filter_error is raised."""
+	
+	if len(lines) < 2:
+		raise filter_error("Packed step profile must provide the number of sublayers and the data")
+	
+	try:
+		nb_sublayers = int(lines[0])
+	except ValueError:
+		raise filter_error("Number of sublayers in packed step profile must be an integer")
+	if nb_sublayers < 1:
+		raise filter_error("Packed step profile must provide at least one step")
+	
+	try:
+		data = zlib.decompress(base64.b64decode("".join(lines[1:])))
+	except (TypeError, zlib.error):
+		raise filter_error("Packed step profile data is corrupted")
+	
+	thickness = array.array("d")
+	step_profile = array.array("i")
+	thickness_size = nb_sublayers*thickness.itemsize
+	if len(data) != thickness_size + nb_sublayers*step_profile.itemsize:
+		raise filter_error("Packed step profile data does not match the number of sublayers")
+	thickness.fromstring(data[:thickness_size])
+	step_profile.fromstring(data[thickness_size:])
+	if sys.byteorder == "big":
+		thickness.byteswap()
+		step_profile.byteswap()
+	
+	return thickness.tolist(), step_profile.tolist()
+
+
+
+########################################################################
+#                                                                      #
+# multiply_matrices_by_power                                           #
+#                                                                      #
+########################################################################
+def multiply_matrices_by_power(global_matrices, matrices, power, temp_matrices):
+	"""Multiply matrices by a power of other matrices
+	
+	This function takes 4 arguments:
+	  global_matrices    the matrices to multiply;
+	  matrices           the matrices to raise to the power;
+	  power              the power, a positive integer;
+	  temp_matrices      matrices used for temporary storage.
+	
+	The power is calculated by repeated squaring, which requires a
+	number of multiplications proportional to the logarithm of the
+	power. The matrices raised to the power are modified."""
+	
+	while True:
+		if power & 1:
+			global_matrices.multiply_matrices(matrices)
+		power >>= 1
+		if not power:
+			break
+		temp_matrices.copy_matrices(matrices)
+		matrices.multiply_matrices(temp_matrices)
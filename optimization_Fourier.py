@@ -25,6 +25,14 @@
 
 import math
 import cmath
+import operator
+
+# Numpy is not required, but it accelerates the calculation of the
+# index profile when it is available.
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 from definitions import *
 import config
@@ -41,6 +49,15 @@ Q_function_descriptions = ["sqrt(R/T)", "sqrt(0.5*(1/T-T))", "0.5*ln((1+sqrt(R))
 
 one_hundred_eighty_over_pi = 180.0/math.pi
 
+# When the integral of eq. 9 is calculated by recurrence, the phasors
+# are recalculated directly every PHASOR_RESET_INTERVAL points to avoid
+# the accumulation of roundoff errors.
+PHASOR_RESET_INTERVAL = 500
+
+# When numpy is used, the integral is calculated for blocks of
+# thicknesses to limit the size of the temporary arrays.
+NUMPY_BLOCK_SIZE = 1000000
+
 
 
 ########################################################################
@@ -477,13 +494,18 @@ class optimization_Fourier(optimization):
 			n_mixture = self.N.get_N_mixture()
 			k_corrected = [self.k[i_wvl]*n_mixture[i_wvl].real/self.n_0 for i_wvl in range(self.nb_wvls)]
 		else:
-			# Calculate the optical thickness for every wavelength.
-			optical_thickness = [0.0]*self.nb_wvls
+			# Calculate the optical thickness for every wavelength. Many
+			# sublayers share the same step, so the thickness is first
+			# accumulated by step.
+			thickness_by_step = {}
 			for i_sublayer in range(len(self.step_thickness)):
-				n_sublayer = self.N.get_N_mixture_graded(self.step_profile[i_sublayer])
-				sublayer_thickness = self.step_thickness[i_sublayer]
+				step = self.step_profile[i_sublayer]
+				thickness_by_step[step] = thickness_by_step.get(step, 0.0) + self.step_thickness[i_sublayer]
+			optical_thickness = [0.0]*self.nb_wvls
+			for step, step_thickness in thickness_by_step.iteritems():
+				n_step = self.N.get_N_mixture_graded(step)
 				for i_wvl in range(self.nb_wvls):
-					optical_thickness[i_wvl] += n_sublayer[i_wvl].real * sublayer_thickness
+					optical_thickness[i_wvl] += n_step[i_wvl].real * step_thickness
 			
 			k_corrected = [self.k[i_wvl]*optical_thickness[i_wvl]/self.OT for i_wvl in range(self.nb_wvls)]
 		
@@ -505,17 +527,7 @@ class optimization_Fourier(optimization):
 		
 		# Then, we calculate the value of the first right term in eq. 9.
 		nb_x = len(self.x)
-		first_term = [0.0]*nb_x
-		for i_x in range(nb_x):
-			x = self.x[i_x]
-			# Calculation of the integral, Q is considered nul out of
-			# the specified range. Since this calculation is long, it is
-			# worth verifying that Q_m is not null.
-			integral = 0.0
-			for i_wvl in range(self.nb_wvls):
-				if Q_m[i_wvl] != 0.0:
-					integral += (Q_m[i_wvl]/k_corrected[i_wvl])*math.sin(Psi_m[i_wvl]-k_corrected[i_wvl]*2.0*(x-0.5*self.OT))*dk[i_wvl]
-			first_term[i_x] = integral/math.pi
+		first_term = self.calculate_first_term(Q_m, Psi_m, k_corrected, dk)
 		
 		# We calculate the index of refraction as a function of optical
 		# thickness.
@@ -579,6 +591,103 @@ class optimization_Fourier(optimization):
  			self.max_iterations_reached = True
 	
 	
+	######################################################################
+	#                                                                    #
+	# calculate_first_term                                               #
+	#                                                                    #
+	######################################################################
+	def calculate_first_term(self, Q_m, Psi_m, k_corrected, dk):
+		"""Calculate the first right term in eq. 9
+		
+		This method takes 4 arguments:
+		  Q_m                the amplitude Q function;
+		  Psi_m              the phase Q function;
+		  k_corrected        the corrected wavenumbers;
+		  dk                 the width of the wavenumber intervals;
+		and returns the first term of eq. 9 for every optical thickness
+		in self.x.
+		
+		The integral is the imaginary part of a sum of phasors
+		  c_i*exp(j*(Psi_i+k_i*OT-2*k_i*x))
+		with c_i = Q_i*dk_i/(pi*k_i). When numpy is available, it is
+		calculated as a matrix product. Otherwise, since the optical
+		thicknesses are equally spaced (except the last one), the
+		phasors are multiplied by exp(-2*j*k_i*dx) from one point to the
+		next, which avoids the calculation of a sine for every wavelength
+		and every point. The result is the same as the one of
+		calculate_first_term_reference, up to roundoff errors."""
+		
+		nb_x = len(self.x)
+		
+		# Q is considered nul out of the specified range. Since this
+		# calculation is long, it is worth ignoring the wavelengths where
+		# Q_m is null.
+		used_wvls = [i_wvl for i_wvl in range(self.nb_wvls) if Q_m[i_wvl] != 0.0]
+		if nb_x == 0 or used_wvls == []:
+			return [0.0]*nb_x
+		
+		c = [Q_m[i_wvl]*dk[i_wvl]/(math.pi*k_corrected[i_wvl]) for i_wvl in used_wvls]
+		a = [Psi_m[i_wvl]+k_corrected[i_wvl]*self.OT for i_wvl in used_wvls]
+		b = [2.0*k_corrected[i_wvl] for i_wvl in used_wvls]
+		
+		if numpy:
+			c = numpy.array(c)
+			a = numpy.array(a)
+			b = numpy.array(b)
+			x = numpy.array(self.x)
+			block_size = max(NUMPY_BLOCK_SIZE//len(c), 1)
+			first_term = numpy.empty(nb_x)
+			for start in range(0, nb_x, block_size):
+				stop = min(start+block_size, nb_x)
+				first_term[start:stop] = numpy.dot(numpy.sin(a - numpy.outer(x[start:stop], b)), c)
+			return first_term.tolist()
+		
+		first_term = [0.0]*nb_x
+		
+		# The last point is not necessarily on the regular grid.
+		first_term[-1] = sum(c_i*math.sin(a_i-b_i*self.x[-1]) for c_i, a_i, b_i in zip(c, a, b))
+		
+		factors = [cmath.exp(-1j*b_i*self.sublayer_OT) for b_i in b]
+		for i_x in range(nb_x-1):
+			if i_x % PHASOR_RESET_INTERVAL == 0:
+				x = self.x[i_x]
+				phasors = [c_i*cmath.exp(1j*(a_i-b_i*x)) for c_i, a_i, b_i in zip(c, a, b)]
+			else:
+				phasors = map(operator.mul, phasors, factors)
+			first_term[i_x] = sum(phasors).imag
+		
+		return first_term
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate_first_term_reference                                     #
+	#                                                                    #
+	######################################################################
+	def calculate_first_term_reference(self, Q_m, Psi_m, k_corrected, dk):
+		"""Calculate the first right term in eq. 9 point by point
+		
+		This method takes the same arguments as calculate_first_term and
+		returns the same result. It directly evaluates the integral for
+		every point and every wavelength and is kept as a reference to
+		test calculate_first_term."""
+		
+		nb_x = len(self.x)
+		first_term = [0.0]*nb_x
+		for i_x in range(nb_x):
+			x = self.x[i_x]
+			# Calculation of the integral, Q is considered nul out of
+			# the specified range. Since this calculation is long, it is
+			# worth verifying that Q_m is not null.
+			integral = 0.0
+			for i_wvl in range(self.nb_wvls):
+				if Q_m[i_wvl] != 0.0:
+					integral += (Q_m[i_wvl]/k_corrected[i_wvl])*math.sin(Psi_m[i_wvl]-k_corrected[i_wvl]*2.0*(x-0.5*self.OT))*dk[i_wvl]
+			first_term[i_x] = integral/math.pi
+		
+		return first_term
+	
+	
 	######################################################################
 	#                                                                    #
 	# get_index_profile                                                  #
@@ -0,0 +1,583 @@
+# optimization_multistart.py
+#
+# Global optimization by refinement of many starting designs.
+#
+# Copyright (c) 2015 Stephane Larouche.
+#
+# This file is part of OpenFilters.
+#
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+import random
+try:
+	import multiprocessing
+except ImportError:
+	multiprocessing = None
+
+import config
+from definitions import *
+import materials
+import optical_filter
+import optimization
+import optimization_refinement
+import targets
+import release
+import version
+import workers
+from moremath import linear_algebra
+
+
+
+# The sampling of the thickness variations.
+RANDOM = 0
+QUASI_RANDOM = 1
+
+# Quasi-random sequences work poorly for their first points.
+HALTON_SKIP = 20
+
+
+
+########################################################################
+#                                                                      #
+# multistart_error                                                     #
+#                                                                      #
+########################################################################
+class multistart_error(Exception):
+	"""Exception class for multi-start optimization errors"""
+	
+	def __init__(self, value = ""):
+		self.value = value
+	
+	def __str__(self):
+		if self.value:
+			return "Multi-start optimization error: %s." % self.value
+		else:
+			return "Multi-start optimization error."
+
+
+
+########################################################################
+#                                                                      #
+# optimization_multistart                                              #
+#                                                                      #
+########################################################################
+class optimization_multistart(object):
+	"""A class to explore the design space by refining many starting
+	designs
+	
+	The starting designs are obtained by varying the thickness of the
+	refined layers of the filter, and optionally by removing some of
+	them. They are refined in parallel by worker processes, or in the
+	calling process when a single process is used, identical solutions
+	are merged, and the solutions are ranked according to their chi
+	square."""
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, filter, targets, parent = None):
+		"""Initialize an instance of the multi-start optimization class
+		
+		This method takes 2 or 3 arguments:
+		  filter             the filter from which to start;
+		  targets            the targets used in the optimization;
+		  parent             (optional) the user interface used to do the
+		                     optimization.
+		
+		If given, the parent must implement an update method taking two
+		arguments (working, status). The status is the number of starting
+		designs whose refinement is completed."""
+		
+		self.filter = filter
+		self.targets = targets
+		self.parent = parent
+		
+		self.nb_starts = config.MULTISTART_NB_STARTS
+		self.thickness_variation = config.MULTISTART_THICKNESS_VARIATION
+		self.max_removed_layers = config.MULTISTART_MAX_REMOVED_LAYERS
+		self.sampling = config.MULTISTART_SAMPLING
+		self.max_iterations = config.MULTISTART_MAX_ITERATIONS
+		self.nb_processes = config.MULTISTART_NB_PROCESSES
+		self.duplicate_tolerance = config.MULTISTART_DUPLICATE_TOLERANCE
+		self.min_thickness = 0.0
+		self.seed = None
+		
+		self.solutions = []
+		self.nb_failed_starts = 0
+		self.status = 0
+		
+		self.working = False
+		self.continue_optimization = False
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_nb_starts                                                      #
+	# set_thickness_variation                                            #
+	# set_max_removed_layers                                             #
+	# set_sampling                                                       #
+	# set_max_iterations                                                 #
+	# set_nb_processes                                                   #
+	# set_duplicate_tolerance                                            #
+	# set_min_thickness                                                  #
+	# set_seed                                                           #
+	#                                                                    #
+	######################################################################
+	def set_nb_starts(self, nb_starts):
+		"""Set the number of starting designs, including the original
+		design"""
+		
+		self.nb_starts = nb_starts
+	
+	def set_thickness_variation(self, thickness_variation):
+		"""Set the relative variation of the thickness of the layers"""
+		
+		self.thickness_variation = thickness_variation
+	
+	def set_max_removed_layers(self, max_removed_layers):
+		"""Set the maximum number of layers removed from the starting
+		designs"""
+		
+		self.max_removed_layers = max_removed_layers
+	
+	def set_sampling(self, sampling):
+		"""Set the sampling of thickness variations (RANDOM or
+		QUASI_RANDOM)"""
+		
+		self.sampling = sampling
+	
+	def set_max_iterations(self, max_iterations):
+		"""Set the maximum number of iterations of every refinement"""
+		
+		self.max_iterations = max_iterations
+	
+	def set_nb_processes(self, nb_processes):
+		"""Set the number of worker processes (0 for one per processor)"""
+		
+		self.nb_processes = nb_processes
+	
+	def set_duplicate_tolerance(self, duplicate_tolerance):
+		"""Set the thickness difference under which solutions are
+		identical"""
+		
+		self.duplicate_tolerance = duplicate_tolerance
+	
+	def set_min_thickness(self, min_thickness):
+		"""Set the minimal thickness of the layers, thinner layers are
+		removed after the refinement"""
+		
+		self.min_thickness = min_thickness
+	
+	def set_seed(self, seed):
+		"""Set the seed of the random number generator to obtain
+		reproducible starting designs"""
+		
+		self.seed = seed
+	
+	
+	######################################################################
+	#                                                                    #
+	# make_starting_designs                                              #
+	#                                                                    #
+	######################################################################
+	def make_starting_designs(self):
+		"""Make the starting designs
+		
+		This method returns a list of filters. The first one is a copy of
+		the original filter."""
+		
+		generator = random.Random(self.seed)
+		
+		refined_layers = [i_layer for i_layer in range(self.filter.get_nb_layers(FRONT)) if self.filter.get_refinable_layer_thickness(i_layer, FRONT) and self.filter.get_refine_layer_thickness(i_layer, FRONT)]
+		
+		if not refined_layers:
+			raise multistart_error("The thickness of at least one layer must be refined")
+		
+		if self.sampling == QUASI_RANDOM:
+			bases = get_primes(len(refined_layers))
+		
+		starting_designs = [self.filter.clone()]
+		
+		for i_start in range(1, self.nb_starts):
+			starting_design = self.filter.clone()
+			
+			if self.sampling == QUASI_RANDOM:
+				variations = [2.0*halton(i_start+HALTON_SKIP, base)-1.0 for base in bases]
+			else:
+				variations = [generator.uniform(-1.0, 1.0) for i_layer in refined_layers]
+			
+			for i_layer, variation in zip(refined_layers, variations):
+				thickness = starting_design.get_layer_thickness(i_layer, FRONT)
+				starting_design.change_layer_thickness(thickness*(1.0+self.thickness_variation*variation), i_layer, FRONT)
+			
+			# Layers are removed by giving them a null thickness, adjacent
+			# layers of the same material are then merged. At least one
+			# refined layer is kept.
+			nb_removed_layers = generator.randint(0, min(self.max_removed_layers, len(refined_layers)-1))
+			if nb_removed_layers:
+				for i_layer in generator.sample(refined_layers, nb_removed_layers):
+					starting_design.change_layer_thickness(0.0, i_layer, FRONT)
+				starting_design.merge_layers()
+			
+			starting_designs.append(starting_design)
+		
+		return starting_designs
+	
+	
+	######################################################################
+	#                                                                    #
+	# go                                                                 #
+	#                                                                    #
+	######################################################################
+	def go(self):
+		"""Refine all the starting designs
+		
+		The refinements are done in worker processes unless the number of
+		processes is 1 or the multiprocessing module is not available.
+		When it is done, the solutions can be obtained with
+		get_solutions."""
+		
+		self.continue_optimization = True
+		self.working = True
+		self.solutions = []
+		self.nb_failed_starts = 0
+		self.status = 0
+		
+		if self.parent:
+			self.parent.update(self.working, self.status)
+		
+		starting_designs = self.make_starting_designs()
+		
+		nb_processes = workers.get_nb_processes(self.nb_processes, len(starting_designs))
+		
+		# Worker processes recreate the starting designs and their
+		# materials from their description; in this process, the starting
+		# designs are refined directly.
+		if nb_processes > 1:
+			catalog_description = materials.describe_material_catalog(self.filter.get_material_catalog())
+			material_states = materials.describe_materials(self.filter.get_materials())
+			target_texts = [workers.write_to_text(targets.write_target, target) for target in self.targets]
+			arguments = [(catalog_description, material_states, workers.write_to_text(optical_filter.write_filter, starting_design), target_texts, self.max_iterations, self.min_thickness) for starting_design in starting_designs]
+			pool = multiprocessing.Pool(nb_processes)
+			answers = (read_refined_design(answer, self.filter) for answer in pool.imap_unordered(refine_starting_design, arguments))
+		else:
+			pool = None
+			answers = (refine_design(starting_design, self.targets, self.max_iterations, self.min_thickness) for starting_design in starting_designs)
+		
+		try:
+			for answer in answers:
+				if answer is None:
+					self.nb_failed_starts += 1
+				else:
+					chi_2, solution = answer
+					self.add_solution(chi_2, solution)
+				
+				self.status += 1
+				
+				if not self.continue_optimization:
+					break
+				
+				if self.parent:
+					self.parent.update(self.working, self.status)
+		
+		finally:
+			if pool:
+				pool.terminate()
+				pool.join()
+		
+		self.solutions.sort(key = lambda solution: solution[0])
+		
+		self.working = False
+		
+		if self.parent:
+			self.parent.update(self.working, self.status)
+	
+	
+	######################################################################
+	#                                                                    #
+	# stop                                                               #
+	#                                                                    #
+	######################################################################
+	def stop(self):
+		"""Stop the optimization
+		
+		This will stop the optimization after the current refinement. The
+		solutions already obtained are kept."""
+		
+		self.continue_optimization = False
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_solution                                                       #
+	#                                                                    #
+	######################################################################
+	def add_solution(self, chi_2, solution):
+		"""Add a solution, merging it with an identical one if any
+		
+		This method takes 2 arguments:
+		  chi_2              the chi square of the solution;
+		  solution           the refined filter."""
+		
+		layers = get_layers_description(solution)
+		
+		for i_solution, (other_chi_2, other_solution, nb_times_found) in enumerate(self.solutions):
+			other_layers = get_layers_description(other_solution)
+			if len(layers) != len(other_layers):
+				continue
+			for (material, thickness), (other_material, other_thickness) in zip(layers, other_layers):
+				if material != other_material or abs(thickness-other_thickness) > self.duplicate_tolerance:
+					break
+			else:
+				if chi_2 < other_chi_2:
+					self.solutions[i_solution] = (chi_2, solution, nb_times_found+1)
+				else:
+					self.solutions[i_solution] = (other_chi_2, other_solution, nb_times_found+1)
+				return
+		
+		self.solutions.append((chi_2, solution, 1))
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_solutions                                                      #
+	#                                                                    #
+	######################################################################
+	def get_solutions(self):
+		"""Get the solutions
+		
+		This method returns a list of tuples (chi_2, filter, nb_times_found)
+		sorted by increasing chi square. nb_times_found is the number of
+		starting designs that converged to that solution."""
+		
+		return self.solutions
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_best_solution                                                  #
+	#                                                                    #
+	######################################################################
+	def get_best_solution(self):
+		"""Get the best solution
+		
+		This method returns the filter with the lowest chi square, or None
+		if no refinement succeeded."""
+		
+		if self.solutions:
+			return self.solutions[0][1]
+		
+		return None
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_nb_failed_starts                                               #
+	# get_status                                                         #
+	# get_working                                                        #
+	#                                                                    #
+	######################################################################
+	def get_nb_failed_starts(self):
+		"""Get the number of starting designs whose refinement failed"""
+		
+		return self.nb_failed_starts
+	
+	def get_status(self):
+		"""Get the number of starting designs already refined"""
+		
+		return self.status
+	
+	def get_working(self):
+		"""Get if the optimization is working"""
+		
+		return self.working
+
+
+
+########################################################################
+#                                                                      #
+# refine_starting_design                                               #
+#                                                                      #
+########################################################################
+def refine_starting_design(arguments):
+	"""Refine a starting design
+	
+	This function takes a single argument, a tuple containing the
+	description of the material catalog, the states of the materials of
+	the filter, the starting design and the targets written as text, the
+	maximum number of iterations and the minimal thickness of the
+	layers. It returns a tuple containing the chi square and the refined
+	filter written as text, or None if the refinement failed.
+	
+	This function is executed in worker processes; its arguments and
+	return value are therefore made of simple types."""
+	
+	catalog_description, material_states, filter_text, target_texts, max_iterations, min_thickness = arguments
+	
+	file_version = version.version(release.VERSION)
+	
+	try:
+		material_catalog = materials.material_catalog_from_states(catalog_description, material_states)
+		filter = optical_filter.parse_filter(filter_text.splitlines(), file_version, material_catalog)
+		the_targets = [targets.parse_target(target_text.splitlines(), file_version) for target_text in target_texts]
+	except (optical_filter.filter_error, materials.material_error, targets.target_error):
+		return None
+	
+	answer = refine_design(filter, the_targets, max_iterations, min_thickness)
+	if answer is None:
+		return None
+	
+	return answer[0], workers.write_to_text(optical_filter.write_filter, filter)
+
+
+
+########################################################################
+#                                                                      #
+# refine_design                                                        #
+#                                                                      #
+########################################################################
+def refine_design(filter, the_targets, max_iterations, min_thickness):
+	"""Refine a design
+	
+	This function takes 4 arguments:
+	  filter             the design to refine, it is modified;
+	  the_targets        the targets;
+	  max_iterations     the maximum number of iterations;
+	  min_thickness      the minimal thickness of the layers, or 0;
+	and returns a tuple containing the chi square and the refined
+	filter, or None if the refinement failed."""
+	
+	try:
+		refinement = optimization_refinement.optimization_refinement(filter, the_targets)
+		refinement.max_iterations = max_iterations
+		refinement.initial_max_iterations = max_iterations
+		refinement.go()
+		
+		if min_thickness:
+			refinement.set_min_thickness(min_thickness)
+			refinement.remove_thin_layers()
+			refinement.go()
+		
+		refinement.copy_to_filter()
+	
+	# A starting design that cannot be refined, for example because the
+	# removal of layers left an unusable design or because the
+	# refinement diverged, must not stop the other refinements. Other
+	# errors are bugs and are propagated.
+	except (optimization.optimization_error, optical_filter.filter_error, materials.material_error, targets.target_error, linear_algebra.matrix_error, ArithmeticError, ValueError):
+		return None
+	
+	return refinement.get_chi_2(), filter
+
+
+
+########################################################################
+#                                                                      #
+# read_refined_design                                                  #
+#                                                                      #
+########################################################################
+def read_refined_design(answer, filter):
+	"""Read a design refined by a worker process
+	
+	This function takes 2 arguments:
+	  answer             the value returned by refine_starting_design;
+	  filter             the original filter;
+	and returns a tuple containing the chi square and the refined filter,
+	or None if the refinement failed.
+	
+	The refined filter uses the material catalog and the materials of
+	the original filter, including materials replaced with set_material."""
+	
+	if answer is None:
+		return None
+	
+	chi_2, filter_text = answer
+	
+	solution = optical_filter.parse_filter(filter_text.splitlines(), version.version(release.VERSION), filter.get_material_catalog())
+	
+	for material in filter.get_materials():
+		if material.is_mixture():
+			continue
+		for material_nb, solution_material in enumerate(solution.get_materials()):
+			if solution_material.get_name() == material.get_name() and solution_material is not material:
+				solution.set_material(material_nb, material)
+	
+	return chi_2, solution
+
+
+
+########################################################################
+#                                                                      #
+# get_layers_description                                               #
+#                                                                      #
+########################################################################
+def get_layers_description(filter):
+	"""Get the material and the thickness of the front layers of a filter
+	
+	Graded-index layers are described by their total thickness."""
+	
+	layers = []
+	for i_layer in range(filter.get_nb_layers(FRONT)):
+		thickness = filter.get_layer_thickness(i_layer, FRONT)
+		if isinstance(thickness, list):
+			thickness = sum(thickness)
+		layers.append((filter.get_layer_material_name(i_layer, FRONT), thickness))
+	
+	return layers
+
+
+
+########################################################################
+#                                                                      #
+# get_primes                                                           #
+# halton                                                               #
+#                                                                      #
+########################################################################
+def get_primes(nb):
+	"""Get the nb first prime numbers"""
+	
+	primes = []
+	candidate = 2
+	while len(primes) < nb:
+		for prime in primes:
+			if prime*prime > candidate:
+				primes.append(candidate)
+				break
+			if candidate % prime == 0:
+				break
+		else:
+			primes.append(candidate)
+		candidate += 1
+	
+	return primes
+
+def halton(index, base):
+	"""Get an element of the Halton sequence in a base
+	
+	The elements of the sequence are in the [0, 1[ interval."""
+	
+	value = 0.0
+	fraction = 1.0
+	while index > 0:
+		fraction /= base
+		value += fraction*(index % base)
+		index //= base
+	
+	return value
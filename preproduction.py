@@ -27,6 +27,7 @@
 # REMOVE when Python 3.0 will be out.
 from __future__ import division
 
+import array
 import math
 import random
 import time
@@ -877,3 +878,747 @@ class random_errors(object):
 						else:
 							outfile.write(" %15.6f" % self.results[i_data_type][i_test][i_wavelength])
 					outfile.write("\n")
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_columns                                                        #
+	#                                                                    #
+	######################################################################
+	def get_columns(self, all_results = False):
+		"""Get the results of the analysis in columns
+		
+		This method takes an optional argument:
+		  all_results        a boolean indicating if the results of all
+		                     the tests must be returned instead of the
+		                     statistics, default is False;
+		and returns a list of tables, one for every data type, that can
+		be exported with export.export_columns. Every table is a tuple of
+		a title, a list of column titles and a list of columns."""
+		
+		if self.thickness_error_type == RELATIVE_THICKNESS:
+			thickness_error = "%.2f %%" % (100.0*self.relative_thickness_error)
+		elif self.thickness_error_type == PHYSICAL_THICKNESS:
+			thickness_error = "%.2f nm" % self.physical_thickness_error
+		
+		if self.distribution == UNIFORM:
+			distribution = "uniform"
+		elif self.distribution == NORMAL:
+			distribution = "normal"
+		
+		header = "Simulation of %s random thickness errors (%s distribution, %i tests)" % (thickness_error, distribution, self.nb_tests)
+		
+		tables = []
+		
+		for i_data_type, data_type in enumerate(self.data_types):
+			if data_type is data_holder.COLOR:
+				title = "%s: %s at %.2f degrees for %s (%s, %s)" % (header, data_holder.DATA_TYPE_NAMES[data_type], self.angle, export.polarization_text(self.polarization), self.illuminant_name, self.observer_name)
+				color_titles = ["R %s" % name for name in export.COLOR_COLUMN_TITLES] + ["T %s" % name for name in export.COLOR_COLUMN_TITLES]
+				
+				if all_results:
+					column_titles = ["test"] + color_titles
+					rows = [export.get_color_values(self.results[i_data_type][i_test][0]) + export.get_color_values(self.results[i_data_type][i_test][1]) for i_test in range(self.nb_tests)]
+					columns = [range(1, self.nb_tests+1)] + [list(column) for column in zip(*rows)]
+				
+				else:
+					column_titles = ["design %s" % name for name in color_titles]\
+					              + ["mean %s" % name for name in color_titles]\
+					              + ["maximum %s" % name for name in color_titles]\
+					              + ["std. dev. R", "std. dev. T"]
+					values = export.get_color_values(self.expected_result[i_data_type][0]) + export.get_color_values(self.expected_result[i_data_type][1])\
+					       + export.get_color_values(self.mean[i_data_type][0]) + export.get_color_values(self.mean[i_data_type][1])\
+					       + export.get_color_values(self.max[i_data_type][0]) + export.get_color_values(self.max[i_data_type][1])\
+					       + self.std_dev[i_data_type]
+					columns = [[value] for value in values]
+			
+			else:
+				title = "%s: %s at %.2f degrees for %s" % (header, data_holder.DATA_TYPE_NAMES[data_type], self.angle, export.polarization_text(self.polarization))
+				wavelengths = export.to_list(self.wavelengths)
+				
+				if all_results:
+					column_titles = ["wavelength (nm)"] + ["test %i" % (i_test+1) for i_test in range(self.nb_tests)]
+					columns = [wavelengths] + [export.to_list(self.results[i_data_type][i_test]) for i_test in range(self.nb_tests)]
+				
+				else:
+					column_titles = ["wavelength (nm)", "design", "mean", "std. dev.", "minimum", "maximum"]
+					columns = [wavelengths, export.to_list(self.expected_result[i_data_type]), self.mean[i_data_type], self.std_dev[i_data_type], self.min[i_data_type], self.max[i_data_type]]
+			
+			tables.append((title, column_titles, columns))
+		
+		return tables
+
+
+
+########################################################################
+#                                                                      #
+# sensitivity                                                          #
+#                                                                      #
+########################################################################
+class sensitivity(object):
+	"""A class to analyse the sensitivity of the properties of an optical
+	filter to the thickness and the index of its layers.
+	
+	The derivatives are calculated analytically and combined, to first
+	order, with the expected errors on the parameters. Only the
+	derivatives that contribute significantly to the error are kept."""
+	
+	
+	positions_by_data_type = {data_holder.REFLECTION: 0,
+	                          data_holder.TRANSMISSION: 1,
+	                          data_holder.ABSORPTION: 2,
+	                          data_holder.REFLECTION_PHASE: 5,
+	                          data_holder.TRANSMISSION_PHASE: 6}
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, original_filter):
+		"""Initialize the sensitivity analysis.
+		
+		This method takes a single input argument:
+		  original_filter        the filter to study."""
+		
+		self.original_filter = original_filter
+		
+		self.data_types = [data_holder.REFLECTION, data_holder.TRANSMISSION]
+		
+		self.angles = [0.0]
+		self.polarization = S
+		
+		self.thickness_error_type = config.THICKNESS_ERROR_TYPE
+		self.relative_thickness_error = config.RELATIVE_THICKNESS_ERROR
+		self.physical_thickness_error = config.PHYSICAL_THICKNESS_ERROR
+		self.index_error = config.INDEX_ERROR
+		self.threshold = config.SENSITIVITY_THRESHOLD
+		
+		self.wavelengths = self.original_filter.get_wavelengths()
+		self.nb_wavelengths = len(self.wavelengths)
+		self.nb_layers = self.original_filter.get_nb_layers(FRONT)
+		
+		self.parameters = []
+		self.errors = []
+		self.derivatives = {}
+		self.std_dev = []
+		self.sum_of_squares = []
+		
+		self.progress = 0.0
+		
+		self.stop_ = False
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_data_types                                                     #
+	#                                                                    #
+	######################################################################
+	def set_data_types(self, data_types):
+		"""Set the data type
+		
+		This method takes a single input argument:
+		  data_types             a sequence of the data types to analyse,
+		                         among reflection, transmission, absorption
+		                         and the reflection and transmission
+		                         phases."""
+		
+		self.data_types = data_types
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_angles                                                         #
+	#                                                                    #
+	######################################################################
+	def set_angles(self, angles):
+		"""Set the angles
+		
+		This method takes a single input argument:
+		  angles                 a sequence of the angles of incidence."""
+		
+		self.angles = angles
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_polarization                                                   #
+	#                                                                    #
+	######################################################################
+	def set_polarization(self, polarization):
+		"""Set polarization
+		
+		This method takes a single input argument:
+		  polarization           the polarization."""
+		
+		self.polarization = polarization
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_thickness_error_type                                           #
+	#                                                                    #
+	######################################################################
+	def set_thickness_error_type(self, thickness_error_type):
+		"""Set the thickness error type
+		
+		This method takes a single input argument:
+		  thickness_error_type   the error type (either RELATIVE_THICKNESS
+		                         or PHYSICAL_THICKNESS)."""
+		
+		self.thickness_error_type = thickness_error_type
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_relative_thickness_error                                       #
+	#                                                                    #
+	######################################################################
+	def set_relative_thickness_error(self, relative_thickness_error):
+		"""Set the relative thickness error
+		
+		This method takes a single input argument:
+		  relative_thickness_error   the relative thickness error."""
+		
+		self.relative_thickness_error = relative_thickness_error
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_physical_thickness_error                                       #
+	#                                                                    #
+	######################################################################
+	def set_physical_thickness_error(self, physical_thickness_error):
+		"""Set the absolute physical thickness error
+		
+		This method takes a single input argument:
+		  physical_thickness_error   the physical thickness error in nm."""
+		
+		self.physical_thickness_error = physical_thickness_error
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_index_error                                                    #
+	#                                                                    #
+	######################################################################
+	def set_index_error(self, index_error):
+		"""Set the index error
+		
+		This method takes a single input argument:
+		  index_error            the error on the real part of the index
+		                         of layers made of mixtures."""
+		
+		self.index_error = index_error
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_threshold                                                      #
+	#                                                                    #
+	######################################################################
+	def set_threshold(self, threshold):
+		"""Set the threshold
+		
+		This method takes a single input argument:
+		  threshold              the fraction of the largest contribution
+		                         to the error under which derivatives are
+		                         not kept."""
+		
+		self.threshold = threshold
+		
+		self.reset()
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_data_types                                                     #
+	#                                                                    #
+	######################################################################
+	def get_data_types(self):
+		"""Get the data types
+		
+		This method returns a list of the properties that are analysed."""
+		
+		return self.data_types
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_angles                                                         #
+	#                                                                    #
+	######################################################################
+	def get_angles(self):
+		"""Get the angles
+		
+		This method returns the incidence angles."""
+		
+		return self.angles
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_polarization                                                   #
+	#                                                                    #
+	######################################################################
+	def get_polarization(self):
+		"""Get polarization
+		
+		This method returns the polarization."""
+		
+		return self.polarization
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_thickness_error_type                                           #
+	#                                                                    #
+	######################################################################
+	def get_thickness_error_type(self):
+		"""Get the thickness error type
+		
+		This method returns the thickness error type."""
+		
+		return self.thickness_error_type
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_relative_thickness_error                                       #
+	#                                                                    #
+	######################################################################
+	def get_relative_thickness_error(self):
+		"""Get the relative thickness error
+		
+		This method returns the relative thickness error."""
+		
+		return self.relative_thickness_error
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_physical_thickness_error                                       #
+	#                                                                    #
+	######################################################################
+	def get_physical_thickness_error(self):
+		"""Get the absolute error in physical thickness
+		
+		This method returns the absolute physical thickness error."""
+		
+		return self.physical_thickness_error
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_index_error                                                    #
+	#                                                                    #
+	######################################################################
+	def get_index_error(self):
+		"""Get the index error
+		
+		This method returns the error on the index of mixtures."""
+		
+		return self.index_error
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_threshold                                                      #
+	#                                                                    #
+	######################################################################
+	def get_threshold(self):
+		"""Get the threshold
+		
+		This method returns the threshold under which derivatives are not
+		kept."""
+		
+		return self.threshold
+	
+	
+	######################################################################
+	#                                                                    #
+	# calculate                                                          #
+	#                                                                    #
+	######################################################################
+	def calculate(self):
+		"""Calculate the sensitivity of the filter
+		
+		This method neither takes nor return any argument. It is possible
+		to stop its execution by calling the stop method. The attributes of
+		the instance are only modified if the calculation was not stopped.
+		
+		The thickness of every homogeneous layer and the index of every
+		layer made of a mixture are considered. Graded-index layers are
+		not. A filter_error is raised if the derivatives are not available,
+		see optical_filter.analyse_derivatives."""
+		
+		self.stop_ = False
+		self.progress = 0.0
+		
+		for data_type in self.data_types:
+			if data_type not in self.positions_by_data_type:
+				raise optical_filter.filter_error("Sensitivity analysis is not available for %s" % data_holder.DATA_TYPE_NAMES[data_type])
+			if data_type in (data_holder.REFLECTION_PHASE, data_holder.TRANSMISSION_PHASE) and self.polarization not in (S, P):
+				raise optical_filter.filter_error("Sensitivity analysis of the phase is only available for s or p polarization")
+		
+		# Identify the parameters and their expected errors.
+		parameters = []
+		errors = []
+		for i_layer in range(self.nb_layers):
+			if self.original_filter.is_graded(i_layer, FRONT):
+				continue
+			
+			parameters.append((optical_filter.THICKNESS_DERIVATIVE, i_layer))
+			if self.thickness_error_type == RELATIVE_THICKNESS:
+				errors.append(self.relative_thickness_error*self.original_filter.get_layer_thickness(i_layer, FRONT))
+			elif self.thickness_error_type == PHYSICAL_THICKNESS:
+				errors.append(self.physical_thickness_error)
+			
+			if self.original_filter.get_layer_material(i_layer, FRONT).is_mixture():
+				parameters.append((optical_filter.INDEX_DERIVATIVE, i_layer))
+				errors.append(self.index_error)
+		
+		nb_data_types = len(self.data_types)
+		nb_angles = len(self.angles)
+		nb_parameters = len(parameters)
+		
+		# Only significant derivatives are kept, in arrays indexed by
+		# (i_data_type, i_angle, i_parameter). The standard deviation and
+		# the sums of the squares of the contributions of every parameter
+		# are calculated before discarding anything.
+		derivatives = {}
+		std_dev = [[None]*nb_angles for i_data_type in range(nb_data_types)]
+		sum_of_squares = [[0.0]*nb_parameters for i_data_type in range(nb_data_types)]
+		
+		for i_angle, angle in enumerate(self.angles):
+			property_derivatives = self.original_filter.property_derivatives(parameters, angle, self.polarization)
+			
+			if property_derivatives is None or self.stop_: return
+			
+			for i_data_type, data_type in enumerate(self.data_types):
+				position = self.positions_by_data_type[data_type]
+				
+				contributions = [[errors[i_parameter]*derivative for derivative in property_derivatives[i_parameter][position]] for i_parameter in range(nb_parameters)]
+				
+				std_dev[i_data_type][i_angle] = [math.sqrt(sum(contributions[i_parameter][i_wvl]**2 for i_parameter in range(nb_parameters))) for i_wvl in range(self.nb_wavelengths)]
+				
+				largest_contributions = [max(abs(contribution) for contribution in contributions[i_parameter]) for i_parameter in range(nb_parameters)]
+				threshold = self.threshold*max(largest_contributions + [0.0])
+				
+				for i_parameter in range(nb_parameters):
+					sum_of_squares[i_data_type][i_parameter] += sum(contribution*contribution for contribution in contributions[i_parameter])
+					
+					if largest_contributions[i_parameter] > threshold:
+						derivatives[(i_data_type, i_angle, i_parameter)] = array.array("d", property_derivatives[i_parameter][position])
+			
+			# Give other threads a chance...
+			time.sleep(0)
+			
+			if self.stop_: return
+			
+			self.progress = (i_angle + 1)/nb_angles
+		
+		self.parameters = parameters
+		self.errors = errors
+		self.derivatives = derivatives
+		self.std_dev = std_dev
+		self.sum_of_squares = sum_of_squares
+	
+	
+	######################################################################
+	#                                                                    #
+	# stop                                                               #
+	#                                                                    #
+	######################################################################
+	def stop(self):
+		"""Stop the calculation
+		
+		This method neither takes nor return any argument."""
+		
+		self.stop_ = True
+	
+	
+	######################################################################
+	#                                                                    #
+	# reset                                                              #
+	#                                                                    #
+	######################################################################
+	def reset(self):
+		"""Reset the results
+		
+		This method neither takes nor return any argument."""
+		
+		self.parameters = []
+		self.errors = []
+		self.derivatives = {}
+		self.std_dev = []
+		self.sum_of_squares = []
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_wavelengths                                                    #
+	#                                                                    #
+	######################################################################
+	def get_wavelengths(self):
+		"""Get the wavelengths
+		
+		This method returns the wavelengths used in the analysis."""
+		
+		return self.wavelengths
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_parameters                                                     #
+	#                                                                    #
+	######################################################################
+	def get_parameters(self):
+		"""Get the parameters
+		
+		This method returns the parameters that were considered, as a
+		list of (kind, position) tuples where kind is either
+		optical_filter.THICKNESS_DERIVATIVE or
+		optical_filter.INDEX_DERIVATIVE, and the list of their errors."""
+		
+		return self.parameters, self.errors
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_derivatives                                                    #
+	#                                                                    #
+	######################################################################
+	def get_derivatives(self, data_type, i_angle, i_parameter):
+		"""Get the derivatives of a property
+		
+		This method takes 3 arguments:
+		  data_type          the data type;
+		  i_angle            the position of the angle in the list of
+		                     angles;
+		  i_parameter        the position of the parameter in the list of
+		                     parameters;
+		and returns the derivative of the property with regard to the
+		parameter at every wavelength. Derivatives that were not kept are
+		returned as zeros."""
+		
+		i_data_type = self.data_types.index(data_type)
+		
+		try:
+			return self.derivatives[(i_data_type, i_angle, i_parameter)].tolist()
+		except KeyError:
+			return [0.0]*self.nb_wavelengths
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_nb_kept_derivatives                                            #
+	#                                                                    #
+	######################################################################
+	def get_nb_kept_derivatives(self):
+		"""Get the number of kept derivatives
+		
+		This method returns the number of spectra of derivatives that
+		were kept."""
+		
+		return len(self.derivatives)
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_std_dev                                                        #
+	#                                                                    #
+	######################################################################
+	def get_std_dev(self, data_type, i_angle = 0):
+		"""Get the standard deviation of a property
+		
+		This method takes 1 or 2 arguments:
+		  data_type          the data type;
+		  i_angle            (optional) the position of the angle in the
+		                     list of angles, the default value is 0;
+		and returns the standard deviation of the property, at every
+		wavelength, expected from the errors on the parameters."""
+		
+		return self.std_dev[self.data_types.index(data_type)][i_angle]
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_error_budget                                                   #
+	#                                                                    #
+	######################################################################
+	def get_error_budget(self, data_type):
+		"""Get the error budget of a property
+		
+		This method takes a single argument:
+		  data_type          the data type;
+		and returns, for every parameter, a (RMS contribution, fraction)
+		tuple where the RMS contribution is the root mean square, over all
+		wavelengths and angles, of the error on the property caused by
+		the parameter, and the fraction is its part of the total
+		variance."""
+		
+		sum_of_squares = self.sum_of_squares[self.data_types.index(data_type)]
+		nb_values = self.nb_wavelengths*len(self.angles)
+		total = sum(sum_of_squares)
+		
+		budget = []
+		for i_parameter in range(len(self.parameters)):
+			RMS_contribution = math.sqrt(sum_of_squares[i_parameter]/nb_values)
+			if total:
+				fraction = sum_of_squares[i_parameter]/total
+			else:
+				fraction = 0.0
+			budget.append((RMS_contribution, fraction))
+		
+		return budget
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_most_sensitive_layers                                          #
+	#                                                                    #
+	######################################################################
+	def get_most_sensitive_layers(self, data_type, nb_layers = None):
+		"""Get the layers that contribute the most to the error
+		
+		This method takes 1 or 2 arguments:
+		  data_type          the data type;
+		  nb_layers          (optional) the number of layers to return,
+		                     by default all layers are returned;
+		and returns a list of (position, fraction) tuples sorted by
+		decreasing fraction of the total variance of the property caused
+		by the thickness and the index of the layer."""
+		
+		budget = self.get_error_budget(data_type)
+		
+		fractions = {}
+		for i_parameter, (kind, position) in enumerate(self.parameters):
+			fractions[position] = fractions.get(position, 0.0) + budget[i_parameter][1]
+		
+		layers = sorted(fractions.items(), key = lambda item: item[1], reverse = True)
+		
+		if nb_layers is not None:
+			layers = layers[:nb_layers]
+		
+		return layers
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_progress                                                       #
+	#                                                                    #
+	######################################################################
+	def get_progress(self):
+		"""Get the progress of the calculation
+		
+		This method returns the progress of the calculation."""
+		
+		return self.progress
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_header                                                         #
+	#                                                                    #
+	######################################################################
+	def get_header(self):
+		"""Get the header describing the analysis
+		
+		This method returns a string describing the analysis."""
+		
+		if self.thickness_error_type == RELATIVE_THICKNESS:
+			thickness_error = "%.2f %%" % (100.0*self.relative_thickness_error)
+		elif self.thickness_error_type == PHYSICAL_THICKNESS:
+			thickness_error = "%.2f nm" % self.physical_thickness_error
+		
+		return "Sensitivity to %s thickness errors and %.4f index errors for %s" % (thickness_error, self.index_error, export.polarization_text(self.polarization))
+	
+	
+	######################################################################
+	#                                                                    #
+	# save                                                               #
+	#                                                                    #
+	######################################################################
+	def save(self, outfile):
+		"""Save the results of the analysis
+		
+		This method takes one argument:
+		  outfile            the file in which to write."""
+		
+		parameter_names = {optical_filter.THICKNESS_DERIVATIVE: "thickness",
+		                   optical_filter.INDEX_DERIVATIVE: "index"}
+		
+		# Write the header.
+		outfile.write("%s\n" % self.get_header())
+		
+		for i_data_type, data_type in enumerate(self.data_types):
+			
+			# Write the error budget.
+			outfile.write("Error budget of %s\n" % data_holder.DATA_TYPE_NAMES[data_type])
+			outfile.write("%5s %15s %15s %15s %15s\n" % ("layer", "parameter", "error", "RMS contrib.", "fraction"))
+			
+			budget = self.get_error_budget(data_type)
+			for i_parameter, (kind, position) in enumerate(self.parameters):
+				outfile.write("%5i %15s %15.6f %15.6e %15.6f\n" % (position, parameter_names[kind], self.errors[i_parameter], budget[i_parameter][0], budget[i_parameter][1]))
+			
+			# Write the standard deviation at every angle.
+			for i_angle, angle in enumerate(self.angles):
+				outfile.write("%s at %.2f degrees\n" % (data_holder.DATA_TYPE_NAMES[data_type], angle))
+				outfile.write("%15s %15s\n" % ("wavelength (nm)", "std. dev."))
+				
+				for i_wvl in range(self.nb_wavelengths):
+					outfile.write("%15.6f %15.6e\n" % (self.wavelengths[i_wvl], self.std_dev[i_data_type][i_angle][i_wvl]))
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_columns                                                        #
+	#                                                                    #
+	######################################################################
+	def get_columns(self):
+		"""Get the results of the analysis in columns
+		
+		This method returns a list of tables, one for every data type and
+		angle, that can be exported with export.export_columns. Every
+		table is a tuple of a title, a list of column titles and a list of
+		columns. The columns are the wavelength, the standard deviation
+		and the kept derivatives."""
+		
+		parameter_names = {optical_filter.THICKNESS_DERIVATIVE: "d/d thickness",
+		                   optical_filter.INDEX_DERIVATIVE: "d/d index"}
+		
+		header = self.get_header()
+		wavelengths = export.to_list(self.wavelengths)
+		
+		tables = []
+		
+		for i_data_type, data_type in enumerate(self.data_types):
+			for i_angle, angle in enumerate(self.angles):
+				title = "%s: %s at %.2f degrees" % (header, data_holder.DATA_TYPE_NAMES[data_type], angle)
+				column_titles = ["wavelength (nm)", "std. dev."]
+				columns = [wavelengths, self.std_dev[i_data_type][i_angle]]
+				
+				for i_parameter, (kind, position) in enumerate(self.parameters):
+					key = (i_data_type, i_angle, i_parameter)
+					if key in self.derivatives:
+						column_titles.append("%s %i" % (parameter_names[kind], position))
+						columns.append(self.derivatives[key].tolist())
+				
+				tables.append((title, column_titles, columns))
+		
+		return tables
@@ -65,7 +65,11 @@ class project(object):
 	"""A class to represent an optical coating design project
 	
 	This class holds together a list of filters and a list of targets. In
-	addition, it provides the possibility to set a multiline comment."""
+	addition, it provides the possibility to set a multiline comment.
+	
+	Filters and targets can be added in unparsed form, as the lines of
+	their section in a project file. They are then only parsed when they
+	are first accessed."""
 	
 	
 	######################################################################
@@ -91,6 +95,13 @@ class project(object):
 		self.filters = []
 		self.targets = []
 		
+		# The sections of the project file of the filters and targets that
+		# were not parsed yet. Each unparsed section is a tuple of the lines
+		# of the section and of the version of the file. When a filter or a
+		# target is parsed, its section is replaced by None.
+		self.filter_sections = []
+		self.target_sections = []
+		
 		self.nb_filters = 0
 		self.nb_targets = 0
 		
@@ -160,6 +171,7 @@ class project(object):
 			filter = optical_filter.optical_filter(self.material_catalog)
 		
 		self.filters.append(filter)
+		self.filter_sections.append(None)
 		
 		self.nb_filters += 1
 		
@@ -168,6 +180,29 @@ class project(object):
 		return self.filters.index(filter)
 	
 	
+	######################################################################
+	#                                                                    #
+	# add_filter_section                                                 #
+	#                                                                    #
+	######################################################################
+	def add_filter_section(self, lines, file_version):
+		"""Add an unparsed filter to the project
+		
+		This method takes 2 input arguments:
+		  lines          the lines of the filter section of a project file;
+		  file_version   the version of the file;
+		and returns the index of the filter that was added.
+		
+		The filter is parsed when it is first accessed."""
+		
+		self.filters.append(None)
+		self.filter_sections.append((lines, file_version))
+		
+		self.nb_filters += 1
+		
+		return self.nb_filters - 1
+	
+	
 	######################################################################
 	#                                                                    #
 	# add_target                                                         #
@@ -180,6 +215,7 @@ class project(object):
 		  target       the target to add."""
 		
 		self.targets.append(target)
+		self.target_sections.append(None)
 		self.nb_targets += 1
 		
 		self.modified = True
@@ -187,6 +223,29 @@ class project(object):
 		return self.targets.index(target)
 	
 	
+	######################################################################
+	#                                                                    #
+	# add_target_section                                                 #
+	#                                                                    #
+	######################################################################
+	def add_target_section(self, lines, file_version):
+		"""Add an unparsed target to the project
+		
+		This method takes 2 input arguments:
+		  lines          the lines of the target section of a project file;
+		  file_version   the version of the file;
+		and returns the index of the target that was added.
+		
+		The target is parsed when it is first accessed."""
+		
+		self.targets.append(None)
+		self.target_sections.append((lines, file_version))
+		
+		self.nb_targets += 1
+		
+		return self.nb_targets - 1
+	
+	
 	######################################################################
 	#                                                                    #
 	# remove_filter                                                      #
@@ -199,6 +258,7 @@ class project(object):
 		  filter       the number of the filter to remove."""
 		
 		self.filters.pop(nb)
+		self.filter_sections.pop(nb)
 		self.nb_filters -= 1
 		
 		self.modified = True
@@ -216,6 +276,7 @@ class project(object):
 		  target       the number of the target to remove."""
 		
 		self.targets.pop(nb)
+		self.target_sections.pop(nb)
 		self.nb_targets -= 1
 		
 		self.modified = True
@@ -242,7 +303,11 @@ class project(object):
 	def get_filters(self):
 		"""Get the list of filters in the project
 		
-		This method returns the list of filters in the project."""
+		This method returns the list of filters in the project. All the
+		filters that were not parsed yet are parsed."""
+		
+		for nb in range(self.nb_filters):
+			self.load_filter(nb)
 		
 		return self.filters
 	
@@ -257,11 +322,54 @@ class project(object):
 		
 		This method takes a single input argument:
 		  nb       the number of the filter
-		and returns the filter."""
+		and returns the filter.
+		
+		If the filter was not parsed yet, it is parsed."""
+		
+		self.load_filter(nb)
 		
 		return self.filters[nb]
 	
 	
+	######################################################################
+	#                                                                    #
+	# load_filter                                                        #
+	#                                                                    #
+	######################################################################
+	def load_filter(self, nb):
+		"""Parse a filter of the project if it was not parsed yet
+		
+		This method takes a single input argument:
+		  nb       the number of the filter.
+		
+		If an error occurs during the parsing of the filter, a
+		project_error, a filter_error or a material_error is raised."""
+		
+		if self.filter_sections[nb] is None:
+			return
+		
+		lines, file_version = self.filter_sections[nb]
+		
+		self.filters[nb] = parse_filter_section(lines, file_version, self.material_catalog)
+		self.filter_sections[nb] = None
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_filter_section                                                 #
+	#                                                                    #
+	######################################################################
+	def get_filter_section(self, nb):
+		"""Get the unparsed section of a filter
+		
+		This method takes a single input argument:
+		  nb       the number of the filter
+		and returns the lines and the file version of the filter section,
+		or None if the filter was already parsed."""
+		
+		return self.filter_sections[nb]
+	
+	
 	######################################################################
 	#                                                                    #
 	# get_nb_targets                                                     #
@@ -279,7 +387,7 @@ class project(object):
 			return self.nb_targets
 		
 		nb_targets = 0
-		for target in self.targets:
+		for target in self.get_targets():
 			if target.get_kind() == kind:
 				nb_targets += 1
 		
@@ -294,7 +402,11 @@ class project(object):
 	def get_targets(self):
 		"""Get the list of targets in the project
 		
-		This method returns the list of targets in the project."""
+		This method returns the list of targets in the project. All the
+		targets that were not parsed yet are parsed."""
+		
+		for nb in range(self.nb_targets):
+			self.load_target(nb)
 		
 		return self.targets
 	
@@ -309,11 +421,54 @@ class project(object):
 		
 		This method takes a single input argument:
 		  nb       the number of the target
-		and returns the target."""
+		and returns the target.
+		
+		If the target was not parsed yet, it is parsed."""
+		
+		self.load_target(nb)
 		
 		return self.targets[nb]
 	
 	
+	######################################################################
+	#                                                                    #
+	# load_target                                                        #
+	#                                                                    #
+	######################################################################
+	def load_target(self, nb):
+		"""Parse a target of the project if it was not parsed yet
+		
+		This method takes a single input argument:
+		  nb       the number of the target.
+		
+		If an error occurs during the parsing of the target, a
+		project_error or a target_error is raised."""
+		
+		if self.target_sections[nb] is None:
+			return
+		
+		lines, file_version = self.target_sections[nb]
+		
+		self.targets[nb] = parse_target_section(lines, file_version)
+		self.target_sections[nb] = None
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_target_section                                                 #
+	#                                                                    #
+	######################################################################
+	def get_target_section(self, nb):
+		"""Get the unparsed section of a target
+		
+		This method takes a single input argument:
+		  nb       the number of the target
+		and returns the lines and the file version of the target section,
+		or None if the target was already parsed."""
+		
+		return self.target_sections[nb]
+	
+	
 	######################################################################
 	#                                                                    #
 	# set_modified                                                       #
@@ -339,16 +494,18 @@ class project(object):
 		"""Get if the project was modified
 		
 		This method returns True or False depending if the project, or any
-		filter or target included in the project have been modified."""
+		filter or target included in the project have been modified.
+		Filters and targets that were not parsed yet cannot have been
+		modified."""
 		
 		if self.modified:
 			return True
 		
 		for i in range(self.nb_filters):
-			if self.filters[i].get_modified():
+			if self.filters[i] is not None and self.filters[i].get_modified():
 				return True
 		for i in range(self.nb_targets):
-			if self.targets[i].get_modified():
+			if self.targets[i] is not None and self.targets[i].get_modified():
 				return True
 		
 		return False
@@ -360,18 +517,23 @@ class project(object):
 # parse_project                                                        #
 #                                                                      #
 ########################################################################
-def parse_project(lines, material_catalog = None):
+def parse_project(lines, material_catalog = None, lazy = False):
 	"""Parse a project file
 	
-	This function takes 1 or 2 input arguments:
-	  lines             the lines of a project file (a list of strings);
+	This function takes 1 to 3 input arguments:
+	  lines             the lines of a project file (a list of strings
+	                    or an open file);
 	  material_catalog  (optional) the material catalog to use with this
 		                  project;
+	  lazy              (optional) a boolean indicating if the parsing of
+	                    filters and targets should be delayed until they
+	                    are accessed, default is False;
 	and returns a single output argument:
 	  project           the project.
 	
 	If an error occurs during the parsing of the file, a project_error
-  is raised."""
+  is raised. When lazy is True, errors in filters and targets are only
+  raised when they are accessed."""
   
 	try:
 		keywords, values = simple_parser.parse(lines)
@@ -409,24 +571,16 @@ def parse_project(lines, material_catalog = None):
 			new_project.set_comment(comment)
 		
 		elif keyword == "Filter":
-			try:
-				filter = optical_filter.parse_filter(value, file_version, material_catalog)
-			except (optical_filter.filter_error, materials.material_error), error:
-				if file_version > version.version(release.VERSION):
-					raise project_error("%s\n\nThe project file was created with a newer version of OpenFilters, which may explain this error" % error)
-				else:
-					raise
-			new_project.add_filter(filter)
+			if lazy:
+				new_project.add_filter_section(value, file_version)
+			else:
+				new_project.add_filter(parse_filter_section(value, file_version, material_catalog))
 		
 		elif keyword == "Target":
-			try:
-				target = targets.parse_target(value, file_version)
-			except targets.target_error, error:
-				if file_version > version.version(release.VERSION):
-					raise project_error("%s\n\nThis error may be due to the fact that the project file was created with a newer version of OpenFilters" % error)
-				else:
-					raise
-			new_project.add_target(target)
+			if lazy:
+				new_project.add_target_section(value, file_version)
+			else:
+				new_project.add_target(parse_target_section(value, file_version))
 		
 		elif keyword == "Version":
 			raise project_error("Only one version is allowed on the first line of the project file")
@@ -445,14 +599,17 @@ def parse_project(lines, material_catalog = None):
 # read_project                                                         #
 #                                                                      #
 ########################################################################
-def read_project(filename, material_catalog = None):
+def read_project(filename, material_catalog = None, lazy = False):
 	"""Read a project file
 	
-	This function takes 1 or 2 input arguments:
+	This function takes 1 to 3 input arguments:
 	  filename          the name of the project file, including the
 	                    directory;
 	  material_catalog  (optional) the material catalog to use with this
 		                  project;
+	  lazy              (optional) a boolean indicating if the parsing of
+	                    filters and targets should be delayed until they
+	                    are accessed, default is False;
 	and returns a single output argument:
 	  project           the project.
 	
@@ -464,11 +621,11 @@ def read_project(filename, material_catalog = None):
 	except IOError:
 		raise project_error("This file does not exist")
 	
-	lines = file.readlines()
-	
-	file.close()
-	
-	new_project = parse_project(lines, material_catalog)
+	# The file is parsed as it is read.
+	try:
+		new_project = parse_project(file, material_catalog, lazy)
+	finally:
+		file.close()
 	
 	return new_project
 
@@ -497,14 +654,27 @@ def write_project(project, filename):
 		temporary_file.write("\t*%s*\n" % line)
 	temporary_file.write("End\n")
 	
-	for filter in project.get_filters():
+	# Filters and targets that were not parsed are written back as they
+	# were read, unless they were read from a file written by another
+	# version of OpenFilters.
+	current_version = version.version(release.VERSION)
+	
+	for nb in range(project.get_nb_filters()):
 		temporary_file.write("Filter:\n")
-		optical_filter.write_filter(filter, temporary_file, "\t")
+		section = project.get_filter_section(nb)
+		if section and section[1] == current_version:
+			simple_parser.write_lines(temporary_file, section[0])
+		else:
+			optical_filter.write_filter(project.get_filter(nb), temporary_file, "\t")
 		temporary_file.write("End\n")
 	
-	for target in project.get_targets():
+	for nb in range(project.get_nb_targets()):
 		temporary_file.write("Target:\n")
-		targets.write_target(target, temporary_file, "\t")
+		section = project.get_target_section(nb)
+		if section and section[1] == current_version:
+			simple_parser.write_lines(temporary_file, section[0])
+		else:
+			targets.write_target(project.get_target(nb), temporary_file, "\t")
 		temporary_file.write("End\n")
 	
 	temporary_file.close()
@@ -517,3 +687,63 @@ def write_project(project, filename):
 	os.rename(temporary_file_name, filename)
 	
 	project.set_modified(False)
+
+
+
+########################################################################
+#                                                                      #
+# parse_filter_section                                                 #
+#                                                                      #
+########################################################################
+def parse_filter_section(lines, file_version, material_catalog = None):
+	"""Parse the section of a project file describing a filter
+	
+	This function takes 2 or 3 input arguments:
+	  lines             the lines of the filter section;
+	  file_version      the version of the project file;
+	  material_catalog  (optional) the material catalog to use with this
+		                  filter;
+	and returns a single output argument:
+	  filter            the filter.
+	
+	If the project file was created with a newer version of OpenFilters,
+	errors are reported as a project_error mentioning it."""
+	
+	try:
+		filter = optical_filter.parse_filter(lines, file_version, material_catalog)
+	except (optical_filter.filter_error, materials.material_error), error:
+		if file_version > version.version(release.VERSION):
+			raise project_error("%s\n\nThe project file was created with a newer version of OpenFilters, which may explain this error" % error)
+		else:
+			raise
+	
+	return filter
+
+
+
+########################################################################
+#                                                                      #
+# parse_target_section                                                 #
+#                                                                      #
+########################################################################
+def parse_target_section(lines, file_version):
+	"""Parse the section of a project file describing a target
+	
+	This function takes 2 input arguments:
+	  lines             the lines of the target section;
+	  file_version      the version of the project file;
+	and returns a single output argument:
+	  target            the target.
+	
+	If the project file was created with a newer version of OpenFilters,
+	errors are reported as a project_error mentioning it."""
+	
+	try:
+		target = targets.parse_target(lines, file_version)
+	except targets.target_error, error:
+		if file_version > version.version(release.VERSION):
+			raise project_error("%s\n\nThis error may be due to the fact that the project file was created with a newer version of OpenFilters" % error)
+		else:
+			raise
+	
+	return target
@@ -54,7 +54,9 @@ def parse(lines):
 	"""Parse lines written in a simple format
 	
 	This function takes a single argument:
-	  lines                a list of lines to parse.
+	  lines                the lines to parse, either a list of lines or
+	                       any other iterable returning lines, such as a
+	                       file object;
 	and it returns two lists containing the names of the properties and
 	their values.
 	
@@ -65,27 +67,33 @@ def parse(lines):
 	value of the property is written on multiple lines, and the end of
 	the property in indicated by a line containing only "end".
 	
+	The lines are consumed in a single pass, so that the time required
+	to parse a file is proportional to its length and that a file object
+	can be parsed without first reading all its lines in memory. The
+	lines provided as a list are not modified.
+	
 	No attempt is made to convert the value of the properties; it is left
 	to the calling function to interpret the properties and they are
 	returned as strings."""
 	
-	# Remove leading and trailing spaces, tabs, returns and line feeds.
-	for i in range(len(lines)):
-		lines[i] = lines[i].strip()
+	# Both loops share the same iterator so that the lines of multiline
+	# properties are consumed only once.
+	lines = iter(lines)
 	
 	# Do a first separation of the elements of the file. If a line ends
-	# with ":", look for the end statement.
+	# with ":", look for the end statement. Leading and trailing spaces,
+	# tabs, returns and line feeds are removed.
 	keywords = []
 	values = []
-	while lines:
-		line = lines.pop(0)
+	for line in lines:
+		line = line.strip()
 		if line:
 			if line.count(":") == 1 and line.endswith(":"):
 				keyword = line[0:-1].strip()
 				value = []
 				level = 1
-				while lines:
-					line = lines.pop(0)
+				for line in lines:
+					line = line.strip()
 					if line and line.count(":") == 1 and line.endswith(":"):
 						level += 1
 					elif line.upper() == "END":
@@ -117,12 +125,44 @@ def parse(lines):
 def parse_file(infile):
 	"""Parse simple files
 	
-	Read a file and parse it using the parse function.
+	Read a file and parse it using the parse function. The lines are
+	read from the file as they are parsed.
 	
 	This function takes a single input argument:
 	  infile               the file to parse."""
 	
-	lines = infile.readlines()
-	keywords, values = parse(lines)
+	keywords, values = parse(infile)
 	
 	return keywords, values
+
+
+
+########################################################################
+#                                                                      #
+# write_lines                                                          #
+#                                                                      #
+########################################################################
+def write_lines(outfile, lines, prefix = ""):
+	"""Write back the lines of a multiline property
+	
+	This function takes 2 or 3 arguments:
+	  outfile              the file in which to write;
+	  lines                the value of a multiline property, as returned
+	                       by parse;
+	  prefix               (optional) a prefix to add to every line.
+	
+	This function is the reverse of parse for multiline properties: the
+	indentation of nested multiline properties, removed by parse, is
+	restored so that a property can be written back to a file without
+	interpreting it."""
+	
+	level = 1
+	for line in lines:
+		if line.upper() == "END" and level > 1:
+			level -= 1
+			outfile.write(prefix + "\t"*level + line + "\n")
+		elif line.count(":") == 1 and line.endswith(":"):
+			outfile.write(prefix + "\t"*level + line + "\n")
+			level += 1
+		else:
+			outfile.write(prefix + "\t"*level + line + "\n")
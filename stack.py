@@ -278,3 +278,83 @@ def analyse_stack_formula(formula):
 			multiplication_factors.pop(i)
 	
 	return elements, multiplication_factors
+
+
+
+########################################################################
+#                                                                      #
+# find_repetitions                                                     #
+#                                                                      #
+########################################################################
+def find_repetitions(sequence, max_period = None):
+	"""Find the periodic parts of a sequence of layers
+	
+	This function takes 1 or 2 arguments:
+	  sequence                 a list of hashable values describing the
+	                           layers, identical layers must have equal
+	                           values;
+	  max_period               (optional) the maximum number of layers in
+	                           a period, by default there is no limit;
+	and returns a list of (start, period, repetitions) tuples covering
+	the whole sequence in order, where the layers from start to
+	start+period are repeated the given number of times.
+	
+	This is used to multiply the matrices of a period only once and then
+	raise the result to a power by repeated squaring. A repetition is
+	only kept when it reduces the number of matrix multiplications, the
+	other layers are returned with a period and a number of repetitions
+	of 1. Stacks made from formulas such as (HL)^20 and periodic
+	graded-index profiles are found automatically, whatever the way
+	they were created or modified."""
+	
+	nb_layers = len(sequence)
+	
+	# For every layer, find the position of the next identical layer.
+	next_occurrence = [nb_layers]*nb_layers
+	last_occurrence = {}
+	for i in range(nb_layers-1, -1, -1):
+		next_occurrence[i] = last_occurrence.get(sequence[i], nb_layers)
+		last_occurrence[sequence[i]] = i
+	
+	repetitions = []
+	
+	i = 0
+	while i < nb_layers:
+		best_period = 1
+		best_nb_repetitions = 1
+		best_gain = 0
+		
+		# Only the positions of the next occurences of the layer can be
+		# the beginning of a second period.
+		j = next_occurrence[i]
+		while j < nb_layers:
+			period = j - i
+			if max_period and period > max_period:
+				break
+			
+			# Stop when even a perfectly periodic sequence could not do
+			# better than what was already found.
+			if nb_layers - i - period <= best_gain:
+				break
+			
+			length = 0
+			while j+length < nb_layers and sequence[i+length] == sequence[j+length]:
+				length += 1
+			nb_repetitions = (length+period)//period
+			
+			# The number of multiplications saved, considering that the
+			# power of the period requires one squaring per bit of the
+			# number of repetitions and one multiplication per set bit.
+			binary = bin(nb_repetitions)[2:]
+			gain = period*(nb_repetitions-1) - (len(binary)-1) - binary.count("1")
+			if gain > best_gain:
+				best_period = period
+				best_nb_repetitions = nb_repetitions
+				best_gain = gain
+			
+			j = next_occurrence[j]
+		
+		repetitions.append((i, best_period, best_nb_repetitions))
+		i += best_period*best_nb_repetitions
+	
+	return repetitions
@@ -0,0 +1,500 @@
+# sweep.py
+#
+# Evaluate families of filters obtained by varying parameters of a
+# filter.
+#
+# Copyright (c) 2015 Stephane Larouche.
+#
+# This file is part of OpenFilters.
+#
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+import itertools
+try:
+	import multiprocessing
+except ImportError:
+	multiprocessing = None
+
+import config
+from definitions import *
+import data_holder
+import export
+import materials
+import optical_filter
+import release
+import stack
+import version
+import workers
+
+
+
+########################################################################
+#                                                                      #
+# sweep_error                                                          #
+#                                                                      #
+########################################################################
+class sweep_error(Exception):
+	"""Exception class for parameter sweep errors"""
+	
+	def __init__(self, value = ""):
+		self.value = value
+	
+	def __str__(self):
+		if self.value:
+			return "Sweep error: %s." % self.value
+		else:
+			return "Sweep error."
+
+
+
+########################################################################
+#                                                                      #
+# parameter_sweep                                                      #
+#                                                                      #
+########################################################################
+class parameter_sweep(object):
+	"""A class to calculate the properties of the filters obtained by
+	varying one or many parameters of a filter
+	
+	Every parameter is described by a name, a list of values and a
+	modification that applies a value to a filter. When many parameters
+	are given, all the combinations of their values are evaluated. The
+	modified filters are made in the calling process and their properties
+	are calculated in worker processes, or directly in the calling
+	process when a single process is used."""
+	
+	
+	methods_by_data_type = {data_holder.REFLECTION: optical_filter.optical_filter.reflection,
+	                        data_holder.TRANSMISSION: optical_filter.optical_filter.transmission,
+	                        data_holder.ABSORPTION: optical_filter.optical_filter.absorption,
+	                        data_holder.REFLECTION_PHASE: optical_filter.optical_filter.reflection_phase,
+	                        data_holder.TRANSMISSION_PHASE: optical_filter.optical_filter.transmission_phase,
+	                        data_holder.REFLECTION_GD: optical_filter.optical_filter.reflection_GD,
+	                        data_holder.TRANSMISSION_GD: optical_filter.optical_filter.transmission_GD,
+	                        data_holder.REFLECTION_GDD: optical_filter.optical_filter.reflection_GDD,
+	                        data_holder.TRANSMISSION_GDD: optical_filter.optical_filter.transmission_GDD,
+	                        data_holder.COLOR: optical_filter.optical_filter.color}
+	
+	
+	######################################################################
+	#                                                                    #
+	# __init__                                                           #
+	#                                                                    #
+	######################################################################
+	def __init__(self, original_filter):
+		"""Initialize the sweep
+		
+		This method takes a single input argument:
+		  original_filter        the filter to modify; it is not modified
+		                         itself."""
+		
+		self.original_filter = original_filter
+		
+		self.parameters = []
+		
+		self.data_types = [data_holder.REFLECTION, data_holder.TRANSMISSION]
+		
+		self.angle = 0.0
+		self.polarization = UNPOLARIZED
+		self.illuminant_name = self.original_filter.get_illuminant()
+		self.observer_name = self.original_filter.get_observer()
+		
+		self.nb_processes = config.SWEEP_NB_PROCESSES
+		
+		self.wavelengths = []
+		self.combinations = []
+		self.results = []
+		
+		self.progress = 0.0
+		
+		self.stop_ = False
+	
+	
+	######################################################################
+	#                                                                    #
+	# add_parameter                                                      #
+	#                                                                    #
+	######################################################################
+	def add_parameter(self, name, values, modification):
+		"""Add a parameter to vary
+		
+		This method takes 3 arguments:
+		  name                   the name of the parameter;
+		  values                 the list of values of the parameter;
+		  modification           the modification applying a value to a
+		                         filter, either the name of a method of
+		                         the filter taking the value as its only
+		                         argument (for example
+		                         "set_center_wavelength" or
+		                         "set_substrate") or a function taking
+		                         the filter and the value as arguments.
+		
+		The results have one dimension by parameter, in the order in which
+		they were added."""
+		
+		if not values:
+			raise sweep_error("Parameter %s must have at least one value" % name)
+		
+		if isinstance(modification, str):
+			if not hasattr(self.original_filter, modification):
+				raise sweep_error("Filters have no method %s" % modification)
+			method_name = modification
+			modification = lambda filter, value: getattr(filter, method_name)(value)
+		
+		self.parameters.append((name, list(values), modification))
+	
+	
+	######################################################################
+	#                                                                    #
+	# set_data_types                                                     #
+	# set_angle                                                          #
+	# set_polarization                                                   #
+	# set_illuminant                                                     #
+	# set_observer                                                       #
+	# set_nb_processes                                                   #
+	#                                                                    #
+	######################################################################
+	def set_data_types(self, data_types):
+		"""Set the data types to calculate (data_holder constants)"""
+		
+		for data_type in data_types:
+			if data_type not in self.methods_by_data_type:
+				raise sweep_error("Cannot sweep %s" % data_holder.DATA_TYPE_NAMES.get(data_type, data_type))
+		
+		self.data_types = data_types
+	
+	def set_angle(self, angle):
+		"""Set the angle of incidence"""
+		
+		self.angle = angle
+	
+	def set_polarization(self, polarization):
+		"""Set the polarization"""
+		
+		self.polarization = polarization
+	
+	def set_illuminant(self, illuminant_name):
+		"""Set the illuminant used to calculate colors"""
+		
+		self.illuminant_name = illuminant_name
+	
+	def set_observer(self, observer_name):
+		"""Set the observer used to calculate colors"""
+		
+		self.observer_name = observer_name
+	
+	def set_nb_processes(self, nb_processes):
+		"""Set the number of worker processes
+		
+		When 0, one process is used for every processor; when 1, the
+		calculations are done in the calling process."""
+		
+		self.nb_processes = nb_processes
+	
+	
+	######################################################################
+	#                                                                    #
+	# make_filters                                                       #
+	#                                                                    #
+	######################################################################
+	def make_filters(self):
+		"""Make the modified filters
+		
+		This method returns a list of tuples of parameter values and a
+		list of the corresponding filters, in the order of the results."""
+		
+		combinations = list(itertools.product(*[values for name, values, modification in self.parameters]))
+		
+		filters = []
+		for combination in combinations:
+			filter = self.original_filter.clone()
+			for (name, values, modification), value in zip(self.parameters, combination):
+				modification(filter, value)
+			filters.append(filter)
+		
+		return combinations, filters
+	
+	
+	######################################################################
+	#                                                                    #
+	# simulate                                                           #
+	#                                                                    #
+	######################################################################
+	def simulate(self):
+		"""Calculate the properties of all the modified filters
+		
+		This method neither takes nor return any argument. It is possible
+		to stop its execution by calling the stop method. The attributes of
+		the instance are only modified if the calculation was not
+		stopped."""
+		
+		if not self.parameters:
+			raise sweep_error("At least one parameter must be varied")
+		
+		self.stop_ = False
+		self.progress = 0.0
+		
+		combinations, filters = self.make_filters()
+		nb_filters = len(filters)
+		
+		nb_processes = workers.get_nb_processes(self.nb_processes, nb_filters)
+		
+		# Worker processes recreate the filters and their materials from
+		# their description; in this process, the filters are evaluated
+		# directly.
+		if nb_processes > 1:
+			catalog_description = materials.describe_material_catalog(self.original_filter.get_material_catalog())
+			arguments = []
+			for i_filter, filter in enumerate(filters):
+				arguments.append((i_filter, catalog_description, materials.describe_materials(filter.get_materials()), workers.write_to_text(optical_filter.write_filter, filter), self.data_types, self.angle, self.polarization, self.illuminant_name, self.observer_name))
+			pool = multiprocessing.Pool(nb_processes)
+			answers = pool.imap_unordered(evaluate_filter, arguments)
+		else:
+			pool = None
+			answers = ((i_filter,) + calculate_filter_values(filter, self.data_types, self.angle, self.polarization, self.illuminant_name, self.observer_name) for i_filter, filter in enumerate(filters))
+		
+		filters_values = [None]*nb_filters
+		wavelengths = None
+		try:
+			for nb_done, (i_filter, filter_wavelengths, filter_values) in enumerate(answers):
+				if wavelengths is None:
+					wavelengths = filter_wavelengths
+				elif filter_wavelengths != wavelengths:
+					raise sweep_error("The modifications must not change the wavelengths")
+				filters_values[i_filter] = filter_values
+				
+				self.progress = float(nb_done+1)/nb_filters
+				
+				if self.stop_:
+					return
+		
+		finally:
+			if pool:
+				pool.terminate()
+				pool.join()
+		
+		# Arrange the results in nested lists with one dimension by
+		# parameter.
+		shape = [len(values) for name, values, modification in self.parameters]
+		self.wavelengths = wavelengths
+		self.combinations = combinations
+		self.results = [reshape([filter_values[i_data_type] for filter_values in filters_values], shape) for i_data_type in range(len(self.data_types))]
+	
+	
+	######################################################################
+	#                                                                    #
+	# stop                                                               #
+	#                                                                    #
+	######################################################################
+	def stop(self):
+		"""Stop the simulation
+		
+		This method neither takes nor return any argument."""
+		
+		self.stop_ = True
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_parameters                                                     #
+	# get_wavelengths                                                    #
+	# get_results                                                        #
+	# get_progress                                                       #
+	#                                                                    #
+	######################################################################
+	def get_parameters(self):
+		"""Get the list of tuples of the names and values of the
+		parameters"""
+		
+		return [(name, values) for name, values, modification in self.parameters]
+	
+	def get_wavelengths(self):
+		"""Get the wavelengths"""
+		
+		return self.wavelengths
+	
+	def get_results(self):
+		"""Get the results
+		
+		This method returns a list with an element for every data type.
+		Every element is made of nested lists with a dimension for every
+		parameter and a last dimension for the wavelengths; for example
+		results[i_data_type][i_value_1][i_value_2][i_wavelength]. For
+		colors, the last dimension contains the values of the reflected and
+		transmitted colors in the order of export.COLOR_COLUMN_TITLES."""
+		
+		return self.results
+	
+	def get_progress(self):
+		"""Get the fraction of the filters already evaluated"""
+		
+		return self.progress
+	
+	
+	######################################################################
+	#                                                                    #
+	# get_columns                                                        #
+	#                                                                    #
+	######################################################################
+	def get_columns(self):
+		"""Get the results in columns
+		
+		This method returns a list of tables, one for every data type,
+		that can be exported with export.export_columns. Every table is a
+		tuple of a title, a list of column titles and a list of columns.
+		The tables have a row for every combination of parameter values
+		and wavelength (or color), with a column for every parameter. The
+		list is empty if the filters were not simulated yet."""
+		
+		if not self.results:
+			return []
+		
+		parameter_names = [name for name, values, modification in self.parameters]
+		parameter_values = [[value for value in combination] for combination in self.combinations]
+		
+		tables = []
+		
+		for i_data_type, data_type in enumerate(self.data_types):
+			values = flatten(self.results[i_data_type], len(self.parameters))
+			
+			if data_type == data_holder.COLOR:
+				title = "%s at %.2f degrees for %s (%s, %s)" % (data_holder.DATA_TYPE_NAMES[data_type], self.angle, export.polarization_text(self.polarization), self.illuminant_name, self.observer_name)
+				column_titles = parameter_names + ["R %s" % name for name in export.COLOR_COLUMN_TITLES] + ["T %s" % name for name in export.COLOR_COLUMN_TITLES]
+				columns = [list(column) for column in zip(*parameter_values)] + [list(column) for column in zip(*values)]
+			
+			else:
+				title = "%s at %.2f degrees for %s" % (data_holder.DATA_TYPE_NAMES[data_type], self.angle, export.polarization_text(self.polarization))
+				column_titles = parameter_names + ["wavelength (nm)", data_holder.DATA_TYPE_NAMES[data_type]]
+				nb_wavelengths = len(self.wavelengths)
+				columns = [[combination[i_parameter] for combination in parameter_values for i_wavelength in range(nb_wavelengths)] for i_parameter in range(len(parameter_names))]
+				columns.append(self.wavelengths*len(values))
+				columns.append([value for filter_values in values for value in filter_values])
+			
+			tables.append((title, column_titles, columns))
+		
+		return tables
+
+
+
+########################################################################
+#                                                                      #
+# evaluate_filter                                                      #
+#                                                                      #
+########################################################################
+def evaluate_filter(arguments):
+	"""Calculate the properties of a filter
+	
+	This function takes a single argument, a tuple containing the number
+	of the filter, the description of the material catalog, the states of
+	the materials of the filter, the filter written as text, the data
+	types, the angle, the polarization, the illuminant and the observer.
+	It returns a tuple containing the number of the filter, the list of
+	wavelengths and a list of the values of every data type.
+	
+	This function is executed in worker processes; its arguments and
+	return value are therefore made of simple types."""
+	
+	i_filter, catalog_description, material_states, filter_text, data_types, angle, polarization, illuminant_name, observer_name = arguments
+	
+	material_catalog = materials.material_catalog_from_states(catalog_description, material_states)
+	filter = optical_filter.parse_filter(filter_text.splitlines(), version.version(release.VERSION), material_catalog)
+	
+	return (i_filter,) + calculate_filter_values(filter, data_types, angle, polarization, illuminant_name, observer_name)
+
+
+
+########################################################################
+#                                                                      #
+# calculate_filter_values                                              #
+#                                                                      #
+########################################################################
+def calculate_filter_values(filter, data_types, angle, polarization, illuminant_name, observer_name):
+	"""Calculate the properties of a filter
+	
+	This function takes 6 arguments:
+	  filter                 the filter;
+	  data_types             the data types to calculate;
+	  angle                  the angle of incidence;
+	  polarization           the polarization;
+	  illuminant_name        the name of the illuminant;
+	  observer_name          the name of the observer;
+	and returns a tuple containing the list of wavelengths and a list of
+	the values of every data type."""
+	
+	values = []
+	for data_type in data_types:
+		if data_type == data_holder.COLOR:
+			R_color, T_color = filter.color(angle, polarization, illuminant_name, observer_name)
+			values.append(export.get_color_values(R_color) + export.get_color_values(T_color))
+		else:
+			values.append(export.to_list(parameter_sweep.methods_by_data_type[data_type](filter, angle, polarization)))
+	
+	return export.to_list(filter.get_wavelengths()), values
+
+
+
+########################################################################
+#                                                                      #
+# stack_formula_modification                                           #
+#                                                                      #
+########################################################################
+def stack_formula_modification(formula, materials, side = FRONT):
+	"""Get a modification replacing the layers of a filter by a stack
+	
+	This function takes 2 or 3 arguments:
+	  formula                a stack formula containing a format
+	                         specification replaced by the value of the
+	                         parameter, for example "(HL)^%i H" to vary the
+	                         number of periods;
+	  materials              a dictionary that associates materials with
+	                         symbols, as for stack.stack;
+	  side                   (optional) the side where to put the stack,
+	                         the default value is FRONT;
+	and returns the modification, to be used with
+	parameter_sweep.add_parameter."""
+	
+	def modification(filter, value):
+		filter.clear_design(side)
+		stack.stack(filter, formula % value, materials, side)
+	
+	return modification
+
+
+
+########################################################################
+#                                                                      #
+# reshape                                                              #
+# flatten                                                              #
+#                                                                      #
+########################################################################
+def reshape(values, shape):
+	"""Arrange a flat list in nested lists of a given shape"""
+	
+	if len(shape) <= 1:
+		return values
+	
+	size = len(values)//shape[0]
+	
+	return [reshape(values[i*size:(i+1)*size], shape[1:]) for i in range(shape[0])]
+
+def flatten(values, nb_dimensions):
+	"""Flatten the nb_dimensions first dimensions of nested lists"""
+	
+	for i_dimension in range(nb_dimensions-1):
+		values = [element for sublist in values for element in sublist]
+	
+	return values
@@ -33,7 +33,7 @@ print ""
 # Get the list of tests to execute. If no test is provided, execute all tests.
 tests = sys.argv[1:]
 if tests == []:
-	tests = ["color", "units"]
+	tests = ["color", "units", "parser", "export", "Fourier", "periodic", "batch", "imports", "multistart", "sweep", "adaptive", "clone", "cache", "GD", "field map", "VASE", "characterization", "dispersion derivatives", "sensitivity", "partial coherence", "averaging", "material cache", "lazy project", "sublayer cache"]
 
 
 # Test the color conversion.
@@ -43,7 +43,7 @@ if "color" in tests:
 	print ""
 	print "========== color tests =========="
 	print ""
-
+	
 	import color
 	import random
 	import math
@@ -140,6 +140,1677 @@ if "units" in tests:
 		print "500 nm =", converted, units.ABBREVIATIONS[unit], "=", converted_back, "m"
 
 
+# Test the speed of the parser on a large project file.
+if "parser" in tests:
+	tests.remove("parser")
+	
+	print ""
+	print "========== parser tests =========="
+	print ""
+	
+	import os
+	import time
+	import tempfile
+	
+	import simple_parser
+	import optical_filter
+	import project
+	from definitions import FRONT, TOP
+	
+	# Generate a project with a graded-index layer made of 100000
+	# sublayers.
+	nb_sublayers = 100000
+	filter = optical_filter.optical_filter()
+	step_profile = [i%40 for i in range(nb_sublayers)]
+	thickness = [0.5]*nb_sublayers
+	filter.add_graded_layer_from_steps("IdealMixture", step_profile, thickness, TOP, FRONT)
+	original_project = project.project(filter.get_material_catalog())
+	original_project.add_filter(filter)
+	
+	handle, filename = tempfile.mkstemp(suffix = ".ofp")
+	os.close(handle)
+	start = time.time()
+	project.write_project(original_project, filename)
+	stop = time.time()
+	print "Project written in %.4f seconds (%i bytes)." % (stop-start, os.path.getsize(filename))
+	
+	try:
+		infile = open(filename)
+		lines = infile.readlines()
+		infile.close()
+		print "Project file of %i lines." % len(lines)
+		
+		start = time.time()
+		keywords, values = simple_parser.parse(lines)
+		stop = time.time()
+		print "Lines parsed in %.4f seconds." % (stop-start)
+		
+		infile = open(filename)
+		start = time.time()
+		keywords_from_file, values_from_file = simple_parser.parse_file(infile)
+		stop = time.time()
+		infile.close()
+		print "File parsed in %.4f seconds." % (stop-start)
+		if keywords_from_file == keywords and values_from_file == values:
+			print "Same result when parsing lines and file: OK"
+		else:
+			print "Same result when parsing lines and file: An error occured"
+		
+		start = time.time()
+		read_project = project.read_project(filename)
+		stop = time.time()
+		print "Project read in %.4f seconds." % (stop-start)
+		
+		thickness_read, step_profile_read = read_project.get_filter(0).get_layer_step_profile(0, FRONT)
+		if step_profile_read == step_profile:
+			print "Step profile: OK"
+		else:
+			print "Step profile: An error occured"
+		
+		# Write and read back the same project with packed graded-index
+		# layers.
+		import config
+		config.PACKED_GRADED_LAYER_MIN_SUBLAYERS = 1000
+		start = time.time()
+		project.write_project(original_project, filename)
+		stop = time.time()
+		print ""
+		print "Packed project written in %.4f seconds (%i bytes)." % (stop-start, os.path.getsize(filename))
+		
+		start = time.time()
+		read_project = project.read_project(filename)
+		stop = time.time()
+		print "Packed project read in %.4f seconds." % (stop-start)
+		
+		thickness_read, step_profile_read = read_project.get_filter(0).get_layer_step_profile(0, FRONT)
+		if step_profile_read == step_profile and thickness_read == thickness:
+			print "Packed step profile: OK"
+		else:
+			print "Packed step profile: An error occured"
+	
+	finally:
+		os.remove(filename)
+
+
+# Test the speed of the bulk export of results.
+if "export" in tests:
+	tests.remove("export")
+	
+	print ""
+	print "========== export tests =========="
+	print ""
+	
+	import os
+	import csv
+	import time
+	import tempfile
+	
+	import optical_filter
+	import data_holder
+	import export
+	from definitions import FRONT, TOP, UNPOLARIZED
+	
+	# Calculate the reflection of a quarter-wave stack on 100000
+	# wavelengths.
+	filter = optical_filter.optical_filter()
+	filter.set_wavelengths_by_range(300.0, 1300.0, 0.01)
+	for i in range(10):
+		filter.add_layer("IdealMixture", 100.0, TOP, FRONT, 2.3)
+		filter.add_layer("IdealMixture", 150.0, TOP, FRONT, 1.5)
+	reflection = data_holder.reflection_data(filter, filter.reflection(), 0.0, UNPOLARIZED)
+	
+	handle, text_filename = tempfile.mkstemp(suffix = ".txt")
+	os.close(handle)
+	handle, csv_filename = tempfile.mkstemp(suffix = ".csv")
+	os.close(handle)
+	
+	try:
+		start = time.time()
+		export.export_results_to_text(text_filename, [reflection])
+		stop = time.time()
+		print "Results exported to text in %.4f seconds (%i bytes)." % (stop-start, os.path.getsize(text_filename))
+		
+		start = time.time()
+		export.export_results(csv_filename, [reflection])
+		stop = time.time()
+		print "Results exported to CSV in %.4f seconds (%i bytes)." % (stop-start, os.path.getsize(csv_filename))
+		
+		start = time.time()
+		export.export_results(csv_filename + ".gz", [reflection], precision = 7)
+		stop = time.time()
+		print "Results exported to compressed CSV with 7 digits in %.4f seconds (%i bytes)." % (stop-start, os.path.getsize(csv_filename + ".gz"))
+		os.remove(csv_filename + ".gz")
+		
+		infile = open(csv_filename)
+		title = infile.readline()
+		rows = list(csv.reader(infile))
+		infile.close()
+		wavelengths = reflection.get_wavelengths()
+		R = reflection.get_data()
+		if rows[0] == ["wavelength (nm)", "R"]\
+		   and len(rows) == len(wavelengths)+1\
+		   and all(float(rows[i+1][0]) == wavelengths[i] and float(rows[i+1][1]) == R[i] for i in range(len(wavelengths))):
+			print "CSV content: OK"
+		else:
+			print "CSV content: An error occured"
+	
+	finally:
+		os.remove(text_filename)
+		os.remove(csv_filename)
+	
+	# The format is checked from the name of the file, before
+	# exporting.
+	OK = export.check_filename("results.csv") == (export.CSV, False)
+	OK = OK and export.check_filename("results.TXT.gz") == (export.CSV, True)
+	try:
+		export.check_filename("results.xyz")
+	except export.export_error:
+		pass
+	else:
+		OK = False
+	
+	if OK:
+		print "Format check: OK"
+	else:
+		print "Format check: An error occured"
+
+# Compare the calculation of the index profile in the Fourier transform
+# method with the reference implementation.
+if "Fourier" in tests:
+	tests.remove("Fourier")
+	
+	print ""
+	print "========== Fourier tests =========="
+	print ""
+	
+	import time
+	
+	import project
+	import optimization_Fourier
+	
+	Fourier_project = project.read_project("examples/Fourier.ofp")
+	optimization = optimization_Fourier.optimization_Fourier(Fourier_project.get_filter(0), Fourier_project.get_targets())
+	
+	k = optimization.k
+	dk = [0.5*(k[max(i-1, 0)]-k[min(i+1, len(k)-1)]) for i in range(len(k))]
+	
+	start = time.time()
+	reference = optimization.calculate_first_term_reference(optimization.Q, optimization.Psi, k, dk)
+	stop = time.time()
+	print "Reference calculation of %i points at %i wavelengths in %.4f seconds." % (len(optimization.x), len(k), stop-start)
+	
+	start = time.time()
+	first_term = optimization.calculate_first_term(optimization.Q, optimization.Psi, k, dk)
+	stop = time.time()
+	print "Calculation in %.4f seconds (numpy is %s)." % (stop-start, "available" if optimization_Fourier.numpy else "not available")
+	
+	if max(abs(first_term[i]-reference[i]) for i in range(len(reference))) < 1.0e-12:
+		print "First term of eq. 9: OK"
+	else:
+		print "First term of eq. 9: An error occured"
+
+# Compare the analysis of a periodic stack with and without the
+# detection of periods.
+if "periodic" in tests:
+	tests.remove("periodic")
+	
+	print ""
+	print "========== periodic tests =========="
+	print ""
+	
+	import time
+	
+	import config
+	import optical_filter
+	import stack
+	
+	results = []
+	for max_period in [0, 100]:
+		config.PERIODIC_MAX_PERIOD = max_period
+		filter = optical_filter.optical_filter()
+		filter.set_wavelengths_by_range(400.0, 800.0, 0.5)
+		stack.stack(filter, "(HL)^100 H", {"H": ("IdealMixture", stack.MAX), "L": ("IdealMixture", stack.MIN)})
+		start = time.time()
+		R = filter.reflection(30.0)
+		stop = time.time()
+		print "Reflection of (HL)^100 H calculated in %.4f seconds with PERIODIC_MAX_PERIOD = %i." % (stop-start, max_period)
+		results.append(R)
+	
+	if max(abs(results[0][i]-results[1][i]) for i in range(len(results[0]))) < 1.0e-10:
+		print "Reflection: OK"
+	else:
+		print "Reflection: An error occured"
+
+# Run a job of the batch runner and verify that it does not need wx.
+if "batch" in tests:
+	tests.remove("batch")
+	
+	print ""
+	print "========== batch tests =========="
+	print ""
+	
+	import os
+	import tempfile
+	
+	import batch
+	
+	handle, filename = tempfile.mkstemp(suffix = ".csv")
+	os.close(handle)
+	status = batch.main(["-q", "-f", "0", "-a", "10", "-p", "s", "-o", filename, os.path.join("examples", "AR.ofp"), "reflection"])
+	lines = open(filename).read().splitlines()
+	os.remove(filename)
+	
+	if status == 0 and lines[0] == "# Reflection at 10.00 degrees for s-polarized light" and len(lines) > 2:
+		print "Reflection job: OK"
+	else:
+		print "Reflection job: An error occured"
+	
+	# An unknown format is detected before calculating anything, the
+	# optimization jobs require an output file and the project given as
+	# input is never overwritten.
+	sys.stderr, stderr = open(os.devnull, "w"), sys.stderr
+	try:
+		status = batch.main(["-q", "-o", "R.xyz", os.path.join("examples", "AR.ofp"), "reflection"])
+		try:
+			batch.main(["-q", os.path.join("examples", "AR.ofp"), "needles"])
+		except SystemExit:
+			missing_output_refused = True
+		else:
+			missing_output_refused = False
+		try:
+			batch.main(["-q", "-o", os.path.join("examples", "..", "examples", "AR.ofp"), os.path.join("examples", "AR.ofp"), "needles"])
+		except SystemExit:
+			input_overwrite_refused = True
+		else:
+			input_overwrite_refused = False
+	finally:
+		sys.stderr.close()
+		sys.stderr = stderr
+	
+	if status == 1 and not os.path.exists("R.xyz") and missing_output_refused and input_overwrite_refused:
+		print "Output validation: OK"
+	else:
+		print "Output validation: An error occured"
+	
+	# Optimization errors are reported like the others.
+	handle, filename = tempfile.mkstemp(suffix = ".ofp")
+	os.close(handle)
+	sys.stderr, stderr = open(os.devnull, "w"), sys.stderr
+	try:
+		status = batch.main(["-q", "-o", filename, os.path.join("examples", "Beamsplitter.ofp"), "Fourier"])
+	finally:
+		sys.stderr.close()
+		sys.stderr = stderr
+		os.remove(filename)
+	
+	if status == 1:
+		print "Optimization error: OK"
+	else:
+		print "Optimization error: An error occured"
+	
+	if "wx" not in sys.modules:
+		print "Import of wx: OK"
+	else:
+		print "Import of wx: An error occured"
+
+# Verify that the computational modules import quickly, without wx
+# and without the user configuration. The import is done in a new
+# interpreter to measure it from scratch.
+if "imports" in tests:
+	tests.remove("imports")
+	
+	print ""
+	print "========== imports tests =========="
+	print ""
+	
+	import os
+	import subprocess
+	
+	IMPORT_TIME_BUDGET = 0.5
+	
+	core_modules = ["abeles", "moremath", "optical_filter", "targets", "optimization_refinement", "optimization_needles", "optimization_steps", "optimization_Fourier", "preproduction", "color", "materials", "project", "export"]
+	command = "import sys, time\n"\
+	          "start = time.time()\n"\
+	          "import %s\n"\
+	          "print time.time()-start\n"\
+	          "print ' '.join(name for name in ['wx', 'GUI', 'user_config', 'localize'] if name in sys.modules)\n" % ", ".join(core_modules)
+	process = subprocess.Popen([sys.executable, "-c", command], stdout = subprocess.PIPE, cwd = os.path.dirname(os.path.abspath(__file__)))
+	output = process.communicate()[0].splitlines()
+	import_time = float(output[0])
+	print "Computational modules imported in %.4f seconds." % import_time
+	
+	if process.returncode == 0 and import_time < IMPORT_TIME_BUDGET:
+		print "Import time: OK"
+	else:
+		print "Import time: An error occured"
+	
+	if len(output) < 2 or not output[1].strip():
+		print "Import dependencies: OK"
+	else:
+		print "Import dependencies: An error occured (%s)" % output[1]
+
+# Refine a few starting designs in worker processes and verify that
+# all of them are accounted for in the ranked solutions.
+if "multistart" in tests:
+	tests.remove("multistart")
+	
+	print ""
+	print "========== multistart tests =========="
+	print ""
+	
+	import os
+	import time
+	
+	import project
+	import optimization_multistart
+	
+	the_project = project.read_project(os.path.join("examples", "AR.ofp"))
+	
+	optimization = optimization_multistart.optimization_multistart(the_project.get_filter(0), the_project.get_targets())
+	optimization.set_nb_starts(4)
+	optimization.set_max_iterations(20)
+	optimization.set_max_removed_layers(1)
+	optimization.set_nb_processes(2)
+	optimization.set_seed(0)
+	start = time.time()
+	optimization.go()
+	stop = time.time()
+	solutions = optimization.get_solutions()
+	print "%i starting designs refined in %.4f seconds, %i different solutions." % (4, stop-start, len(solutions))
+	
+	chi_2s = [chi_2 for chi_2, solution, nb_times_found in solutions]
+	if chi_2s == sorted(chi_2s) and sum(nb_times_found for chi_2, solution, nb_times_found in solutions) + optimization.get_nb_failed_starts() == 4:
+		print "Solutions: OK"
+	else:
+		print "Solutions: An error occured"
+	
+	# The designs are refined with the materials held by the filter, not
+	# those of the catalog, in the calling process as in worker
+	# processes.
+	import optical_filter
+	import stack
+	import data_holder
+	import characterization
+	modified_filter = optical_filter.optical_filter()
+	stack.stack(modified_filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	modified_filter.set_wavelengths_by_range(400.0, 900.0, 5.0)
+	material = modified_filter.get_material(modified_filter.get_material_nb("TiO2")).clone()
+	properties = list(material.get_properties())
+	properties[0] *= 1.05
+	material.set_properties(*properties)
+	modified_filter.set_material(modified_filter.get_material_nb("TiO2"), material)
+	wavelengths = modified_filter.get_wavelengths()
+	R = modified_filter.reflection()
+	target = characterization.measurement(data_holder.REFLECTION, wavelengths, [[R[i_wvl] for i_wvl in range(len(wavelengths))]], [[0.001]*len(wavelengths)]).get_target()
+	for i_layer in range(modified_filter.get_nb_layers()):
+		modified_filter.change_layer_thickness(0.97*modified_filter.get_layer_thickness(i_layer), i_layer)
+	
+	OK = True
+	for nb_processes in [1, 2]:
+		optimization = optimization_multistart.optimization_multistart(modified_filter, [target])
+		optimization.set_nb_starts(2)
+		optimization.set_max_removed_layers(0)
+		optimization.set_nb_processes(nb_processes)
+		optimization.set_seed(0)
+		optimization.go()
+		chi_2, solution, nb_times_found = optimization.get_solutions()[0]
+		if optimization.get_nb_failed_starts() != 0 or chi_2 > 1.0e-3 or solution.get_material(solution.get_material_nb("TiO2")).get_properties() != material.get_properties():
+			OK = False
+	
+	if OK:
+		print "Materials in memory: OK"
+	else:
+		print "Materials in memory: An error occured"
+	
+	# The number of processes never exceeds the number of tasks.
+	import workers
+	nb_processes = workers.get_nb_processes(0, 3)
+	if 1 <= nb_processes <= 3 and workers.get_nb_processes(4, 2) == 2 and workers.get_nb_processes(4, 0) == 1:
+		print "Number of processes: OK"
+	else:
+		print "Number of processes: An error occured"
+
+# Sweep the number of periods and the center wavelength of a stack in
+# worker processes and compare with the direct calculation.
+if "sweep" in tests:
+	tests.remove("sweep")
+	
+	print ""
+	print "========== sweep tests =========="
+	print ""
+	
+	import time
+	
+	import optical_filter
+	import stack
+	import sweep
+	import data_holder
+	from definitions import FRONT
+	
+	symbols = {"H": ("IdealMixture", stack.MAX), "L": ("IdealMixture", stack.MIN)}
+	filter = optical_filter.optical_filter()
+	filter.set_wavelengths_by_range(400.0, 800.0, 1.0)
+	stack.stack(filter, "(HL)^5 H", symbols)
+	
+	parameter_sweep = sweep.parameter_sweep(filter)
+	parameter_sweep.add_parameter("periods", range(1, 6), sweep.stack_formula_modification("(HL)^%i H", symbols))
+	parameter_sweep.add_parameter("center wavelength", [500.0, 600.0], "set_center_wavelength")
+	parameter_sweep.set_data_types([data_holder.TRANSMISSION])
+	parameter_sweep.set_nb_processes(2)
+	start = time.time()
+	parameter_sweep.simulate()
+	stop = time.time()
+	print "10 filters evaluated in %.4f seconds." % (stop-start)
+	
+	results = parameter_sweep.get_results()[0]
+	direct_filter = filter.clone()
+	direct_filter.clear_design(FRONT)
+	stack.stack(direct_filter, "(HL)^3 H", symbols)
+	direct_filter.set_center_wavelength(600.0)
+	T = direct_filter.transmission()
+	
+	if len(results) == 5 and len(results[2]) == 2 and max(abs(results[2][1][i]-T[i]) for i in range(len(T))) < 1.0e-6:
+		print "Results: OK"
+	else:
+		print "Results: An error occured"
+	
+	# The filters are evaluated with their own materials, which may not
+	# be saved, in the calling process as in worker processes.
+	import materials
+	material_catalog = materials.material_catalog()
+	custom_material = material_catalog.get_material("SiO2").clone()
+	custom_material.set_name("UnsavedSiO2")
+	material_catalog.add_material(custom_material, False)
+	custom_filter = optical_filter.optical_filter(material_catalog)
+	custom_filter.set_wavelengths_by_range(400.0, 800.0, 1.0)
+	OK = True
+	for nb_processes in [1, 2]:
+		custom_sweep = sweep.parameter_sweep(custom_filter)
+		custom_sweep.add_parameter("periods", range(1, 3), sweep.stack_formula_modification("(HL)^%i", {"H": ("TiO2", 1.0), "L": ("UnsavedSiO2", 1.0)}))
+		custom_sweep.set_data_types([data_holder.TRANSMISSION, data_holder.COLOR])
+		custom_sweep.set_nb_processes(nb_processes)
+		OK = OK and custom_sweep.get_columns() == []
+		custom_sweep.simulate()
+		tables = custom_sweep.get_columns()
+		OK = OK and len(tables) == 2 and len(tables[0][2][0]) == 2*len(custom_sweep.get_wavelengths()) and len(tables[1][2][0]) == 2
+	
+	if OK:
+		print "Materials in memory: OK"
+	else:
+		print "Materials in memory: An error occured"
+
+# Sample the transmission of a narrowband filter adaptively and verify
+# that the linear interpolation between the wavelengths reproduces a
+# dense uniform sampling.
+if "adaptive" in tests:
+	tests.remove("adaptive")
+	
+	print ""
+	print "========== adaptive tests =========="
+	print ""
+	
+	import bisect
+	import time
+	
+	import optical_filter
+	import stack
+	
+	filter = optical_filter.optical_filter()
+	filter.set_center_wavelength(1550.0)
+	stack.stack(filter, "(HL)^7 2H (LH)^7", {"H": ("IdealMixture", stack.MAX), "L": ("IdealMixture", stack.MIN)})
+	
+	filter.set_wavelengths_by_range(1500.0, 1600.0, 0.01)
+	dense_wavelengths = filter.get_wavelengths()
+	dense_wavelengths = [dense_wavelengths[i] for i in range(len(dense_wavelengths))]
+	dense_T = filter.transmission()
+	
+	start = time.time()
+	filter.set_wavelengths_adaptively(1500.0, 1600.0, 0.001)
+	T = filter.transmission()
+	stop = time.time()
+	wavelengths = filter.get_wavelengths()
+	wavelengths = [wavelengths[i] for i in range(len(wavelengths))]
+	print "%i adaptive wavelengths instead of %i calculated in %.4f seconds." % (len(wavelengths), len(dense_wavelengths), stop-start)
+	
+	largest_error = 0.0
+	for i in range(len(dense_wavelengths)):
+		j = min(max(bisect.bisect(wavelengths, dense_wavelengths[i]), 1), len(wavelengths)-1)
+		interpolated_T = T[j-1] + (T[j]-T[j-1])*(dense_wavelengths[i]-wavelengths[j-1])/(wavelengths[j]-wavelengths[j-1])
+		largest_error = max(largest_error, abs(interpolated_T-dense_T[i]))
+	
+	if largest_error < 0.002 and len(wavelengths) < len(dense_wavelengths)/10:
+		print "Interpolation: OK"
+	else:
+		print "Interpolation: An error occured"
+	
+	# With a limited number of wavelengths, the refinement concentrates
+	# on the peak at the center instead of the short wavelengths.
+	import config
+	nb_initial_wvls = config.ADAPTIVE_WAVELENGTHS_INITIAL_NB
+	initial_wavelengths = set([1500.0+i*100.0/(nb_initial_wvls-1) for i in range(nb_initial_wvls-1)] + [1600.0])
+	original_max_nb = config.ADAPTIVE_WAVELENGTHS_MAX_NB
+	config.ADAPTIVE_WAVELENGTHS_MAX_NB = nb_initial_wvls+20
+	try:
+		filter.set_wavelengths_adaptively(1500.0, 1600.0, 0.001)
+	finally:
+		config.ADAPTIVE_WAVELENGTHS_MAX_NB = original_max_nb
+	limited_wavelengths = filter.get_wavelengths()
+	added_wavelengths = [limited_wavelengths[i] for i in range(len(limited_wavelengths)) if limited_wavelengths[i] not in initial_wavelengths]
+	
+	try:
+		filter.set_wavelengths_adaptively(1500.0, 1600.0, 0.0)
+	except optical_filter.filter_error:
+		tolerance_checked = True
+	else:
+		tolerance_checked = False
+	
+	if len(added_wavelengths) == 20 and all(1545.0 < wavelength < 1555.0 for wavelength in added_wavelengths) and tolerance_checked:
+		print "Limited number of wavelengths: OK"
+	else:
+		print "Limited number of wavelengths: An error occured"
+
+# Verify that clones share the layers with the original filter until
+# one of them is modified.
+if "clone" in tests:
+	tests.remove("clone")
+	
+	print ""
+	print "========== clone tests =========="
+	print ""
+	
+	import time
+	import StringIO
+	
+	import optical_filter
+	import project
+	from definitions import *
+	
+	def filter_as_text(filter):
+		outfile = StringIO.StringIO()
+		optical_filter.write_filter(filter, outfile)
+		return outfile.getvalue()
+	
+	filter = optical_filter.optical_filter()
+	for i in range(1000):
+		filter.add_layer(["SiO2", "TiO2"][i%2], 100.0+i, TOP, FRONT)
+	filter.add_layer("SiO2", 100.0, TOP, BACK)
+	
+	start = time.time()
+	clone = filter.clone()
+	stop = time.time()
+	print "Clone of a %i layers filter in %.6f seconds." % (filter.get_nb_layers(FRONT), stop-start)
+	
+	Rugate_filter = project.read_project("examples/Rugate.ofp").get_filter(0)
+	T = Rugate_filter.transmission()
+	clone_T = Rugate_filter.clone().transmission()
+	
+	if filter_as_text(clone) == filter_as_text(filter) and all(clone_T[i] == T[i] for i in range(len(T))):
+		print "Copy: OK"
+	else:
+		print "Copy: An error occured"
+	
+	modifications = [lambda filter: filter.add_layer("TiO2", 10.0, 5, FRONT),
+	                 lambda filter: filter.remove_layer(TOP, FRONT),
+	                 lambda filter: filter.change_layer_thickness(0.0, 3, FRONT),
+	                 lambda filter: filter.merge_layers(),
+	                 lambda filter: filter.set_refine_layer_thickness(2, False, FRONT),
+	                 lambda filter: filter.set_add_needles(4, False, FRONT),
+	                 lambda filter: filter.swap_sides(),
+	                 lambda filter: filter.set_center_wavelength(600.0),
+	                 lambda filter: filter.clear_design(FRONT)]
+	
+	for original in [filter, Rugate_filter]:
+		original_text = filter_as_text(original)
+		independent = True
+		for modification in modifications:
+			clone = original.clone()
+			clone_of_clone = clone.clone()
+			modification(clone)
+			if filter_as_text(original) != original_text or filter_as_text(clone_of_clone) != original_text:
+				independent = False
+			modification(clone_of_clone)
+			if filter_as_text(clone_of_clone) != filter_as_text(clone):
+				independent = False
+		
+		if independent:
+			print "Modification of clones: OK"
+		else:
+			print "Modification of clones: An error occured"
+
+# Verify that the analysis kept for many angles is limited by the size
+# of the cache and that it gives the same results.
+if "cache" in tests:
+	tests.remove("cache")
+	
+	print ""
+	print "========== cache tests =========="
+	print ""
+	
+	import time
+	
+	import config
+	import optical_filter
+	import stack
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "(HL)^10", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.set_wavelengths_by_range(400.0, 1000.0, 1.0)
+	nb_wvls = len(filter.get_wavelengths())
+	
+	original_cache_size = config.ANALYSIS_CACHE_SIZE
+	config.ANALYSIS_CACHE_SIZE = 20*2*nb_wvls
+	
+	angles = [0.5*i for i in range(160)]
+	
+	start = time.time()
+	for angle in angles:
+		T = filter.transmission(angle, S)
+	for angle in angles[-10:]:
+		R = filter.reflection(angle, S)
+	stop = time.time()
+	print "Analysis at %i angles in %.4f seconds." % (len(angles), stop-start)
+	
+	hits, misses, nb_conditions = filter.get_analysis_cache_statistics()
+	print "%i hits, %i misses, results kept for %i angles." % (hits, misses, nb_conditions)
+	
+	reference_filter = filter.clone()
+	reference_T = reference_filter.transmission(angles[0], S)
+	T = filter.transmission(angles[0], S)
+	
+	config.ANALYSIS_CACHE_SIZE = original_cache_size
+	
+	if hits == 10 and misses == len(angles) and nb_conditions == 20 and all(T[i] == reference_T[i] for i in range(nb_wvls)):
+		print "Cache: OK"
+	else:
+		print "Cache: An error occured"
+	
+	# When the substrate and the medium are not considered, the indices
+	# of mixtures used as medium are kept, so that the analysis is found
+	# again.
+	mixture_filter = optical_filter.optical_filter()
+	stack.stack(mixture_filter, "(HL)^5", {"H": ("IdealMixture", stack.MAX), "L": ("IdealMixture", stack.MIN)})
+	mixture_filter.set_wavelengths_by_range(400.0, 1000.0, 1.0)
+	mixture_filter.set_dont_consider_substrate(True)
+	reference_filter = mixture_filter.clone()
+	for i in range(5):
+		R = mixture_filter.reflection(10.0, S)
+		T = mixture_filter.transmission(10.0, S)
+	hits, misses, nb_conditions = mixture_filter.get_analysis_cache_statistics()
+	reference_R = reference_filter.reflection(10.0, S)
+	
+	if misses == 1 and nb_conditions == 1 and all(R[i] == reference_R[i] for i in range(nb_wvls)):
+		print "Mixture medium: OK"
+	else:
+		print "Mixture medium: An error occured (%i hits, %i misses, %i conditions)" % (hits, misses, nb_conditions)
+
+if "GD" in tests:
+	tests.remove("GD")
+	
+	print ""
+	print "========== GD tests =========="
+	print ""
+	
+	import time
+	
+	import config
+	import optical_filter
+	import stack
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "(HL)^8", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.set_medium("SiO2", FRONT)
+	
+	original_analytic_GD_step = config.ANALYTIC_GD_STEP
+	
+	# The numerical calculation requires closely spaced wavelengths.
+	config.ANALYTIC_GD_STEP = 0
+	filter.set_wavelengths_by_range(650.0, 750.0, 0.01)
+	start = time.time()
+	numerical = [filter.reflection_GD(45.0, S), filter.transmission_GD(45.0, S), filter.reflection_GDD(45.0, P), filter.transmission_GDD(45.0, P)]
+	stop = time.time()
+	print "Numerical GD and GDD in %.4f seconds." % (stop-start)
+	
+	# The analytical calculation does not.
+	config.ANALYTIC_GD_STEP = original_analytic_GD_step
+	filter.set_wavelengths_by_range(650.0, 750.0, 10.0)
+	start = time.time()
+	analytical = [filter.reflection_GD(45.0, S), filter.transmission_GD(45.0, S), filter.reflection_GDD(45.0, P), filter.transmission_GDD(45.0, P)]
+	stop = time.time()
+	print "Analytical GD and GDD in %.4f seconds." % (stop-start)
+	
+	# Compare at common wavelengths, excluding the edges where the
+	# numerical derivatives are one-sided.
+	OK = True
+	for numerical_values, analytical_values in zip(numerical, analytical):
+		scale = max(abs(value) for value in analytical_values)
+		for i in range(1, len(analytical_values)-1):
+			if abs(numerical_values[1000*i]-analytical_values[i]) > 1.0e-3*scale:
+				OK = False
+	
+	if OK:
+		print "GD: OK"
+	else:
+		print "GD: An error occured"
+
+if "field map" in tests:
+	tests.remove("field map")
+	
+	print ""
+	print "========== field map tests =========="
+	print ""
+	
+	import time
+	
+	import optical_filter
+	import stack
+	import data_holder
+	import export
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "(HL)^5", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	
+	wavelengths = [500.0+10.0*i for i in range(21)]
+	angles = [0.0, 30.0]
+	
+	start = time.time()
+	thickness, E2 = filter.electric_field_map(wavelengths, angles, UNPOLARIZED)
+	stop = time.time()
+	print "Map at %i wavelengths and %i angles in %.4f seconds." % (len(wavelengths), len(angles), stop-start)
+	
+	# Compare with the field calculated one wavelength at a time.
+	OK = True
+	for i_angle in range(len(angles)):
+		for i_wvl in [0, 10, 20]:
+			thickness_s, E_s = filter.electric_field(wavelengths[i_wvl], angles[i_angle], S)
+			thickness_p, E_p = filter.electric_field(wavelengths[i_wvl], angles[i_angle], P)
+			for i_layer in range(len(thickness)):
+				for i_sublayer in range(len(thickness[i_layer])):
+					expected = 0.5*E_s[i_layer][i_sublayer]**2 + 0.5*E_p[i_layer][i_sublayer]**2
+					if abs(E2[i_angle][i_wvl][i_layer][i_sublayer]-expected) > 1.0e-12*expected:
+						OK = False
+	
+	title, column_titles, columns = export.get_result_columns(data_holder.electric_field_map_data(filter, (thickness, E2), wavelengths, angles, UNPOLARIZED))
+	if len(columns) != 2+len(angles)*len(wavelengths) or columns[-1] != export.flatten(E2[-1][-1]):
+		OK = False
+	
+	for empty_wavelengths, empty_angles in [([], angles), (wavelengths, [])]:
+		try:
+			filter.electric_field_map(empty_wavelengths, empty_angles)
+		except optical_filter.filter_error:
+			pass
+		else:
+			OK = False
+	
+	if OK:
+		print "Field map: OK"
+	else:
+		print "Field map: An error occured"
+
+if "VASE" in tests:
+	tests.remove("VASE")
+	
+	print ""
+	print "========== VASE tests =========="
+	print ""
+	
+	import time
+	
+	import optical_filter
+	import stack
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "(HL)^10", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.set_wavelengths_by_range(300.0, 1000.0, 1.0)
+	filter.set_consider_backside(True)
+	
+	angles = [45.0+2.5*i for i in range(11)]
+	
+	start = time.time()
+	Psi, Delta = filter.variable_angle_ellipsometry(angles)
+	R = [filter.reflection(angle, P) for angle in angles]
+	stop = time.time()
+	print "Ellipsometry and reflection at %i angles in %.4f seconds." % (len(angles), stop-start)
+	
+	# The r and t kept with the analysis must be the same as those
+	# calculated by a filter that never saw these angles, also after a
+	# change of substrate.
+	OK = True
+	reference_filter = filter.clone()
+	for i_angle in [0, 5, 10]:
+		reference_Psi, reference_Delta = reference_filter.ellipsometry(angles[i_angle])
+		reference_R = reference_filter.reflection(angles[i_angle], P)
+		for i in range(len(filter.get_wavelengths())):
+			if Psi[i_angle][i] != reference_Psi[i] or Delta[i_angle][i] != reference_Delta[i] or R[i_angle][i] != reference_R[i]:
+				OK = False
+	
+	filter.set_substrate("SiO2")
+	reference_filter = filter.clone()
+	R = filter.reflection(angles[0], P)
+	reference_R = reference_filter.reflection(angles[0], P)
+	if any(R[i] != reference_R[i] for i in range(len(filter.get_wavelengths()))):
+		OK = False
+	
+	if OK:
+		print "VASE: OK"
+	else:
+		print "VASE: An error occured"
+
+# Fit the thicknesses and a dispersion parameter of a filter to
+# synthetic measurements and verify that the original values are
+# recovered, also when many samples are characterized in worker
+# processes.
+if "characterization" in tests:
+	tests.remove("characterization")
+	
+	print ""
+	print "========== characterization tests =========="
+	print ""
+	
+	import os
+	import tempfile
+	import time
+	
+	import optical_filter
+	import stack
+	import data_holder
+	import characterization
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.set_wavelengths_by_range(400.0, 900.0, 5.0)
+	wavelengths = filter.get_wavelengths()
+	nb_wvls = len(wavelengths)
+	nb_layers = filter.get_nb_layers()
+	
+	thicknesses = [filter.get_layer_thickness(i_layer) for i_layer in range(nb_layers)]
+	A = filter.get_material(filter.get_material_nb("TiO2")).get_properties()[0]
+	
+	# Write the reflection in a file to read it back as a measurement.
+	R = filter.reflection()
+	handle, filename = tempfile.mkstemp(suffix = ".csv")
+	os.close(handle)
+	outfile = open(filename, "w")
+	outfile.write("# wavelength, R\n")
+	for i_wvl in range(nb_wvls):
+		outfile.write("%.6f, %.12f\n" % (wavelengths[i_wvl], R[i_wvl]))
+	outfile.close()
+	R_measurement = characterization.read_measurement(filename, data_holder.REFLECTION)
+	os.remove(filename)
+	
+	T = filter.transmission(45.0, S)
+	T_measurement = characterization.measurement(data_holder.TRANSMISSION, wavelengths, [[T[i_wvl] for i_wvl in range(nb_wvls)]], [[0.001]*nb_wvls], 45.0, S)
+	Psi, Delta = filter.ellipsometry(65.0)
+	ellipsometry_measurement = characterization.measurement(data_holder.ELLIPSOMETRY, wavelengths, [[Psi[i_wvl] for i_wvl in range(nb_wvls)], [Delta[i_wvl] for i_wvl in range(nb_wvls)]], [[0.1]*nb_wvls, [0.2]*nb_wvls], 65.0)
+	measurements = [R_measurement, T_measurement, ellipsometry_measurement]
+	
+	# Start from a perturbed filter.
+	for i_layer in range(nb_layers):
+		filter.change_layer_thickness(1.05*thicknesses[i_layer], i_layer)
+	material = filter.get_material(filter.get_material_nb("TiO2")).clone()
+	properties = list(material.get_properties())
+	properties[0] = 1.03*A
+	material.set_properties(*properties)
+	filter.set_material(filter.get_material_nb("TiO2"), material)
+	
+	fit = characterization.characterization(filter, measurements)
+	for i_layer in range(nb_layers):
+		fit.add_thickness_parameter(i_layer)
+	fit.add_material_parameter("TiO2", 0)
+	start = time.time()
+	fit.go()
+	stop = time.time()
+	print "%i parameters fitted in %i iterations and %.4f seconds." % (nb_layers+1, fit.get_iteration(), stop-start)
+	
+	values = fit.get_parameter_values()
+	if all(abs(values[i_layer]-thicknesses[i_layer]) < 1.0e-3 for i_layer in range(nb_layers)) and abs(values[-1]-A) < 1.0e-5:
+		print "Characterization: OK"
+	else:
+		print "Characterization: An error occured"
+	
+	fit.copy_to_filter()
+	if [filter.get_layer_thickness(i_layer) for i_layer in range(nb_layers)] == values[:-1] and filter.get_material(filter.get_material_nb("TiO2")).get_properties()[0] == values[-1]:
+		print "Copy to filter: OK"
+	else:
+		print "Copy to filter: An error occured"
+	
+	for i_layer in range(nb_layers):
+		filter.change_layer_thickness(0.95*thicknesses[i_layer], i_layer)
+	batch = characterization.batch_characterization(filter)
+	for i_layer in range(nb_layers):
+		batch.add_thickness_parameter(i_layer)
+	for i_sample in range(len(measurements)):
+		batch.add_sample(measurements[:i_sample+1])
+	batch.set_nb_processes(2)
+	start = time.time()
+	batch.go()
+	stop = time.time()
+	results = batch.get_results()
+	print "%i samples characterized in %.4f seconds." % (len(results), stop-start)
+	
+	if batch.get_nb_failed_samples() == 0 and all(all(abs(values[i_layer]-thicknesses[i_layer]) < 1.0e-3 for i_layer in range(nb_layers)) for chi_2, values in results):
+		print "Batch characterization: OK"
+	else:
+		print "Batch characterization: An error occured"
+	
+	# The samples are characterized with the materials held by the
+	# filter, not those of the catalog, in the calling process as in
+	# worker processes.
+	modified_filter = optical_filter.optical_filter()
+	stack.stack(modified_filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	modified_filter.set_wavelengths_by_range(400.0, 900.0, 5.0)
+	material = modified_filter.get_material(modified_filter.get_material_nb("TiO2")).clone()
+	properties = list(material.get_properties())
+	properties[0] = 1.05*A
+	material.set_properties(*properties)
+	modified_filter.set_material(modified_filter.get_material_nb("TiO2"), material)
+	modified_thicknesses = [modified_filter.get_layer_thickness(i_layer) for i_layer in range(nb_layers)]
+	R = modified_filter.reflection()
+	R_measurement = characterization.measurement(data_holder.REFLECTION, wavelengths, [[R[i_wvl] for i_wvl in range(nb_wvls)]], [[0.001]*nb_wvls])
+	for i_layer in range(nb_layers):
+		modified_filter.change_layer_thickness(0.97*modified_thicknesses[i_layer], i_layer)
+	
+	OK = True
+	for nb_processes in [1, 2]:
+		batch = characterization.batch_characterization(modified_filter)
+		for i_layer in range(nb_layers):
+			batch.add_thickness_parameter(i_layer)
+		batch.add_sample([R_measurement])
+		batch.add_sample([R_measurement])
+		batch.set_nb_processes(nb_processes)
+		batch.go()
+		if batch.get_nb_failed_samples() != 0 or not all(all(abs(values[i_layer]-modified_thicknesses[i_layer]) < 1.0e-3 for i_layer in range(nb_layers)) for chi_2, values in batch.get_results()):
+			OK = False
+	
+	if OK:
+		print "Materials in memory: OK"
+	else:
+		print "Materials in memory: An error occured"
+
+if "dispersion derivatives" in tests:
+	tests.remove("dispersion derivatives")
+	
+	print ""
+	print "========== dispersion derivatives tests =========="
+	print ""
+	
+	import time
+	
+	import abeles
+	import materials
+	import optical_filter
+	import stack
+	import data_holder
+	import characterization
+	from definitions import *
+	
+	wvls = abeles.wvls(3)
+	for i_wvl, wvl in enumerate([400.0, 600.0, 900.0]):
+		wvls.set_wvl(i_wvl, wvl)
+	
+	# Compare the derivatives of the dispersion models with central
+	# finite differences.
+	OK = True
+	for material_class, properties in [(materials.material_Cauchy, [2.2, 0.02, 0.001, 0.01, 1.5, 3500.0]), (materials.material_Sellmeier, [1.0, 0.01, 0.2, 0.05, 0.8, 90.0, 0.01, 1.5, 3500.0])]:
+		material = material_class()
+		material.set_properties(*properties)
+		for property_nb in range(len(properties)):
+			dN = material.get_dN(wvls, property_nb)
+			step = 1.0e-6*max(abs(properties[property_nb]), 1.0)
+			upper_properties = list(properties)
+			upper_properties[property_nb] += step
+			lower_properties = list(properties)
+			lower_properties[property_nb] -= step
+			material.set_properties(*upper_properties)
+			upper_N = material.get_N(wvls)
+			material.set_properties(*lower_properties)
+			lower_N = material.get_N(wvls)
+			material.set_properties(*properties)
+			for i_wvl in range(3):
+				numerical = (upper_N[i_wvl]-lower_N[i_wvl])/(2.0*step)
+				if abs(dN[i_wvl]-numerical) > 1.0e-5*max(abs(numerical), 1.0e-3):
+					OK = False
+	
+	if OK:
+		print "Dispersion derivatives: OK"
+	else:
+		print "Dispersion derivatives: An error occured"
+	
+	# Compare the analytic Jacobian of a characterization with the one
+	# obtained by finite differences.
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.set_wavelengths_by_range(400.0, 900.0, 10.0)
+	filter.set_consider_backside(False)
+	wavelengths = filter.get_wavelengths()
+	nb_wvls = len(wavelengths)
+	
+	R = filter.reflection()
+	T = filter.transmission(45.0, S)
+	Psi, Delta = filter.ellipsometry(65.0)
+	measurements = [characterization.measurement(data_holder.REFLECTION, wavelengths, [[R[i_wvl] for i_wvl in range(nb_wvls)]], [[0.001]*nb_wvls]),
+	                characterization.measurement(data_holder.TRANSMISSION, wavelengths, [[T[i_wvl] for i_wvl in range(nb_wvls)]], [[0.001]*nb_wvls], 45.0, S),
+	                characterization.measurement(data_holder.ELLIPSOMETRY, wavelengths, [[Psi[i_wvl] for i_wvl in range(nb_wvls)], [Delta[i_wvl] for i_wvl in range(nb_wvls)]], [[0.1]*nb_wvls, [0.2]*nb_wvls], 65.0)]
+	
+	fit = characterization.characterization(filter, measurements)
+	for i_layer in range(filter.get_nb_layers()):
+		fit.add_thickness_parameter(i_layer)
+	for property_nb in range(3):
+		fit.add_material_parameter("TiO2", property_nb)
+		fit.add_material_parameter("SiO2", property_nb)
+	fit.prepare()
+	values = fit.get_parameter_values()
+	
+	start = time.time()
+	analytic = fit.calculate_derivatives(values)
+	stop = time.time()
+	print "Analytic Jacobian in %.4f seconds." % (stop-start)
+	start = time.time()
+	numerical = fit.calculate_finite_differences(values)
+	stop = time.time()
+	print "Finite differences Jacobian in %.4f seconds." % (stop-start)
+	
+	OK = True
+	for analytic_derivatives, numerical_derivatives in zip(analytic, numerical):
+		scale = max(abs(derivative) for derivative in numerical_derivatives)
+		if any(abs(analytic_derivative-numerical_derivative) > 1.0e-5*scale for analytic_derivative, numerical_derivative in zip(analytic_derivatives, numerical_derivatives)):
+			OK = False
+	
+	if OK:
+		print "Analytic Jacobian: OK"
+	else:
+		print "Analytic Jacobian: An error occured"
+
+if "sensitivity" in tests:
+	tests.remove("sensitivity")
+	
+	print ""
+	print "========== sensitivity tests =========="
+	print ""
+	
+	import optical_filter
+	import stack
+	import data_holder
+	import preproduction
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.add_layer("IdealMixture", 120.0, TOP, FRONT, 1.8)
+	filter.set_wavelengths_by_range(400.0, 900.0, 10.0)
+	
+	angles = [0.0, 45.0]
+	data_types = [data_holder.REFLECTION, data_holder.TRANSMISSION, data_holder.REFLECTION_PHASE]
+	methods = [optical_filter.optical_filter.reflection, optical_filter.optical_filter.transmission, optical_filter.optical_filter.reflection_phase]
+	
+	analysis = preproduction.sensitivity(filter)
+	analysis.set_data_types(data_types)
+	analysis.set_angles(angles)
+	analysis.set_threshold(0.0)
+	analysis.calculate()
+	parameters, errors = analysis.get_parameters()
+	
+	# Compare the derivatives with central finite differences.
+	OK = True
+	for i_parameter, (kind, position) in enumerate(parameters):
+		modified_filter = filter.clone()
+		if kind == optical_filter.THICKNESS_DERIVATIVE:
+			value = filter.get_layer_thickness(position)
+			step = 1.0e-4
+			change = modified_filter.change_layer_thickness
+		else:
+			value = filter.get_layer_index(position)
+			step = 1.0e-6
+			change = modified_filter.change_layer_index
+		change(value+step, position)
+		upper = [[list(method(modified_filter, angle, S)) for method in methods] for angle in angles]
+		change(value-step, position)
+		lower = [[list(method(modified_filter, angle, S)) for method in methods] for angle in angles]
+		for i_angle in range(len(angles)):
+			for i_data_type, data_type in enumerate(data_types):
+				derivatives = analysis.get_derivatives(data_type, i_angle, i_parameter)
+				numerical = [(upper_value-lower_value)/(2.0*step) for upper_value, lower_value in zip(upper[i_angle][i_data_type], lower[i_angle][i_data_type])]
+				scale = max(abs(derivative) for derivative in numerical)
+				if any(abs(derivative-numerical_derivative) > 1.0e-4*scale for derivative, numerical_derivative in zip(derivatives, numerical)):
+					OK = False
+	
+	if OK:
+		print "Sensitivity derivatives: OK"
+	else:
+		print "Sensitivity derivatives: An error occured"
+	
+	# Verify the summaries and that insignificant derivatives are
+	# discarded.
+	OK = True
+	for data_type in data_types:
+		if abs(sum(fraction for RMS_contribution, fraction in analysis.get_error_budget(data_type))-1.0) > 1.0e-10:
+			OK = False
+		layers = analysis.get_most_sensitive_layers(data_type)
+		if len(layers) != filter.get_nb_layers() or any(layers[i][1] < layers[i+1][1] for i in range(len(layers)-1)):
+			OK = False
+	std_dev = analysis.get_std_dev(data_holder.TRANSMISSION, 1)
+	nb_kept_derivatives = analysis.get_nb_kept_derivatives()
+	analysis.set_threshold(0.5)
+	analysis.calculate()
+	if analysis.get_nb_kept_derivatives() >= nb_kept_derivatives:
+		OK = False
+	if analysis.get_std_dev(data_holder.TRANSMISSION, 1) != std_dev:
+		OK = False
+	
+	if OK:
+		print "Sensitivity summaries: OK"
+	else:
+		print "Sensitivity summaries: An error occured"
+
+if "partial coherence" in tests:
+	tests.remove("partial coherence")
+	
+	print ""
+	print "========== partial coherence tests =========="
+	print ""
+	
+	import math
+	
+	import optical_filter
+	import stack
+	from definitions import *
+	
+	substrate_thickness = 3000.0
+	
+	# A filter on a thin substrate, with a layer on its back side.
+	filter = optical_filter.optical_filter()
+	filter.set_substrate_thickness(substrate_thickness)
+	stack.stack(filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.add_layer("TiO2", 80.0, TOP, BACK)
+	filter.set_wavelengths_by_range(500.0, 520.0, 2.0)
+	
+	# The same filter where the substrate is a layer, which is
+	# coherent.
+	coherent_filter = optical_filter.optical_filter()
+	coherent_filter.set_substrate("void")
+	coherent_filter.set_consider_backside(False)
+	stack.stack(coherent_filter, "HLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	coherent_filter.add_layer("TiO2", 80.0, BOTTOM, FRONT)
+	coherent_filter.add_layer("FusedSilica", substrate_thickness, 1, FRONT)
+	coherent_filter.set_wavelengths_by_range(500.0, 520.0, 2.0)
+	
+	def difference(X, Y):
+		return max(abs(X[i]-Y[i]) for i in range(len(X)))
+	
+	methods = [optical_filter.optical_filter.reflection, optical_filter.optical_filter.transmission, optical_filter.optical_filter.reflection_reverse, optical_filter.optical_filter.transmission_reverse]
+	
+	OK = True
+	for angle in [0.0, 50.0]:
+		for polarization in [S, P]:
+			filter.set_coherence_length(0.0)
+			incoherent = [method(filter, angle, polarization) for method in methods]
+			filter.set_coherence_length(1.0e-3)
+			short = [method(filter, angle, polarization) for method in methods]
+			filter.set_coherence_length(1.0e12)
+			long_ = [method(filter, angle, polarization) for method in methods]
+			coherent = [method(coherent_filter, angle, polarization) for method in methods]
+			for i_method in range(len(methods)):
+				if difference(short[i_method], incoherent[i_method]) > 1.0e-10:
+					OK = False
+				if difference(long_[i_method], coherent[i_method]) > 1.0e-10:
+					OK = False
+	
+	if OK:
+		print "Coherent and incoherent limits: OK"
+	else:
+		print "Coherent and incoherent limits: An error occured"
+	
+	# For a gaussian spectrum, the result must be close to the average of
+	# the coherent properties over the spectrum. They are not identical
+	# since the dispersion and the variation of the properties of the
+	# stacks over the spectrum are neglected.
+	center_wavelength = 510.0
+	bandwidth = 2.0
+	coherence_length = center_wavelength**2/(2.0*math.pi*bandwidth)
+	filter.set_wavelengths([center_wavelength])
+	filter.set_coherence_length(coherence_length)
+	center_wavenumber = 2.0*math.pi/center_wavelength
+	wavenumbers = [center_wavenumber + (-6.0+12.0*i/2000.0)/coherence_length for i in range(2001)]
+	weights = [math.exp(-0.5*((wavenumber-center_wavenumber)*coherence_length)**2) for wavenumber in wavenumbers]
+	coherent_filter.set_wavelengths([2.0*math.pi/wavenumber for wavenumber in wavenumbers])
+	
+	OK = True
+	for angle, polarization in [(0.0, S), (40.0, P)]:
+		R = coherent_filter.reflection(angle, polarization)
+		T = coherent_filter.transmission(angle, polarization)
+		R_average = sum(weights[i]*R[i] for i in range(len(weights)))/sum(weights)
+		T_average = sum(weights[i]*T[i] for i in range(len(weights)))/sum(weights)
+		if abs(filter.reflection(angle, polarization)[0]-R_average) > 5.0e-3:
+			OK = False
+		if abs(filter.transmission(angle, polarization)[0]-T_average) > 5.0e-3:
+			OK = False
+	
+	if OK:
+		print "Partial coherence: OK"
+	else:
+		print "Partial coherence: An error occured"
+
+if "averaging" in tests:
+	tests.remove("averaging")
+	
+	print ""
+	print "========== averaging tests =========="
+	print ""
+	
+	import math
+	
+	import optical_filter
+	import stack
+	from definitions import *
+	
+	filter = optical_filter.optical_filter()
+	stack.stack(filter, "HLHLHL", {"H": ("TiO2", 1.0), "L": ("SiO2", 1.0)})
+	filter.set_wavelengths_by_range(500.0, 520.0, 2.0)
+	nb_wvls = len(filter.get_wavelengths())
+	
+	# Compare the average over a cone with a brute force average of
+	# rays uniformly distributed over the solid angle.
+	cone_half_angle = 10.0
+	nb_cos_alphas = 40
+	nb_phis = 20
+	min_cos_alpha = math.cos(cone_half_angle*math.pi/180.0)
+	
+	OK = True
+	for angle in [0.0, 30.0]:
+		filter.set_cone_half_angle(0.0)
+		R_brute_force = [0.0]*nb_wvls
+		for i_cos_alpha in range(nb_cos_alphas):
+			cos_alpha = min_cos_alpha + (1.0-min_cos_alpha)*(i_cos_alpha+0.5)/nb_cos_alphas
+			sin_alpha = math.sqrt(1.0-cos_alpha*cos_alpha)
+			for i_phi in range(nb_phis):
+				phi = math.pi*(i_phi+0.5)/nb_phis
+				cos_theta = cos_alpha*math.cos(angle*math.pi/180.0) - sin_alpha*math.cos(phi)*math.sin(angle*math.pi/180.0)
+				R = filter.reflection(math.acos(cos_theta)*180.0/math.pi, UNPOLARIZED)
+				for i_wvl in range(nb_wvls):
+					R_brute_force[i_wvl] += R[i_wvl]/(nb_cos_alphas*nb_phis)
+		filter.set_cone_half_angle(cone_half_angle)
+		R = filter.reflection(angle, UNPOLARIZED)
+		if max(abs(R[i_wvl]-R_brute_force[i_wvl]) for i_wvl in range(nb_wvls)) > 1.0e-5:
+			OK = False
+	
+	if OK:
+		print "Cone of light: OK"
+	else:
+		print "Cone of light: An error occured"
+	
+	# For a linear polarization, every ray of the brute force average
+	# receives the part of the field on the axis perpendicular to the
+	# ray, and is calculated at the polarization given by the share of
+	# that field along its own s polarization.
+	OK = True
+	for polarization in [S, P]:
+		angle = 30.0
+		sin_theta_0 = math.sin(angle*math.pi/180.0)
+		cos_theta_0 = math.cos(angle*math.pi/180.0)
+		k_0 = (sin_theta_0, 0.0, cos_theta_0)
+		p_0 = (cos_theta_0, 0.0, -sin_theta_0)
+		s_0 = (0.0, 1.0, 0.0)
+		if polarization == S:
+			E_0 = s_0
+		else:
+			E_0 = p_0
+		filter.set_cone_half_angle(0.0)
+		R_brute_force = [0.0]*nb_wvls
+		for i_cos_alpha in range(nb_cos_alphas):
+			cos_alpha = min_cos_alpha + (1.0-min_cos_alpha)*(i_cos_alpha+0.5)/nb_cos_alphas
+			sin_alpha = math.sqrt(1.0-cos_alpha*cos_alpha)
+			for i_phi in range(2*nb_phis):
+				phi = math.pi*(i_phi+0.5)/nb_phis
+				k = [cos_alpha*k_0[i]+sin_alpha*(math.cos(phi)*p_0[i]+math.sin(phi)*s_0[i]) for i in range(3)]
+				E = [E_0[i]-sum(E_0[j]*k[j] for j in range(3))*k[i] for i in range(3)]
+				s = (-k[1], k[0], 0.0)
+				fraction_s = sum(E[i]*s[i] for i in range(3))**2/(sum(E[i]*E[i] for i in range(3))*sum(s[i]*s[i] for i in range(3)))
+				R = filter.reflection(math.acos(k[2])*180.0/math.pi, math.asin(math.sqrt(min(fraction_s, 1.0)))*180.0/math.pi)
+				for i_wvl in range(nb_wvls):
+					R_brute_force[i_wvl] += R[i_wvl]/(2*nb_cos_alphas*nb_phis)
+		filter.set_cone_half_angle(cone_half_angle)
+		R = filter.reflection(angle, polarization)
+		if max(abs(R[i_wvl]-R_brute_force[i_wvl]) for i_wvl in range(nb_wvls)) > 1.0e-5:
+			OK = False
+	
+	if OK:
+		print "Cone of light with polarization: OK"
+	else:
+		print "Cone of light with polarization: An error occured"
+	
+	# Compare the average over the bandwidth with a brute force average
+	# over a triangular slit function.
+	bandwidth = 2.0
+	center_wavelength = 510.0
+	nb_shifts = 200
+	shifts = [-bandwidth+2.0*bandwidth*i/nb_shifts for i in range(nb_shifts+1)]
+	weights = [bandwidth-abs(shift) for shift in shifts]
+	
+	filter.set_cone_half_angle(0.0)
+	filter.set_wavelengths([center_wavelength+shift for shift in shifts])
+	T = filter.transmission(20.0, P)
+	T_brute_force = sum(weights[i]*T[i] for i in range(len(shifts)))/sum(weights)
+	filter.set_wavelengths([center_wavelength])
+	filter.set_bandwidth(bandwidth)
+	
+	if abs(filter.transmission(20.0, P)[0]-T_brute_force) < 1.0e-6:
+		print "Bandwidth: OK"
+	else:
+		print "Bandwidth: An error occured"
+	
+	# The analysis at every angle and shift of the wavelengths is shared
+	# by the properties, and the derivatives are not available.
+	filter.set_wavelengths_by_range(500.0, 520.0, 2.0)
+	filter.set_cone_half_angle(cone_half_angle)
+	T = filter.transmission(30.0, S)
+	hits, misses, nb_conditions = filter.get_analysis_cache_statistics()
+	R = filter.reflection(30.0, S)
+	A = filter.absorption(30.0, S)
+	OK = filter.get_analysis_cache_statistics()[1] == misses
+	if max(abs(A[i_wvl]-(1.0-R[i_wvl]-T[i_wvl])) for i_wvl in range(nb_wvls)) > 1.0e-12:
+		OK = False
+	try:
+		filter.property_derivatives([(optical_filter.THICKNESS_DERIVATIVE, 0)], 30.0, S)
+	except optical_filter.filter_error:
+		pass
+	else:
+		OK = False
+	
+	if OK:
+		print "Shared analysis: OK"
+	else:
+		print "Shared analysis: An error occured"
+
+# Verify that materials are shared as clones, that the pickled cache
+# is used and invalidated, and that a catalog is read by threads.
+if "material cache" in tests:
+	tests.remove("material cache")
+	
+	print ""
+	print "========== material cache tests =========="
+	print ""
+	
+	import os
+	import shutil
+	import tempfile
+	
+	import materials
+	
+	directory = tempfile.mkdtemp()
+	try:
+		for filename in os.listdir(materials.default_material_directory):
+			if filename.endswith(".mat"):
+				shutil.copy(os.path.join(materials.default_material_directory, filename), directory)
+		broken_file = open(os.path.join(directory, "Broken.mat"), "w")
+		broken_file.write("Kind: nonsense\n")
+		broken_file.close()
+		
+		# Every catalog gets its own instance of a material.
+		catalog_1 = materials.material_catalog(directory)
+		catalog_2 = materials.material_catalog(directory)
+		SiO2_1 = catalog_1.get_material("SiO2")
+		SiO2_2 = catalog_2.get_material("SiO2")
+		properties = SiO2_2.get_properties()
+		SiO2_1.set_properties(2.0, 0.0, 0.0, 0.0, 1.0, 4000.0)
+		if SiO2_1 is not SiO2_2 and SiO2_2.get_properties() == properties and materials.read_material("SiO2", directory).get_properties() == properties:
+			print "Shared materials: OK"
+		else:
+			print "Shared materials: An error occured"
+		
+		# All the materials were read by threads, except the broken one
+		# whose error is kept and raised when it is requested.
+		OK = catalog_1.get_loading_errors().keys() == ["Broken"]
+		OK = OK and all(catalog_1.materials[material_name] is not None for material_name in catalog_1.get_material_names() if material_name != "Broken")
+		try:
+			catalog_1.get_material("Broken")
+		except materials.material_error:
+			pass
+		else:
+			OK = False
+		
+		if OK:
+			print "Threaded loading: OK"
+		else:
+			print "Threaded loading: An error occured"
+		
+		# Count the materials that are parsed.
+		parse_material = materials.parse_material
+		nb_parsed = [0]
+		def counting_parse_material(name, infile):
+			nb_parsed[0] += 1
+			return parse_material(name, infile)
+		materials.parse_material = counting_parse_material
+		
+		try:
+			# Simulate a new session, where only the cache saved on disk
+			# is available.
+			cache_filename = materials.get_material_cache_filename(directory)
+			materials.shared_materials.clear()
+			materials.cached_materials.clear()
+			SiO2 = materials.read_material("SiO2", directory)
+			if not cache_filename or (nb_parsed[0] == 0 and SiO2.get_properties() == properties):
+				print "Pickled cache: OK"
+			else:
+				print "Pickled cache: An error occured"
+			
+			# A modified file is parsed again. Without a cache on disk,
+			# the material was already parsed above.
+			nb_already_parsed = nb_parsed[0]
+			SiO2_file = open(os.path.join(directory, "SiO2.mat"), "a")
+			SiO2_file.write("\n")
+			SiO2_file.close()
+			materials.read_material("SiO2", directory)
+			OK = nb_parsed[0] == nb_already_parsed+1
+			materials.read_material("SiO2", directory)
+			OK = OK and nb_parsed[0] == nb_already_parsed+1
+			
+			# And so is a forgotten one.
+			materials.forget_material("SiO2", directory)
+			OK = OK and "SiO2" not in materials.get_material_cache(directory)
+			materials.read_material("SiO2", directory)
+			OK = OK and nb_parsed[0] == nb_already_parsed+2
+			
+			if OK:
+				print "Cache invalidation: OK"
+			else:
+				print "Cache invalidation: An error occured"
+		
+		finally:
+			materials.parse_material = parse_material
+	
+	finally:
+		shutil.rmtree(directory)
+		cache_filename = materials.get_material_cache_filename(directory)
+		if cache_filename and os.path.exists(cache_filename):
+			os.remove(cache_filename)
+		materials.cached_materials.pop(directory, None)
+		materials.modified_material_caches.discard(directory)
+
+# Verify that projects read lazily are written back verbatim, unless
+# their filters were loaded or they come from another version.
+if "lazy project" in tests:
+	tests.remove("lazy project")
+	
+	print ""
+	print "========== lazy project tests =========="
+	print ""
+	
+	import os
+	import tempfile
+	
+	import release
+	import project
+	
+	example_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples")
+	example_names = sorted(name for name in os.listdir(example_directory) if name.endswith(".ofp"))
+	
+	directory = tempfile.mkdtemp()
+	input_filename = os.path.join(directory, "input.ofp")
+	output_filename = os.path.join(directory, "output.ofp")
+	
+	def read_file(filename):
+		infile = open(filename, "rb")
+		content = infile.read()
+		infile.close()
+		return content
+	
+	def write_file(filename, content):
+		outfile = open(filename, "wb")
+		outfile.write(content)
+		outfile.close()
+	
+	def set_file_version(content, file_version):
+		first_line, rest = content.split("\n", 1)
+		return "Version: %s\n%s" % (file_version, rest)
+	
+	try:
+		# An unchanged project of the current version is written back
+		# byte for byte.
+		OK = True
+		for name in example_names:
+			content = set_file_version(read_file(os.path.join(example_directory, name)), release.VERSION)
+			write_file(input_filename, content)
+			project.write_project(project.read_project(input_filename, lazy = True), output_filename)
+			if read_file(output_filename) != content:
+				print "%s was not written back verbatim" % name
+				OK = False
+		
+		if OK:
+			print "Verbatim write-back: OK"
+		else:
+			print "Verbatim write-back: An error occured"
+		
+		# A loaded and modified filter is written from the parsed filter.
+		content = set_file_version(read_file(os.path.join(example_directory, "Edge.ofp")), release.VERSION)
+		write_file(input_filename, content)
+		lazy_project = project.read_project(input_filename, lazy = True)
+		lazy_project.load_filter(0)
+		filter = lazy_project.get_filter(0)
+		thickness = filter.get_layer_thickness(0) + 10.0
+		filter.change_layer_thickness(thickness, 0)
+		project.write_project(lazy_project, output_filename)
+		read_back_project = project.read_project(output_filename)
+		if lazy_project.get_filter_section(0) is None and read_file(output_filename) != content and abs(read_back_project.get_filter(0).get_layer_thickness(0) - thickness) < 1e-9:
+			print "Modified filter: OK"
+		else:
+			print "Modified filter: An error occured"
+		
+		# A project of another version is written from the parsed
+		# filters and targets, exactly like a project read at once.
+		OK = True
+		for name in example_names:
+			example_filename = os.path.join(example_directory, name)
+			project.write_project(project.read_project(example_filename, lazy = True), output_filename)
+			lazy_content = read_file(output_filename)
+			project.write_project(project.read_project(example_filename), output_filename)
+			if lazy_content != read_file(output_filename):
+				print "%s was written back verbatim despite its version" % name
+				OK = False
+		
+		# The errors in a filter of a newer version are only raised when
+		# it is accessed, and mention the version.
+		content = set_file_version(read_file(os.path.join(example_directory, "Edge.ofp")), "99.0")
+		content = content.replace("Filter:\n", "Filter:\n\tNonsense: 1\n", 1)
+		write_file(input_filename, content)
+		lazy_project = project.read_project(input_filename, lazy = True)
+		try:
+			lazy_project.get_filter(0)
+		except project.project_error, error:
+			OK = OK and "newer version" in str(error)
+		else:
+			OK = False
+		
+		if OK:
+			print "Version mismatch: OK"
+		else:
+			print "Version mismatch: An error occured"
+	
+	finally:
+		for filename in os.listdir(directory):
+			os.remove(os.path.join(directory, filename))
+		os.rmdir(directory)
+
+# Verify that the cache of the matrices of graded-index sublayers does
+# not change the results and stays within its size.
+if "sublayer cache" in tests:
+	tests.remove("sublayer cache")
+	
+	print ""
+	print "========== sublayer cache tests =========="
+	print ""
+	
+	import random
+	
+	import config
+	import graded
+	import optical_filter
+	from definitions import *
+	
+	# A random profile, so that the sublayers are not grouped in
+	# periods.
+	random_generator = random.Random(0)
+	filter = optical_filter.optical_filter()
+	nb_sublayers = 400
+	step_profile = [random_generator.randint(0, 39) for i in range(nb_sublayers)]
+	filter.add_graded_layer_from_steps("IdealMixture", step_profile, [2.0]*nb_sublayers, TOP, FRONT)
+	filter.set_wavelengths_by_range(400.0, 800.0, 5.0)
+	nb_wvls = len(filter.get_wavelengths())
+	
+	# Keep the caches used by the filter to look at them.
+	original_cache_class = graded.sublayer_matrices_cache
+	original_cache_size = config.SUBLAYER_MATRICES_CACHE_SIZE
+	used_caches = []
+	max_lengths = []
+	class recording_cache(original_cache_class):
+		def __init__(self, *arguments):
+			original_cache_class.__init__(self, *arguments)
+			used_caches.append(self)
+		def get_matrices(self, N, key, thickness):
+			matrices = original_cache_class.get_matrices(self, N, key, thickness)
+			max_lengths.append(len(self.matrices))
+			return matrices
+	
+	def calculate_R_T(cache_size):
+		del used_caches[:]
+		del max_lengths[:]
+		config.SUBLAYER_MATRICES_CACHE_SIZE = cache_size
+		new_filter = filter.clone()
+		return new_filter.reflection(0.0, S), new_filter.transmission(0.0, S)
+	
+	graded.sublayer_matrices_cache = recording_cache
+	try:
+		R, T = calculate_R_T(original_cache_size)
+		hits = sum(cache.hits for cache in used_caches)
+		misses = sum(cache.misses for cache in used_caches)
+		print "Default size: %i hits, %i misses." % (hits, misses)
+		OK = misses == len(set(step_profile)) and hits+misses == nb_sublayers
+		
+		R_0, T_0 = calculate_R_T(0)
+		OK = OK and all(length == 0 for length in max_lengths)
+		
+		R_LRU, T_LRU = calculate_R_T(10*nb_wvls)
+		OK = OK and all(cache.max_size == 10 for cache in used_caches)
+		OK = OK and max(max_lengths) == 10
+		OK = OK and sum(cache.misses for cache in used_caches) > len(set(step_profile))
+	
+	finally:
+		graded.sublayer_matrices_cache = original_cache_class
+		config.SUBLAYER_MATRICES_CACHE_SIZE = original_cache_size
+	
+	if OK:
+		print "Counters and size: OK"
+	else:
+		print "Counters and size: An error occured"
+	
+	if all(abs(R_0[i]-R[i]) < 1e-12 and abs(T_0[i]-T[i]) < 1e-12 and abs(R_LRU[i]-R[i]) < 1e-12 and abs(T_LRU[i]-T[i]) < 1e-12 for i in range(nb_wvls)):
+		print "Same results: OK"
+	else:
+		print "Same results: An error occured"
+
 # Verify that all tests were executed
 if tests:
 	print ""
@@ -0,0 +1,72 @@
+# workers.py
+#
+# Functions to distribute calculations over worker processes.
+#
+# Copyright (c) 2015 Stephane Larouche.
+#
+# This file is part of OpenFilters.
+#
+# OpenFilters is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or (at
+# your option) any later version.
+#
+# OpenFilters is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+# USA
+
+
+import StringIO
+try:
+	import multiprocessing
+except ImportError:
+	multiprocessing = None
+
+
+
+########################################################################
+#                                                                      #
+# get_nb_processes                                                     #
+#                                                                      #
+########################################################################
+def get_nb_processes(nb_processes, nb_tasks):
+	"""Get the number of worker processes to use
+	
+	This function takes 2 arguments:
+	  nb_processes       the requested number of processes, 0 to use one
+	                     process per CPU;
+	  nb_tasks           the number of tasks to distribute.
+	It returns the number of processes, between 1 and the number of
+	tasks, or 1 if the multiprocessing module is not available."""
+	
+	if multiprocessing is None:
+		return 1
+	
+	if nb_processes == 0:
+		try:
+			nb_processes = multiprocessing.cpu_count()
+		except NotImplementedError:
+			nb_processes = 1
+	
+	return max(min(nb_processes, nb_tasks), 1)
+
+
+
+########################################################################
+#                                                                      #
+# write_to_text                                                        #
+#                                                                      #
+########################################################################
+def write_to_text(write_function, element):
+	"""Write a filter or a target in a string using its write function"""
+	
+	outfile = StringIO.StringIO()
+	write_function(element, outfile)
+	
+	return outfile.getvalue()